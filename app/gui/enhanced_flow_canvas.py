@@ -1076,7 +1076,7 @@ class EnhancedFlowCanvas(QGraphicsView):
             return
         if self._locked:
             return  # 锁定时不弹编辑菜单
-        from app.pipeline.module_registry import list_registered_modules, get_module_class
+        from app.pipeline.module_registry import list_registered_modules, get_module_metadata
         from app.pipeline.base_module import ModuleType
         menu = QMenu(self)
         # 语言辅助
@@ -1095,10 +1095,10 @@ class EnhancedFlowCanvas(QGraphicsView):
         names = list_registered_modules()
         for name in names:
             low = name.lower()
-            cls = get_module_class(name)
-            # 模块类型用于基础分类，名称用于细化
+            meta = get_module_metadata(name)
+            # 模块类型用于基础分类 (来自清单缓存，无需导入模块)，名称用于细化
             try:
-                mtype = cls(name=name).module_type if cls else ModuleType.CUSTOM
+                mtype = ModuleType(meta['module_type']) if meta and meta.get('module_type') else ModuleType.CUSTOM
             except Exception:
                 mtype = ModuleType.CUSTOM
             target_key = '其它'
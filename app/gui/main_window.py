@@ -13,11 +13,17 @@ import os, json
 
 from .enhanced_flow_canvas import EnhancedFlowCanvas
 from app.pipeline.pipeline_executor import PipelineExecutor, ExecutionMode, PipelineStatus
+from app.pipeline.profiling import SamplingProfiler
+from app.pipeline.metrics_exporter import MetricsExporter
 import threading, time
 from typing import Dict, Any
 from .dock_panel import DockPanel, PropertyPanel
 import os
 from app.utils.i18n import set_language_mode, get_language_mode, translate, L
+from app.utils.startup_profiler import begin_phase, end_phase, get_profiler
+from app.utils.ml_preloader import start_preload, peek_preloader
+from app.models.model_cache import get_model_cache
+from app.models.warmup_scheduler import get_warmup_scheduler, graph_depths
 
 
 class MainWindow(QMainWindow):
@@ -62,9 +68,27 @@ class MainWindow(QMainWindow):
             pass
         # 编辑相关动作集合（用于锁定时禁用）在菜单初始化时填充
         self._edit_related_actions: list[QAction] = []
+        # 性能剖析：待应用的节点剖析 {node_id: cycles}（执行器每次运行重建）与进程级采样剖析器
+        self._pending_node_profiles: Dict[str, int] = {}
+        self._sampling_profiler: SamplingProfiler | None = None
+        self._profiles_dir = os.path.join(self._user_data_dir, 'profiles')
+        # Prometheus 指标端点（跨运行保留，执行器重建时切换数据源）
+        self._metrics_exporter: MetricsExporter | None = None
+        self._metrics_port: int = 9464
+        # 运行前图优化（消除死节点 / 融合轻量链），持久化到 settings.json
+        self._optimize_graph: bool = False
+        # 窗口显示后在后台预加载 torch/ultralytics，持久化到 settings.json
+        self._ml_preload_enabled: bool = True
+        # 模型常驻: 停止/重启与单次运行之间保留已加载且已预热的模型，持久化到 settings.json
+        self._keep_warm_models: bool = True
+        # 单次运行会话: 连续“运行一次”之间保持模块启动，持久化到 settings.json
+        self._run_once_session: bool = True
+        self._once_session_executor: PipelineExecutor | None = None
+        self._once_session_sig = None
 
         # 先加载用户设置(语言/运行间隔)以便后续 UI 初始化直接使用正确语言
         self._load_user_settings()
+        get_model_cache().set_keep_warm(self._keep_warm_models)
         # 初始化UI组件 & 菜单/工具栏/状态栏（此时语言模式已就位）
         self._init_ui()
         self._init_menu()
@@ -211,6 +235,9 @@ class MainWindow(QMainWindow):
         resume_action = QAction(L('恢复','Resume'), self); resume_action.setShortcut(QKeySequence('F7')); resume_action.setShortcutContext(Qt.ShortcutContext.ApplicationShortcut); resume_action.triggered.connect(self._resume_pipeline); run_menu.addAction(resume_action)
         stop_action = QAction(L('停止运行','Stop'), self); stop_action.setShortcut(QKeySequence('F8')); stop_action.setShortcutContext(Qt.ShortcutContext.ApplicationShortcut); stop_action.triggered.connect(self._stop_pipeline); run_menu.addAction(stop_action)
         run_once_action = QAction(L('运行一次','Run Once'), self); run_once_action.setShortcut(QKeySequence('F9')); run_once_action.setShortcutContext(Qt.ShortcutContext.ApplicationShortcut); run_once_action.triggered.connect(self._run_pipeline_once); run_menu.addAction(run_once_action)
+        run_menu.addSeparator()
+        once_session_action = QAction(L('单次运行保持模块启动(会话)','Keep Modules Started Between Single Runs'), self); once_session_action.setCheckable(True); once_session_action.setChecked(self._run_once_session); once_session_action.toggled.connect(self._set_run_once_session); run_menu.addAction(once_session_action)
+        optimize_action = QAction(L('图优化(消除死节点/融合轻量链)','Graph Optimization (Dead Nodes / Fuse Chains)'), self); optimize_action.setCheckable(True); optimize_action.setChecked(self._optimize_graph); optimize_action.toggled.connect(self._set_optimize_graph); run_menu.addAction(optimize_action)
 
         # 监控菜单
         monitor_menu = menubar.addMenu(L('监控','Monitor'))
@@ -230,6 +257,19 @@ class MainWindow(QMainWindow):
                 self.statusbar.showMessage(msg, 3000)
         auto_preheat_action.toggled.connect(_toggle_preheat)
         monitor_menu.addAction(auto_preheat_action)
+        ml_preload_action = QAction(L('启动时预加载torch/ultralytics','Preload torch/ultralytics at Startup'), self)
+        ml_preload_action.setCheckable(True)
+        ml_preload_action.setChecked(self._ml_preload_enabled)
+        ml_preload_action.toggled.connect(self._set_ml_preload)
+        monitor_menu.addAction(ml_preload_action)
+        keep_warm_action = QAction(L('模型常驻(停止后保留预热模型)','Keep Models Warm Across Runs'), self)
+        keep_warm_action.setCheckable(True)
+        keep_warm_action.setChecked(self._keep_warm_models)
+        keep_warm_action.toggled.connect(self._set_keep_warm_models)
+        monitor_menu.addAction(keep_warm_action)
+        unload_models_action = QAction(L('卸载缓存模型','Unload Cached Models'), self)
+        unload_models_action.triggered.connect(self._unload_cached_models)
+        monitor_menu.addAction(unload_models_action)
         # 设置运行间隔
         set_interval_action = QAction(L('设置运行间隔(ms)','Set Interval (ms)'), self)
         def _set_interval():
@@ -255,6 +295,27 @@ class MainWindow(QMainWindow):
                 self.statusbar.showMessage(L('刷新失败:','Refresh failed:')+f'{e}', 5000)
         refresh_view_act.triggered.connect(_do_refresh_all)
         monitor_menu.addAction(refresh_view_act)
+        # 性能剖析 (cProfile 单节点 / 整进程采样)
+        profile_menu = monitor_menu.addMenu(L('性能剖析','Profiling'))
+        node_profile_act = QAction(L('剖析模块(cProfile)...','Profile Module (cProfile)...'), self)
+        node_profile_act.triggered.connect(self._profile_selected_node)
+        profile_menu.addAction(node_profile_act)
+        sampling_act = QAction(L('采样剖析(火焰图)','Sampling Profiler (Flame Graph)'), self)
+        sampling_act.setCheckable(True)
+        sampling_act.setChecked(bool(self._sampling_profiler and self._sampling_profiler.is_running))
+        sampling_act.toggled.connect(self._toggle_sampling_profiler)
+        profile_menu.addAction(sampling_act)
+        profile_status_act = QAction(L('剖析状态','Profiling Status'), self)
+        profile_status_act.triggered.connect(self._show_profiling_status)
+        profile_menu.addAction(profile_status_act)
+        history_export_act = QAction(L('导出指标历史(CSV)...','Export Metrics History (CSV)...'), self)
+        history_export_act.triggered.connect(self._export_metrics_history)
+        monitor_menu.addAction(history_export_act)
+        metrics_http_act = QAction(L('指标端点(Prometheus)','Metrics Endpoint (Prometheus)'), self)
+        metrics_http_act.setCheckable(True)
+        metrics_http_act.setChecked(bool(self._metrics_exporter and self._metrics_exporter.is_running))
+        metrics_http_act.toggled.connect(self._toggle_metrics_endpoint)
+        monitor_menu.addAction(metrics_http_act)
 
         # 视图菜单
         view_menu = menubar.addMenu(L('视图','View'))
@@ -500,9 +561,10 @@ class MainWindow(QMainWindow):
     # 菜单动作槽函数
     def _new_project(self):
         """新建项目"""
+        self._close_once_session()
         self.flow_canvas.clear()
         self.statusbar.showMessage(L('新建项目','New project'))
-        self._reset_warmup_state()
+        self._unload_cached_models(notify=False)
         
     def _open_project(self):
         """加载流程文件"""
@@ -510,8 +572,9 @@ class MainWindow(QMainWindow):
         path, _ = QFileDialog.getOpenFileName(self, '加载流程', start_dir, 'Pipeline (*.json);;All (*)')
         if not path:
             return
-        # 打开项目前重置预热状态
-        self._reset_warmup_state()
+        # 打开项目前关闭单次运行会话，释放上一项目的常驻模型并重置预热状态
+        self._close_once_session()
+        self._unload_cached_models(notify=False)
         ok = self.flow_canvas.load_from_file(path)
         if ok:
             self.statusbar.showMessage(L('加载成功:','Loaded:')+f' {path}')
@@ -601,9 +664,12 @@ class MainWindow(QMainWindow):
         if self.pipeline_executor and self.pipeline_executor.status == PipelineStatus.RUNNING:
             self.statusbar.showMessage('流程已在运行中')
             return
+        # 持续运行接管模块生命周期，先关闭单次运行会话
+        self._close_once_session()
         # 构建执行器
         self.pipeline_executor = PipelineExecutor()
         self.flow_canvas.build_executor(self.pipeline_executor)
+        self.pipeline_executor.config['optimize_graph'] = self._optimize_graph
         # 设为顺序执行
         self.pipeline_executor.set_execution_mode(ExecutionMode.SEQUENTIAL)
         # 注册回调
@@ -614,6 +680,9 @@ class MainWindow(QMainWindow):
         self.pipeline_executor.add_module_step_callback(self._on_executor_module_step)
         # 性能指标回调（冗余保障：即使定时器刷新，仍在有新数据时立即更新缓存）
         self.pipeline_executor.add_metrics_callback(self._on_executor_metrics)
+        self._apply_pending_node_profiles(self.pipeline_executor)
+        if self._metrics_exporter:
+            self._metrics_exporter.set_executor(self.pipeline_executor)
         # 启动执行器，传入初始空输入
         started = self.pipeline_executor.start(input_data={})
         if not started:
@@ -623,31 +692,93 @@ class MainWindow(QMainWindow):
         self._feeder_stop.clear()
         self._feeder_thread = threading.Thread(target=self._feeder_loop, daemon=True)
         self._feeder_thread.start()
-        self.statusbar.showMessage('流程已启动')
+        self.statusbar.showMessage('流程已启动' + self._format_optimization_report(self.pipeline_executor))
 
     def _run_pipeline_once(self):
-        """构建并执行单次流程，不进入持续馈送线程。"""
+        """构建并执行单次流程，不进入持续馈送线程。
+        开启单次运行会话时复用同一执行器并保持模块启动 (相机/模型不逐次开关)，
+        画布拓扑或模块配置变化时自动重建会话。
+        """
         if self.pipeline_executor and self.pipeline_executor.status in (PipelineStatus.RUNNING, PipelineStatus.PAUSED):
             self.statusbar.showMessage('持续运行中，无法单次执行')
             return
+        if not self._run_once_session:
+            exec_once = self._build_once_executor()
+            result = exec_once.run_once(input_data={})
+            self._report_once_result(exec_once, result)
+            return
+        exec_once = self._build_once_executor()
+        sig = self._once_graph_signature(exec_once)
+        sess = self._once_session_executor
+        if sess is None or not sess.is_session_open() or sig != self._once_session_sig:
+            self._close_once_session()
+            if not exec_once.open_session():
+                self.statusbar.showMessage('单次运行会话打开失败')
+                return
+            self._once_session_executor, self._once_session_sig = exec_once, sig
+            sess = exec_once
+        elif self._metrics_exporter:
+            self._metrics_exporter.set_executor(sess)
+        result = sess.run_once(input_data={})
+        st = sess.get_session_stats()
+        suffix = (f" {st.get('last_latency', 0.0) * 1000:.1f}ms (会话第 {st.get('runs', 0)} 次, "
+                  f"平均 {st.get('avg_latency', 0.0) * 1000:.1f}ms)") if st.get('open') else ''
+        self._report_once_result(sess, result, suffix)
+
+    def _build_once_executor(self) -> PipelineExecutor:
         # 新建执行器并构建流程
         exec_once = PipelineExecutor()
         self.flow_canvas.build_executor(exec_once)
+        exec_once.config['optimize_graph'] = self._optimize_graph
         exec_once.set_execution_mode(ExecutionMode.SEQUENTIAL)  # 强制顺序
         # 注册高亮与结果回调（临时）
         exec_once.add_module_step_callback(self._on_executor_module_step)
         exec_once.add_result_callback(lambda r: self.statusbar.showMessage(f'单次结果: {list(r.keys())[:5]}'))
         exec_once.add_error_callback(lambda e: self.statusbar.showMessage(f'单次执行错误: {e}'))
         exec_once.add_metrics_callback(lambda nodes, agg: self._cache_metrics_snapshot(nodes, agg))
-        result = exec_once.run_once(input_data={})
+        self._apply_pending_node_profiles(exec_once)
+        if self._metrics_exporter:
+            self._metrics_exporter.set_executor(exec_once)
+        return exec_once
+
+    def _report_once_result(self, exec_once: PipelineExecutor, result, suffix: str = ''):
         if result is None:
             if exec_once.status == PipelineStatus.ERROR:
                 self.statusbar.showMessage('单次执行失败')
             else:
                 self.statusbar.showMessage('单次执行未产出结果')
         else:
-            self.statusbar.showMessage('单次执行完成')
-        
+            self.statusbar.showMessage('单次执行完成' + suffix)
+
+    @staticmethod
+    def _once_graph_signature(executor: PipelineExecutor):
+        """会话复用判定: 节点/模块实例/配置与连接均未变化。"""
+        nodes = []
+        for nid, node in sorted(executor.nodes.items()):
+            try:
+                cfg = json.dumps(node.module.config, sort_keys=True, default=str)
+            except Exception:
+                cfg = repr(node.module.config)
+            nodes.append((nid, id(node.module), cfg))
+        conns = sorted((c.source_module, c.source_port, c.target_module, c.target_port) for c in executor.connections)
+        return tuple(nodes), tuple(conns)
+
+    def _close_once_session(self):
+        sess = self._once_session_executor
+        self._once_session_executor = None
+        self._once_session_sig = None
+        if sess is not None:
+            try:
+                sess.close_session()
+            except Exception as e:
+                print(f"关闭单次运行会话失败: {e}")
+
+    def _set_run_once_session(self, checked: bool):
+        self._run_once_session = bool(checked)
+        if not checked:
+            self._close_once_session()
+        self._persist_user_settings()
+
     def _stop_pipeline(self):
         """停止流程"""
         if not self.pipeline_executor:
@@ -760,6 +891,10 @@ class MainWindow(QMainWindow):
                     wf.write(st)
             except Exception as e2:
                 print(f"保存窗口状态失败: {e2}")
+            if self._metrics_exporter:
+                self._metrics_exporter.stop()
+            self._close_once_session()
+            self._unload_cached_models(notify=False)
         except Exception as e:
             print(f"关闭时保存视图状态失败: {e}")
         event.accept()
@@ -792,6 +927,8 @@ class MainWindow(QMainWindow):
             from PyQt6.QtCore import QTimer
             self.statusbar.showMessage('正在准备热加载上次项目...')
             QTimer.singleShot(400, self._auto_load_last_project)
+            if self._ml_preload_enabled:
+                QTimer.singleShot(0, self._start_ml_preload)
 
     # ---------- 系统信息更新 ----------
     def _update_system_info(self):
@@ -878,8 +1015,52 @@ class MainWindow(QMainWindow):
         # 更新 YOLO 预热进度条
         self._update_warmup_bar()
 
+    def _start_ml_preload(self):
+        """后台线程导入 torch/ultralytics 并应用 torch.load 兼容补丁；YOLO 模块启动时等待其结果。"""
+        try:
+            start_preload()
+        except Exception as e:
+            print(f"启动依赖预加载失败: {e}")
+
+    def _set_ml_preload(self, checked: bool):
+        self._ml_preload_enabled = bool(checked)
+        if checked:
+            self._start_ml_preload()
+        self._persist_user_settings()
+
+    def _set_keep_warm_models(self, checked: bool):
+        self._keep_warm_models = bool(checked)
+        get_model_cache().set_keep_warm(self._keep_warm_models)
+        self._persist_user_settings()
+
+    def _unload_cached_models(self, notify: bool = True):
+        """释放缓存中的模型 (项目关闭/手动卸载)；运行中的模型在停止后释放。"""
+        try:
+            removed = get_model_cache().unload_all()
+        except Exception as e:
+            removed = 0
+            print(f"卸载缓存模型失败: {e}")
+        self._reset_warmup_state()
+        if notify:
+            self._post_status(L('已卸载缓存模型:','Unloaded cached models:') + f' {removed}', 3000)
+
+    def _update_ml_preload_bar(self) -> bool:
+        """依赖预加载进行中时由预热进度条显示其进度；返回 True 表示已占用进度条。"""
+        pre = peek_preloader()
+        if pre is None or not pre.is_loading():
+            return False
+        st = pre.status()
+        self.warmup_bar.setEnabled(True)
+        self.warmup_bar.setValue(int(st['progress'] * 100))
+        if self._warmup_bar_last_style != 'active':
+            self._apply_warmup_bar_style('active')
+        self.warmup_bar.setToolTip(f"依赖预加载中: {st['step'] or '-'} | {st['progress'] * 100:.0f}% | 已用 {st['elapsed_s'] or 0:.1f}s")
+        return True
+
     def _update_warmup_bar(self):
         """更新 YOLO 预热进度条: 紫色=进行中, 绿色=全部完成(持久化), 灰色=未开始或无 YOLO."""
+        if self._update_ml_preload_bar():
+            return
         # 若已持久化完成：保持绿色，除非画布不再有 YOLO 模块
         if self._warmup_completed_persist:
             try:
@@ -912,8 +1093,6 @@ class MainWindow(QMainWindow):
         except Exception:
             modules = []
         total_yolo = 0
-        active_count = 0
-        progresses = []
         all_done = True
         for m in modules:
             ref = getattr(m, 'module_ref', None)
@@ -928,14 +1107,9 @@ class MainWindow(QMainWindow):
                 done = getattr(ref, '_warmup_done', False)
                 cfg = getattr(ref, 'config', {}) if isinstance(getattr(ref, 'config', {}), dict) else {}
                 total_iter = int(cfg.get('warmup_iterations', 0))
-                completed_iter = int(getattr(ref, '_warmup_iters_completed', 0))
                 mod_complete = bool(done or (total_iter == 0 and not warming))
                 if not mod_complete:
                     all_done = False
-                if warming and not done and total_iter > 0:
-                    active_count += 1
-                    pct = max(0.0, min(100.0, (completed_iter / total_iter) * 100.0))
-                    progresses.append(pct)
             except Exception:
                 pass
         if total_yolo == 0:
@@ -944,14 +1118,17 @@ class MainWindow(QMainWindow):
             if self._warmup_bar_last_style != 'inactive':
                 self._apply_warmup_bar_style('inactive')
             return
-        if active_count > 0 and progresses:
-            avg_pct = sum(progresses)/len(progresses)
+        # 进行中的预热由调度器汇总 (排队 + 运行，按迭代数加权的总体进度)
+        prog = get_warmup_scheduler().progress()
+        if prog['queued'] + prog['running'] > 0:
+            pct = prog['fraction'] * 100.0
             self.warmup_bar.setEnabled(True)
-            self.warmup_bar.setValue(int(avg_pct))
+            self.warmup_bar.setValue(int(pct))
             if self._warmup_bar_last_style != 'active':
                 self._apply_warmup_bar_style('active')
-            detail = ', '.join(f"{int(p)}%" for p in progresses)
-            self.warmup_bar.setToolTip(f"YOLO 预热进行中: {active_count}/{total_yolo} | 平均 {avg_pct:.1f}% | 详情 [{detail}]")
+            running = ', '.join(f"{j['name']} {j['completed']}/{j['total']}" for j in prog['jobs'] if j['state'] == 'running')
+            self.warmup_bar.setToolTip(f"模型预热进行中: 运行 {prog['running']} / 排队 {prog['queued']} / 完成 {prog['done']}"
+                                       f" (并发上限 {prog['max_concurrent']}) | 总体 {pct:.1f}% | 当前 [{running}]")
         else:
             if all_done:
                 self._warmup_completed_persist = True
@@ -965,7 +1142,11 @@ class MainWindow(QMainWindow):
                 self.warmup_bar.setValue(0)
                 if self._warmup_bar_last_style != 'inactive':
                     self._apply_warmup_bar_style('inactive')
-                self.warmup_bar.setToolTip("YOLO 预热未开始或等待首次推理触发")
+                tip = "YOLO 预热未开始或等待首次推理触发"
+                pre = peek_preloader()
+                if pre is not None and pre.state == 'failed':
+                    tip += f" | 依赖预加载失败: {pre.status()['error']}"
+                self.warmup_bar.setToolTip(tip)
 
     def _apply_warmup_bar_style(self, mode: str):
         """设置预热进度条样式: inactive(灰), active(紫), completed(绿)."""
@@ -1001,6 +1182,10 @@ class MainWindow(QMainWindow):
                 lang = data.get('language_mode')
                 if isinstance(lang, str) and lang in ('zh','en','both'):
                     set_language_mode(lang)
+                self._optimize_graph = bool(data.get('optimize_graph', False))
+                self._ml_preload_enabled = bool(data.get('ml_preload', True))
+                self._keep_warm_models = bool(data.get('keep_warm_models', True))
+                self._run_once_session = bool(data.get('run_once_session', True))
         except Exception as e:
             # 读取失败忽略，保持默认
             print(f"加载用户设置失败: {e}")
@@ -1011,6 +1196,10 @@ class MainWindow(QMainWindow):
             data = {
                 'run_interval_ms': int(self._feeder_interval_sec * 1000),
                 'language_mode': get_language_mode(),
+                'optimize_graph': self._optimize_graph,
+                'ml_preload': self._ml_preload_enabled,
+                'keep_warm_models': self._keep_warm_models,
+                'run_once_session': self._run_once_session,
                 'ts': time.time()
             }
             with open(self._settings_path, 'w', encoding='utf-8') as f:
@@ -1119,6 +1308,134 @@ class MainWindow(QMainWindow):
         self._last_metrics_snapshot = {}
         self.metrics_label.setText("Exec: 0 | Avg: 0ms | Slow: -")
 
+    # ---------- 性能剖析 ----------
+    def _profile_selected_node(self):
+        """选择画布模块并开启 cProfile 剖析；运行中立即生效，否则在下次运行时应用。"""
+        from PyQt6.QtWidgets import QInputDialog
+        modules = [m for m in getattr(self.flow_canvas, 'modules', []) if getattr(m, 'module_id', None)]
+        if not modules:
+            self.statusbar.showMessage(L('画布中没有模块','No modules on canvas'), 3000)
+            return
+        labels = [f"{m.module_type} ({m.module_id})" for m in modules]
+        sel = self.flow_canvas.scene.selectedItems()
+        default_idx = modules.index(sel[0]) if sel and sel[0] in modules else 0
+        label, ok = QInputDialog.getItem(self, L('剖析模块','Profile Module'), L('模块:','Module:'), labels, default_idx, False)
+        if not ok:
+            return
+        cycles, ok2 = QInputDialog.getInt(self, L('剖析模块','Profile Module'), L('剖析周期数:','Cycles:'), 50, 1, 100000, 10)
+        if not ok2:
+            return
+        node_id = modules[labels.index(label)].module_id
+        ex = self.pipeline_executor
+        if ex and ex.status in (PipelineStatus.RUNNING, PipelineStatus.PAUSED) and node_id in ex.nodes:
+            ex.enable_node_profiling(node_id, cycles=cycles, output_dir=self._profiles_dir)
+            self.statusbar.showMessage(L('已开启剖析:','Profiling:')+f' {label} x{cycles}', 4000)
+        else:
+            self._pending_node_profiles[node_id] = cycles
+            self.statusbar.showMessage(L('将在下次运行时剖析:','Will profile on next run:')+f' {label} x{cycles}', 4000)
+
+    def _apply_pending_node_profiles(self, executor: PipelineExecutor):
+        for node_id, cycles in list(self._pending_node_profiles.items()):
+            if executor.enable_node_profiling(node_id, cycles=cycles, output_dir=self._profiles_dir):
+                del self._pending_node_profiles[node_id]
+
+    def _toggle_sampling_profiler(self, checked: bool):
+        if checked:
+            if self._sampling_profiler is None:
+                self._sampling_profiler = SamplingProfiler()
+            if self._sampling_profiler.start():
+                self.statusbar.showMessage(L('采样剖析已开始','Sampling profiler started'), 3000)
+            return
+        if not self._sampling_profiler or not self._sampling_profiler.is_running:
+            return
+        self._sampling_profiler.stop()
+        path = self._sampling_profiler.dump_collapsed(
+            os.path.join(self._profiles_dir, f"sampling_{time.strftime('%Y%m%d_%H%M%S')}.collapsed"))
+        st = self._sampling_profiler.status()
+        if path:
+            self.statusbar.showMessage(L('采样剖析已保存:','Sampling profile saved:')+f" {path} ({st['samples']} samples)", 6000)
+        else:
+            self.statusbar.showMessage(L('采样剖析保存失败','Failed to save sampling profile'), 4000)
+
+    def _show_profiling_status(self):
+        parts = []
+        if self.pipeline_executor:
+            st = self.pipeline_executor.get_profiling_status()
+            for nid, p in st['active'].items():
+                parts.append(f"{nid}: {p['completed_cycles']}/{p['cycles']}")
+            for nid, p in st['finished'].items():
+                parts.append(f"{nid}: {L('完成','done')} -> {p['output_path']}")
+        if self._pending_node_profiles:
+            parts.append(L('待运行:','pending:')+' '+', '.join(self._pending_node_profiles.keys()))
+        if self._sampling_profiler:
+            sp = self._sampling_profiler.status()
+            parts.append(f"sampling: {'on' if sp['running'] else 'off'} {sp['samples']} samples")
+        self.statusbar.showMessage(' | '.join(parts) if parts else L('无剖析任务','No profiling tasks'), 8000)
+
+    def _set_optimize_graph(self, checked: bool):
+        self._optimize_graph = bool(checked)
+        self._persist_user_settings()
+        self.statusbar.showMessage(L('图优化将在下次运行时生效','Graph optimization applies on next run'), 3000)
+
+    def _format_optimization_report(self, executor: PipelineExecutor) -> str:
+        rep = executor.get_optimization_report()
+        if not rep or not (rep['eliminated'] or rep['fused']):
+            return ''
+        fused = '; '.join('→'.join(c) for c in rep['fused'])
+        return (f" | {L('消除','eliminated')}: {', '.join(rep['eliminated']) or '-'}"
+                f" | {L('融合','fused')}: {fused or '-'}")
+
+    def _export_metrics_history(self):
+        """导出当前执行器的周期/节点趋势 (长格式 CSV: series,ts,count,rate,mean_ms,max_ms)。"""
+        ex = self.pipeline_executor
+        if not ex:
+            self.statusbar.showMessage(L('尚无执行器','No executor yet'), 3000)
+            return
+        from PyQt6.QtWidgets import QInputDialog
+        choices = [L('1秒 (近10分钟)','1 s (last 10 min)'), L('1分钟 (近24小时)','1 min (last 24 h)')]
+        choice, ok = QInputDialog.getItem(self, L('导出指标历史','Export Metrics History'), L('分辨率:','Resolution:'), choices, 0, False)
+        if not ok:
+            return
+        res = 1.0 if choices.index(choice) == 0 else 60.0
+        out_dir = os.path.join(self._user_data_dir, 'metrics')
+        path = os.path.join(out_dir, f"history_{int(res)}s_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('series,ts,count,rate,mean_ms,max_ms\n')
+                for key in [None] + ex.list_history_series():
+                    h = ex.get_metrics_history(key, resolution_s=res)
+                    name = key or 'cycle'
+                    for i in range(len(h['ts'])):
+                        f.write(f"{name},{h['ts'][i]:.0f},{h['count'][i]},{h['rate'][i]:.3f},"
+                                f"{h['mean'][i]*1000:.3f},{h['max'][i]*1000:.3f}\n")
+            self.statusbar.showMessage(L('已导出:','Exported:')+f' {path}', 5000)
+        except Exception as e:
+            self.statusbar.showMessage(L('导出失败:','Export failed:')+f' {e}', 5000)
+
+    def _toggle_metrics_endpoint(self, checked: bool):
+        """开关 Prometheus 指标 HTTP 端点 (GET /metrics)。"""
+        if not checked:
+            if self._metrics_exporter:
+                self._metrics_exporter.stop()
+                self._metrics_exporter = None
+                self.statusbar.showMessage(L('指标端点已关闭','Metrics endpoint stopped'), 3000)
+            return
+        from PyQt6.QtWidgets import QInputDialog
+        port, ok = QInputDialog.getInt(self, L('指标端点','Metrics Endpoint'), L('监听端口:','Port:'),
+                                       self._metrics_port, 1, 65535, 1)
+        if not ok:
+            return
+        exporter = MetricsExporter(self.pipeline_executor, host='0.0.0.0', port=port)
+        try:
+            exporter.start()
+        except OSError as e:
+            self.statusbar.showMessage(L('指标端点启动失败:','Metrics endpoint failed:')+f' {e}', 5000)
+            return
+        self._metrics_port = port
+        self._metrics_exporter = exporter
+        self.statusbar.showMessage(L('指标端点:','Metrics endpoint:')+f' http://<host>:{port}/metrics', 5000)
+
     # ---------- 最近项目自动加载/保存 ----------
     def _persist_last_project(self, path: str):
         """记录最近打开的项目路径到元数据文件"""
@@ -1143,9 +1460,11 @@ class MainWindow(QMainWindow):
             if recent_path and os.path.exists(recent_path) and recent_path.lower().endswith('.json'):
                 # 项目切换时重置预热持久化状态
                 self._reset_warmup_state()
+                begin_phase('auto_load_project')
                 def _progress(done, total):
                     self.statusbar.showMessage(f'热加载进度: {done}/{total} 模块')
                 def _finished(ok):
+                    end_phase('auto_load_project')
                     if ok:
                         self._current_pipeline_path = recent_path
                         self.statusbar.showMessage(f'热加载完成: {recent_path}')
@@ -1159,6 +1478,7 @@ class MainWindow(QMainWindow):
                 from PyQt6.QtCore import QTimer as _QT
                 _QT.singleShot(1200, self._auto_preheat_models)
         except Exception as e:
+            end_phase('auto_load_project')
             self.statusbar.showMessage(f'自动加载异常: {e}')
 
     def _auto_preheat_models(self):
@@ -1182,7 +1502,19 @@ class MainWindow(QMainWindow):
                 pass
         if not targets:
             return
+        # 按流程图层级排序: 离相机最近的模型先加载、先排队预热
+        try:
+            refs = [getattr(m, 'module_ref', None) for m in modules]
+            edges = [(sp.parent_item.module_ref, ep.parent_item.module_ref)
+                     for _line, sp, ep in getattr(self.flow_canvas, 'connections', [])]
+            depths = graph_depths([r for r in refs if r is not None], edges)
+            for r in targets:
+                r.warmup_priority = depths.get(r, 0)
+            targets.sort(key=lambda r: depths.get(r, 0))
+        except Exception:
+            pass
         def _worker(refs):
+            begin_phase('model_warmup')
             for r in refs:
                 try:
                     if hasattr(r, 'warmup_async'):
@@ -1191,6 +1523,12 @@ class MainWindow(QMainWindow):
                     pass
             # 使用线程安全的异步状态更新
             self._post_status(f'YOLO预热已触发: {len(refs)} 个', 4000)
+            # 启动耗时记录开启时等待预热结束以记录完整阶段 (最多 10 分钟)
+            if get_profiler() is not None:
+                deadline = time.time() + 600
+                while time.time() < deadline and any(getattr(r, '_warming', False) for r in refs):
+                    time.sleep(0.05)
+            end_phase('model_warmup')
         import threading
         threading.Thread(target=_worker, args=(targets,), daemon=True, name='yolo-preheat-thread').start()
 
@@ -8,7 +8,7 @@ GUI 模块控件
 from PyQt6.QtWidgets import (QWidget, QLabel, QVBoxLayout, QTreeWidget, QTreeWidgetItem, QLineEdit, QApplication)
 from PyQt6.QtCore import Qt, pyqtSignal, QMimeData
 from PyQt6.QtGui import QDrag, QPixmap, QIcon, QPainter, QShortcut, QKeySequence, QColor
-from app.pipeline.module_registry import list_registered_modules, get_module_class
+from app.pipeline.module_registry import list_registered_modules, get_module_metadata, save_manifest
 from app.pipeline.base_module import ModuleType
 from app.pipeline.utility.category_utils import classify_module
 from app.utils.i18n import bilingual, translate, get_language_mode, L
@@ -69,17 +69,12 @@ class ModuleToolbox(QWidget):
         self.tree.clear()
         groups = {k: [] for k in ['输入', '模型', '显示', '存储', '协议', '脚本', '逻辑', '其它']}
 
-        def classify_local(name: str, cls) -> str:
-            try:
-                mtype = cls(name=name).module_type if cls else None
-            except Exception:
-                mtype = None
-            return classify_module(name, mtype)
-
+        # 分类来自模块清单缓存 (不导入模块类)
         for display in list_registered_modules():
-            cls = get_module_class(display)
-            cat = classify_local(display, cls)
-            groups[cat].append(display)
+            meta = get_module_metadata(display)
+            cat = meta.get('category') if meta else None
+            groups[cat if cat in groups else classify_module(display, None)].append(display)
+        save_manifest()
 
         # 构建树节点
         for gname, items in groups.items():
@@ -107,12 +102,8 @@ class ModuleToolbox(QWidget):
     def _make_icon(self, name: str, category: str | None = None) -> QIcon:
         """生成简易彩色方块图标。根据分类而非旧 ModuleType 上色。"""
         if category is None:
-            cls = get_module_class(name)
-            try:
-                mtype = cls(name=name).module_type if cls else None
-            except Exception:
-                mtype = None
-            category = classify_module(name, mtype)
+            meta = get_module_metadata(name)
+            category = meta.get('category') if meta else classify_module(name, None)
         color_map = {
             '输入': '#4CAF50',
             '模型': '#9C27B0',
@@ -193,17 +184,14 @@ class ModuleToolbox(QWidget):
         drag = QDrag(self)
         mime = QMimeData()
         mime.setData('application/x-fahai-module', name.encode('utf-8'))
-        # 端口预览：实例化类
-        cls = get_module_class(name)
+        # 端口预览：读取模块清单元数据
+        meta = get_module_metadata(name)
         ports_str = ''
-        if cls:
+        if meta and meta.get('available', True):
             try:
-                inst = cls(name=name)
-                ins = ','.join(inst.input_ports.keys())
-                outs = ','.join(inst.output_ports.keys())
                 # bilingual ports 仅在常见端口进行映射
-                bins = ','.join(bilingual(p) for p in inst.input_ports.keys())
-                bouts = ','.join(bilingual(p) for p in inst.output_ports.keys())
+                bins = ','.join(bilingual(p) for p in meta.get('inputs', []))
+                bouts = ','.join(bilingual(p) for p in meta.get('outputs', []))
                 ports_str = f"{bins}|{bouts}"
                 mime.setData('application/x-fahai-ports', ports_str.encode('utf-8'))
             except Exception:
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程级模型缓存
+多个 YOLO 节点使用同一权重时共享一份已加载 (且已预热) 的模型。
+
+- 键: (规范化模型路径, 设备, 精度)，精度为 fp32 / fp16
+- 引用计数: acquire() +1，release() -1；被引用的条目永不淘汰
+- LRU 淘汰: 未被引用的条目保留以便复用，总占用超过内存预算时按最近最少使用淘汰
+- 并发: 同一键的并发加载只执行一次；ModelHandle.predict 使用每个模型独立的锁串行化
+- 参数隔离: ultralytics 会把每次 predict 的参数合并进持久的 predictor.args，未传的参数沿用上一个调用方的值；
+  ModelHandle.predict 对未传的逐次参数 (classes/imgsz/conf/iou/max_det/agnostic_nms) 显式补默认值
+- 统计: hits / misses / loads / load_errors / evictions / 占用字节
+- 常驻 (keep_warm): 未引用的条目不受预算淘汰，执行器停止/重启、run_once 后直接复用已加载且已预热的模型；
+  仅在 invalidate() (模型路径/设备配置变化)、unload_all() (项目关闭/手动卸载) 时释放
+
+预算默认取环境变量 FAHAI_MODEL_CACHE_MB (默认 2048MB，0 表示不保留未引用的条目)；
+常驻默认取 FAHAI_MODEL_KEEP_WARM (默认关闭，GUI 按用户设置开启)。
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+CacheKey = Tuple[str, str, str]
+
+
+def make_key(model_path: str, device: str = 'cpu', precision: str = 'fp32') -> CacheKey:
+    """规范化缓存键: 本地文件使用绝对路径，内置名称 (如 yolov8n.pt) 原样保留。"""
+    path = str(model_path or '')
+    try:
+        if os.path.exists(path):
+            path = os.path.normcase(os.path.abspath(path))
+    except Exception:
+        pass
+    return (path, str(device or 'cpu'), str(precision or 'fp32'))
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """估算模型参数与缓冲区占用 (torch.nn.Module / ultralytics YOLO)；无法估算时返回 0。"""
+    for target in (getattr(model, 'model', None), model):
+        if target is None:
+            continue
+        params = getattr(target, 'parameters', None)
+        if not callable(params):
+            continue
+        try:
+            total = sum(p.numel() * p.element_size() for p in target.parameters())
+            buffers = getattr(target, 'buffers', None)
+            if callable(buffers):
+                total += sum(b.numel() * b.element_size() for b in target.buffers())
+            return int(total)
+        except Exception:
+            continue
+    return 0
+
+
+# 逐次推理参数的默认值 (ultralytics 默认配置)；imgsz 默认取权重训练尺寸 (model.overrides)
+PREDICT_DEFAULTS: Dict[str, Any] = {
+    'classes': None, 'conf': 0.25, 'iou': 0.7, 'max_det': 300, 'agnostic_nms': False,
+}
+DEFAULT_IMGSZ = 640
+
+
+def default_imgsz(model: Any) -> int:
+    """权重的训练输入尺寸 (ultralytics model.overrides['imgsz'])；未知时为 DEFAULT_IMGSZ。"""
+    overrides = getattr(model, 'overrides', None)
+    return (overrides.get('imgsz') if isinstance(overrides, dict) else None) or DEFAULT_IMGSZ
+
+
+class ModelHandle:
+    """共享模型句柄: predict 串行化，其余属性透传到底层模型。"""
+
+    def __init__(self, key: CacheKey, model: Any, nbytes: int = 0):
+        self.key = key
+        self.model = model
+        self.nbytes = int(nbytes)
+        self.refcount = 0
+        self.warmed = False
+        # 已失效: 引用归零时立即移除 (配置变化/项目关闭)
+        self.stale = False
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.predict_count = 0
+        self._predict_lock = threading.Lock()
+
+    def predict(self, *args, **kwargs):
+        with self._predict_lock:
+            self.last_used = time.time()
+            self.predict_count += 1
+            return self.model.predict(*args, **self.call_args(kwargs))
+
+    def call_args(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """补全逐次参数: 共享模型的 predictor.args 会保留其它节点上次传入的 classes/imgsz 等。"""
+        full = dict(PREDICT_DEFAULTS, imgsz=default_imgsz(self.model))
+        full.update(kwargs)
+        return full
+
+    def __getattr__(self, item):
+        # 仅在实例属性不存在时调用，透传 names / plot 等
+        model = self.__dict__.get('model')
+        if model is None:
+            raise AttributeError(item)
+        return getattr(model, item)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'path': self.key[0], 'device': self.key[1], 'precision': self.key[2],
+            'refcount': self.refcount, 'warmed': self.warmed, 'stale': self.stale, 'bytes': self.nbytes,
+            'predict_count': self.predict_count, 'loaded_at': self.loaded_at, 'last_used': self.last_used,
+        }
+
+
+class _Pending:
+    """加载中的占位: 其它调用方等待同一次加载结果。"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.handle: Optional[ModelHandle] = None
+        self.error: Optional[BaseException] = None
+
+
+class ModelCache:
+    def __init__(self, memory_budget_bytes: Optional[int] = None, keep_warm: Optional[bool] = None):
+        if memory_budget_bytes is None:
+            try:
+                memory_budget_bytes = int(float(os.environ.get('FAHAI_MODEL_CACHE_MB', '2048')) * 1024 * 1024)
+            except ValueError:
+                memory_budget_bytes = 2048 * 1024 * 1024
+        self.memory_budget_bytes = max(0, int(memory_budget_bytes))
+        if keep_warm is None:
+            keep_warm = os.environ.get('FAHAI_MODEL_KEEP_WARM', '').strip().lower() in ('1', 'true', 'yes', 'on')
+        self.keep_warm = bool(keep_warm)
+        self._entries: 'OrderedDict[CacheKey, ModelHandle]' = OrderedDict()
+        self._pending: Dict[CacheKey, _Pending] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    # ---------- 获取 / 释放 ----------
+    def acquire(self, model_path: str, device: str, precision: str,
+                loader: Callable[[], Any]) -> ModelHandle:
+        """获取共享模型 (引用计数 +1)。未缓存时调用 loader() 加载；加载异常原样抛出。"""
+        key = make_key(model_path, device, precision)
+        while True:
+            with self._lock:
+                handle = self._entries.get(key)
+                if handle is not None:
+                    self._entries.move_to_end(key)
+                    handle.refcount += 1
+                    handle.stale = False  # 仍有节点需要该模型
+                    self.hits += 1
+                    return handle
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = _Pending()
+                    self.misses += 1
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                pending.event.wait()
+                if pending.error is not None:
+                    raise pending.error
+                continue  # 重新走命中路径计数
+            # 在锁外加载 (耗时)
+            t0 = time.perf_counter()
+            try:
+                model = loader()
+                handle = ModelHandle(key, model, estimate_model_bytes(model))
+            except BaseException as e:
+                with self._lock:
+                    self.load_errors += 1
+                    self._pending.pop(key, None)
+                pending.error = e
+                pending.event.set()
+                raise
+            with self._lock:
+                self.loads += 1
+                self.load_seconds += time.perf_counter() - t0
+                handle.refcount = 1
+                self._entries[key] = handle
+                self._pending.pop(key, None)
+                self._evict_locked()
+            pending.handle = handle
+            pending.event.set()
+            return handle
+
+    def release(self, handle: Optional[ModelHandle]):
+        """释放引用 (引用计数 -1)。未引用条目保留在缓存中，超出预算时淘汰。"""
+        if handle is None:
+            return
+        with self._lock:
+            if handle.refcount > 0:
+                handle.refcount -= 1
+            if handle.refcount == 0 and handle.stale:
+                self._remove_handle_locked(handle)
+            self._evict_locked()
+
+    def _remove_locked(self, key: CacheKey) -> bool:
+        h = self._entries.pop(key, None)
+        if h is None:
+            return False
+        h.model = None
+        return True
+
+    def _remove_handle_locked(self, handle: ModelHandle):
+        if self._entries.get(handle.key) is handle:
+            self._remove_locked(handle.key)
+
+    def _evict_locked(self):
+        if self.keep_warm:
+            return
+        total = sum(h.nbytes for h in self._entries.values())
+        if total <= self.memory_budget_bytes:
+            return
+        for key in list(self._entries.keys()):  # 从最久未使用开始
+            if total <= self.memory_budget_bytes:
+                break
+            h = self._entries[key]
+            if h.refcount > 0:
+                continue
+            del self._entries[key]
+            total -= h.nbytes
+            h.model = None
+            self.evictions += 1
+
+    # ---------- 管理 ----------
+    def set_keep_warm(self, enabled: bool):
+        """切换常驻模式；关闭时立即按预算淘汰未引用条目。"""
+        with self._lock:
+            self.keep_warm = bool(enabled)
+            self._evict_locked()
+
+    def invalidate(self, key: CacheKey) -> bool:
+        """使条目失效: 未被引用则立即移除，否则在最后一个引用释放时移除。返回是否已移除。"""
+        with self._lock:
+            h = self._entries.get(key)
+            if h is None:
+                return False
+            if h.refcount > 0:
+                h.stale = True
+                return False
+            return self._remove_locked(key)
+
+    def unload_all(self) -> int:
+        """卸载全部模型 (项目关闭/手动卸载): 未引用的立即移除，仍在使用的标记失效；返回移除数量。"""
+        removed = 0
+        with self._lock:
+            for key, h in list(self._entries.items()):
+                if h.refcount > 0:
+                    h.stale = True
+                elif self._remove_locked(key):
+                    removed += 1
+        return removed
+
+    def set_budget(self, memory_budget_bytes: int):
+        with self._lock:
+            self.memory_budget_bytes = max(0, int(memory_budget_bytes))
+            self._evict_locked()
+
+    def clear(self, force: bool = False) -> int:
+        """移除未被引用的条目 (force=True 时全部移除)；返回移除数量。"""
+        removed = 0
+        with self._lock:
+            for key in list(self._entries.keys()):
+                h = self._entries[key]
+                if h.refcount > 0 and not force:
+                    continue
+                del self._entries[key]
+                h.model = None
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = [h.info() for h in self._entries.values()]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'loads': self.loads,
+                'load_errors': self.load_errors,
+                'evictions': self.evictions,
+                'load_seconds': round(self.load_seconds, 4),
+                'entries': len(entries),
+                'referenced': sum(1 for e in entries if e['refcount'] > 0),
+                'bytes': sum(e['bytes'] for e in entries),
+                'budget_bytes': self.memory_budget_bytes,
+                'keep_warm': self.keep_warm,
+                'models': entries,
+            }
+
+
+_cache: Optional[ModelCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_model_cache() -> ModelCache:
+    """进程级共享缓存实例。"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ModelCache()
+    return _cache
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型热切换
+运行中修改模型路径/设备/精度时，不停止流程: 后台线程加载并预热新模型，旧模型继续推理；
+新模型就绪后由模块在下一次 process() 开始 (周期边界) 调用 take() 原子替换，切换延迟为一个周期。
+加载或预热失败时回滚: 新模型被丢弃，旧模型继续服务，模块据此恢复配置并记录错误。
+
+同一时间只保留一个待切换任务: 再次 begin() (配置又变化) 或 cancel() (停止) 会使进行中的任务作废，
+作废任务完成后其模型由 discard 回调释放。
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+SWAP_STATES = ("idle", "loading", "warming", "ready", "failed")
+
+
+class ModelSwapper:
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._lock = threading.Lock()
+        self._gen = 0
+        self._thread: Optional[threading.Thread] = None
+        self._ready: Optional[Tuple[Any, Any]] = None     # (source, model)
+        self._failed: Optional[Tuple[Any, str]] = None    # (source, error)
+        self._discard: Optional[Callable[[Any], None]] = None
+        self.state = "idle"
+        self.source: Any = None
+        self.error: Optional[str] = None
+        self.swaps = 0
+        self.rollbacks = 0
+        self.load_ms = 0.0
+        self.warmup_ms = 0.0
+        self.last_swap_at: Optional[float] = None
+
+    @property
+    def pending(self) -> bool:
+        return self.state in ("loading", "warming", "ready")
+
+    def _drop(self, model: Any, discard: Optional[Callable[[Any], None]]):
+        if model is None or discard is None:
+            return
+        try:
+            discard(model)
+        except Exception:
+            pass
+
+    def begin(self, source: Any, load: Callable[[], Any], warmup: Callable[[Any], None],
+              discard: Optional[Callable[[Any], None]] = None):
+        """启动后台加载 + 预热。load() 返回新模型 (失败抛异常)，warmup(model) 失败抛异常即回滚。"""
+        with self._lock:
+            self._gen += 1
+            gen = self._gen
+            stale, stale_discard = self._ready, self._discard
+            self._ready = None
+            self._failed = None
+            self._discard = discard
+            self.state = "loading"
+            self.source = source
+            self.error = None
+        if stale is not None:
+            self._drop(stale[1], stale_discard)
+
+        def _run():
+            model = None
+            try:
+                t0 = time.perf_counter()
+                model = load()
+                t1 = time.perf_counter()
+                with self._lock:
+                    if gen != self._gen:
+                        return  # 已作废: 不再预热，finally 中释放
+                    self.state = "warming"
+                warmup(model)
+                t2 = time.perf_counter()
+                with self._lock:
+                    if gen == self._gen:
+                        self._ready = (source, model)
+                        self.state = "ready"
+                        self.load_ms = round((t1 - t0) * 1000.0, 1)
+                        self.warmup_ms = round((t2 - t1) * 1000.0, 1)
+                        model = None
+            except Exception as e:
+                with self._lock:
+                    if gen == self._gen:
+                        self._failed = (source, str(e))
+                        self.state = "failed"
+                        self.error = str(e)
+            finally:
+                # 作废 (被新任务取代/取消) 或失败的模型
+                self._drop(model, discard)
+
+        th = threading.Thread(target=_run, name=f"model-swap-{self.name}", daemon=True)
+        self._thread = th
+        th.start()
+
+    def take(self) -> Optional[Tuple[str, Any, Any]]:
+        """周期边界调用: ("swap", source, 新模型) / ("rollback", source, 错误信息) / None (无事件)。"""
+        if self._ready is None and self._failed is None:
+            return None
+        with self._lock:
+            if self._ready is not None:
+                source, model = self._ready
+                self._ready = None
+                self.state = "idle"
+                self.swaps += 1
+                self.last_swap_at = time.time()
+                return ("swap", source, model)
+            if self._failed is not None:
+                source, error = self._failed
+                self._failed = None
+                self.rollbacks += 1
+                return ("rollback", source, error)
+        return None
+
+    def cancel(self, wait: float = 0.0):
+        """作废进行中的任务并释放已就绪但未切换的模型 (模块停止/配置恢复时调用)。"""
+        with self._lock:
+            self._gen += 1
+            ready, discard = self._ready, self._discard
+            self._ready = None
+            self._failed = None
+            if self.state != "failed":
+                self.state = "idle"
+        if ready is not None:
+            self._drop(ready[1], discard)
+        th = self._thread
+        if wait > 0 and th is not None and th.is_alive():
+            th.join(timeout=wait)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待后台任务结束 (测试/脚本使用)；返回是否已结束。"""
+        th = self._thread
+        if th is None:
+            return True
+        th.join(timeout=timeout)
+        return not th.is_alive()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "source": list(self.source) if isinstance(self.source, tuple) else self.source,
+            "error": self.error,
+            "swaps": self.swaps,
+            "rollbacks": self.rollbacks,
+            "load_ms": self.load_ms,
+            "warmup_ms": self.warmup_ms,
+            "last_swap_at": self.last_swap_at,
+        }
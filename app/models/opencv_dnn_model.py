@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OpenCV DNN 推理后端
+基于 cv2.dnn 加载 ONNX 模型并在 CPU 上推理，无需 torch / onnxruntime，
+适合仅有 CPU 的产线工控机 (opencv-python 已是必需依赖)。
+
+注意: cv2.setNumThreads 为进程级设置，num_threads > 0 时会影响同进程其它 OpenCV 调用。
+后台加载 (热切换) 时以 apply_threads=False 加载，待新模型在周期边界生效时再调用 apply_threads()。
+"""
+import os
+import time
+from typing import Any, Dict, List, Union
+
+import numpy as np
+
+from app.models.base_model import BaseModel, ModelFormat
+
+
+class OpenCVDNNModel(BaseModel):
+    """cv2.dnn ONNX 模型: load() 读取网络，inference() 返回各输出层数组列表。"""
+
+    def __init__(self, model_path: str = "", config: Dict[str, Any] = None):
+        super().__init__(model_path, config)
+        self.model_format = ModelFormat.ONNX
+        self.device = "cpu"
+        self.num_threads = int(self.config.get("num_threads", 0) or 0)
+
+    @property
+    def supported_formats(self) -> List[str]:
+        return [ModelFormat.ONNX]
+
+    def load(self, model_path: str, config: Dict[str, Any] = None, apply_threads: bool = True) -> bool:
+        import cv2
+        if config:
+            self.config.update(config)
+        self.model_path = model_path
+        self.model_name = os.path.basename(model_path) if model_path else self.model_name
+        self.num_threads = int(self.config.get("num_threads", 0) or 0)
+        self.class_names = list(self.config.get("class_names", []) or [])
+        self.num_classes = len(self.class_names)
+        fmt = str(self.config.get("model_format", ModelFormat.ONNX)).lower()
+        if fmt not in self.supported_formats:
+            self.logger.error(f"OpenCV DNN 后端不支持的模型格式: {fmt}")
+            return False
+        try:
+            net = cv2.dnn.readNetFromONNX(model_path)
+            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        except Exception as e:
+            self.logger.error(f"OpenCV DNN 加载失败: {e}")
+            return False
+        self.model = net
+        if apply_threads:
+            self.apply_threads()
+        self.output_names = list(net.getUnconnectedOutLayersNames())
+        size = self.config.get("input_size", [640, 640])
+        self.input_shape = (int(self.batch_size or 1), 3, int(size[1]), int(size[0]))
+        self.is_loaded = True
+        self.logger.info(f"OpenCV DNN 模型加载成功: {model_path} 输出={self.output_names}")
+        return True
+
+    def apply_threads(self):
+        """应用 num_threads (cv2.setNumThreads，进程级)；0 保持当前设置。"""
+        if self.num_threads > 0:
+            import cv2
+            cv2.setNumThreads(self.num_threads)
+
+    def inference(self, inputs: Union[np.ndarray, Dict[str, np.ndarray]]) -> List[np.ndarray]:
+        if not self.is_loaded or self.model is None:
+            raise RuntimeError("模型未加载")
+        start_time = time.time()
+        if isinstance(inputs, dict):
+            for name, blob in inputs.items():
+                self.model.setInput(np.ascontiguousarray(blob, dtype=np.float32), name)
+        else:
+            self.model.setInput(np.ascontiguousarray(inputs, dtype=np.float32))
+        outs = self.model.forward(self.output_names)
+        self._update_statistics(time.time() - start_time)
+        return list(outs)
+
+    def get_model_info(self) -> Dict[str, Any]:
+        info = super().get_model_info()
+        info.update({"backend": "opencv_dnn", "num_threads": self.num_threads})
+        return info
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型输入预处理引擎 (纯 NumPy + cv2，复用预分配缓冲区)
+
+每帧的处理只有两遍:
+  1. resize: cv2.resize 写入按尺寸缓存的 uint8 缓冲区 (尺寸不变时跳过)
+  2. 融合写出: 对每个输出通道一次 uint8 -> float32 乘法写入 CHW 输出 (x * 1/(255*std))，再就地加偏置
+     (-mean/std)；BGR->RGB 通过按逆序读取源通道完成，HWC->CHW 由写入目标的通道平面完成，无额外拷贝
+letterbox 边框值 (114 归一化后) 只在缓冲区几何变化时填充，其余帧只覆盖中间区域。
+
+输出 blob 按 (批大小, 输入尺寸) 缓存复用: 返回的数组在下一次 run() 前有效 (推理后端 setInput 会复制)。
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PAD_VALUE = 114
+
+
+class PreprocessEngine:
+    """letterbox / 直接缩放 + 通道交换 + 归一化 + HWC->CHW，支持批量。"""
+
+    def __init__(self, max_buffers: int = 4):
+        self.max_buffers = max(1, int(max_buffers))
+        self._blobs: "OrderedDict[Tuple[int, int, int], np.ndarray]" = OrderedDict()
+        self._resized: "OrderedDict[Tuple[int, ...], np.ndarray]" = OrderedDict()
+        self._geometry: Dict[Tuple[int, int, int, int], Tuple[int, int, int, int]] = {}
+        self._params: Optional[tuple] = None
+        self.allocations = 0
+        self.input_size = (640, 640)
+        self.letterbox = True
+        self.order = (2, 1, 0)
+        self.scale = np.full(3, 1.0 / 255.0, np.float32)
+        self.bias = np.zeros(3, np.float32)
+        self.pad = self.scale * PAD_VALUE + self.bias
+
+    def configure(self, input_size: Sequence[int], preprocessing: Optional[Dict[str, Any]] = None):
+        """input_size 为 [w, h]；preprocessing 同 ModelModule 配置 (normalize/mean/std/letterbox/bgr2rgb)。"""
+        prep = preprocessing or {}
+        mean = tuple(float(v) for v in prep.get("mean", [0.485, 0.456, 0.406]))
+        std = tuple(float(v) for v in prep.get("std", [0.229, 0.224, 0.225]))
+        params = (int(input_size[0]), int(input_size[1]), bool(prep.get("normalize", True)), mean, std,
+                  bool(prep.get("letterbox", True)), bool(prep.get("bgr2rgb", True)))
+        if params == self._params:
+            return
+        self._params = params
+        w, h, normalize, _, _, letterbox, bgr2rgb = params
+        self.input_size = (w, h)
+        self.letterbox = letterbox
+        self.order = (2, 1, 0) if bgr2rgb else (0, 1, 2)
+        if normalize:
+            # (x/255 - mean)/std == x * (1/(255*std)) + (-mean/std)
+            std_arr = np.asarray(std, np.float64)
+            self.scale = (1.0 / (255.0 * std_arr)).astype(np.float32)
+            self.bias = (-np.asarray(mean, np.float64) / std_arr).astype(np.float32)
+        else:
+            self.scale = np.ones(3, np.float32)
+            self.bias = np.zeros(3, np.float32)
+        self.pad = self.scale * PAD_VALUE + self.bias
+        self._geometry.clear()   # 边框值可能变化: 下一次全量填充
+
+    # ---------- 缓冲区 ----------
+    def _cached(self, store: "OrderedDict", key: tuple, shape: tuple, dtype) -> Tuple[np.ndarray, bool]:
+        buf = store.get(key)
+        if buf is not None:
+            store.move_to_end(key)
+            return buf, False
+        buf = np.empty(shape, dtype)
+        store[key] = buf
+        self.allocations += 1
+        while len(store) > self.max_buffers:
+            old, _ = store.popitem(last=False)
+            if store is self._blobs:
+                for g in [g for g in self._geometry if g[:3] == old]:
+                    del self._geometry[g]
+        return buf, True
+
+    def _resize(self, image: np.ndarray, nw: int, nh: int) -> np.ndarray:
+        import cv2
+        if image.shape[1] == nw and image.shape[0] == nh:
+            return image
+        shape = (nh, nw) + image.shape[2:]
+        dst, _ = self._cached(self._resized, shape, shape, np.uint8)
+        return cv2.resize(image, (nw, nh), dst=dst)
+
+    # ---------- 主流程 ----------
+    def run(self, images: Sequence[np.ndarray], rois: Optional[Sequence[Optional[Dict]]] = None
+            ) -> Tuple[np.ndarray, List[Dict[str, float]], Dict[str, float]]:
+        """返回 (blob (N,3,H,W) float32, 每张图的坐标变换, 阶段耗时 ms)。
+        坐标变换字段: scale_x/scale_y/pad_x/pad_y (网络输入 -> 裁剪图)、roi_x/roi_y、width/height (裁剪图尺寸)。
+        """
+        t0 = time.perf_counter()
+        tw, th = self.input_size
+        n = len(images)
+        key = (n, th, tw)
+        blob, _ = self._cached(self._blobs, key, (n, 3, th, tw), np.float32)
+        rois = list(rois) if rois is not None else [None] * n
+        transforms: List[Dict[str, float]] = []
+        resize_s = fuse_s = 0.0
+        for i, image in enumerate(images):
+            t1 = time.perf_counter()
+            roi = rois[i] if i < len(rois) else None
+            roi_x = roi_y = 0
+            if roi:
+                x, y = int(roi.get("x", 0)), int(roi.get("y", 0))
+                w, h = roi.get("width", image.shape[1]), roi.get("height", image.shape[0])
+                image = image[y:y + int(h), x:x + int(w)]
+                roi_x, roi_y = x, y
+            if image.ndim == 3 and image.shape[2] == 1:
+                image = image[:, :, 0]
+            elif image.ndim == 3 and image.shape[2] > 3:
+                image = image[:, :, :3]
+            ih, iw = image.shape[:2]
+            if self.letterbox:
+                scale = min(tw / iw, th / ih)
+                nw, nh = int(iw * scale), int(ih * scale)
+                left, top = (tw - nw) // 2, (th - nh) // 2
+            else:
+                nw, nh, left, top = tw, th, 0, 0
+            resized = self._resize(image, nw, nh)
+            t2 = time.perf_counter()
+            planes = blob[i]
+            geometry = (top, left, nh, nw)
+            if self._geometry.get(key + (i,)) != geometry:
+                for c in range(3):
+                    planes[c].fill(self.pad[c])
+                self._geometry[key + (i,)] = geometry
+            region = planes[:, top:top + nh, left:left + nw]
+            for c in range(3):
+                # 灰度图三个通道相同；BGR->RGB 时输出通道 c 读取源通道 order[c]
+                chan = resized if resized.ndim == 2 else resized[:, :, self.order[c]]
+                np.multiply(chan, self.scale[c], out=region[c], dtype=np.float32, casting="unsafe")
+                if self.bias[c] != 0.0:
+                    region[c] += self.bias[c]
+            t3 = time.perf_counter()
+            resize_s += t2 - t1
+            fuse_s += t3 - t2
+            transforms.append({"scale_x": nw / iw, "scale_y": nh / ih, "pad_x": left, "pad_y": top,
+                               "roi_x": roi_x, "roi_y": roi_y, "width": iw, "height": ih})
+        timings = {"resize_ms": resize_s * 1000.0, "normalize_ms": fuse_s * 1000.0,
+                   "preprocess_ms": (time.perf_counter() - t0) * 1000.0}
+        return blob, transforms, timings
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffers": len(self._blobs) + len(self._resized),
+            "bytes": int(sum(b.nbytes for b in self._blobs.values()) + sum(b.nbytes for b in self._resized.values())),
+            "allocations": self.allocations,
+        }
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程级模型预热调度器
+多个模型同时预热会争抢 CPU/GPU，反而让每个模型都更晚就绪。调度器把预热任务排队执行:
+
+- 并发上限: 同时运行的预热任务数 (默认取环境变量 FAHAI_WARMUP_CONCURRENCY，缺省 1)
+- 优先级: 数值越小越先执行，同优先级按提交顺序；模块的 warmup_priority 通常为其在流程图中的层级
+  (离相机/输入最近的模型为 0)，见 graph_depths()
+- batch(): 上下文内提交的任务暂不派发，退出时按优先级统一排队 (避免先提交的低优先级任务抢先启动)
+- 进度: progress() 汇总排队/运行/完成数与按迭代加权的总体进度，GUI 预热进度条据此显示
+- 等待: wait() 阻塞直到指定 (或全部未完成) 任务结束，执行器可在启动前等待模型就绪
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+
+
+class WarmupJob:
+    """单个预热任务。fn(job) 执行预热，每完成一次迭代调用 job.advance()；抛异常即失败。"""
+
+    def __init__(self, name: str, fn: Callable[["WarmupJob"], None], priority: int = 0, total: int = 1):
+        self.name = name
+        self.fn = fn
+        self.priority = int(priority)
+        self.total = max(0, int(total))
+        self.completed = 0
+        self.state = "queued"
+        self.error: Optional[str] = None
+        self.queued_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._event = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._event.is_set()
+
+    def advance(self, n: int = 1):
+        self.completed = min(self.total, self.completed + int(n)) if self.total else self.completed + int(n)
+
+    def progress(self) -> float:
+        if self.finished:
+            return 1.0
+        return self.completed / self.total if self.total else 0.0
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name, "state": self.state, "priority": self.priority,
+            "completed": self.completed, "total": self.total, "error": self.error,
+            "wait_s": round((self.started_at or time.time()) - self.queued_at, 3),
+            "run_s": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else 0.0,
+        }
+
+
+class WarmupScheduler:
+    def __init__(self, max_concurrent: Optional[int] = None):
+        if max_concurrent is None:
+            try:
+                max_concurrent = int(os.environ.get("FAHAI_WARMUP_CONCURRENCY", "1"))
+            except ValueError:
+                max_concurrent = 1
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[int, int, WarmupJob]] = []
+        self._seq = itertools.count()
+        self._running: List[WarmupJob] = []
+        self._jobs: List[WarmupJob] = []   # 最近一轮提交的全部任务 (进度统计)
+        self._hold = 0
+
+    # ---------- 提交 / 派发 ----------
+    def submit(self, name: str, fn: Callable[[WarmupJob], None], priority: int = 0, total: int = 1) -> WarmupJob:
+        job = WarmupJob(name, fn, priority, total)
+        with self._lock:
+            if not self._heap and not self._running:
+                # 上一轮已全部结束: 重新开始统计
+                self._jobs = [j for j in self._jobs if not j.finished]
+            self._jobs.append(job)
+            heapq.heappush(self._heap, (job.priority, next(self._seq), job))
+            self._dispatch_locked()
+        return job
+
+    @contextmanager
+    def batch(self):
+        """上下文内提交的任务在退出时按优先级统一派发。"""
+        with self._lock:
+            self._hold += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._hold -= 1
+                self._dispatch_locked()
+
+    def set_max_concurrent(self, n: int):
+        with self._lock:
+            self.max_concurrent = max(1, int(n))
+            self._dispatch_locked()
+
+    def cancel(self, job: WarmupJob) -> bool:
+        """取消尚未开始的任务；返回是否已取消。"""
+        with self._lock:
+            for i, (_, _, queued) in enumerate(self._heap):
+                if queued is job:
+                    self._heap.pop(i)
+                    heapq.heapify(self._heap)
+                    break
+            else:
+                return False
+        job.state = "cancelled"
+        job.finished_at = time.time()
+        job._event.set()
+        return True
+
+    def _dispatch_locked(self):
+        while self._hold == 0 and self._heap and len(self._running) < self.max_concurrent:
+            _, _, job = heapq.heappop(self._heap)
+            job.state = "running"
+            job.started_at = time.time()
+            self._running.append(job)
+            threading.Thread(target=self._run, args=(job,), name=f"warmup-{job.name}", daemon=True).start()
+
+    def _run(self, job: WarmupJob):
+        try:
+            job.fn(job)
+            job.state = "done"
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if job in self._running:
+                    self._running.remove(job)
+                self._dispatch_locked()
+            job._event.set()
+
+    # ---------- 等待 / 统计 ----------
+    def wait(self, jobs: Optional[Iterable[WarmupJob]] = None, timeout: Optional[float] = None) -> bool:
+        """等待任务结束 (jobs 为空时等待当前全部未完成任务)；超时返回 False。"""
+        if jobs is None:
+            with self._lock:
+                jobs = [j for j in self._jobs if not j.finished]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in list(jobs):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job.wait(remaining):
+                return False
+        return True
+
+    def idle(self) -> bool:
+        with self._lock:
+            return not self._heap and not self._running
+
+    def progress(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs)
+        counts = {s: 0 for s in JOB_STATES}
+        for j in jobs:
+            counts[j.state] = counts.get(j.state, 0) + 1
+        weight = sum(max(1, j.total) for j in jobs)
+        done = sum(j.progress() * max(1, j.total) for j in jobs)
+        return dict(counts, total=len(jobs), max_concurrent=self.max_concurrent,
+                    fraction=round(done / weight, 4) if weight else 1.0,
+                    jobs=[j.info() for j in jobs])
+
+
+def graph_depths(nodes: Iterable[Hashable], edges: Iterable[Tuple[Hashable, Hashable]]) -> Dict[Hashable, int]:
+    """节点层级 = 到任一无前驱节点 (相机/输入) 的最长路径边数；环上节点按已知前驱估计。"""
+    nodes = list(nodes)
+    preds: Dict[Hashable, List[Hashable]] = {n: [] for n in nodes}
+    for src, dst in edges:
+        if src in preds and dst in preds and src != dst:
+            preds[dst].append(src)
+    depth: Dict[Hashable, int] = {}
+    pending = list(nodes)
+    while pending:
+        progressed = False
+        for n in list(pending):
+            if all(p in depth for p in preds[n]):
+                depth[n] = 1 + max((depth[p] for p in preds[n]), default=-1)
+                pending.remove(n)
+                progressed = True
+        if not progressed:
+            # 存在环: 取已知前驱中的最大层级
+            n = pending.pop(0)
+            depth[n] = 1 + max((depth[p] for p in preds[n] if p in depth), default=-1)
+    return depth
+
+
+_scheduler: Optional[WarmupScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_warmup_scheduler() -> WarmupScheduler:
+    """进程级预热调度器实例。"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = WarmupScheduler()
+    return _scheduler
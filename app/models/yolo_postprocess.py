@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YOLO 输出解码与 NMS (纯 NumPy，无 torch 依赖)
+
+- decode_yolo: 解析 YOLOv8 风格 (1, 4+nc, N) 与 YOLOv5 风格 (1, N, 5+nc) 输出，
+  先按最大类别分数过滤再转换坐标，返回 xyxy / score / class_id
+- nms: 贪心 NMS，每轮对剩余框做一次向量化 IoU 计算
+- batched_nms: 按类别 NMS (坐标偏移技巧，一次调用完成所有类别)
+- scale_boxes: 网络输入坐标 -> 原图坐标 (letterbox / 直接缩放)
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def decode_yolo(output: np.ndarray, conf_threshold: float = 0.25,
+                num_classes: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """解码单张图像的 YOLO 输出为 (xyxy float32 (M,4), scores (M,), class_ids int32 (M,))。
+    num_classes 已知时据列数区分 v8 (4+nc) / v5 (5+nc，含 objectness)；未知时按 v8 处理。
+    """
+    out = np.asarray(output, dtype=np.float32)
+    while out.ndim > 2 and out.shape[0] == 1:
+        out = out[0]
+    if out.ndim != 2:
+        raise ValueError(f"无法解析的 YOLO 输出形状: {np.shape(output)}")
+    # v8 导出为 (C, N)，统一为 (N, C)；类别数已知时按列数判断布局，否则按 C << N 推断
+    if num_classes is not None:
+        widths = (4 + int(num_classes), 5 + int(num_classes))
+        if out.shape[1] not in widths and out.shape[0] in widths:
+            out = out.T
+    elif out.shape[0] < out.shape[1]:
+        out = out.T
+    cols = out.shape[1]
+    has_obj = num_classes is not None and cols == 5 + int(num_classes)
+    if cols < (6 if has_obj else 5):
+        raise ValueError(f"YOLO 输出列数不足: {cols}")
+    cls_scores = out[:, 5:] if has_obj else out[:, 4:]
+    class_ids = cls_scores.argmax(axis=1)
+    scores = cls_scores[np.arange(len(out)), class_ids]
+    if has_obj:
+        scores = scores * out[:, 4]
+    keep = scores >= conf_threshold
+    boxes = out[keep, :4]
+    xyxy = np.empty_like(boxes)
+    half_w = boxes[:, 2] / 2
+    half_h = boxes[:, 3] / 2
+    xyxy[:, 0] = boxes[:, 0] - half_w
+    xyxy[:, 1] = boxes[:, 1] - half_h
+    xyxy[:, 2] = boxes[:, 0] + half_w
+    xyxy[:, 3] = boxes[:, 1] + half_h
+    return xyxy, scores[keep].astype(np.float32, copy=False), class_ids[keep].astype(np.int32)
+
+
+def box_area(xyxy: np.ndarray) -> np.ndarray:
+    return np.clip(xyxy[:, 2] - xyxy[:, 0], 0, None) * np.clip(xyxy[:, 3] - xyxy[:, 1], 0, None)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float = 0.45, max_det: int = 0) -> np.ndarray:
+    """贪心 NMS，返回保留框的索引 (按分数降序)。max_det > 0 时保留数达到后提前结束。"""
+    n = len(scores)
+    if n == 0:
+        return np.zeros((0,), dtype=np.int64)
+    boxes = np.asarray(boxes, dtype=np.float32)
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    areas = box_area(boxes)
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        if max_det and len(keep) >= max_det:
+            break
+        rest = order[1:]
+        xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def batched_nms(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray, iou_threshold: float = 0.45,
+                max_det: int = 0, agnostic: bool = False) -> np.ndarray:
+    """按类别 NMS: 不同类别的框平移到互不重叠的区域后统一做一次 NMS。"""
+    if len(scores) == 0 or agnostic:
+        return nms(boxes, scores, iou_threshold, max_det)
+    boxes = np.asarray(boxes, dtype=np.float32)
+    offset = float(boxes.max()) + 1.0
+    shifted = boxes + (np.asarray(class_ids, dtype=np.float32) * offset)[:, None]
+    return nms(shifted, scores, iou_threshold, max_det)
+
+
+def scale_boxes(xyxy: np.ndarray, scale_x: float, scale_y: float, pad_x: float, pad_y: float,
+                orig_shape: Tuple[int, int]) -> np.ndarray:
+    """网络输入坐标映射回原图: (x - pad) / scale，并裁剪到原图范围 orig_shape=(h, w)。"""
+    out = np.empty_like(xyxy, dtype=np.float32)
+    out[:, [0, 2]] = (xyxy[:, [0, 2]] - pad_x) / scale_x
+    out[:, [1, 3]] = (xyxy[:, [1, 3]] - pad_y) / scale_y
+    h, w = orig_shape[:2]
+    out[:, [0, 2]] = np.clip(out[:, [0, 2]], 0, w)
+    out[:, [1, 3]] = np.clip(out[:, [1, 3]], 0, h)
+    return out
@@ -27,18 +27,22 @@ class ModuleCapabilities:
         may_block: 是否可能进行阻塞操作（IO/CPU密集）。
         resource_tags: 资源标签 (例如: ['camera','gpu']).
         throughput_hint: 吞吐提示（预估每秒处理次数 / 帧数）。
+        side_effects: 是否有外部副作用（显示/写文件/通信/打印等）。None 表示由图优化按
+            resource_tags 与输出端口推断；有副作用的模块视为汇点，不会被死节点消除。
     """
     def __init__(self,
                  supports_async: bool = False,
                  supports_batch: bool = False,
                  may_block: bool = False,
                  resource_tags: Optional[List[str]] = None,
-                 throughput_hint: Optional[float] = None):
+                 throughput_hint: Optional[float] = None,
+                 side_effects: Optional[bool] = None):
         self.supports_async = supports_async
         self.supports_batch = supports_batch
         self.may_block = may_block
         self.resource_tags = resource_tags or []
         self.throughput_hint = throughput_hint if throughput_hint is not None else 0.0
+        self.side_effects = side_effects
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -47,6 +51,7 @@ class ModuleCapabilities:
             "may_block": self.may_block,
             "resource_tags": list(self.resource_tags),
             "throughput_hint": self.throughput_hint,
+            "side_effects": self.side_effects,
         }
 
 
@@ -98,6 +103,8 @@ class BaseModule(ABC):
         # 输入输出端口定义（标准化）: {port_name: {"type": str, "desc": str, "required": bool}}
         self.input_ports = {}
         self.output_ports = {}
+        # 有下游消费者的输出端口集合 (执行器在规划/连接变化时设置)；None 表示未知，视为全部需要
+        self._consumed_outputs: Optional[frozenset] = None
 
         # 注册标准端口（子类可覆盖 _define_ports）
         self._define_ports()
@@ -156,6 +163,16 @@ class BaseModule(ABC):
             if k in self.output_ports:
                 self.outputs[k] = v
 
+    # ------------------- 按需输出 -------------------
+    def set_consumed_outputs(self, ports: Optional[Any]):
+        """由执行器设置有下游连接的输出端口；None 表示未知 (独立调用/关闭按需输出)，所有端口均需产出。"""
+        self._consumed_outputs = None if ports is None else frozenset(ports)
+
+    def is_output_consumed(self, port: str) -> bool:
+        """输出端口是否有消费者。子类据此跳过无人使用端口的昂贵计算 (标注/颜色转换等)。"""
+        consumed = self._consumed_outputs
+        return consumed is None or port in consumed
+
     def clear_io(self):
         self.inputs.clear()
         self.outputs.clear()
@@ -356,6 +373,12 @@ class BaseModule(ABC):
             "capabilities": self.capabilities.to_dict(),
         }
         
+    def get_retained_buffers(self) -> Dict[str, Any]:
+        """返回模块内部跨周期保留的数据 (缓存/队列等)，供执行器统计驻留内存。
+        子类有缓存时重写，返回 {名称: 数据引用}；默认无。
+        """
+        return {}
+
     def set_property(self, key: str, value: Any):
         """设置模块属性"""
         self.properties[key] = value
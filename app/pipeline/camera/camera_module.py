@@ -89,11 +89,14 @@ class CameraModule(BaseModule):
             "target_fps": 30.0,
             "drop_if_slow": True
         })
-        self._last_frame: Optional[np.ndarray] = None
+        self._last_frame: Optional[np.ndarray] = None  # 最近采集的原始 BGR 帧
         self._last_ts: float = 0.0
+        # 最近一次颜色转换结果缓存 (原始帧引用, 转换后帧)，重复输出同一帧时不再转换
+        self._converted: tuple = (None, None)
         self._frame_counter: int = 0
         self._last_output_ts: float = 0.0
         self._start_time: float = time.time()
+        self._dropped_frames: int = 0  # 队列满时丢弃的旧帧数
 
     @property
     def module_type(self) -> ModuleType:
@@ -122,6 +125,7 @@ class CameraModule(BaseModule):
         self._close_camera()
 
     def _on_configure(self, config: Dict[str, Any]):
+        self._converted = (None, None)  # format 可能变化
         if self.camera and self.camera.isOpened():
             self._configure_camera()
 
@@ -177,12 +181,14 @@ class CameraModule(BaseModule):
                 time.sleep(0.01)
                 continue
             ts = time.time()
-            processed = self._process_frame(frame)
+            # 颜色转换延迟到 process() 输出时进行: 被丢弃/节流的帧与无人消费 image 端口时不做转换
+            processed = frame
             self._last_frame = processed
             self._last_ts = ts
             if self.frame_queue.full():
                 try:
-                    self.frame_queue.get_nowait()
+                    self.buffer_pool.release(self.frame_queue.get_nowait())
+                    self._dropped_frames += 1
                 except Empty:
                     pass
             # 使用缓冲池容器减少字典对象频繁分配
@@ -209,6 +215,17 @@ class CameraModule(BaseModule):
             return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         return frame
 
+    def _output_frame(self, frame: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """按需颜色转换: image 端口无下游消费者时返回 None。"""
+        if frame is None or not self.is_output_consumed("image"):
+            return None
+        src, converted = self._converted
+        if src is frame:
+            return converted
+        converted = self._process_frame(frame)
+        self._converted = (frame, converted)
+        return converted
+
     def process(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         if not self.is_capturing:
             return {"meta": {"error": "not-started", "camera_id": self.camera_id}}
@@ -245,11 +262,28 @@ class CameraModule(BaseModule):
             "output_fps_est": (self._frame_counter / max(now - self._start_time, 1e-3)),
             "throttled": not allow_new,
             "queue_size": self.frame_queue.qsize(),
+            "dropped_frames": self._dropped_frames,
         }
+        image = self._output_frame(image)
         if image is None:
             return {"meta": meta}
         return {"image": image, "meta": meta}
 
+    def get_status(self) -> Dict[str, Any]:
+        base = super().get_status()
+        base.update({
+            "is_capturing": self.is_capturing,
+            "queue_size": self.frame_queue.qsize(),
+            "dropped_frames": self._dropped_frames,
+            "frames_output": self._frame_counter,
+        })
+        return base
+
+    def get_retained_buffers(self) -> Dict[str, Any]:
+        with self.frame_queue.mutex:
+            queued = list(self.frame_queue.queue)
+        return {"frame_queue": queued, "last_frame": self._last_frame}
+
     def get_camera_info(self) -> Dict[str, Any]:
         if not self.camera or not self.camera.isOpened():
             return {}
@@ -116,6 +116,9 @@ class ImageDisplayModule(BaseModule):
         if self._should_update(img):
             self.last_image = img
             self._change_counter += 1
+        # meta 无下游消费者时不构造 (image 保留: 画布缩略图读取该输出)
+        if not self.is_output_consumed("meta"):
+            return {"image": img, "meta": None}
         return {
             "image": img,
             "meta": {
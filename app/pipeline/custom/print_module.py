@@ -2,9 +2,10 @@
 # -*- coding: utf-8 -*-
 """(moved) 打印模块"""
 from typing import Dict, Any
-from app.pipeline.base_module import BaseModule, ModuleType
+from app.pipeline.base_module import BaseModule, ModuleType, ModuleCapabilities
 
 class PrintModule(BaseModule):
+    CAPABILITIES = ModuleCapabilities(resource_tags=["print"], throughput_hint=1000.0, side_effects=True)
     def __init__(self, name: str = "打印模块"):
         self.last_text = None
         super().__init__(name)
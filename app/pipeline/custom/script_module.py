@@ -22,10 +22,12 @@ from __future__ import annotations
 from typing import Any, Dict
 import time, traceback, hashlib
 
-from app.pipeline.base_module import BaseModule, ModuleType
+from app.pipeline.base_module import BaseModule, ModuleType, ModuleCapabilities
 
 class ScriptModule(BaseModule):
     module_type = ModuleType.CUSTOM
+    # 用户脚本可能有任意副作用，图优化不会将其作为死节点消除
+    CAPABILITIES = ModuleCapabilities(resource_tags=["script"], side_effects=True)
 
     def __init__(self, name: str = "脚本模块"):
         super().__init__(name=name)
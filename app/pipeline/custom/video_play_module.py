@@ -135,6 +135,7 @@ class VideoPlayModule(BaseModule):
         self._total_frames: Optional[int] = None
         self._last_frame_shape: Optional[tuple] = None
         self._speed_factor: float = 1.0
+        self._dropped_frames: int = 0  # process 取最新帧时丢弃的积压帧数
 
     @property
     def module_type(self) -> ModuleType:
@@ -357,6 +358,8 @@ class VideoPlayModule(BaseModule):
         while True:
             try:
                 item = self._queue.get_nowait()
+                if frame is not None:
+                    self._dropped_frames += 1
                 frame = item
             except Empty:
                 break
@@ -413,6 +416,11 @@ class VideoPlayModule(BaseModule):
             return {"meta": meta}
         return {"image": frame, "meta": meta}
 
+    def get_retained_buffers(self) -> Dict[str, Any]:
+        with self._queue.mutex:
+            queued = list(self._queue.queue)
+        return {"_queue": queued}
+
     def get_status(self) -> Dict[str, Any]:
         base = super().get_status()
         base.update({
@@ -421,5 +429,7 @@ class VideoPlayModule(BaseModule):
             "original_fps": self._orig_fps,
             "paused": self._paused,
             "speed": self._speed_factor,
+            "queue_size": self._queue.qsize(),
+            "dropped_frames": self._dropped_frames,
         })
         return base
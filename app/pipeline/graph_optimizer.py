@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静态图优化 (构建/规划阶段)
+1. 死节点消除: 从汇点 (有副作用或无输出端口的模块) 反向遍历，无法到达任何汇点的节点被移除。
+2. 链融合: 连续的轻量非阻塞节点 (前一节点仅有一个后继、后一节点仅有一个前驱) 合并为一个调度单元，
+   执行器按单元调度，省去中间节点的层级屏障与线程池提交开销。
+   轻量需显式声明 throughput_hint >= CHEAP_THROUGHPUT_HINT；有副作用的模块 (含脚本) 从不融合。
+
+只做结构分析，返回结果由 PipelineExecutor.optimize_graph 应用。
+"""
+from typing import Any, Dict, List, Optional
+
+# 视为有副作用 (汇点) 的资源标签
+SIDE_EFFECT_TAGS = frozenset({'viewer', 'io', 'save', 'modbus', 'print', 'script'})
+# throughput_hint 不低于该值 (次/秒) 视为轻量；0 (未声明) 不视为轻量
+CHEAP_THROUGHPUT_HINT = 100.0
+# 已有实测平均耗时时，超过该值 (秒) 不融合
+CHEAP_AVG_TIME_S = 0.002
+
+
+def has_side_effects(module) -> bool:
+    """模块是否有外部副作用。显式 side_effects 优先，其次按资源标签与输出端口推断。"""
+    caps = module.capabilities
+    explicit = getattr(caps, 'side_effects', None)
+    if explicit is not None:
+        return bool(explicit)
+    if SIDE_EFFECT_TAGS.intersection(caps.resource_tags or []):
+        return True
+    return not module.output_ports
+
+
+def is_cheap(module, avg_time: Optional[float] = None) -> bool:
+    """轻量非阻塞模块判定 (可参与链融合)。未声明耗时的模块不视为轻量: GUI 每次运行新建执行器，
+    通常没有实测耗时可供判断。"""
+    caps = module.capabilities
+    if caps.may_block or caps.supports_async:
+        return False
+    if has_side_effects(module) or 'script' in (caps.resource_tags or []):
+        return False
+    if (caps.throughput_hint or 0.0) < CHEAP_THROUGHPUT_HINT:
+        return False
+    if avg_time is not None and avg_time > CHEAP_AVG_TIME_S:
+        return False
+    return True
+
+
+def find_dead_nodes(nodes: Dict[str, Any]) -> List[str]:
+    """返回无法到达任何汇点的节点 ID (保持原有顺序)。nodes: {node_id: PipelineNode}"""
+    live = set()
+    stack = [nid for nid, node in nodes.items() if has_side_effects(node.module)]
+    while stack:
+        nid = stack.pop()
+        if nid in live:
+            continue
+        live.add(nid)
+        for pred in nodes[nid].predecessors:
+            if pred.node_id not in live:
+                stack.append(pred.node_id)
+    return [nid for nid in nodes if nid not in live]
+
+
+def find_fusible_chains(nodes: Dict[str, Any], perf_stats: Optional[Dict[str, Dict[str, float]]] = None) -> List[List[str]]:
+    """查找可融合的线性链 (长度 >= 2)。
+
+    链内相邻节点 a->b 满足: a 唯一后继为 b、b 唯一前驱为 a，且两者均为轻量节点。
+    链首可有多个前驱，链尾可有多个后继。
+    """
+    perf_stats = perf_stats or {}
+    cheap = {nid for nid, node in nodes.items()
+             if is_cheap(node.module, perf_stats.get(nid, {}).get('avg_time'))}
+    nxt: Dict[str, str] = {}
+    for nid in cheap:
+        node = nodes[nid]
+        if len(node.predecessors) != 1:
+            continue
+        pred = node.predecessors[0]
+        if pred.node_id in cheap and len(pred.successors) == 1:
+            nxt[pred.node_id] = nid
+    continuations = set(nxt.values())
+    chains: List[List[str]] = []
+    for nid in nodes:  # 按插入顺序输出，结果稳定
+        if nid not in cheap or nid in continuations or nid not in nxt:
+            continue
+        chain = [nid]
+        while chain[-1] in nxt:
+            chain.append(nxt[chain[-1]])
+        chains.append(chain)
+    return chains
+
+
+def contract_levels(levels: List[List[str]], chains: List[List[str]]) -> List[List[str]]:
+    """将执行层级中的链成员折叠到链首所在层 (仅保留链首)，去掉空层。"""
+    members = {nid for chain in chains for nid in chain[1:]}
+    out = []
+    for level in levels:
+        kept = [nid for nid in level if nid not in members]
+        if kept:
+            out.append(kept)
+    return out
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+负载大小与内存统计
+- estimate_size: 估算端口数据大小 (ndarray 使用 nbytes，list/dict 递归估算，大列表抽样外推)。
+- PayloadTracker: 按输出端口 / 连接边统计字节数与字节速率。
+- tracemalloc 快照与差异对比，用于定位运行期间内存增长来源。
+"""
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+# 列表/字典超过该元素数时只抽样前 N 个并按比例外推，避免统计本身成为瓶颈
+_SAMPLE_ITEMS = 32
+
+
+def estimate_size(obj: Any, max_depth: int = 4) -> int:
+    """估算对象占用字节数。
+
+    - numpy.ndarray / 具备 nbytes 属性的对象: 直接返回 nbytes
+    - torch.Tensor: element_size * nelement
+    - bytes/str: 长度 (+对象头)
+    - list/tuple/set/dict: 递归求和；元素过多时抽样外推
+    共享引用不去重 (用于评估数据流经边的负载量，而非精确堆占用)。
+    """
+    return _estimate(obj, max_depth)
+
+
+def _estimate(obj: Any, depth: int) -> int:
+    if obj is None:
+        return 0
+    nbytes = getattr(obj, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if hasattr(obj, 'element_size') and hasattr(obj, 'nelement'):
+        try:
+            return int(obj.element_size() * obj.nelement())
+        except Exception:
+            pass
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+    if isinstance(obj, (str, int, float, bool)):
+        return sys.getsizeof(obj)
+    if depth <= 0:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        n = len(obj)
+        if n == 0:
+            return sys.getsizeof(obj)
+        items = list(obj.items())[:_SAMPLE_ITEMS] if n > _SAMPLE_ITEMS else obj.items()
+        part = sum(_estimate(k, depth - 1) + _estimate(v, depth - 1) for k, v in items)
+        scale = n / _SAMPLE_ITEMS if n > _SAMPLE_ITEMS else 1.0
+        return sys.getsizeof(obj) + int(part * scale)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        n = len(obj)
+        if n == 0:
+            return sys.getsizeof(obj)
+        seq = obj if isinstance(obj, (list, tuple)) else list(obj)
+        sample = seq[:_SAMPLE_ITEMS] if n > _SAMPLE_ITEMS else seq
+        part = sum(_estimate(v, depth - 1) for v in sample)
+        scale = n / _SAMPLE_ITEMS if n > _SAMPLE_ITEMS else 1.0
+        return sys.getsizeof(obj) + int(part * scale)
+    return sys.getsizeof(obj)
+
+
+class PayloadTracker:
+    """按端口/连接边统计负载。
+
+    端口键: "node_id.port"；边键: "src.port->dst.port"。
+    字节速率按 rate_window_s 滚动窗口计算 (上一个完整窗口的 bytes/s)。
+    """
+
+    def __init__(self, rate_window_s: float = 1.0):
+        self.rate_window_s = max(0.1, float(rate_window_s))
+        self._ports: Dict[str, Dict[str, float]] = {}
+        self._edges: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _update(self, table: Dict[str, Dict[str, float]], key: str, size: int, now: float):
+        st = table.get(key)
+        if st is None:
+            st = {'count': 0, 'last_bytes': 0, 'max_bytes': 0, 'total_bytes': 0,
+                  'bytes_per_sec': 0.0, '_win_start': now, '_win_bytes': 0}
+            table[key] = st
+        st['count'] += 1
+        st['last_bytes'] = size
+        st['total_bytes'] += size
+        if size > st['max_bytes']:
+            st['max_bytes'] = size
+        st['_win_bytes'] += size
+        elapsed = now - st['_win_start']
+        if elapsed >= self.rate_window_s:
+            st['bytes_per_sec'] = st['_win_bytes'] / elapsed
+            st['_win_start'] = now
+            st['_win_bytes'] = 0
+
+    def record(self, node_id: str, port: str, size: int, edges: List[Tuple[str, str]]):
+        """记录一次端口输出；edges 为 [(target_node_id, target_port), ...]。"""
+        now = time.time()
+        with self._lock:
+            self._update(self._ports, f"{node_id}.{port}", size, now)
+            for target_id, target_port in edges:
+                self._update(self._edges, f"{node_id}.{port}->{target_id}.{target_port}", size, now)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            ports = {k: {kk: vv for kk, vv in v.items() if not kk.startswith('_')} for k, v in self._ports.items()}
+            edges = {k: {kk: vv for kk, vv in v.items() if not kk.startswith('_')} for k, v in self._edges.items()}
+        return {'ports': ports, 'edges': edges}
+
+    def reset(self):
+        with self._lock:
+            self._ports.clear()
+            self._edges.clear()
+
+
+# ---------- tracemalloc 快照 ----------
+def take_tracemalloc_snapshot(frames: int = 10) -> tracemalloc.Snapshot:
+    """获取 tracemalloc 快照；若尚未开启追踪则先启动 (之前的分配不会被记录)。"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return tracemalloc.take_snapshot()
+
+
+def diff_tracemalloc_snapshots(old: tracemalloc.Snapshot, new: tracemalloc.Snapshot,
+                               limit: int = 20, key_type: str = 'lineno') -> List[Dict[str, Any]]:
+    """对比两个快照，返回按增长量排序的前 limit 项。"""
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ]
+    old = old.filter_traces(filters)
+    new = new.filter_traces(filters)
+    out: List[Dict[str, Any]] = []
+    for stat in new.compare_to(old, key_type)[:limit]:
+        frame = stat.traceback[0] if stat.traceback else None
+        out.append({
+            'location': f"{frame.filename}:{frame.lineno}" if frame else '?',
+            'size_diff': stat.size_diff,
+            'size': stat.size,
+            'count_diff': stat.count_diff,
+            'count': stat.count,
+        })
+    return out
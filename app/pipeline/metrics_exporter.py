@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prometheus 指标导出
+内嵌 stdlib http.server 后台线程，GET /metrics 返回 Prometheus 文本格式 (0.0.4)。
+
+数据来源: PipelineExecutor.get_status() / get_metrics() 与各模块 get_status()。
+快照采集与序列化均在 HTTP 线程完成，执行线程只在 get_metrics 复制统计字典时短暂持锁；
+快照按 min_refresh_s 缓存，频繁抓取不会反复遍历模块。
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 模块 get_status() 字段 -> (指标名, 类型, 说明)
+_MODULE_FIELD_METRICS: Dict[str, Tuple[str, str, str]] = {
+    'queue_size': ('fahai_module_queue_depth', 'gauge', 'Frames/items waiting in module internal queue'),
+    'dropped_frames': ('fahai_module_dropped_frames_total', 'counter', 'Frames dropped by module queues'),
+    'model_loaded': ('fahai_model_loaded', 'gauge', 'Model weights loaded (1/0)'),
+    'warming': ('fahai_model_warming', 'gauge', 'Model warmup in progress (1/0)'),
+    'warmup_done': ('fahai_model_warmup_done', 'gauge', 'Model warmup completed (1/0)'),
+    'warmup_iters_completed': ('fahai_model_warmup_iterations', 'gauge', 'Completed warmup iterations'),
+    'model_refs': ('fahai_model_shared_refs', 'gauge', 'Nodes sharing this module\'s cached model'),
+}
+
+# 模型缓存统计字段 -> (指标名, 类型, 说明)
+_MODEL_CACHE_METRICS: Dict[str, Tuple[str, str, str]] = {
+    'hits': ('fahai_model_cache_hits_total', 'counter', 'Model cache hits'),
+    'misses': ('fahai_model_cache_misses_total', 'counter', 'Model cache misses'),
+    'evictions': ('fahai_model_cache_evictions_total', 'counter', 'Models evicted from the cache'),
+    'load_errors': ('fahai_model_cache_load_errors_total', 'counter', 'Failed model loads'),
+    'load_seconds': ('fahai_model_cache_load_seconds_total', 'counter', 'Time spent loading models'),
+    'entries': ('fahai_model_cache_entries', 'gauge', 'Models held in the cache'),
+    'bytes': ('fahai_model_cache_bytes', 'gauge', 'Estimated bytes held by cached models'),
+    'budget_bytes': ('fahai_model_cache_budget_bytes', 'gauge', 'Model cache memory budget'),
+}
+
+_PIPELINE_STATES = ('idle', 'running', 'paused', 'stopping', 'stopped', 'error')
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**kw) -> str:
+    if not kw:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in kw.items()) + '}'
+
+
+def _num(v: Any) -> Optional[float]:
+    if isinstance(v, bool):
+        return 1.0 if v else 0.0
+    if isinstance(v, (int, float)):
+        return float(v)
+    return None
+
+
+def collect_snapshot(executor) -> Dict[str, Any]:
+    """从执行器采集一次只读快照 (在调用方线程执行)。"""
+    modules: Dict[str, Dict[str, Any]] = {}
+    for node_id, node in list(executor.nodes.items()):
+        try:
+            modules[node_id] = node.module.get_status()
+        except Exception as e:
+            modules[node_id] = {'name': node_id, 'status': 'error', 'errors': [str(e)]}
+    # 模型缓存仅在已被模型模块导入时采集 (不为导出指标引入依赖)
+    cache_mod = sys.modules.get('app.models.model_cache')
+    model_cache = None
+    if cache_mod is not None:
+        try:
+            model_cache = cache_mod.get_model_cache().stats()
+        except Exception:
+            model_cache = None
+    return {
+        'name': executor.name,
+        'status': executor.get_status(),
+        'metrics': executor.get_metrics(),
+        'modules': modules,
+        'model_cache': model_cache,
+        'timestamp': time.time(),
+    }
+
+
+def format_prometheus(snapshot: Dict[str, Any]) -> str:
+    """将快照序列化为 Prometheus 文本格式。"""
+    lines: List[str] = []
+    pipe = snapshot.get('name', 'pipeline')
+
+    def family(name: str, mtype: str, help_text: str, samples: List[Tuple[str, float]]):
+        if not samples:
+            return
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {mtype}')
+        for labels, value in samples:
+            lines.append(f'{name}{labels} {value:.17g}')
+
+    st = snapshot.get('status', {})
+    cur_state = st.get('status', 'idle')
+    family('fahai_pipeline_state', 'gauge', 'Pipeline state (1 for current state)',
+           [(_labels(pipeline=pipe, state=s), 1.0 if s == cur_state else 0.0) for s in _PIPELINE_STATES])
+    family('fahai_pipeline_cycles_total', 'counter', 'Executed pipeline cycles',
+           [(_labels(pipeline=pipe), float(st.get('execution_count', 0)))])
+    family('fahai_pipeline_cycle_seconds_total', 'counter', 'Total time spent in pipeline cycles',
+           [(_labels(pipeline=pipe), float(st.get('total_execution_time', 0.0)))])
+    family('fahai_pipeline_cycle_rate', 'gauge', 'Cycles per second derived from average cycle time',
+           [(_labels(pipeline=pipe), float(st.get('throughput', 0.0)))])
+    family('fahai_pipeline_errors_total', 'counter', 'Pipeline execution errors',
+           [(_labels(pipeline=pipe), float(st.get('error_count', 0)))])
+    family('fahai_pipeline_nodes', 'gauge', 'Number of nodes in the pipeline',
+           [(_labels(pipeline=pipe), float(st.get('node_count', 0)))])
+
+    nodes = snapshot.get('metrics', {}).get('nodes', {})
+    modules = snapshot.get('modules', {})
+
+    def node_labels(nid: str) -> str:
+        m = modules.get(nid, {})
+        return _labels(pipeline=pipe, node=nid, module=m.get('name', nid))
+
+    family('fahai_node_executions_total', 'counter', 'Node run_cycle executions',
+           [(node_labels(n), float(s.get('exec_count', 0))) for n, s in nodes.items()])
+    family('fahai_node_seconds_total', 'counter', 'Total node run_cycle time',
+           [(node_labels(n), float(s.get('total_time', 0.0))) for n, s in nodes.items()])
+    family('fahai_node_latency_seconds', 'gauge', 'Node run_cycle latency by statistic',
+           [(_labels(pipeline=pipe, node=n, module=modules.get(n, {}).get('name', n), stat=k),
+             float(s.get(f'{k}_time', 0.0)))
+            for n, s in nodes.items() for k in ('last', 'avg', 'max')])
+
+    family('fahai_module_running', 'gauge', 'Module status is running (1/0)',
+           [(node_labels(n), 1.0 if m.get('status') == 'running' else 0.0) for n, m in modules.items()])
+    family('fahai_module_errors', 'gauge', 'Number of recorded module errors',
+           [(node_labels(n), float(len(m.get('errors') or []))) for n, m in modules.items()])
+    for field, (metric, mtype, help_text) in _MODULE_FIELD_METRICS.items():
+        samples = []
+        for n, m in modules.items():
+            v = _num(m.get(field))
+            if v is not None:
+                samples.append((node_labels(n), v))
+        family(metric, mtype, help_text, samples)
+    cache = snapshot.get('model_cache')
+    if cache:
+        for field, (metric, mtype, help_text) in _MODEL_CACHE_METRICS.items():
+            v = _num(cache.get(field))
+            if v is not None:
+                family(metric, mtype, help_text, [('', v)])
+    lines.append('')
+    return '\n'.join(lines)
+
+
+class MetricsExporter:
+    """后台 HTTP 指标端点。
+
+    executor 可在运行期间通过 set_executor 替换 (GUI 每次运行会重建执行器)。
+    """
+
+    def __init__(self, executor=None, host: str = '127.0.0.1', port: int = 9464,
+                 min_refresh_s: float = 0.5):
+        self._executor = executor
+        self.host = host
+        self.port = int(port)
+        self.min_refresh_s = max(0.0, float(min_refresh_s))
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._cache_lock = threading.Lock()
+        self._cache_body: Optional[bytes] = None
+        self._cache_ts = 0.0
+        self.scrape_count = 0
+
+    def set_executor(self, executor):
+        self._executor = executor
+        with self._cache_lock:
+            self._cache_body = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        if self._server:
+            return self._server.server_address[:2]
+        return self.host, self.port
+
+    def render(self) -> bytes:
+        """生成 (或复用缓存的) 指标文本。"""
+        now = time.time()
+        with self._cache_lock:
+            if self._cache_body is not None and (now - self._cache_ts) < self.min_refresh_s:
+                return self._cache_body
+            ex = self._executor
+            if ex is None:
+                body = b'# no executor attached\n'
+            else:
+                body = format_prometheus(collect_snapshot(ex)).encode('utf-8')
+            self._cache_body = body
+            self._cache_ts = now
+            return body
+
+    def start(self) -> bool:
+        if self.is_running:
+            return False
+        exporter = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                try:
+                    body = exporter.render()
+                except Exception as e:
+                    self.send_error(500, str(e))
+                    return
+                exporter.scrape_count += 1
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # 静默访问日志
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                        name='metrics-http')
+        self._thread.start()
+        return True
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self._server = None
+        self._thread = None
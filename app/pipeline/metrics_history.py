@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能指标历史 (多分辨率环形缓冲)
+每个序列 (整体周期 / 单节点) 按多个分辨率分桶聚合: 默认 1s x 600 (10 分钟) 与 60s x 1440 (24 小时)。
+每个分辨率为定长 numpy 数组 (桶号/次数/耗时总和/最大耗时)，内存占用固定，不随运行时长增长。
+写入为 O(1) 标量更新；查询按桶号向量化取出，空桶补零，便于直接绘制吞吐/延迟趋势。
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (分辨率秒, 桶数)
+DEFAULT_RESOLUTIONS: Tuple[Tuple[float, int], ...] = ((1.0, 600), (60.0, 1440))
+
+CYCLE_SERIES = '__cycle__'
+
+
+class RingSeries:
+    """单分辨率环形缓冲: 槽位 = 桶号 % capacity，槽内桶号过期时重置。"""
+
+    def __init__(self, resolution_s: float, capacity: int):
+        self.resolution_s = float(resolution_s)
+        self.capacity = int(capacity)
+        self._bucket = np.full(self.capacity, -1, dtype=np.int64)
+        self._count = np.zeros(self.capacity, dtype=np.int64)
+        self._sum = np.zeros(self.capacity, dtype=np.float64)
+        self._max = np.zeros(self.capacity, dtype=np.float64)
+
+    def add(self, ts: float, value: float):
+        b = int(ts // self.resolution_s)
+        i = b % self.capacity
+        if self._bucket[i] != b:
+            self._bucket[i] = b
+            self._count[i] = 0
+            self._sum[i] = 0.0
+            self._max[i] = 0.0
+        self._count[i] += 1
+        self._sum[i] += value
+        if value > self._max[i]:
+            self._max[i] = value
+
+    def query(self, start_ts: float, end_ts: float) -> Dict[str, np.ndarray]:
+        """返回 [start_ts, end_ts] 覆盖的全部桶 (超出保留范围的部分截断)，空桶 count=0。"""
+        hi = int(end_ts // self.resolution_s)
+        lo = max(int(start_ts // self.resolution_s), hi - self.capacity + 1)
+        if lo > hi:
+            empty = np.zeros(0, dtype=np.float64)
+            return {'ts': empty, 'count': np.zeros(0, dtype=np.int64), 'rate': empty,
+                    'mean': empty, 'max': empty}
+        ids = np.arange(lo, hi + 1, dtype=np.int64)
+        slots = ids % self.capacity
+        hit = self._bucket[slots] == ids
+        count = np.where(hit, self._count[slots], 0)
+        total = np.where(hit, self._sum[slots], 0.0)
+        mx = np.where(hit, self._max[slots], 0.0)
+        mean = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+        return {
+            'ts': ids.astype(np.float64) * self.resolution_s,
+            'count': count,
+            'rate': count / self.resolution_s,
+            'mean': mean,
+            'max': mx,
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return self._bucket.nbytes + self._count.nbytes + self._sum.nbytes + self._max.nbytes
+
+
+class MetricsHistory:
+    """整体周期与各节点耗时的多分辨率历史。
+
+    record_cycle / record_node 在执行线程调用；query 可在任意线程调用。
+    """
+
+    def __init__(self, resolutions: Sequence[Tuple[float, int]] = DEFAULT_RESOLUTIONS):
+        self.resolutions: Tuple[Tuple[float, int], ...] = tuple((float(r), int(c)) for r, c in resolutions)
+        self._series: Dict[str, List[RingSeries]] = {}
+        self._lock = threading.Lock()
+
+    def _rings(self, key: str) -> List[RingSeries]:
+        rings = self._series.get(key)
+        if rings is None:
+            rings = [RingSeries(r, c) for r, c in self.resolutions]
+            self._series[key] = rings
+        return rings
+
+    def record(self, key: str, duration: float, ts: Optional[float] = None):
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            for ring in self._rings(key):
+                ring.add(ts, duration)
+
+    def record_cycle(self, duration: float, ts: Optional[float] = None):
+        self.record(CYCLE_SERIES, duration, ts)
+
+    def record_node(self, node_id: str, duration: float, ts: Optional[float] = None):
+        self.record(node_id, duration, ts)
+
+    def series(self) -> List[str]:
+        """已记录的节点序列 (不含整体周期序列)。"""
+        with self._lock:
+            return [k for k in self._series if k != CYCLE_SERIES]
+
+    def query(self, node_id: Optional[str] = None, resolution_s: float = 1.0,
+              window_s: Optional[float] = None, end_ts: Optional[float] = None) -> Dict[str, Any]:
+        """查询趋势数据。
+
+        Args:
+            node_id: 节点 ID；None 表示整体周期序列
+            resolution_s: 选择分辨率 (取不小于该值的最细分辨率，超出则用最粗分辨率)
+            window_s: 时间窗口长度，None 表示该分辨率的全部保留范围
+            end_ts: 窗口结束时间，默认当前时间
+        Returns:
+            {'resolution_s', 'ts', 'count', 'rate', 'mean', 'max'}，数组等长，空桶 count=0
+        """
+        idx = len(self.resolutions) - 1
+        for i, (res, _cap) in enumerate(self.resolutions):
+            if res >= resolution_s:
+                idx = i
+                break
+        res, cap = self.resolutions[idx]
+        end_ts = time.time() if end_ts is None else end_ts
+        span = res * cap if window_s is None else min(float(window_s), res * cap)
+        with self._lock:
+            rings = self._series.get(node_id if node_id is not None else CYCLE_SERIES)
+            if rings is None:
+                data = RingSeries(res, 1).query(1.0, 0.0)
+            else:
+                data = rings[idx].query(end_ts - span + res, end_ts)
+        data['resolution_s'] = res
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(r.nbytes for rings in self._series.values() for r in rings)
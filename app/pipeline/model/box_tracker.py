@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轻量 IoU + 卡尔曼跟踪器 (纯 NumPy)
+检测模块按间隔执行完整检测，中间帧用跟踪器外推检测框并分配稳定的 track_id。
+
+- 状态 [cx, cy, w, h, vx, vy, vw, vh]，匀速模型；所有轨迹的预测/更新按批量矩阵运算完成
+- 关联: IoU 矩阵一次计算 (不同类别置 0)，按 IoU 从大到小贪心匹配
+- 外推帧输出置信度 = 检测置信度 x decay^(距上次检测的帧数)，
+  任一轨迹的外推置信度低于阈值时调用方应提前执行检测
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# 过程/观测噪声相对框尺寸的标准差系数 (与 SORT/DeepSORT 常用取值一致)
+_STD_POS = 1.0 / 20
+_STD_VEL = 1.0 / 160
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(A,4) x (B,4) xyxy -> (A,B) IoU。"""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)), np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return (inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)).astype(np.float32)
+
+
+def greedy_match(iou: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """按 IoU 降序贪心匹配，返回 (行索引, 列索引)。"""
+    rows, cols = np.nonzero(iou >= threshold)
+    if not len(rows):
+        return np.zeros((0,), np.int64), np.zeros((0,), np.int64)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_r, used_c, mr, mc = set(), set(), [], []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if r in used_r or c in used_c:
+            continue
+        used_r.add(r)
+        used_c.add(c)
+        mr.append(r)
+        mc.append(c)
+    return np.asarray(mr, np.int64), np.asarray(mc, np.int64)
+
+
+def _xyxy_to_cxcywh(b: np.ndarray) -> np.ndarray:
+    return np.stack([(b[:, 0] + b[:, 2]) / 2, (b[:, 1] + b[:, 3]) / 2, b[:, 2] - b[:, 0], b[:, 3] - b[:, 1]], axis=1)
+
+
+def _cxcywh_to_xyxy(s: np.ndarray) -> np.ndarray:
+    half_w, half_h = s[:, 2] / 2, s[:, 3] / 2
+    return np.stack([s[:, 0] - half_w, s[:, 1] - half_h, s[:, 0] + half_w, s[:, 1] + half_h], axis=1)
+
+
+class BoxTracker:
+    """多目标框跟踪器。update() 用于检测帧，predict() 用于中间帧。"""
+
+    _F = np.eye(8, dtype=np.float64)
+    _F[:4, 4:] = np.eye(4)
+    _H = np.eye(4, 8, dtype=np.float64)
+
+    def __init__(self, match_iou: float = 0.3, max_age: int = 5, decay: float = 0.9):
+        self.match_iou = float(match_iou)
+        self.max_age = int(max_age)
+        self.decay = float(decay)
+        self.reset()
+
+    def reset(self):
+        self.x = np.zeros((0, 8), np.float64)       # 状态
+        self.P = np.zeros((0, 8, 8), np.float64)    # 协方差
+        self.ids = np.zeros((0,), np.int64)
+        self.cls = np.zeros((0,), np.int32)
+        self.conf = np.zeros((0,), np.float32)      # 最近一次检测置信度
+        self.since_update = np.zeros((0,), np.int32)
+        self._next_id = 1
+        self.frames_since_detection: Optional[int] = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---------------- 卡尔曼 -----------------
+    def _predict_state(self):
+        if not len(self.x):
+            return
+        size = np.maximum(self.x[:, 2:4], 1.0)
+        std = np.concatenate([size * _STD_POS, size * _STD_POS, size * _STD_VEL, size * _STD_VEL], axis=1)
+        Q = np.zeros_like(self.P)
+        idx = np.arange(8)
+        Q[:, idx, idx] = std ** 2
+        self.x = self.x @ self._F.T
+        self.P = self._F @ self.P @ self._F.T + Q
+        # 宽高不允许外推为负
+        self.x[:, 2:4] = np.maximum(self.x[:, 2:4], 1.0)
+
+    def _correct(self, rows: np.ndarray, z: np.ndarray):
+        if not len(rows):
+            return
+        x, P = self.x[rows], self.P[rows]
+        size = np.maximum(z[:, 2:4], 1.0)
+        std = np.concatenate([size * _STD_POS, size * _STD_POS], axis=1)
+        R = np.zeros((len(rows), 4, 4))
+        idx = np.arange(4)
+        R[:, idx, idx] = std ** 2
+        H = self._H
+        S = H @ P @ H.T + R
+        K = P @ H.T @ np.linalg.inv(S)
+        innov = z - x @ H.T
+        self.x[rows] = x + (K @ innov[:, :, None])[:, :, 0]
+        self.P[rows] = (np.eye(8) - K @ H) @ P
+
+    def _spawn(self, z: np.ndarray, conf: np.ndarray, cls: np.ndarray):
+        n = len(z)
+        if not n:
+            return
+        x = np.zeros((n, 8))
+        x[:, :4] = z
+        size = np.maximum(z[:, 2:4], 1.0)
+        std = np.concatenate([size * 2 * _STD_POS, size * 2 * _STD_POS, size * 10 * _STD_VEL,
+                              size * 10 * _STD_VEL], axis=1)
+        P = np.zeros((n, 8, 8))
+        idx = np.arange(8)
+        P[:, idx, idx] = std ** 2
+        self.x = np.concatenate([self.x, x])
+        self.P = np.concatenate([self.P, P])
+        self.ids = np.concatenate([self.ids, np.arange(self._next_id, self._next_id + n)])
+        self._next_id += n
+        self.cls = np.concatenate([self.cls, cls.astype(np.int32)])
+        self.conf = np.concatenate([self.conf, conf.astype(np.float32)])
+        self.since_update = np.concatenate([self.since_update, np.zeros((n,), np.int32)])
+
+    def _drop(self, keep: np.ndarray):
+        self.x, self.P, self.ids = self.x[keep], self.P[keep], self.ids[keep]
+        self.cls, self.conf, self.since_update = self.cls[keep], self.conf[keep], self.since_update[keep]
+
+    # ---------------- 对外接口 -----------------
+    def update(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray) -> np.ndarray:
+        """检测帧: 预测 -> 关联 -> 更新/新建/淘汰，返回与输入检测一一对应的 track_id (int64 (N,))。"""
+        self._predict_state()
+        xyxy = np.asarray(xyxy, np.float32).reshape(-1, 4)
+        cls = np.asarray(cls, np.int32).reshape(-1)
+        conf = np.asarray(conf, np.float32).reshape(-1)
+        iou = iou_matrix(xyxy, self.boxes())
+        iou[cls[:, None] != self.cls[None, :]] = 0.0
+        det_idx, trk_idx = greedy_match(iou, self.match_iou)
+        self._correct(trk_idx, _xyxy_to_cxcywh(xyxy[det_idx]).astype(np.float64))
+        self.conf[trk_idx] = conf[det_idx]
+        self.since_update += 1
+        self.since_update[trk_idx] = 0
+        out = np.zeros((len(xyxy),), np.int64)
+        out[det_idx] = self.ids[trk_idx]
+        new = np.setdiff1d(np.arange(len(xyxy)), det_idx)
+        first_new = self._next_id
+        # 未匹配轨迹超过 max_age 个检测帧未命中则淘汰 (新建轨迹前处理，避免影响索引)
+        self._drop(self.since_update <= self.max_age)
+        self._spawn(_xyxy_to_cxcywh(xyxy[new]).astype(np.float64), conf[new], cls[new])
+        out[new] = np.arange(first_new, first_new + len(new))
+        self.frames_since_detection = 0
+        return out
+
+    def predict(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """中间帧: 外推所有轨迹，返回 (xyxy, conf x quality, cls, track_id)；仅输出本轮检测命中的轨迹。"""
+        self._predict_state()
+        if self.frames_since_detection is not None:
+            self.frames_since_detection += 1
+        live = self.since_update == 0
+        q = self.decay ** (self.frames_since_detection or 0)
+        return (self.boxes()[live], (self.conf[live] * q).astype(np.float32), self.cls[live].copy(),
+                self.ids[live].copy())
+
+    def boxes(self) -> np.ndarray:
+        return _cxcywh_to_xyxy(self.x[:, :4]).astype(np.float32) if len(self.x) else np.zeros((0, 4), np.float32)
+
+    def min_confidence(self, ahead: int = 0) -> Optional[float]:
+        """活动轨迹在 ahead 帧后的最低外推置信度；无活动轨迹时为 None。"""
+        live = self.since_update == 0
+        if self.frames_since_detection is None or not live.any():
+            return None
+        return float(self.conf[live].min() * self.decay ** (self.frames_since_detection + ahead))
+
+    def need_detection(self, interval: int, min_conf: float) -> bool:
+        """按检测间隔或外推置信度判断下一帧是否执行完整检测。"""
+        if self.frames_since_detection is None:
+            return True
+        if self.frames_since_detection + 1 >= max(1, int(interval)):
+            return True
+        low = self.min_confidence(ahead=1)
+        return low is not None and low < min_conf
+
+    def stats(self) -> Dict[str, int]:
+        return {"tracks": int(len(self)), "active": int((self.since_update == 0).sum()), "next_id": int(self._next_id)}
@@ -3,6 +3,21 @@
 """
 模型推理模块 (完整版本)
 原始实现迁移至分类目录，保留加载/预处理/后处理框架。
+
+推理后端:
+- opencv_dnn: cv2.dnn 加载 ONNX 在 CPU 上推理 (无需 torch)，后处理按 YOLO 输出解码 + NMS。
+  YOLO 导出的 ONNX 期望输入为 0~1 的 RGB，需将 preprocessing.mean/std 设为 [0,0,0]/[1,1,1]。
+
+热切换 (hot_swap=True): 运行中修改 model_path/backend/num_threads 时后台加载新模型并做一次推理预热，
+旧模型继续推理，就绪后在下一次 process() 开始时切换；加载/预热失败则回滚配置并继续使用旧模型。
+
+预处理由 PreprocessEngine 完成 (复用预分配 float32 缓冲区，通道交换/归一化/HWC->CHW 融合为一遍写出)。
+批量: image 端口传入图像列表时按 batch_size 分块推理 (模型需支持对应批大小)，
+detections 为每张图的检测列表，count 为每张图的数量。
+inference_info.stages 记录本次调用各阶段耗时 (resize/normalize/preprocess/inference/postprocess，毫秒)。
+
+CPU 预算: cv2.dnn 线程数为进程级 (num_threads 或并行执行时由执行器按并发模型数设置)，
+本模块只将推理调用线程绑定到 cpu_affinity (空则使用执行器在 cpu_budget=pin 时分配的核心)。
 """
 import os
 import time
@@ -13,7 +28,13 @@ try:
     from pydantic import BaseModel as PydModel, validator
 except ImportError:
     PydModel = object  # type: ignore
-from app.models.base_model import BaseModel as InferenceBaseModel
+from app.models.model_swap import ModelSwapper
+from app.models.opencv_dnn_model import OpenCVDNNModel
+from app.models.preprocess import PreprocessEngine
+from app.models.yolo_postprocess import batched_nms, box_area, decode_yolo, scale_boxes
+from app.utils.cpu_budget import apply_cpu_budget, parse_core_list, resolve_cpu_budget
+
+BACKENDS = ("opencv_dnn",)
 
 
 class ModelModule(BaseModule):
@@ -36,6 +57,10 @@ class ModelModule(BaseModule):
         class_names: List[str] = []
         device: str = "auto"
         batch_size: int = 1
+        backend: str = "opencv_dnn"
+        num_threads: int = 0  # cv2.setNumThreads (进程级)，0 保持 OpenCV 默认
+        hot_swap: bool = True  # 运行中更换模型时后台加载预热，下一周期切换
+        cpu_affinity: str = ""  # 推理线程绑定的核心，如 "0-3" (空则使用执行器分配)
         preprocessing: Dict[str, Any] = {
             "normalize": True,
             "mean": [0.485, 0.456, 0.406],
@@ -68,6 +93,23 @@ class ModelModule(BaseModule):
                 raise ValueError("batch_size 必须 > 0")
             return v
 
+        @validator("backend")
+        def _backend_ok(cls, v):
+            if v not in BACKENDS:
+                raise ValueError(f"backend 必须为 {BACKENDS} 之一")
+            return v
+
+        @validator("num_threads")
+        def _threads_ok(cls, v):
+            if v < 0:
+                raise ValueError("num_threads 不能为负")
+            return v
+
+        @validator("cpu_affinity")
+        def _affinity_ok(cls, v):
+            parse_core_list(v)
+            return v
+
     def __init__(self, name: str = "模型模块"):
         super().__init__(name)
         self.model = None  # 实际推理模型实例
@@ -75,6 +117,15 @@ class ModelModule(BaseModule):
         self.inference_count = 0
         self.total_inference_time = 0.0
         self.last_inference_time = 0.0
+        self._loaded_source: Optional[Tuple[str, str, int]] = None  # (path, backend, threads)
+        # 最近一次预处理的坐标变换: 网络输入 -> 原图
+        self._input_transform: Dict[str, float] = {}
+        # 预处理引擎 (按输入尺寸/批大小复用缓冲区) 与各阶段累计耗时 (ms)
+        self._preprocess = PreprocessEngine()
+        self._stage_totals: Dict[str, float] = {}
+        self._swapper = ModelSwapper(name)
+        # 执行器分配的 CPU 预算 {"threads", "cores"} (见 app.utils.cpu_budget)
+        self.cpu_budget: Optional[Dict[str, Any]] = None
         self.config.update({
             "model_type": "detection",
             "model_path": "",
@@ -86,6 +137,10 @@ class ModelModule(BaseModule):
             "class_names": [],
             "device": "auto",
             "batch_size": 1,
+            "backend": "opencv_dnn",
+            "num_threads": 0,
+            "hot_swap": True,
+            "cpu_affinity": "",
             "preprocessing": {
                 "normalize": True,
                 "mean": [0.485, 0.456, 0.406],
@@ -119,100 +174,227 @@ class ModelModule(BaseModule):
                 raise RuntimeError("模型加载失败")
 
     def _on_stop(self):
-        pass
+        self._swapper.cancel()
 
     def _on_configure(self, config: Dict[str, Any]):
-        # pydantic 校验后模型路径变更需要重新加载
-        if "model_path" in config and config["model_path"] != self.config.get("model_path"):
+        # config 已合并；模型路径/后端/线程数与已加载的不一致时重新加载
+        if self._loaded_source is not None and self._model_source() != self._loaded_source:
+            if bool(self.config.get("hot_swap", True)) and self.model_loaded and self.config.get("model_path"):
+                # 旧模型继续服务，新模型后台加载预热后在周期边界切换
+                self._begin_hot_swap()
+                return
             self.model_loaded = False
-            self._load_model()
+            self.model = None
+            self._loaded_source = None
+            if self.config.get("model_path"):
+                self._load_model()
+        elif self._swapper.pending:
+            self._swapper.cancel()
+
+    def _begin_hot_swap(self):
+        source = self._model_source()
+        if self._swapper.pending and self._swapper.source == source:
+            return  # 同一来源的切换已在进行/已就绪: 无关配置变更不重新加载
+        cfg = dict(self.config)
+
+        def _load():
+            # 切换线程上不修改进程级 OpenCV 线程数 (旧模型仍在服务、执行器可能已设置预算)，生效时再应用
+            model = self._create_model(source[0], cfg, apply_threads=False)
+            if model is None:
+                raise RuntimeError(f"模型加载失败: {source[0]}")
+            return model
+
+        def _warmup(model):
+            outs = model.inference(np.zeros(model.input_shape, np.float32))
+            if not outs:
+                raise RuntimeError("预热推理无输出")
+
+        self._swapper.begin(source, _load, _warmup)
+
+    def _apply_hot_swap(self):
+        """周期边界调用: 切换到已就绪的新模型，或在失败时回滚配置。"""
+        event = self._swapper.take()
+        if event is None:
+            return
+        kind, source, payload = event
+        if kind == "swap":
+            self.model = payload
+            payload.apply_threads()
+            self.model_loaded = True
+            self._loaded_source = source
+            self.logger.info(f"已切换到新模型: {source[0]}")
+            return
+        if self._loaded_source is not None:
+            # 经 configure() 回滚 (校验与属性面板同步)；来源与已加载模型一致，不会再发起切换
+            path, backend, threads = self._loaded_source
+            self.configure(dict(self.config, model_path=path, backend=backend, num_threads=threads))
+        self.logger.warning(f"新模型 {source[0]} 加载/预热失败，继续使用原模型: {payload}")
+
+    def _model_source(self) -> Tuple[str, str, int]:
+        return (str(self.config.get("model_path") or ""), str(self.config.get("backend", "opencv_dnn")),
+                int(self.config.get("num_threads", 0) or 0))
+
+    def _create_model(self, path: str, config: Dict[str, Any], apply_threads: bool = True) -> Optional[OpenCVDNNModel]:
+        """按配置创建并加载后端模型；失败返回 None (原因写入日志)。
+        apply_threads=False 时不设置进程级 OpenCV 线程数 (由调用方在模型生效时调用 apply_threads())。"""
+        if not os.path.exists(path):
+            self.logger.error(f"模型文件不存在: {path}")
+            return None
+        self.logger.info(f"加载模型: {path}")
+        fmt = str(config.get("model_format", "onnx")).lower()
+        if fmt != "onnx":
+            self.logger.error(f"后端 {config.get('backend')} 仅支持 ONNX 模型，当前格式: {fmt}")
+            return None
+        model = OpenCVDNNModel(path, config)
+        if model.load(path, config, apply_threads=apply_threads):
+            return model
+        self.logger.error("模型初始化失败")
+        return None
 
     def _load_model(self) -> bool:
         path = self.config.get("model_path")
         if not path:
             self.logger.warning("未指定模型路径")
             return False
-        if not os.path.exists(path):
-            self.logger.error(f"模型文件不存在: {path}")
-            return False
         try:
-            self.logger.info(f"加载模型: {path}")
-            # 使用基础推理模型占位（真实实现可替换）
-            self.model = InferenceBaseModel()
-            if self.model.load(path, self.config):
-                self.model_loaded = True
-                return True
-            self.logger.error("模型初始化失败")
-            return False
+            model = self._create_model(path, self.config)
+            if model is None:
+                return False
+            self.model = model
+            self.model_loaded = True
+            self._loaded_source = self._model_source()
+            return True
         except Exception as e:
             self.logger.error(f"模型加载异常: {e}")
             return False
 
+    def _preprocess_batch(self, images: List[np.ndarray], rois: List[Optional[Dict]]
+                          ) -> Tuple[np.ndarray, List[Dict[str, float]], Dict[str, float]]:
+        """预处理一批图像 -> (blob (N,3,H,W), 每张图的坐标变换, 阶段耗时 ms)；blob 在下一次调用前有效。"""
+        self._preprocess.configure(self.config.get("input_size", [640, 640]), self.config.get("preprocessing", {}))
+        return self._preprocess.run(images, rois)
+
     def _preprocess_image(self, image: np.ndarray, roi: Optional[Dict] = None) -> Optional[np.ndarray]:
         if image is None:
             return None
-        if roi:
-            x, y = roi.get("x", 0), roi.get("y", 0)
-            w, h = roi.get("width", image.shape[1]), roi.get("height", image.shape[0])
-            image = image[y:y+h, x:x+w]
-        prep = self.config.get("preprocessing", {})
-        if prep.get("bgr2rgb", True) and len(image.shape) == 3:
-            image = image[:, :, ::-1]
-        target = self.config.get("input_size", [640, 640])
-        import cv2
-        if prep.get("letterbox", True):
-            image = self._letterbox_resize(image, target)
-        else:
-            image = cv2.resize(image, tuple(target))
-        if prep.get("normalize", True):
-            image = image.astype(np.float32) / 255.0
-            mean = np.array(prep.get("mean", [0.485, 0.456, 0.406]))
-            std = np.array(prep.get("std", [0.229, 0.224, 0.225]))
-            image = (image - mean) / std
-        if len(image.shape) == 3:
-            image = image.transpose(2, 0, 1)
-            image = np.expand_dims(image, 0)
-        return image
-
-    def _letterbox_resize(self, image: np.ndarray, target_size: List[int]) -> np.ndarray:
-        import cv2
-        h, w = image.shape[:2]
-        tw, th = target_size
-        scale = min(tw / w, th / h)
-        nw, nh = int(w * scale), int(h * scale)
-        resized = cv2.resize(image, (nw, nh))
-        result = np.full((th, tw, 3), 114, dtype=np.uint8)
-        top = (th - nh) // 2
-        left = (tw - nw) // 2
-        result[top:top+nh, left:left+nw] = resized
-        return result
-
-    def _postprocess_results(self, raw: Any, shape: Tuple[int, int]) -> Dict[str, Any]:
-        # 占位后处理，根据模型类型扩展
-        return {"detections": [], "count": 0}
+        blob, transforms, _ = self._preprocess_batch([image], [roi])
+        self._input_transform = transforms[0]
+        return blob
+
+    def _class_name(self, class_id: int) -> str:
+        names = self.config.get("class_names") or []
+        return names[class_id] if 0 <= class_id < len(names) else str(class_id)
+
+    def _postprocess_results(self, raw: Any, shape: Tuple[int, int],
+                             transform: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """解码首个输出: detection 按 YOLO 解码 + 过滤 + NMS，classification 取 top-k。
+        transform 为该图像的预处理坐标变换 (缺省使用最近一次单图预处理的变换)。"""
+        out = raw[0] if isinstance(raw, (list, tuple)) else raw
+        if out is None:
+            return {"detections": [], "count": 0}
+        out = np.asarray(out, dtype=np.float32)
+        names = self.config.get("class_names") or []
+        max_det = int(self.config.get("max_detections", 100) or 0)
+        if self.config.get("model_type") == "classification":
+            probs = out.reshape(-1)
+            k = min(max_det or len(probs), len(probs))
+            idx = np.argsort(-probs, kind="stable")[:k]
+            dets = [{"class_id": int(i), "class_name": self._class_name(int(i)), "confidence": float(probs[i])}
+                    for i in idx if probs[i] >= self.config.get("confidence_threshold", 0.5)]
+            return {"detections": dets, "count": len(dets)}
+        xyxy, scores, cls = decode_yolo(out, float(self.config.get("confidence_threshold", 0.5)),
+                                        len(names) or None)
+        t = transform or self._input_transform or {"scale_x": 1.0, "scale_y": 1.0, "pad_x": 0, "pad_y": 0}
+        crop_shape = (t.get("height", shape[0]), t.get("width", shape[1]))
+        xyxy = scale_boxes(xyxy, t["scale_x"], t["scale_y"], t["pad_x"], t["pad_y"], crop_shape)
+        keep = self._filter_mask(xyxy, cls)
+        xyxy, scores, cls = xyxy[keep], scores[keep], cls[keep]
+        idx = batched_nms(xyxy, scores, cls, float(self.config.get("nms_threshold", 0.4)), max_det)
+        xyxy, scores, cls = xyxy[idx], scores[idx], cls[idx]
+        xyxy[:, [0, 2]] += t.get("roi_x", 0)
+        xyxy[:, [1, 3]] += t.get("roi_y", 0)
+        dets = [{"box": [float(v) for v in b], "confidence": float(s), "class_id": int(c),
+                 "class_name": self._class_name(int(c))}
+                for b, s, c in zip(xyxy, scores, cls)]
+        return {"detections": dets, "count": len(dets)}
+
+    def _filter_mask(self, xyxy: np.ndarray, cls: np.ndarray) -> np.ndarray:
+        """postprocessing 过滤 (类别/面积/宽高比) 在 NMS 之前向量化执行。"""
+        post = self.config.get("postprocessing", {}) or {}
+        keep = np.ones(len(cls), dtype=bool)
+        wanted = post.get("filter_classes") or []
+        if wanted:
+            names = self.config.get("class_names") or []
+            ids = {int(c) if not isinstance(c, str) else (names.index(c) if c in names else -1) for c in wanted}
+            keep &= np.isin(cls, list(ids))
+        area = box_area(xyxy)
+        min_area = post.get("min_area", 0) or 0
+        max_area = post.get("max_area", -1)
+        if min_area > 0:
+            keep &= area >= min_area
+        if max_area is not None and max_area > 0:
+            keep &= area <= max_area
+        ratio_range = post.get("aspect_ratio_range")
+        if ratio_range and len(ratio_range) == 2:
+            w = xyxy[:, 2] - xyxy[:, 0]
+            h = np.maximum(xyxy[:, 3] - xyxy[:, 1], 1e-6)
+            ratio = w / h
+            keep &= (ratio >= ratio_range[0]) & (ratio <= ratio_range[1])
+        return keep
 
     def process(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        # 周期边界: 应用已就绪的热切换模型
+        self._apply_hot_swap()
+        apply_cpu_budget(0, resolve_cpu_budget(self.config, self.cpu_budget)[1])
         if not self.model_loaded or not self.model:
             return {"error": "模型未加载"}
         image = inputs.get("image")
-        if image is None:
+        if image is None or (isinstance(image, (list, tuple)) and not image):
             return {"error": "缺少输入图像"}
+        batched = isinstance(image, (list, tuple))
+        images = list(image) if batched else [image]
         roi = inputs.get("roi")
+        rois = list(roi) if isinstance(roi, (list, tuple)) else [roi] * len(images)
+        chunk = max(1, int(self.config.get("batch_size", 1) or 1))
+        stages = {"resize_ms": 0.0, "normalize_ms": 0.0, "preprocess_ms": 0.0,
+                  "inference_ms": 0.0, "postprocess_ms": 0.0}
+        per_image: List[Dict[str, Any]] = []
         start = time.time()
-        processed = self._preprocess_image(image, roi)
-        if processed is None:
-            return {"error": "预处理失败"}
-        raw = self.model.inference(processed)
-        results = self._postprocess_results(raw, image.shape[:2])
+        for s0 in range(0, len(images), chunk):
+            part = images[s0:s0 + chunk]
+            blob, transforms, timings = self._preprocess_batch(part, rois[s0:s0 + chunk])
+            for k, v in timings.items():
+                stages[k] += v
+            t0 = time.perf_counter()
+            raw = self.model.inference(blob)
+            t1 = time.perf_counter()
+            outs = raw if isinstance(raw, (list, tuple)) else [raw]
+            for j, (img, tr) in enumerate(zip(part, transforms)):
+                item = outs
+                if len(part) > 1:
+                    # 批量输出按首维拆分为单图输出
+                    item = [o[j:j + 1] if np.ndim(o) and np.shape(o)[0] == len(part) else o for o in outs]
+                self._input_transform = tr
+                per_image.append(self._postprocess_results(item, img.shape[:2], tr))
+            stages["inference_ms"] += (t1 - t0) * 1000.0
+            stages["postprocess_ms"] += (time.perf_counter() - t1) * 1000.0
         infer_time = time.time() - start
+        if batched:
+            results = {"detections": [r["detections"] for r in per_image], "count": [r["count"] for r in per_image]}
+        else:
+            results = per_image[0]
         self.inference_count += 1
         self.total_inference_time += infer_time
         self.last_inference_time = infer_time
+        for k, v in stages.items():
+            self._stage_totals[k] = self._stage_totals.get(k, 0.0) + v
         results["inference_info"] = {
             "inference_time": infer_time,
             "inference_count": self.inference_count,
             "average_time": self.total_inference_time / self.inference_count,
-            "timestamp": time.time()
+            "timestamp": time.time(),
+            "batch": len(images),
+            "stages": {k: round(v, 3) for k, v in stages.items()},
         }
         return results
 
@@ -223,5 +405,27 @@ class ModelModule(BaseModule):
             "total_time": self.total_inference_time,
             "average_time": avg,
             "last_inference_time": self.last_inference_time,
-            "fps": 1.0 / avg if avg > 0 else 0
+            "fps": 1.0 / avg if avg > 0 else 0,
+            # 各阶段平均耗时 (ms/次调用)
+            "stage_average_ms": {k: round(v / self.inference_count, 3) for k, v in self._stage_totals.items()}
+            if self.inference_count else {},
         }
+
+    def get_status(self) -> Dict[str, Any]:
+        base = super().get_status()
+        info = {}
+        try:
+            if self.model is not None:
+                info = self.model.get_model_info()
+        except Exception:
+            pass
+        base.update({
+            "backend": self.config.get("backend"),
+            "num_threads": self.config.get("num_threads", 0),
+            "model_loaded": self.model_loaded,
+            "model_info": info,
+            "hot_swap": self._swapper.stats(),
+            "cpu_affinity": resolve_cpu_budget(self.config, self.cpu_budget)[1],
+            "preprocess": self._preprocess.stats(),
+        })
+        return base
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运动/变化门控
+传送带场景中大部分帧是空皮带，逐帧推理浪费算力。MotionGate 在缩小的灰度图上计算变化分数
+(与参考帧的绝对差超过 pixel_threshold 的像素比例)，低于 threshold 时判定为无变化，
+调用方可跳过推理并复用上次结果。
+
+参考帧 (reference):
+  inferred  最近一次执行推理的帧 (默认；缓慢漂移会累积直至超过阈值，缓存结果始终对应参考帧)
+  previous  上一帧 (只对帧间突变敏感)
+max_skip > 0 时连续跳过该帧数后强制推理一次。
+"""
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+GATE_REFERENCES = ("inferred", "previous")
+
+
+class MotionGate:
+    def __init__(self, threshold: float = 0.01, pixel_threshold: int = 25, width: int = 160,
+                 reference: str = "inferred", max_skip: int = 0):
+        self.threshold = float(threshold)
+        self.pixel_threshold = int(pixel_threshold)
+        self.width = int(width)
+        self.reference = reference
+        self.max_skip = int(max_skip)
+        self._ref: Optional[np.ndarray] = None
+        self._src_shape: Optional[tuple] = None
+        self.reset_stats()
+
+    def configure(self, threshold: float, pixel_threshold: int, width: int, reference: str, max_skip: int):
+        changed = (int(width) != self.width)
+        self.threshold = float(threshold)
+        self.pixel_threshold = int(pixel_threshold)
+        self.width = int(width)
+        self.reference = reference
+        self.max_skip = int(max_skip)
+        if changed:
+            self.reset()
+
+    def reset(self):
+        """丢弃参考帧，下一帧必定推理。"""
+        self._ref = None
+        self._src_shape = None
+
+    def reset_stats(self):
+        self.frames = 0
+        self.skipped = 0
+        self.consecutive_skips = 0
+        self.last_score: Optional[float] = None
+        self.gate_time = 0.0
+        self.infer_time = 0.0
+        self.infer_count = 0
+
+    def thumbnail(self, image: np.ndarray) -> np.ndarray:
+        """缩小的灰度图: 先按步长抽样再 INTER_AREA 缩放，避免对高分辨率整图做颜色转换。"""
+        import cv2
+        h, w = image.shape[:2]
+        tw = max(8, min(self.width, w))
+        step = max(1, w // (tw * 2))
+        small = image[::step, ::step]
+        if small.ndim == 3:
+            small = cv2.cvtColor(np.ascontiguousarray(small[:, :, :3]), cv2.COLOR_BGR2GRAY)
+        th = max(1, int(round(small.shape[0] * tw / small.shape[1])))
+        small = cv2.resize(small, (tw, th), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (3, 3), 0)
+
+    def score(self, thumb: np.ndarray) -> Optional[float]:
+        if self._ref is None or self._ref.shape != thumb.shape:
+            return None
+        import cv2
+        diff = cv2.absdiff(thumb, self._ref)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / float(diff.size)
+
+    def should_infer(self, image: np.ndarray, force: bool = False) -> bool:
+        """返回本帧是否需要推理；需要推理时 (inferred 模式) 本帧成为新的参考帧。"""
+        t0 = time.perf_counter()
+        self.frames += 1
+        thumb = self.thumbnail(image)
+        shape = tuple(image.shape)
+        score = self.score(thumb) if shape == self._src_shape else None
+        self.last_score = score
+        run = force or score is None or score >= self.threshold or \
+            (self.max_skip > 0 and self.consecutive_skips >= self.max_skip)
+        if run or self.reference == "previous":
+            self._ref = thumb
+            self._src_shape = shape
+        if run:
+            self.consecutive_skips = 0
+        else:
+            self.skipped += 1
+            self.consecutive_skips += 1
+        self.gate_time += time.perf_counter() - t0
+        return run
+
+    def record_inference(self, seconds: float):
+        """记录一次实际推理耗时，用于估算跳过节省的计算量。"""
+        self.infer_time += float(seconds)
+        self.infer_count += 1
+
+    def stats(self) -> Dict[str, Any]:
+        avg_infer = self.infer_time / self.infer_count if self.infer_count else 0.0
+        saved = avg_infer * self.skipped
+        total = saved + self.infer_time
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skipped / self.frames, 4) if self.frames else 0.0,
+            "last_score": None if self.last_score is None else round(self.last_score, 5),
+            "gate_ms_avg": round(self.gate_time * 1000.0 / self.frames, 3) if self.frames else 0.0,
+            "infer_ms_avg": round(avg_infer * 1000.0, 3),
+            # 估算: 跳过帧数 x 平均推理耗时，扣除门控自身开销
+            "saved_ms": round(saved * 1000.0, 1),
+            "net_saved_ms": round((saved - self.gate_time) * 1000.0, 1),
+            "saved_ratio": round(saved / total, 4) if total > 0 else 0.0,
+        }
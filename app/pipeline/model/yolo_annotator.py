@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YOLO 轻量标注器 (cv2 绘制，替代 ultralytics Results.plot)
+
+Results.plot 每帧分配一张全分辨率新图并经通用 Annotator (PIL/cv2 混合) 绘制；
+FastAnnotator 直接使用 cv2 基本图元在复用的缓冲区上绘制:
+- 缓冲区轮换: 内部维护 buffers 个 (默认 3) 同尺寸数组循环使用，尺寸不变时不再分配；
+  下游 (显示/保存) 在后续若干帧内持有的引用不会被立即覆盖，需长期保存时请自行 copy
+- 预览缩放: preview_max_side > 0 时先缩放到最长边不超过该值再绘制 (坐标同步缩放)
+- max_draw: 仅绘制置信度最高的前 N 个目标 (0 表示不限)
+- 分割掩码: 以多边形 (Masks.xy，原图坐标) 填充后在包围区域内半透明混合
+- 抗锯齿: 默认关闭 (水平/垂直框线无差别，文字 LINE_AA 约为 LINE_8 的 5~6 倍耗时)，antialias=True 可开启
+
+颜色与 ultralytics 默认调色板一致 (BGR)。
+"""
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from app.pipeline.model.yolo_utils import top_k
+
+ANNOTATORS = ("fast", "ultralytics", "none")
+
+_PALETTE_HEX = ("FF3838", "FF9D97", "FF701F", "FFB21D", "CFD231", "48F90A", "92CC17", "3DDB86", "1A9334", "00D4BB",
+                "2C99A8", "00C2FF", "344593", "6473FF", "0018EC", "8438FF", "520085", "CB38FF", "FF95C8", "FF37C7")
+PALETTE_BGR = [(int(h[4:6], 16), int(h[2:4], 16), int(h[0:2], 16)) for h in _PALETTE_HEX]
+
+
+def class_color(class_id: int):
+    return PALETTE_BGR[int(class_id) % len(PALETTE_BGR)]
+
+
+class FastAnnotator:
+    def __init__(self, buffers: int = 3, mask_alpha: float = 0.5, antialias: bool = False):
+        self._buffers: List[np.ndarray] = []
+        self._n_buffers = max(1, int(buffers))
+        self._next = 0
+        self._overlay: Optional[np.ndarray] = None
+        self.mask_alpha = float(mask_alpha)
+        self.line_type = cv2.LINE_AA if antialias else cv2.LINE_8
+        self.frames = 0
+        self.last_ms = 0.0
+        self.last_drawn = 0
+
+    # ---------- 缓冲区 ----------
+    def _acquire_buffer(self, shape, dtype) -> np.ndarray:
+        if self._buffers and (self._buffers[0].shape != shape or self._buffers[0].dtype != dtype):
+            self._buffers = []
+            self._overlay = None
+        if len(self._buffers) < self._n_buffers:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers.append(buf)
+            self._next = 0
+            return buf
+        buf = self._buffers[self._next]
+        self._next = (self._next + 1) % self._n_buffers
+        return buf
+
+    def _prepare(self, image: np.ndarray, preview_max_side: int):
+        h, w = image.shape[:2]
+        scale = 1.0
+        if preview_max_side > 0 and max(h, w) > preview_max_side:
+            scale = preview_max_side / float(max(h, w))
+            size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+            buf = self._acquire_buffer((size[1], size[0]) + image.shape[2:], image.dtype)
+            cv2.resize(image, size, dst=buf, interpolation=cv2.INTER_AREA)
+        else:
+            buf = self._acquire_buffer(image.shape, image.dtype)
+            np.copyto(buf, image)
+        return buf, scale
+
+    # ---------- 绘制 ----------
+    def annotate(self, image: np.ndarray, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray,
+                 names: Dict[int, str], polygons: Optional[Sequence[np.ndarray]] = None,
+                 show_conf: bool = True, show_labels: bool = True, max_draw: int = 0,
+                 preview_max_side: int = 0, track_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """在复用缓冲区上绘制检测框/标签/掩码，返回该缓冲区 (输入图像不被修改)。
+        image 为 HxWx3 uint8 (BGR)；xyxy/conf/cls 为同长度数组，polygons / track_ids 与之按序对应。
+        """
+        t0 = time.perf_counter()
+        buf, scale = self._prepare(image, int(preview_max_side or 0))
+        n = int(len(cls))
+        order = np.arange(n)
+        if max_draw and 0 < max_draw < n:
+            order = top_k(np.asarray(conf, dtype=np.float32), max_draw)
+        if len(order):
+            if polygons is not None:
+                self._draw_masks(buf, [polygons[i] for i in order.tolist()], cls[order], scale)
+            self._draw_boxes(buf, xyxy[order], conf[order], cls[order], names, scale, show_conf, show_labels,
+                             self.line_type, None if track_ids is None else np.asarray(track_ids)[order])
+        self.frames += 1
+        self.last_drawn = int(len(order))
+        self.last_ms = (time.perf_counter() - t0) * 1000.0
+        return buf
+
+    def _draw_masks(self, buf: np.ndarray, polygons: List[np.ndarray], cls: np.ndarray, scale: float):
+        pts_list, colors = [], []
+        for poly, cid in zip(polygons, cls.tolist()):
+            if poly is None or len(poly) < 3:
+                continue
+            pts = np.asarray(poly, dtype=np.float32)
+            if scale != 1.0:
+                pts = pts * scale
+            pts_list.append(np.round(pts).astype(np.int32).reshape(-1, 1, 2))
+            colors.append(class_color(cid))
+        if not pts_list:
+            return
+        # 仅在全部多边形的包围区域内混合，避免整帧 addWeighted
+        allpts = np.concatenate(pts_list).reshape(-1, 2)
+        h, w = buf.shape[:2]
+        x0, y0 = np.clip(allpts.min(axis=0), 0, [w - 1, h - 1])
+        x1, y1 = np.clip(allpts.max(axis=0) + 1, 1, [w, h])
+        if x1 <= x0 or y1 <= y0:
+            return
+        if self._overlay is None or self._overlay.shape != buf.shape:
+            self._overlay = np.empty_like(buf)
+        roi = buf[y0:y1, x0:x1]
+        over = self._overlay[y0:y1, x0:x1]
+        np.copyto(over, roi)
+        offset = np.array([x0, y0], dtype=np.int32)
+        for pts, color in zip(pts_list, colors):
+            cv2.fillPoly(over, [pts - offset], color, self.line_type)
+        cv2.addWeighted(over, self.mask_alpha, roi, 1.0 - self.mask_alpha, 0, dst=roi)
+
+    @staticmethod
+    def _draw_boxes(buf: np.ndarray, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray, names: Dict[int, str],
+                    scale: float, show_conf: bool, show_labels: bool, line_type: int = cv2.LINE_8,
+                    track_ids: Optional[np.ndarray] = None):
+        h, w = buf.shape[:2]
+        lw = max(round((h + w) / 2 * 0.003), 2)  # 与 ultralytics 默认线宽一致
+        font_scale = lw / 3.0
+        tf = max(lw - 1, 1)
+        boxes = np.round(np.asarray(xyxy, dtype=np.float32) * scale).astype(np.int32)
+        get = (names or {}).get
+        tids = track_ids.tolist() if track_ids is not None else [None] * len(boxes)
+        for (x1, y1, x2, y2), score, cid, tid in zip(boxes.tolist(), np.asarray(conf).tolist(), cls.tolist(), tids):
+            color = class_color(cid)
+            cv2.rectangle(buf, (x1, y1), (x2, y2), color, lw, line_type)
+            if not show_labels and not show_conf and tid is None:
+                continue
+            parts = [] if tid is None else [f"#{tid}"]
+            if show_labels:
+                parts.append(str(get(cid, cid)))
+            if show_conf:
+                parts.append(f"{score:.2f}")
+            label = " ".join(parts)
+            (tw, th), _ = cv2.getTextSize(label, 0, font_scale, tf)
+            outside = y1 - th - 3 >= 0
+            ty = y1 - th - 3 if outside else y1 + th + 3
+            cv2.rectangle(buf, (x1, y1), (x1 + tw, ty), color, -1, line_type)
+            cv2.putText(buf, label, (x1, y1 - 2 if outside else y1 + th + 2), 0, font_scale,
+                        (255, 255, 255), tf, line_type)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"frames": self.frames, "last_ms": round(self.last_ms, 3), "last_drawn": self.last_drawn,
+                "buffers": len(self._buffers)}
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测 -> 裁剪 -> 分类 级联的批量工具
+- detection_boxes: 从检测模块任一 results_format (dicts / structured / columnar) 取出 (N,4) xyxy
+- crop_batch: 一次向量化双线性采样把全部检测框缩放为 (N,S,S,C) 批量，不逐框调用 cv2.resize
+- attach_classification: 把分类结果按原格式附加到每个检测 (cls_id / cls_name / cls_confidence)
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.pipeline.model.yolo_utils import class_names_for
+
+CROP_MODES = ("square", "stretch")
+
+
+def detection_boxes(detections: Any) -> np.ndarray:
+    """检测结果 -> float32 (N,4) xyxy；无法识别时返回空数组。"""
+    if detections is None:
+        return np.zeros((0, 4), np.float32)
+    if isinstance(detections, np.ndarray):
+        if detections.dtype.names and "box" in detections.dtype.names:
+            return detections["box"].astype(np.float32, copy=False).reshape(-1, 4)
+        return np.asarray(detections, np.float32).reshape(-1, 4) if detections.size else np.zeros((0, 4), np.float32)
+    if isinstance(detections, dict):
+        boxes = detections.get("boxes")
+        return np.asarray(boxes, np.float32).reshape(-1, 4) if boxes is not None else np.zeros((0, 4), np.float32)
+    if isinstance(detections, (list, tuple)):
+        rows: List[Sequence[float]] = []
+        for item in detections:
+            box = item.get("box", item.get("bbox")) if isinstance(item, dict) else item
+            rows.append(list(box)[:4] if box is not None else [0.0, 0.0, 0.0, 0.0])
+        return np.asarray(rows, np.float32).reshape(-1, 4)
+    return np.zeros((0, 4), np.float32)
+
+
+def crop_regions(xyxy: np.ndarray, pad: float = 0.0, mode: str = "square") -> np.ndarray:
+    """按 pad (边长比例) 外扩检测框；square 模式以框中心扩成正方形，与分类模型的中心裁剪训练方式一致。"""
+    x1, y1, x2, y2 = (xyxy[:, i].astype(np.float32) for i in range(4))
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    w, h = np.maximum(x2 - x1, 1.0), np.maximum(y2 - y1, 1.0)
+    if mode == "square":
+        w = h = np.maximum(w, h)
+    w, h = w * (1.0 + 2 * pad), h * (1.0 + 2 * pad)
+    return np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+
+def crop_batch(image: np.ndarray, regions: np.ndarray, size: int) -> np.ndarray:
+    """向量化双线性采样: (H,W[,C]) 图像 + (N,4) 区域 -> (N,size,size[,C]) uint8。
+    采样点取像素中心 (与 cv2.resize INTER_LINEAR 一致)，越界部分按边缘像素延伸。
+    """
+    n = len(regions)
+    img = image if image.ndim == 3 else image[:, :, None]
+    h, w, c = img.shape
+    if not n:
+        out = np.zeros((0, size, size, c), np.uint8)
+        return out if image.ndim == 3 else out[..., 0]
+    t = (np.arange(size, dtype=np.float32) + 0.5) / size
+    r = regions.astype(np.float32)
+    xs = r[:, 0:1] + t[None, :] * (r[:, 2:3] - r[:, 0:1]) - 0.5   # (N,S)
+    ys = r[:, 1:2] + t[None, :] * (r[:, 3:4] - r[:, 1:2]) - 0.5
+    xs = np.clip(xs, 0, w - 1)
+    ys = np.clip(ys, 0, h - 1)
+    x0 = np.floor(xs).astype(np.int32)
+    y0 = np.floor(ys).astype(np.int32)
+    x1 = np.minimum(x0 + 1, w - 1)
+    y1 = np.minimum(y0 + 1, h - 1)
+    wx = (xs - x0)[:, None, :, None]
+    wy = (ys - y0)[:, :, None, None]
+    yy0, yy1 = y0[:, :, None], y1[:, :, None]
+    xx0, xx1 = x0[:, None, :], x1[:, None, :]
+    top = img[yy0, xx0].astype(np.float32) * (1 - wx) + img[yy0, xx1].astype(np.float32) * wx
+    bottom = img[yy1, xx0].astype(np.float32) * (1 - wx) + img[yy1, xx1].astype(np.float32) * wx
+    out = np.clip(top * (1 - wy) + bottom * wy + 0.5, 0, 255).astype(np.uint8)
+    return out if image.ndim == 3 else out[..., 0]
+
+
+def attach_classification(detections: Any, index: np.ndarray, cls_ids: np.ndarray, confs: np.ndarray,
+                          names: Dict[int, str]) -> Any:
+    """把分类结果附加到检测结果 (保持原格式，不修改输入)。
+    index 为已分类检测的序号，其余检测 cls_id=-1 / cls_name=None / cls_confidence=0。
+    """
+    n = len(detection_boxes(detections))
+    ids = np.full((n,), -1, np.int32)
+    scores = np.zeros((n,), np.float32)
+    ids[index] = cls_ids
+    scores[index] = confs
+    done = np.zeros((n,), bool)
+    done[index] = True
+    if isinstance(detections, np.ndarray) and detections.dtype.names:
+        dtype = np.dtype(detections.dtype.descr + [("cls_id", np.int32), ("cls_confidence", np.float32)])
+        out = np.empty(n, dtype=dtype)
+        for field in detections.dtype.names:
+            out[field] = detections[field]
+        out["cls_id"] = ids
+        out["cls_confidence"] = scores
+        return out
+    cls_names: List[Optional[str]] = [nm if ok else None for nm, ok in zip(class_names_for(ids, names), done)]
+    if isinstance(detections, dict):
+        res = dict(detections)
+        res.update({"cls_id": ids, "cls_confidence": scores, "cls_names": cls_names})
+        return res
+    out_list = []
+    for k, item in enumerate(detections or []):
+        entry = dict(item) if isinstance(item, dict) else {"box": list(item)[:4]}
+        entry["cls_id"] = int(ids[k]) if done[k] else None
+        entry["cls_name"] = cls_names[k]
+        entry["cls_confidence"] = round(float(scores[k]), 5) if done[k] else None
+        out_list.append(entry)
+    return out_list
+
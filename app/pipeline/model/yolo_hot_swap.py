@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YOLO 模块的模型热切换 (检测/分割/分类共用，机制见 app.models.model_swap)
+运行中 configure 修改 model_path / device / half 且 hot_swap=True 时:
+  - 后台线程经共享模型缓存加载新权重并预热 (至少一次推理，用于验证模型可用；预热经 warmup_scheduler 排队)
+  - 旧模型继续推理；新模型就绪后在下一次 process() 开始时原子替换并释放旧模型引用
+  - 加载/预热失败: 丢弃新模型，经 configure() 将配置恢复为仍在服务的模型，错误记录在 get_status()["hot_swap"]
+宿主模块需提供 _model / _model_key / _model_source / _names / _model_loaded 等属性
+以及 _select_device()、_model_source_cfg()，并在 __init__ 中创建 self._swapper。
+"""
+from typing import Any, Dict
+
+import numpy as np
+
+from app.models.model_cache import ModelHandle, get_model_cache
+from app.models.model_swap import ModelSwapper
+from app.models.warmup_scheduler import get_warmup_scheduler
+
+
+class YoloHotSwapMixin:
+    _swapper: ModelSwapper
+
+    def _hot_swap_ready(self) -> bool:
+        """是否可以热切换: 启用 hot_swap 且已有模型在服务 (未运行时直接按新配置加载)。"""
+        return bool(self.config.get("hot_swap", True)) and self._model_loaded and self._model is not None
+
+    def _swap_warmup_kwargs(self) -> Dict[str, Any]:
+        """预热推理的附加参数 (子类按任务覆盖)。"""
+        return {}
+
+    def _swap_loader(self, path: str, device: str, precision: str) -> ModelHandle:
+        from app.utils.ml_preloader import require_yolo
+        YOLO, err = require_yolo()
+        if YOLO is None:
+            raise RuntimeError(f"未安装 ultralytics: {err}")
+        return get_model_cache().acquire(path, device, precision, lambda: YOLO(path))
+
+    def _on_model_swapped(self):
+        """新模型生效后的清理 (子类覆盖: 丢弃缓存结果/轨迹等)。"""
+
+    def _begin_hot_swap(self):
+        source = self._model_source_cfg()
+        if self._swapper.pending and self._swapper.source == source:
+            return  # 同一来源的切换已在进行/已就绪: 无关配置变更不重新加载
+        path = source[0]
+        device = self._select_device()
+        precision = "fp16" if bool(source[2]) and device.startswith("cuda") else "fp32"
+        iters = max(1, int(self.config.get("warmup_iterations", 0)))
+        size = int(self.config.get("warmup_image_size", 640))
+        kwargs = dict(self._swap_warmup_kwargs(), verbose=False, device=device, half=precision == "fp16")
+
+        def _warmup(handle):
+            if getattr(handle, "warmed", False):
+                return
+            dummy = (np.random.rand(size, size, 3) * 255).astype(np.uint8)
+
+            def _run(job):
+                for _ in range(iters):
+                    handle.predict(source=dummy, **kwargs)
+                    job.advance()
+            # 与其它模型的预热共用调度器 (受并发上限约束)，在切换线程中等待完成
+            job = get_warmup_scheduler().submit(f"{self.name}:hot-swap", _run, self.warmup_priority, iters)
+            job.wait()
+            if job.state != "done":
+                raise RuntimeError(job.error or f"预热未完成: {job.state}")
+            handle.warmed = True
+
+        self.logger.info(f"模块 {self.name} 后台加载新模型: {path} ({device}/{precision})")
+        self._swapper.begin(source, lambda: self._swap_loader(path, device, precision), _warmup,
+                            get_model_cache().release)
+
+    def _apply_hot_swap(self):
+        """周期边界 (process 开始) 调用: 应用已就绪的新模型或处理失败回滚。"""
+        event = self._swapper.take()
+        if event is None:
+            return
+        kind, source, payload = event
+        if kind == "swap":
+            old = self._model
+            self._model = payload
+            self._model_key = getattr(payload, "key", None)
+            self._model_source = source
+            self._names = getattr(payload, "names", {}) or {}
+            self._model_loaded = True
+            self._failed_reason = None
+            self._warmup_done = True
+            self._warmup_error = None
+            self._warmup_iters_completed = int(self.config.get("warmup_iterations", 0))
+            self._on_model_swapped()
+            cache = get_model_cache()
+            if isinstance(old, ModelHandle):
+                if old.key != self._model_key:
+                    cache.invalidate(old.key)
+                cache.release(old)
+            self.logger.info(f"模块 {self.name} 已切换到新模型: {source[0]}")
+            return
+        # 回滚: 旧模型继续服务，经 configure() 恢复为其来源 (校验、_on_configure 与属性面板同步)；
+        # 恢复后的来源与在服务的模型一致，不会再发起切换
+        if self._model_source:
+            path, device, half = self._model_source
+            self.configure(dict(self.config, model_path=path, device=device, half=half))
+        self.logger.warning(f"模块 {self.name} 新模型 {source[0]} 加载/预热失败，继续使用原模型: {payload}")
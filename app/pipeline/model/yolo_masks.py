@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分割掩码紧凑输出
+整张 (n,h,w) 掩码体积过大，不适合在执行器中逐帧传递；这里由 masks.data 向量化计算紧凑表示:
+
+- mask_geometry: 每个掩码的面积与质心 (原图坐标)，按行/列投影一次求得，无逐像素 Python 循环
+- crop_masks: 掩码裁剪到检测框 (原图分辨率 uint8)
+- rle_encode / rle_decode: 裁剪掩码的游程编码 (列优先，首段为 0，与 COCO 未压缩 RLE 约定一致)
+- simplify_polygons: masks.xy 多边形按 approxPolyDP 简化
+
+masks.data 为推理分辨率 (letterbox 后的输入尺寸)，经 mask_transform 的缩放/填充映射回原图；
+切片推理等无 masks.data 的结果回退为由多边形计算。
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MASK_FORMATS = ("none", "crop", "rle", "polygon")
+
+
+def mask_transform(mask_hw: Sequence[int], orig_hw: Sequence[int]) -> Tuple[float, float, float]:
+    """掩码坐标 -> 原图坐标的 (gain, pad_x, pad_y)：orig = (m - pad) / gain。"""
+    mh, mw = int(mask_hw[0]), int(mask_hw[1])
+    oh, ow = int(orig_hw[0]), int(orig_hw[1])
+    gain = min(mh / oh, mw / ow)
+    return gain, (mw - ow * gain) / 2.0, (mh - oh * gain) / 2.0
+
+
+def mask_geometry(masks: np.ndarray, orig_shape: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """(n,h,w) 掩码 -> (面积 float32 (n,) 原图像素, 质心 float32 (n,2) 原图 [x,y])。空掩码质心为 NaN。"""
+    n = len(masks)
+    if n == 0:
+        return np.zeros((0,), np.float32), np.zeros((0, 2), np.float32)
+    m = masks > 0.5 if masks.dtype != np.bool_ else masks
+    col = m.sum(axis=1, dtype=np.float64)  # (n,w)
+    row = m.sum(axis=2, dtype=np.float64)  # (n,h)
+    area_m = col.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cx = col @ np.arange(col.shape[1], dtype=np.float64) / area_m
+        cy = row @ np.arange(row.shape[1], dtype=np.float64) / area_m
+    gain, pad_x, pad_y = mask_transform(m.shape[1:], orig_shape)
+    # 像素中心 +0.5 后映射回原图
+    centroid = np.stack([(cx + 0.5 - pad_x) / gain, (cy + 0.5 - pad_y) / gain], axis=1)
+    return (area_m / (gain * gain)).astype(np.float32), centroid.astype(np.float32)
+
+
+def polygon_geometry(polygons: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """多边形 (原图坐标) 的面积与质心 (鞋带公式)；退化多边形取顶点均值作为质心。"""
+    area = np.zeros((len(polygons),), np.float32)
+    centroid = np.full((len(polygons), 2), np.nan, np.float32)
+    for i, p in enumerate(polygons):
+        p = np.asarray(p, dtype=np.float64).reshape(-1, 2)
+        if not len(p):
+            continue
+        x, y = p[:, 0], p[:, 1]
+        xn, yn = np.roll(x, -1), np.roll(y, -1)
+        cross = x * yn - xn * y
+        a = cross.sum() / 2.0
+        area[i] = abs(a)
+        if abs(a) > 1e-9:
+            centroid[i] = ((x + xn) @ cross / (6 * a), (y + yn) @ cross / (6 * a))
+        else:
+            centroid[i] = (x.mean(), y.mean())
+    return area, centroid
+
+
+def _int_boxes(xyxy: np.ndarray, orig_shape: Sequence[int]) -> np.ndarray:
+    h, w = int(orig_shape[0]), int(orig_shape[1])
+    b = np.empty((len(xyxy), 4), np.int32)
+    b[:, 0] = np.clip(np.floor(xyxy[:, 0]), 0, max(w - 1, 0))
+    b[:, 1] = np.clip(np.floor(xyxy[:, 1]), 0, max(h - 1, 0))
+    b[:, 2] = np.maximum(np.clip(np.ceil(xyxy[:, 2]), 0, w), b[:, 0] + 1)
+    b[:, 3] = np.maximum(np.clip(np.ceil(xyxy[:, 3]), 0, h), b[:, 1] + 1)
+    return b
+
+
+def crop_masks(masks: Optional[np.ndarray], xyxy: np.ndarray, orig_shape: Sequence[int],
+               polygons: Optional[Sequence[np.ndarray]] = None) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """掩码裁剪到检测框 (原图坐标)，返回 (整数框 (n,4), uint8 0/1 裁剪掩码列表)。
+    masks 为推理分辨率掩码时只放大框内区域；masks 为 None 时由多边形在框内栅格化。
+    """
+    import cv2
+    boxes = _int_boxes(xyxy, orig_shape)
+    crops: List[np.ndarray] = []
+    if masks is not None and len(masks):
+        gain, pad_x, pad_y = mask_transform(masks.shape[1:], orig_shape)
+        mh, mw = masks.shape[1:]
+        for m, (x1, y1, x2, y2) in zip(masks, boxes.tolist()):
+            # 框映射到掩码坐标后截取，再放大到框尺寸 (仅处理框内像素)
+            mx1 = int(np.clip(np.floor(x1 * gain + pad_x), 0, mw - 1))
+            my1 = int(np.clip(np.floor(y1 * gain + pad_y), 0, mh - 1))
+            mx2 = int(np.clip(np.ceil(x2 * gain + pad_x), mx1 + 1, mw))
+            my2 = int(np.clip(np.ceil(y2 * gain + pad_y), my1 + 1, mh))
+            sub = np.ascontiguousarray(m[my1:my2, mx1:mx2], dtype=np.float32)
+            up = cv2.resize(sub, (x2 - x1, y2 - y1), interpolation=cv2.INTER_LINEAR)
+            crops.append((up > 0.5).astype(np.uint8))
+        return boxes, crops
+    for i, (x1, y1, x2, y2) in enumerate(boxes.tolist()):
+        crop = np.zeros((y2 - y1, x2 - x1), np.uint8)
+        poly = polygons[i] if polygons is not None and i < len(polygons) else None
+        if poly is not None and len(poly):
+            pts = np.round(np.asarray(poly, dtype=np.float32) - (x1, y1)).astype(np.int32)
+            cv2.fillPoly(crop, [pts], 1)
+        crops.append(crop)
+    return boxes, crops
+
+
+def rle_encode(mask: np.ndarray) -> Dict[str, Any]:
+    """0/1 掩码 -> {"size": [h,w], "counts": [...]}，列优先展开，首段为 0 的长度 (可为 0)。"""
+    flat = np.asarray(mask, dtype=np.uint8).ravel(order="F")
+    if not flat.size:
+        return {"size": list(mask.shape[:2]), "counts": []}
+    change = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    bounds = np.concatenate([[0], change, [flat.size]])
+    counts = np.diff(bounds).tolist()
+    if flat[0]:
+        counts.insert(0, 0)
+    return {"size": [int(mask.shape[0]), int(mask.shape[1])], "counts": counts}
+
+
+def rle_decode(rle: Dict[str, Any]) -> np.ndarray:
+    h, w = rle["size"]
+    counts = np.asarray(rle["counts"], dtype=np.int64)
+    values = np.arange(len(counts)) % 2
+    return np.repeat(values.astype(np.uint8), counts).reshape((h, w), order="F")
+
+
+def simplify_polygons(polygons: Sequence[np.ndarray], epsilon: float = 1.0) -> List[np.ndarray]:
+    """approxPolyDP 简化多边形 (epsilon 像素)，epsilon<=0 时原样返回。"""
+    import cv2
+    out = []
+    for p in polygons:
+        p = np.asarray(p, dtype=np.float32).reshape(-1, 2)
+        if epsilon > 0 and len(p) > 3:
+            p = cv2.approxPolyDP(p.reshape(-1, 1, 2), float(epsilon), True).reshape(-1, 2)
+        out.append(p)
+    return out
+
+
+def compact_masks(fmt: str, masks: Optional[np.ndarray], polygons: Optional[Sequence[np.ndarray]],
+                  xyxy: np.ndarray, orig_shape: Sequence[int], epsilon: float = 1.0) -> Dict[str, Any]:
+    """按 fmt 计算每个实例的紧凑掩码及面积/质心。
+    返回 {"area": (n,), "centroid": (n,2), "masks": list|None}；masks 与 polygons 均缺失时面积为 0、质心为 NaN。
+    """
+    n = len(xyxy)
+    if masks is not None and len(masks) == n:
+        area, centroid = mask_geometry(masks, orig_shape)
+    elif polygons is not None and len(polygons) == n:
+        area, centroid = polygon_geometry(polygons)
+    else:
+        area, centroid = np.zeros((n,), np.float32), np.full((n, 2), np.nan, np.float32)
+    payload: Optional[List[Any]] = None
+    if fmt in ("crop", "rle"):
+        boxes, crops = crop_masks(masks if masks is not None and len(masks) == n else None, xyxy, orig_shape,
+                                  polygons)
+        if fmt == "crop":
+            payload = [{"box": b, "mask": c} for b, c in zip(boxes.tolist(), crops)]
+        else:
+            payload = [dict(rle_encode(c), box=b) for b, c in zip(boxes.tolist(), crops)]
+    elif fmt == "polygon":
+        payload = simplify_polygons(polygons, epsilon) if polygons is not None else [np.zeros((0, 2), np.float32)] * n
+    return {"area": area, "centroid": centroid, "masks": payload}
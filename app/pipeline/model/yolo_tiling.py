@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YOLO 切片推理 (高分辨率图像)
+整图缩放到 640 会丢失小目标 (如 12MP 相机的细小缺陷)，切片模式将输入拆分为重叠切片，
+按批送入模型，检测框/分割多边形平移回整图坐标后用向量化 NMS 合并切片边界处的重复目标。
+
+- tile_windows: 计算覆盖整图的切片窗口 (末行/末列贴齐图像边缘)
+- predict_tiled: 切片 -> 分批推理 -> 坐标平移 + 按类别 NMS，返回 TiledResult 与分阶段耗时
+- TiledResult: 与 ultralytics Results 相同的 boxes.data / masks.xy 访问方式，检测/分割模块后续流程无需区分
+"""
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.yolo_postprocess import batched_nms
+from app.pipeline.model.yolo_utils import extract_boxes
+
+
+def tile_windows(height: int, width: int, tile_size: int, overlap: int) -> np.ndarray:
+    """返回切片窗口 (T,4) int32 [x1,y1,x2,y2]。图像不大于切片时只有一个整图窗口。"""
+    stride = max(1, int(tile_size) - int(overlap))
+
+    def _starts(extent: int) -> List[int]:
+        if extent <= tile_size:
+            return [0]
+        starts = list(range(0, extent - tile_size + 1, stride))
+        if starts[-1] + tile_size < extent:
+            starts.append(extent - tile_size)
+        return starts
+
+    ys, xs = _starts(int(height)), _starts(int(width))
+    grid = np.array([(x, y) for y in ys for x in xs], dtype=np.int32)
+    x2 = np.minimum(grid[:, 0] + tile_size, width)
+    y2 = np.minimum(grid[:, 1] + tile_size, height)
+    return np.stack([grid[:, 0], grid[:, 1], x2, y2], axis=1).astype(np.int32)
+
+
+class _Boxes:
+    def __init__(self, data: np.ndarray):
+        self.data = data  # (N,6) [x1,y1,x2,y2,conf,cls]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, idx):
+        return _Boxes(self.data[idx])
+
+
+class _Masks:
+    def __init__(self, xy: List[np.ndarray], orig_shape: Tuple[int, int]):
+        self.xy = xy  # 整图坐标多边形
+        self.data = None  # 切片模式不拼接整图掩码 (12MP x N 代价过高)，使用 xy
+        self.orig_shape = orig_shape
+
+    def __len__(self):
+        return len(self.xy)
+
+    def __getitem__(self, idx):
+        return _Masks([self.xy[i] for i in np.asarray(idx).reshape(-1).tolist()], self.orig_shape)
+
+
+class TiledResult:
+    """切片合并后的结果，接口与 ultralytics Results 中检测/分割模块用到的部分一致。"""
+
+    def __init__(self, orig_img: np.ndarray, data: np.ndarray, polygons: Optional[List[np.ndarray]],
+                 names: Dict[int, str]):
+        self.orig_img = orig_img
+        self.orig_shape = tuple(orig_img.shape[:2])
+        self.names = names
+        self.boxes = _Boxes(data)
+        self.masks = _Masks(polygons, self.orig_shape) if polygons is not None else None
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __getitem__(self, idx):
+        idx = np.asarray(idx, dtype=np.int64).reshape(-1)
+        polygons = [self.masks.xy[i] for i in idx.tolist()] if self.masks is not None else None
+        return TiledResult(self.orig_img, self.boxes.data[idx], polygons, self.names)
+
+    def plot(self, conf: bool = True, labels: bool = True, **_kw) -> np.ndarray:
+        # 无 ultralytics Results 可用，使用 cv2 标注器绘制 (每次返回新图，与 Results.plot 语义一致)
+        from app.pipeline.model.yolo_annotator import FastAnnotator
+        data = self.boxes.data
+        return FastAnnotator(buffers=1).annotate(
+            self.orig_img, data[:, :4], data[:, 4], data[:, 5].astype(np.int32), self.names,
+            polygons=self.masks.xy if self.masks is not None else None, show_conf=conf, show_labels=labels)
+
+
+def predict_tiled(predict: Callable[[List[np.ndarray]], Sequence[Any]], image: np.ndarray, tile_size: int = 640,
+                  overlap: int = 64, batch_size: int = 8, iou_threshold: float = 0.5, agnostic: bool = False,
+                  max_det: int = 0, names: Optional[Dict[int, str]] = None,
+                  with_masks: bool = False) -> Tuple[TiledResult, Dict[str, Any]]:
+    """切片推理。predict(tiles) 接收切片列表并返回与之等长的 Results 列表 (每批调用一次)。
+    返回 (TiledResult, 统计: tiles/batches/candidates/merged 与 tile_ms/infer_ms/merge_ms/total_ms)。
+    """
+    t0 = time.perf_counter()
+    h, w = image.shape[:2]
+    windows = tile_windows(h, w, tile_size, overlap)
+    # 切片为原图视图，不拷贝像素
+    tiles = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in windows.tolist()]
+    t1 = time.perf_counter()
+    step = max(1, int(batch_size))
+    results: List[Any] = []
+    batches = 0
+    for i in range(0, len(tiles), step):
+        results.extend(predict(tiles[i:i + step]))
+        batches += 1
+    t2 = time.perf_counter()
+    datas: List[np.ndarray] = []
+    polygons: List[np.ndarray] = []
+    for r, (x1, y1, _x2, _y2) in zip(results, windows.tolist()):
+        xyxy, conf, cls = extract_boxes(getattr(r, "boxes", None))
+        if not len(cls):
+            continue
+        xyxy = xyxy + np.array([x1, y1, x1, y1], dtype=np.float32)
+        datas.append(np.concatenate([xyxy, conf[:, None], cls[:, None].astype(np.float32)], axis=1))
+        if with_masks:
+            masks_xy = getattr(getattr(r, "masks", None), "xy", None)
+            offset = np.array([x1, y1], dtype=np.float32)
+            for j in range(len(cls)):
+                poly = masks_xy[j] if masks_xy is not None and j < len(masks_xy) else None
+                polygons.append(np.asarray(poly, dtype=np.float32) + offset if poly is not None and len(poly)
+                                else np.zeros((0, 2), np.float32))
+    data = np.concatenate(datas, axis=0) if datas else np.zeros((0, 6), np.float32)
+    candidates = int(len(data))
+    if candidates:
+        keep = batched_nms(data[:, :4], data[:, 4], data[:, 5].astype(np.int32), iou_threshold, max_det,
+                           agnostic=agnostic)
+        data = data[keep]
+        if with_masks:
+            polygons = [polygons[i] for i in keep.tolist()]
+    t3 = time.perf_counter()
+    merged = TiledResult(image, data, polygons if with_masks else None, names or {})
+    stats = {
+        "tiles": int(len(windows)),
+        "batches": batches,
+        "candidates": candidates,
+        "merged": int(len(data)),
+        "tile_ms": round((t1 - t0) * 1000.0, 3),
+        "infer_ms": round((t2 - t1) * 1000.0, 3),
+        "merge_ms": round((t3 - t2) * 1000.0, 3),
+        "total_ms": round((t3 - t0) * 1000.0, 3),
+    }
+    return merged, stats
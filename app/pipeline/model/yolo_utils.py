@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YOLO 模块公用的结果提取工具
+检测/分割/分类模块共用，避免逐个检测框调用 tolist()/item() 的 Python 循环。
+
+- extract_boxes: 一次性将 boxes.data (N,6/7) 从张量转为 NumPy，再切片得到 xyxy / conf / cls
+- class_filter_mask: 按目标类别 (名称或数字索引) 生成布尔掩码，结果/标注/掩码共用
+- subset_results: 按过滤后的原始序号取 Results 子集 (boxes/masks 同步)，用于仅标注过滤结果
+- format_detections: 输出格式
+    dicts       [{"box": [...], "confidence": .., "class_id": .., "class_name": ..}, ...] (兼容旧格式)
+    structured  NumPy 结构化数组 (DETECTION_DTYPE / SEGMENTATION_DTYPE / CLASSIFICATION_DTYPE)
+    columnar    {"boxes": (N,4), "confidence": (N,), "class_id": (N,), "class_names": [...]}
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+RESULT_FORMATS = ("dicts", "structured", "columnar")
+
+DETECTION_DTYPE = np.dtype([("box", np.float32, (4,)), ("confidence", np.float32), ("class_id", np.int32)])
+TRACKED_DETECTION_DTYPE = np.dtype(DETECTION_DTYPE.descr + [("track_id", np.int64)])
+SEGMENTATION_DTYPE = np.dtype([("index", np.int32), ("box", np.float32, (4,)), ("confidence", np.float32),
+                               ("class_id", np.int32)])
+# 分割结果附带掩码面积/质心时的结构化类型 (紧凑掩码本身不放入结构化数组)
+SEGMENTATION_GEOMETRY_DTYPE = np.dtype(SEGMENTATION_DTYPE.descr + [("area", np.float32), ("centroid", np.float32, (2,))])
+CLASSIFICATION_DTYPE = np.dtype([("class_id", np.int32), ("confidence", np.float32)])
+
+
+def to_numpy(x: Any) -> np.ndarray:
+    """torch.Tensor / ndarray / 序列 -> ndarray (张量只做一次 device->host 拷贝)。"""
+    if x is None:
+        return np.empty((0,), dtype=np.float32)
+    if isinstance(x, np.ndarray):
+        return x
+    if hasattr(x, "detach"):
+        x = x.detach()
+    if hasattr(x, "cpu"):
+        x = x.cpu()
+    if hasattr(x, "numpy"):
+        return x.numpy()
+    return np.asarray(x)
+
+
+def extract_boxes(boxes: Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """从 ultralytics Boxes 提取 (xyxy float32 (N,4), conf float32 (N,), cls int32 (N,))。
+    boxes.data 布局为 [x1,y1,x2,y2,(track_id),conf,cls]，优先整体转换一次；缺失时回退到分别读取属性。
+    """
+    empty = (np.zeros((0, 4), np.float32), np.zeros((0,), np.float32), np.zeros((0,), np.int32))
+    if boxes is None:
+        return empty
+    data = getattr(boxes, "data", None)
+    if data is not None:
+        arr = to_numpy(data)
+        if arr.ndim == 2 and arr.shape[1] >= 6:
+            return (np.ascontiguousarray(arr[:, :4], dtype=np.float32),
+                    arr[:, -2].astype(np.float32, copy=False),
+                    arr[:, -1].astype(np.int32))
+    xyxy = getattr(boxes, "xyxy", None)
+    conf = getattr(boxes, "conf", None)
+    cls = getattr(boxes, "cls", None)
+    if xyxy is None or conf is None or cls is None:
+        return empty
+    return (to_numpy(xyxy).astype(np.float32, copy=False).reshape(-1, 4),
+            to_numpy(conf).astype(np.float32, copy=False).reshape(-1),
+            to_numpy(cls).astype(np.int32).reshape(-1))
+
+
+def split_targets(targets: Iterable[Any]) -> Tuple[set, set]:
+    """目标列表拆分为 (数字索引集合, 小写名称集合)。"""
+    index_set, name_set = set(), set()
+    for t in targets or []:
+        s = str(t).strip()
+        if not s:
+            continue
+        if s.isdigit():
+            index_set.add(int(s))
+        else:
+            name_set.add(s.lower())
+    return index_set, name_set
+
+
+def class_filter_mask(cls: np.ndarray, names: Dict[int, str], targets: Iterable[Any]) -> Optional[np.ndarray]:
+    """按目标类别生成布尔掩码；无有效目标时返回 None (表示不过滤)。
+    名称先映射为类别索引，再用 np.isin 一次完成匹配。
+    """
+    index_set, name_set = split_targets(targets)
+    if not index_set and not name_set:
+        return None
+    ids = set(index_set)
+    if name_set:
+        for k, v in (names or {}).items():
+            if str(v).lower() in name_set:
+                ids.add(int(k))
+    if not ids:
+        return np.zeros(len(cls), dtype=bool)
+    return np.isin(cls, np.fromiter(ids, dtype=np.int64, count=len(ids)))
+
+
+def class_names_for(cls: np.ndarray, names: Dict[int, str]) -> List[str]:
+    get = (names or {}).get
+    return [get(c, str(c)) for c in cls.tolist()]
+
+
+def format_detections(xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray, names: Dict[int, str],
+                      fmt: str = "dicts", track_ids: Optional[np.ndarray] = None) -> Any:
+    """按 fmt 输出检测结果 (见模块说明)。track_ids 存在时每个目标附加 track_id。"""
+    if fmt == "structured":
+        out = np.empty(len(cls), dtype=DETECTION_DTYPE if track_ids is None else TRACKED_DETECTION_DTYPE)
+        out["box"] = xyxy
+        out["confidence"] = conf
+        out["class_id"] = cls
+        if track_ids is not None:
+            out["track_id"] = track_ids
+        return out
+    if fmt == "columnar":
+        res = {"boxes": xyxy, "confidence": conf, "class_id": cls, "class_names": class_names_for(cls, names)}
+        if track_ids is not None:
+            res["track_id"] = np.asarray(track_ids, dtype=np.int64)
+        return res
+    boxes = np.round(xyxy.astype(np.float64), 2).tolist()
+    scores = np.round(conf.astype(np.float64), 4).tolist()
+    cids = cls.tolist()
+    cnames = class_names_for(cls, names)
+    out = [{"box": b, "confidence": s, "class_id": c, "class_name": n}
+           for b, s, c, n in zip(boxes, scores, cids, cnames)]
+    if track_ids is not None:
+        for item, tid in zip(out, np.asarray(track_ids).tolist()):
+            item["track_id"] = tid
+    return out
+
+
+def format_segments(xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray, index: np.ndarray,
+                    names: Dict[int, str], mask_shape: List[int], fmt: str = "dicts",
+                    geometry: Optional[Dict[str, Any]] = None) -> Any:
+    """分割结果格式化: 在检测字段基础上附加原始序号 index 与掩码尺寸 mask_shape。
+    geometry (yolo_masks.compact_masks 的返回) 存在时附加 area / centroid 及紧凑掩码 mask
+    (structured 格式只附加 area / centroid)。
+    """
+    if fmt == "structured":
+        out = np.empty(len(cls), dtype=SEGMENTATION_GEOMETRY_DTYPE if geometry else SEGMENTATION_DTYPE)
+        out["index"] = index
+        out["box"] = xyxy
+        out["confidence"] = conf
+        out["class_id"] = cls
+        if geometry:
+            out["area"] = geometry["area"]
+            out["centroid"] = geometry["centroid"]
+        return out
+    if fmt == "columnar":
+        res = {"index": index.astype(np.int32, copy=False), "boxes": xyxy, "confidence": conf, "class_id": cls,
+               "class_names": class_names_for(cls, names), "mask_shape": list(mask_shape)}
+        if geometry:
+            res.update({"area": geometry["area"], "centroid": geometry["centroid"]})
+            if geometry.get("masks") is not None:
+                res["masks"] = geometry["masks"]
+        return res
+    boxes = np.round(xyxy.astype(np.float64), 2).tolist()
+    scores = np.round(conf.astype(np.float64), 4).tolist()
+    out = [{"index": i, "box": b, "class_id": c, "class_name": n, "confidence": sc, "mask_shape": list(mask_shape)}
+           for i, b, c, n, sc in zip(index.tolist(), boxes, cls.tolist(), class_names_for(cls, names), scores)]
+    if geometry:
+        areas = np.round(geometry["area"].astype(np.float64), 1).tolist()
+        cents = np.round(geometry["centroid"].astype(np.float64), 2).tolist()
+        payload = geometry.get("masks")
+        for k, item in enumerate(out):
+            item["area"] = areas[k]
+            item["centroid"] = cents[k]
+            if payload is not None:
+                m = payload[k]
+                item["mask"] = np.round(m.astype(np.float64), 1).tolist() if isinstance(m, np.ndarray) else m
+    return out
+
+
+def subset_results(result: Any, index: np.ndarray) -> Any:
+    """按原始序号取 ultralytics Results 子集 (boxes/masks 一并索引)，避免坐标匹配与深拷贝。
+    新版本直接使用 Results.__getitem__；不支持时浅拷贝 Results 并替换 boxes/masks。
+    """
+    idx = np.asarray(index).astype(np.int64, copy=False).tolist()
+    try:
+        return result[idx]
+    except Exception:
+        pass
+    import copy
+    sub = copy.copy(result)
+    for attr in ("boxes", "masks"):
+        v = getattr(result, attr, None)
+        if v is not None:
+            setattr(sub, attr, v[idx])
+    return sub
+
+
+def top_k(probs: np.ndarray, k: int) -> np.ndarray:
+    """返回概率最高的 k 个索引 (降序)，argpartition 避免全量排序。"""
+    n = probs.shape[0]
+    k = max(0, min(int(k), n))
+    if k == 0:
+        return np.zeros((0,), dtype=np.int64)
+    if k < n:
+        idx = np.argpartition(-probs, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-probs[idx], kind="stable")]
+
+
+def format_classification(probs: np.ndarray, idx: np.ndarray, names: Dict[int, str], fmt: str = "dicts") -> Any:
+    scores = probs[idx].astype(np.float32, copy=False)
+    ids = idx.astype(np.int32)
+    if fmt == "structured":
+        out = np.empty(len(ids), dtype=CLASSIFICATION_DTYPE)
+        out["class_id"] = ids
+        out["confidence"] = scores
+        return out
+    if fmt == "columnar":
+        return {"class_id": ids, "confidence": scores, "class_names": class_names_for(ids, names)}
+    return [{"class_id": c, "class_name": n, "confidence": s}
+            for c, n, s in zip(ids.tolist(), class_names_for(ids, names),
+                               np.round(scores.astype(np.float64), 5).tolist())]
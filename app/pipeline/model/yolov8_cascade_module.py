@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YOLOv8 级联分类模块 (yolov8级联分类)
+输入: image + detections (上游检测模块的 results，任一 results_format)
+输出: image(同输入), results(检测结果附加分类字段), status
+
+流程: 全部检测框一次向量化双线性采样为 (N,S,S,3) 批量 (见 yolo_crops.crop_batch)，
+按 batch_size 分批转为 BCHW 张量，每批只调用一次分类模型，无需脚本模块逐框循环。
+每个检测附加 cls_id / cls_name / cls_confidence (Top-1)；最短边小于 min_box 的框不分类 (cls_id=-1/None)。
+results 保持输入格式: dicts 每项附加字段 | structured 追加 cls_id/cls_confidence 字段
+  | columnar 追加 cls_id/cls_confidence 数组与 cls_names 列表。
+模型加载/共享缓存/预热与 yolov8分类 相同 (top_n / results_format 配置不适用)。
+"""
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.pipeline.model.yolo_crops import CROP_MODES, attach_classification, crop_batch, crop_regions, \
+    detection_boxes
+from app.pipeline.model.yolo_utils import to_numpy
+from app.pipeline.model.yolov8_classify_module import YoloV8ClassifyModule
+from app.utils.cpu_budget import apply_cpu_budget, resolve_cpu_budget
+
+try:
+    from pydantic import validator
+except ImportError:
+    def validator(*args, **kwargs):
+        def _wrap(fn): return fn
+        return _wrap
+
+
+class YoloV8CascadeClassifyModule(YoloV8ClassifyModule):
+
+    class ConfigModel(YoloV8ClassifyModule.ConfigModel):  # type: ignore
+        crop_size: int = 224        # 裁剪缩放后的方形边长 (分类模型输入尺寸，32 的倍数)
+        crop_pad: float = 0.1       # 检测框四周外扩比例
+        crop_mode: str = "square"   # square (以框中心扩为正方形，不变形) | stretch (直接拉伸)
+        batch_size: int = 32        # 每次分类推理的最大裁剪数
+        min_box: int = 4            # 最短边小于该值 (像素) 的检测框不分类
+
+        @validator("crop_size")
+        def _cs(cls, v):
+            if v < 32 or v % 32:
+                raise ValueError("crop_size 必须为 >= 32 的 32 的倍数")
+            return v
+
+        @validator("crop_pad")
+        def _pad(cls, v):
+            if not (0 <= v <= 1):
+                raise ValueError("crop_pad 必须在 [0,1]")
+            return v
+
+        @validator("crop_mode")
+        def _cm(cls, v):
+            if v not in CROP_MODES:
+                raise ValueError(f"crop_mode 必须为 {CROP_MODES}")
+            return v
+
+        @validator("batch_size")
+        def _bs(cls, v):
+            if v < 1:
+                raise ValueError("batch_size 必须 >= 1")
+            return v
+
+        @validator("min_box")
+        def _mb(cls, v):
+            if v < 0:
+                raise ValueError("min_box 不能为负数")
+            return v
+
+    def __init__(self, name: str = "yolov8级联分类"):
+        super().__init__(name)
+        self.config.update({
+            "crop_size": 224,
+            "crop_pad": 0.1,
+            "crop_mode": "square",
+            "batch_size": 32,
+            "min_box": 4,
+        })
+        self._cascade_stats: Dict[str, Any] = {}
+
+    def _define_ports(self):
+        if not self.input_ports:
+            self.register_input_port("image", port_type="frame", desc="输入图像", required=True)
+            self.register_input_port("detections", port_type="meta", desc="检测结果 (yolov8检测 results)",
+                                     required=True)
+            self.register_input_port("control", port_type="bool", desc="推理控制: False 跳过", required=False)
+        if not self.output_ports:
+            self.register_output_port("image_raw", port_type="frame", desc="原始输入图像")
+            self.register_output_port("image", port_type="frame", desc="保持原图")
+            self.register_output_port("results", port_type="meta", desc="附加分类字段的检测结果")
+            self.register_output_port("status", port_type="meta", desc="状态")
+
+    @staticmethod
+    def _batch_source(crops: np.ndarray) -> Any:
+        """(B,S,S,3) BGR uint8 -> ultralytics 可直接推理的批量输入。
+        有 torch 时转为 BCHW RGB float 张量 (0~1)，整批一次前向；否则退化为图像列表 (同样按批推理)。
+        """
+        try:
+            import torch
+        except ImportError:
+            return list(crops)
+        rgb = np.ascontiguousarray(crops[..., ::-1])
+        return torch.from_numpy(rgb).permute(0, 3, 1, 2).float().div_(255.0)
+
+    @staticmethod
+    def _stack_probs(results: List[Any]) -> np.ndarray:
+        """各结果的 probs.data 合并为 (B,K)；张量先在设备上 stack 再一次性拷回。"""
+        datas = [getattr(getattr(r, "probs", None), "data", None) for r in results]
+        try:
+            import torch
+            if datas and all(isinstance(d, torch.Tensor) for d in datas):
+                return torch.stack(datas).float().cpu().numpy()
+        except ImportError:
+            pass
+        return np.stack([to_numpy(d).astype(np.float32, copy=False).reshape(-1) for d in datas])
+
+    def process(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        self._apply_hot_swap()
+        apply_cpu_budget(*resolve_cpu_budget(self.config, self.cpu_budget))
+        if not self._control_allows(inputs.get("control")):
+            return {"status": "skipped"}
+        img = inputs.get("image")
+        if img is None or not isinstance(img, np.ndarray):
+            return {"status": "no-image"}
+        if not self._model_loaded or self._model is None:
+            return {"status": f"model-unloaded: {self._failed_reason or 'unknown'}"}
+        if bool(self.config.get("deferred_first_infer", True)) and self._warming and not self._warmup_done:
+            return {"status": f"warming:{self._warmup_iters_completed}/{self.config.get('warmup_iterations',0)}"}
+        detections = inputs.get("detections")
+        try:
+            xyxy = detection_boxes(detections)
+        except Exception as e:
+            return {"status": f"detections-error: {e}"}
+        arr = img
+        if arr.ndim == 2:
+            arr = np.stack([arr]*3, axis=-1)
+        elif arr.shape[2] == 4:
+            arr = arr[:, :, :3]
+        self._last_raw_shape = tuple(img.shape)
+        min_box = float(self.config.get("min_box", 4))
+        side = np.minimum(xyxy[:, 2] - xyxy[:, 0], xyxy[:, 3] - xyxy[:, 1])
+        index = np.flatnonzero(side >= max(min_box, 1e-6))
+        size = int(self.config.get("crop_size", 224))
+        batch = int(self.config.get("batch_size", 32))
+        device = self._select_device()
+        half = bool(self.config.get("half", False)) and device.startswith("cuda")
+        t0 = time.perf_counter()
+        crops = crop_batch(arr, crop_regions(xyxy[index], float(self.config.get("crop_pad", 0.1)),
+                                             str(self.config.get("crop_mode", "square"))), size)
+        t1 = time.perf_counter()
+        probs: List[np.ndarray] = []
+        try:
+            for s in range(0, len(crops), batch):
+                results = self._model.predict(source=self._batch_source(crops[s:s + batch]), verbose=False,
+                                              device=device, half=half, imgsz=size)
+                probs.append(self._stack_probs(results))
+        except Exception as e:
+            return {"status": f"infer-error: {e}"}
+        t2 = time.perf_counter()
+        try:
+            if probs:
+                p = np.concatenate(probs, axis=0)
+                cls_ids = p.argmax(axis=1).astype(np.int32)
+                confs = p[np.arange(len(p)), cls_ids].astype(np.float32)
+            else:
+                cls_ids, confs = np.zeros((0,), np.int32), np.zeros((0,), np.float32)
+            out = attach_classification(detections, index, cls_ids, confs, self._names)
+        except Exception as e:
+            return {"status": f"parse-error: {e}"}
+        self._last_annotated_shape = self._last_raw_shape
+        self._cascade_stats = {
+            "detections": int(len(xyxy)),
+            "crops": int(len(crops)),
+            "batches": len(probs),
+            "crop_ms": round((t1 - t0) * 1000.0, 3),
+            "infer_ms": round((t2 - t1) * 1000.0, 3),
+        }
+        export_raw = bool(self.config.get("export_raw", True)) and self.is_output_consumed("image_raw")
+        return {
+            "image_raw": img if export_raw else None,
+            "image": img,
+            "results": out,
+            "status": f"ok:{len(crops)}",
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        base = super().get_status()
+        base.update({"cascade": dict(self._cascade_stats)})
+        return base
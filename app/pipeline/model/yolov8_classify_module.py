@@ -6,10 +6,20 @@ YOLOv8 分类模块 (yolov8分类)
 输出: image(可选同输入), results(分类 Top-N 列表)
 
 results: [{"class_id": int, "class_name": str, "confidence": float}, ...]
+results_format: dicts (默认，上述格式) | structured (NumPy 结构化数组: class_id/confidence)
+  | columnar ({"class_id": (K,), "confidence": (K,), "class_names": [...]})
+hot_swap: 运行中修改 model_path/device/half 时后台加载预热新模型，下一周期原子切换，失败回滚 (见 yolo_hot_swap)
+cpu_threads / cpu_affinity: 推理线程的 torch 线程数与绑定核心 (0 / 空使用执行器分配的预算，见 app.utils.cpu_budget)
 """
 from typing import Any, Dict, List, Optional
 import numpy as np
 from app.pipeline.base_module import BaseModule, ModuleType, ModuleCapabilities
+from app.models.model_cache import ModelHandle, default_imgsz, get_model_cache
+from app.pipeline.model.yolo_utils import RESULT_FORMATS, to_numpy, top_k, format_classification
+from app.pipeline.model.yolo_hot_swap import YoloHotSwapMixin
+from app.models.model_swap import ModelSwapper
+from app.models.warmup_scheduler import get_warmup_scheduler
+from app.utils.cpu_budget import apply_cpu_budget, parse_core_list, resolve_cpu_budget
 try:
     from pydantic import BaseModel, validator
 except ImportError:
@@ -18,7 +28,7 @@ except ImportError:
         def _wrap(fn): return fn
         return _wrap
 
-class YoloV8ClassifyModule(BaseModule):
+class YoloV8ClassifyModule(YoloHotSwapMixin, BaseModule):
     CAPABILITIES = ModuleCapabilities(
         supports_async=False,
         supports_batch=False,
@@ -37,11 +47,27 @@ class YoloV8ClassifyModule(BaseModule):
         warmup_iterations: int = 2      # 预热次数
         warmup_image_size: int = 224    # 分类模型默认输入尺寸（可根据权重自适应）
         deferred_first_infer: bool = True  # 预热期间延迟真实推理
+        results_format: str = "dicts"      # results 端口格式: dicts | structured | columnar
+        hot_swap: bool = True              # 运行中更换模型时后台加载预热并在周期边界切换 (不停流程)
+        cpu_threads: int = 0               # 每次推理的 torch intra-op 线程数 (0 使用执行器分配的预算)
+        cpu_affinity: str = ""             # 推理线程绑定的核心，如 "0-3" (空则使用执行器分配)
 
         @validator("top_n")
         def _tn(cls, v):
             if v <= 0: raise ValueError("top_n > 0")
             return v
+        @validator("results_format")
+        def _rf(cls, v):
+            if v not in RESULT_FORMATS: raise ValueError(f"results_format 必须为 {RESULT_FORMATS}")
+            return v
+        @validator("cpu_threads")
+        def _threads(cls, v):
+            if v < 0: raise ValueError("cpu_threads 不能为负")
+            return v
+        @validator("cpu_affinity")
+        def _affinity(cls, v):
+            parse_core_list(v)
+            return v
 
     def __init__(self, name: str = "yolov8分类"):
         super().__init__(name)
@@ -55,9 +81,16 @@ class YoloV8ClassifyModule(BaseModule):
             "warmup_iterations": 2,
             "warmup_image_size": 224,
             "deferred_first_infer": True,
+            "results_format": "dicts",
+            "hot_swap": True,
+            "cpu_threads": 0,
+            "cpu_affinity": "",
         })
         self._model = None
         self._model_loaded = False
+        # 最近一次获取的缓存键与对应配置 (model_path, device, half)，配置变化时使旧条目失效
+        self._model_key: Optional[tuple] = None
+        self._model_source: Optional[tuple] = None
         self._names: Dict[int, str] = {}
         self._failed_reason: Optional[str] = None
         self._last_raw_shape: Optional[tuple] = None
@@ -67,7 +100,13 @@ class YoloV8ClassifyModule(BaseModule):
         self._warmup_done: bool = False
         self._warmup_error: Optional[str] = None
         self._warmup_iters_completed: int = 0
-        self._warmup_thread = None
+        self._warmup_job = None
+        # 预热排队优先级: 流程图层级 (离相机最近为 0，越小越先预热)，由执行器/GUI 设置
+        self.warmup_priority: int = 0
+        # CPU 预算 {"threads", "cores"}: 执行器按并发模型节点数分配 (见 app.utils.cpu_budget)
+        self.cpu_budget: Optional[Dict[str, Any]] = None
+        # 模型热切换 (后台加载/预热新模型)
+        self._swapper = ModelSwapper(name)
 
     @property
     def module_type(self) -> ModuleType:
@@ -96,25 +135,32 @@ class YoloV8ClassifyModule(BaseModule):
     def _on_start(self):
         if self._model_loaded:
             return
-        try:
-            from ultralytics import YOLO  # type: ignore
-        except Exception as e:
-            self._failed_reason = f"未安装 ultralytics: {e}"
+        # 等待后台预加载 (torch/ultralytics 导入 + weights_only 兼容补丁)，未预加载时在此触发并等待
+        from app.utils.ml_preloader import require_yolo
+        YOLO, err = require_yolo()
+        if YOLO is None:
+            self._failed_reason = f"未安装 ultralytics: {err}"
             return
-        # PyTorch 2.6 weights_only 兼容补丁
-        try:
-            from app.utils.torch_patch import ensure_torch_load_legacy
-            ensure_torch_load_legacy()
-        except Exception:
-            pass
         path = self.config.get("model_path", "yolov8n-cls.pt")
         try:
-            self._model = YOLO(path)
+            # 进程级共享缓存: 相同 (权重, 设备, 精度) 的节点复用同一模型与预热结果
+            device = self._select_device()
+            precision = "fp16" if bool(self.config.get("half", False)) and device.startswith("cuda") else "fp32"
+            self._model = get_model_cache().acquire(path, device, precision, lambda: YOLO(path))
+            self._model_key = self._model.key
+            self._model_source = self._model_source_cfg()
             # 分类模型 names 中是类别名称列表
             self._names = getattr(self._model, "names", {}) or {}
             self._model_loaded = True
-            if bool(self.config.get("background_warmup", True)):
-                self._start_warmup_thread()
+            if self._model.warmed:
+                self._warmup_done = True
+                self._warmup_iters_completed = int(self.config.get("warmup_iterations", 0))
+            else:
+                # 新加载 (或被淘汰后重新加载) 的模型需要重新预热
+                self._warmup_done = False
+                self._warmup_iters_completed = 0
+                if bool(self.config.get("background_warmup", True)):
+                    self._schedule_warmup()
         except Exception as e:
             msg = str(e)
             if "weights_only" in msg.lower():
@@ -122,31 +168,64 @@ class YoloV8ClassifyModule(BaseModule):
             else:
                 self._failed_reason = f"模型加载失败: {msg}"
 
+    def _model_source_cfg(self) -> tuple:
+        return (self.config.get("model_path"), self.config.get("device", "auto"), bool(self.config.get("half", False)))
+
+    def _on_configure(self, config: Dict[str, Any]):
+        # 模型路径/设备/精度变化: 旧缓存条目失效 (常驻模式下同样释放；仍在使用时于停止后释放)
+        if self._model_key is not None and self._model_source_cfg() != self._model_source:
+            if self._hot_swap_ready():
+                # 运行中: 旧模型继续服务，新模型后台加载预热后在周期边界切换
+                self._begin_hot_swap()
+            else:
+                get_model_cache().invalidate(self._model_key)
+                self._model_key = None
+                self._model_source = None
+        elif self._swapper.pending:
+            # 配置恢复为当前模型: 放弃进行中的切换
+            self._swapper.cancel()
+
     def _on_stop(self):
+        # 放弃未完成的热切换 (已就绪的新模型引用一并归还)
+        self._swapper.cancel()
+        handle = self._model
         self._model = None
         self._model_loaded = False
         try:
-            if self._warming and self._warmup_thread is not None:
-                import threading
-                if isinstance(self._warmup_thread, threading.Thread):
-                    self._warmup_thread.join(timeout=0.5)
+            job = self._warmup_job
+            if self._warming and job is not None:
+                # 尚未开始的预热直接出队，运行中的短暂等待
+                if get_warmup_scheduler().cancel(job):
+                    self._warming = False
+                else:
+                    job.wait(timeout=0.5)
         except Exception:
             pass
+        # 归还共享模型引用 (未被其它节点引用时按缓存预算保留/淘汰)
+        get_model_cache().release(handle)
+
+    @staticmethod
+    def _control_allows(ctrl: Any) -> bool:
+        """control 端口取值 -> 是否执行推理 (None 视为执行)。"""
+        if ctrl is None:
+            return True
+        if isinstance(ctrl, (int, float)):
+            return ctrl != 0
+        if isinstance(ctrl, str):
+            v = ctrl.strip().lower()
+            ctrl_val = v in {"true","1","yes","y","run","start"}
+            if v in {"false","0","no","n","stop","pause"}:
+                ctrl_val = False
+            return ctrl_val
+        return bool(ctrl)
 
     def process(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        ctrl = inputs.get("control")
-        if ctrl is not None:
-            if isinstance(ctrl, (int, float)):
-                ctrl_val = (ctrl != 0)
-            elif isinstance(ctrl, str):
-                v = ctrl.strip().lower()
-                ctrl_val = v in {"true","1","yes","y","run","start"}
-                if v in {"false","0","no","n","stop","pause"}:
-                    ctrl_val = False
-            else:
-                ctrl_val = bool(ctrl)
-            if not ctrl_val:
-                return {"status": "skipped"}
+        # 周期边界: 应用已就绪的热切换模型
+        self._apply_hot_swap()
+        # 在推理线程上应用 CPU 预算 (线程数/核心绑定)
+        apply_cpu_budget(*resolve_cpu_budget(self.config, self.cpu_budget))
+        if not self._control_allows(inputs.get("control")):
+            return {"status": "skipped"}
         img = inputs.get("image")
         if img is None or not isinstance(img, np.ndarray):
             return {"status": "no-image"}
@@ -166,36 +245,31 @@ class YoloV8ClassifyModule(BaseModule):
         device = self._select_device()
         half = bool(self.config.get("half", False)) and device.startswith("cuda")
         try:
-            results = self._model.predict(source=arr, verbose=False, device=device, half=half)
+            # 显式传入 imgsz: 共享同一权重的级联节点会以 crop_size 推理，不能沿用其尺寸
+            results = self._model.predict(source=arr, verbose=False, device=device, half=half,
+                                          imgsz=default_imgsz(self._model))
         except Exception as e:
             return {"status": f"infer-error: {e}"}
         if not results:
             return {"status": "no-results"}
         r0 = results[0]
-        detections: List[Dict[str, Any]] = []
+        fmt = str(self.config.get("results_format", "dicts"))
         try:
             probs = getattr(r0, "probs", None)
-            if probs is not None and hasattr(probs, "top1"):
-                # probs.data 是向量
-                data = getattr(probs, "data", None)
-                if data is not None:
-                    arr_probs = data.cpu().numpy() if hasattr(data, "cpu") else data
-                    top_n = int(self.config.get("top_n", 5))
-                    idx_sorted = arr_probs.argsort()[::-1][:top_n]
-                    for i in idx_sorted:
-                        detections.append({
-                            "class_id": int(i),
-                            "class_name": self._names.get(int(i), str(i)),
-                            "confidence": round(float(arr_probs[i]), 5)
-                        })
+            data = getattr(probs, "data", None) if probs is not None and hasattr(probs, "top1") else None
+            # probs.data 是向量: 一次转为 NumPy，argpartition 取 Top-N
+            arr_probs = to_numpy(data).reshape(-1) if data is not None else np.zeros((0,), np.float32)
+            idx = top_k(arr_probs, int(self.config.get("top_n", 5)))
+            detections = format_classification(arr_probs, idx, self._names, fmt)
         except Exception as e:
             return {"status": f"parse-error: {e}"}
         self._last_annotated_shape = self._last_raw_shape
+        export_raw = bool(self.config.get("export_raw", True)) and self.is_output_consumed("image_raw")
         return {
-            "image_raw": img if bool(self.config.get("export_raw", True)) else None,
+            "image_raw": img if export_raw else None,
             "image": img,
             "results": detections,
-            "status": f"ok:{len(detections)}"
+            "status": f"ok:{len(idx)}"
         }
 
     def get_status(self) -> Dict[str, Any]:
@@ -210,6 +284,10 @@ class YoloV8ClassifyModule(BaseModule):
             "warmup_done": self._warmup_done,
             "warmup_error": self._warmup_error,
             "warmup_iters_completed": self._warmup_iters_completed,
+            # 共享模型的引用节点数 (>1 表示与其它节点共用同一份权重)
+            "model_refs": self._model.refcount if isinstance(self._model, ModelHandle) else 0,
+            "hot_swap": self._swapper.stats(),
+            "cpu_budget": dict(zip(("threads", "cores"), resolve_cpu_budget(self.config, self.cpu_budget))),
         })
         return base
 
@@ -219,24 +297,26 @@ class YoloV8ClassifyModule(BaseModule):
             if not self._model_loaded:
                 self._on_start()
             if self._model_loaded and not self._warmup_done and not self._warming:
-                self._start_warmup_thread()
+                self._schedule_warmup()
         except Exception as e:
             self._warmup_error = f"warmup-async-error: {e}"
 
     # ---------------- 预热实现 -----------------
-    def _start_warmup_thread(self):
+    def _schedule_warmup(self):
         if self._warming or self._warmup_done or not self._model_loaded or self._model is None:
             return
-        import threading
         self._warming = True
         self._warmup_error = None
         self._warmup_iters_completed = 0
+        # 排队期间模型可能被热切换: 预热固定作用于提交时的模型
+        model = self._model
         iters = max(0, int(self.config.get("warmup_iterations", 0)))
         img_size = int(self.config.get("warmup_image_size", 224))
+        imgsz = default_imgsz(model)
         device = self._select_device()
         half = bool(self.config.get("half", False)) and device.startswith("cuda")
 
-        def _run_warmup():
+        def _run_warmup(job):
             try:
                 if iters <= 0:
                     return
@@ -244,16 +324,20 @@ class YoloV8ClassifyModule(BaseModule):
                 dummy = (_np.random.rand(img_size, img_size, 3) * 255).astype(_np.uint8)
                 for i in range(iters):
                     try:
-                        self._model.predict(source=dummy, verbose=False, device=device, half=half)
+                        model.predict(source=dummy, verbose=False, device=device, half=half, imgsz=imgsz)
                     except Exception as _ie:
                         self._warmup_error = f"warmup-infer-error: {_ie}"
                         break
                     self._warmup_iters_completed = i + 1
+                    job.advance()
             except Exception as e:
                 self._warmup_error = f"warmup-error: {e}"
             finally:
                 self._warming = False
                 self._warmup_done = True if self._warmup_error is None else False
-        th = threading.Thread(target=_run_warmup, name=f"yolo8-cls-warmup-{self.name}", daemon=True)
-        self._warmup_thread = th
-        th.start()
+                if self._warmup_done and self._warmup_iters_completed > 0 and isinstance(model, ModelHandle):
+                    model.warmed = True
+            if self._warmup_error:
+                raise RuntimeError(self._warmup_error)
+        # 统一排队: 并发上限与按流程图层级的优先级见 app.models.warmup_scheduler
+        self._warmup_job = get_warmup_scheduler().submit(self.name, _run_warmup, self.warmup_priority, iters)
@@ -17,15 +17,38 @@ YOLOv8 检测模块 (yolov8检测)
   show_labels: 结果可视化时是否绘制标签
   show_conf: 是否在标注中显示置信度
   half: FP16 推理 (仅在 CUDA 可用时生效)
+  annotator: fast (cv2 复用缓冲区绘制，默认) | ultralytics (Results.plot) | none (不绘制，image 输出原图)
+  max_draw / preview_max_side: 最多绘制目标数 / 标注预览图最长边 (0 不限)
+  track: 跟踪模式，每 detect_interval 帧执行一次完整检测 (或外推置信度低于 track_min_conf 时提前检测)，
+    中间帧由 IoU + 卡尔曼跟踪器外推检测框 (status=tracked:N)，results 附加稳定的 track_id
+  hot_swap: 运行中修改 model_path/device/half 时后台加载并预热新模型，旧模型继续推理，
+    就绪后在下一周期原子切换；失败则回滚到原模型 (见 yolo_hot_swap)
+  cpu_threads / cpu_affinity: 推理线程的 torch 线程数与绑定核心 (0 / 空使用执行器按并发模型节点数分配的预算，
+    见 app.utils.cpu_budget)
 
 results 输出示例 (list[dict]):
   [{"box": [x1,y1,x2,y2], "confidence": 0.87, "class_id": 0, "class_name": "person"}, ...]
+results_format:
+  dicts (默认，上述格式) | structured (NumPy 结构化数组: box/confidence/class_id)
+  | columnar ({"boxes": (N,4), "confidence": (N,), "class_id": (N,), "class_names": [...]})
 
 错误处理: 若模型未加载或输入异常则返回 {"status": "error: ..."} 仅在 results 端口写入。
 """
+import time
 from typing import Any, Dict, List, Optional
 import numpy as np
 from app.pipeline.base_module import BaseModule, ModuleType, ModuleCapabilities
+from app.models.model_cache import ModelHandle, get_model_cache
+from app.pipeline.model.yolo_utils import (RESULT_FORMATS, extract_boxes, class_filter_mask, format_detections,
+                                           subset_results)
+from app.pipeline.model.yolo_annotator import ANNOTATORS, FastAnnotator
+from app.pipeline.model.yolo_tiling import predict_tiled
+from app.pipeline.model.motion_gate import GATE_REFERENCES, MotionGate
+from app.pipeline.model.box_tracker import BoxTracker
+from app.pipeline.model.yolo_hot_swap import YoloHotSwapMixin
+from app.models.model_swap import ModelSwapper
+from app.models.warmup_scheduler import get_warmup_scheduler
+from app.utils.cpu_budget import apply_cpu_budget, parse_core_list, resolve_cpu_budget
 
 try:
     from pydantic import BaseModel, validator
@@ -36,7 +59,7 @@ except ImportError:
             return fn
         return _wrap
 
-class YoloV8DetectModule(BaseModule):
+class YoloV8DetectModule(YoloHotSwapMixin, BaseModule):
     CAPABILITIES = ModuleCapabilities(
         supports_async=False,
         supports_batch=False,
@@ -62,6 +85,30 @@ class YoloV8DetectModule(BaseModule):
         warmup_iterations: int = 2            # 预热推理次数 (≥0)
         warmup_image_size: int = 640          # 预热使用的方形图尺寸 (640x640)
         deferred_first_infer: bool = True     # 若为 True, 在预热未完成时 process 返回 warming 状态
+        results_format: str = "dicts"         # results 端口格式: dicts | structured | columnar
+        annotator: str = "fast"               # 标注方式: fast (cv2 复用缓冲区) | ultralytics (Results.plot) | none (不绘制)
+        max_draw: int = 0                     # 最多绘制的目标数 (按置信度取前 N，0 不限)
+        preview_max_side: int = 0             # >0 时标注图缩放到最长边不超过该值 (仅 fast)
+        tiled: bool = False                   # 切片推理: 高分辨率图拆分为重叠切片分批推理后合并
+        tile_size: int = 640                  # 切片边长 (像素，同时作为推理 imgsz)
+        tile_overlap: int = 64                # 相邻切片重叠像素 (应大于待检目标尺寸)
+        tile_batch: int = 8                   # 每批最多送入模型的切片数
+        tile_merge_iou: float = 0.5           # 合并切片边界重复目标的 NMS IoU 阈值
+        motion_gate: bool = False             # 运动门控: 画面无变化时跳过推理并复用上次结果 (status=cached:N)
+        gate_threshold: float = 0.01          # 变化像素比例阈值 (低于则跳过)
+        gate_pixel_threshold: int = 25        # 灰度差超过该值的像素计为变化
+        gate_width: int = 160                 # 计算变化分数的缩小灰度图宽度
+        gate_reference: str = "inferred"      # 参考帧: inferred (最近推理帧) | previous (上一帧)
+        gate_max_skip: int = 0                # 连续跳过该帧数后强制推理 (0 不限)
+        track: bool = False                   # 跟踪模式: 间隔检测 + 中间帧跟踪外推，输出 track_id
+        detect_interval: int = 3              # 跟踪模式下每 N 帧执行一次完整检测
+        track_iou: float = 0.3                # 检测与轨迹关联的最小 IoU
+        track_max_age: int = 5                # 轨迹连续未命中的检测帧数上限 (超过即删除)
+        track_conf_decay: float = 0.95        # 外推帧置信度每帧衰减系数
+        track_min_conf: float = 0.15          # 外推置信度低于该值时提前执行检测
+        hot_swap: bool = True                 # 运行中更换模型时后台加载预热并在周期边界切换 (不停流程)
+        cpu_threads: int = 0                  # 每次推理的 torch intra-op 线程数 (0 使用执行器分配的预算)
+        cpu_affinity: str = ""                # 推理线程绑定的核心，如 "0-3" (空则使用执行器分配)
 
         @validator("confidence")
         def _conf(cls, v):
@@ -73,6 +120,90 @@ class YoloV8DetectModule(BaseModule):
             if v <= 0:
                 raise ValueError("max_det > 0")
             return v
+        @validator("results_format")
+        def _rf(cls, v):
+            if v not in RESULT_FORMATS:
+                raise ValueError(f"results_format 必须为 {RESULT_FORMATS}")
+            return v
+        @validator("annotator")
+        def _ann(cls, v):
+            if v not in ANNOTATORS:
+                raise ValueError(f"annotator 必须为 {ANNOTATORS}")
+            return v
+        @validator("max_draw", "preview_max_side", "cpu_threads")
+        def _non_neg(cls, v):
+            if v < 0:
+                raise ValueError("不能为负数")
+            return v
+        @validator("tile_size")
+        def _tile(cls, v):
+            if v < 32:
+                raise ValueError("tile_size 必须 >= 32")
+            return v
+        @validator("tile_overlap")
+        def _overlap(cls, v, values):
+            if v < 0 or v >= values.get("tile_size", 640):
+                raise ValueError("tile_overlap 必须在 [0, tile_size)")
+            return v
+        @validator("tile_batch")
+        def _tile_batch(cls, v):
+            if v <= 0:
+                raise ValueError("tile_batch > 0")
+            return v
+        @validator("tile_merge_iou")
+        def _merge_iou(cls, v):
+            if not (0 <= v <= 1):
+                raise ValueError("tile_merge_iou 必须在 [0,1]")
+            return v
+        @validator("gate_threshold")
+        def _gate_thr(cls, v):
+            if not (0 <= v <= 1):
+                raise ValueError("gate_threshold 必须在 [0,1]")
+            return v
+        @validator("gate_pixel_threshold")
+        def _gate_px(cls, v):
+            if not (0 <= v <= 255):
+                raise ValueError("gate_pixel_threshold 必须在 [0,255]")
+            return v
+        @validator("gate_width")
+        def _gate_w(cls, v):
+            if v < 8:
+                raise ValueError("gate_width 必须 >= 8")
+            return v
+        @validator("cpu_affinity")
+        def _affinity(cls, v):
+            parse_core_list(v)
+            return v
+        @validator("gate_reference")
+        def _gate_ref(cls, v):
+            if v not in GATE_REFERENCES:
+                raise ValueError(f"gate_reference 必须为 {GATE_REFERENCES}")
+            return v
+        @validator("gate_max_skip")
+        def _gate_skip(cls, v):
+            if v < 0:
+                raise ValueError("gate_max_skip 不能为负数")
+            return v
+        @validator("detect_interval")
+        def _interval(cls, v):
+            if v < 1:
+                raise ValueError("detect_interval 必须 >= 1")
+            return v
+        @validator("track_max_age")
+        def _max_age(cls, v):
+            if v < 0:
+                raise ValueError("track_max_age 不能为负数")
+            return v
+        @validator("track_iou", "track_min_conf")
+        def _track_prob(cls, v):
+            if not (0 <= v <= 1):
+                raise ValueError("必须在 [0,1]")
+            return v
+        @validator("track_conf_decay")
+        def _decay(cls, v):
+            if not (0 < v <= 1):
+                raise ValueError("track_conf_decay 必须在 (0,1]")
+            return v
 
     def __init__(self, name: str = "yolov8检测"):
         super().__init__(name)
@@ -94,9 +225,48 @@ class YoloV8DetectModule(BaseModule):
             "warmup_iterations": 2,
             "warmup_image_size": 640,
             "deferred_first_infer": True,
+            "results_format": "dicts",
+            "annotator": "fast",
+            "max_draw": 0,
+            "preview_max_side": 0,
+            "tiled": False,
+            "tile_size": 640,
+            "tile_overlap": 64,
+            "tile_batch": 8,
+            "tile_merge_iou": 0.5,
+            "motion_gate": False,
+            "gate_threshold": 0.01,
+            "gate_pixel_threshold": 25,
+            "gate_width": 160,
+            "gate_reference": "inferred",
+            "gate_max_skip": 0,
+            "track": False,
+            "detect_interval": 3,
+            "track_iou": 0.3,
+            "track_max_age": 5,
+            "track_conf_decay": 0.95,
+            "track_min_conf": 0.15,
+            "hot_swap": True,
+            "cpu_threads": 0,
+            "cpu_affinity": "",
         })
+        # cv2 轻量标注器 (复用输出缓冲区)
+        self._annotator = FastAnnotator()
+        # 最近一次切片推理的统计 (切片数/批数/各阶段耗时 ms)
+        self._tile_stats: Optional[Dict[str, Any]] = None
+        # 运动门控: 变化分数判定 + 最近一次推理输出 (跳过时复用) 及其对应的动态 targets
+        self._gate = MotionGate()
+        self._last_output: Optional[Dict[str, Any]] = None
+        self._gate_key: Optional[tuple] = None
+        # 跟踪模式: 跟踪器、建立轨迹时的动态 targets 及检测/外推帧计数
+        self._tracker = BoxTracker()
+        self._track_key: Optional[tuple] = None
+        self._track_counts = {"detect_frames": 0, "tracked_frames": 0}
         self._model = None
         self._model_loaded = False
+        # 最近一次获取的缓存键与对应配置 (model_path, device, half)，配置变化时使旧条目失效
+        self._model_key: Optional[tuple] = None
+        self._model_source: Optional[tuple] = None
         self._names: Dict[int, str] = {}
         self._failed_reason: Optional[str] = None
         # 最近一次推理的尺寸 (H,W,C)
@@ -107,7 +277,13 @@ class YoloV8DetectModule(BaseModule):
         self._warmup_done: bool = False
         self._warmup_error: Optional[str] = None
         self._warmup_iters_completed: int = 0
-        self._warmup_thread = None
+        self._warmup_job = None
+        # 预热排队优先级: 流程图层级 (离相机最近为 0，越小越先预热)，由执行器/GUI 设置
+        self.warmup_priority: int = 0
+        # CPU 预算 {"threads", "cores"}: 执行器按并发模型节点数分配 (见 app.utils.cpu_budget)
+        self.cpu_budget: Optional[Dict[str, Any]] = None
+        # 模型热切换 (后台加载/预热新模型)
+        self._swapper = ModelSwapper(name)
 
     @property
     def module_type(self) -> ModuleType:
@@ -139,26 +315,33 @@ class YoloV8DetectModule(BaseModule):
     def _on_start(self):
         if self._model_loaded:
             return
-        try:
-            from ultralytics import YOLO  # type: ignore
-        except Exception as e:
-            self._failed_reason = f"未安装 ultralytics: {e}"
+        # 等待后台预加载 (torch/ultralytics 导入 + weights_only 兼容补丁)，未预加载时在此触发并等待
+        from app.utils.ml_preloader import require_yolo
+        YOLO, err = require_yolo()
+        if YOLO is None:
+            self._failed_reason = f"未安装 ultralytics: {err}"
             return
-        # PyTorch 2.6 weights_only 兼容补丁
-        try:
-            from app.utils.torch_patch import ensure_torch_load_legacy
-            ensure_torch_load_legacy()
-        except Exception:
-            pass
         model_path = self.config.get("model_path", "yolov8n.pt")
         try:
-            self._model = YOLO(model_path)
+            # 进程级共享缓存: 相同 (权重, 设备, 精度) 的节点复用同一模型与预热结果
+            device = self._select_device()
+            precision = "fp16" if bool(self.config.get("half", False)) and device.startswith("cuda") else "fp32"
+            self._model = get_model_cache().acquire(model_path, device, precision, lambda: YOLO(model_path))
+            self._model_key = self._model.key
+            self._model_source = self._model_source_cfg()
             # 取类别名称
             self._names = getattr(self._model, "names", {}) or {}
             self._model_loaded = True
             # 启动后台预热线程（可选）
-            if bool(self.config.get("background_warmup", True)):
-                self._start_warmup_thread()
+            if self._model.warmed:
+                self._warmup_done = True
+                self._warmup_iters_completed = int(self.config.get("warmup_iterations", 0))
+            else:
+                # 新加载 (或被淘汰后重新加载) 的模型需要重新预热
+                self._warmup_done = False
+                self._warmup_iters_completed = 0
+                if bool(self.config.get("background_warmup", True)):
+                    self._schedule_warmup()
         except Exception as e:
             # 若报错与 weights_only 相关，提示可能的兼容问题
             msg = str(e)
@@ -167,20 +350,59 @@ class YoloV8DetectModule(BaseModule):
             else:
                 self._failed_reason = f"模型加载失败: {msg}"
 
+    def _model_source_cfg(self) -> tuple:
+        return (self.config.get("model_path"), self.config.get("device", "auto"), bool(self.config.get("half", False)))
+
+    def _on_configure(self, config: Dict[str, Any]):
+        # 模型路径/设备/精度变化: 旧缓存条目失效 (常驻模式下同样释放；仍在使用时于停止后释放)
+        if self._model_key is not None and self._model_source_cfg() != self._model_source:
+            if self._hot_swap_ready():
+                # 运行中: 旧模型继续服务，新模型后台加载预热后在周期边界切换
+                self._begin_hot_swap()
+            else:
+                get_model_cache().invalidate(self._model_key)
+                self._model_key = None
+                self._model_source = None
+        elif self._swapper.pending:
+            # 配置恢复为当前模型: 放弃进行中的切换
+            self._swapper.cancel()
+        # 配置变化后缓存结果不再可信，下一帧重新推理
+        self._gate.configure(self.config.get("gate_threshold", 0.01), self.config.get("gate_pixel_threshold", 25),
+                             self.config.get("gate_width", 160), self.config.get("gate_reference", "inferred"),
+                             self.config.get("gate_max_skip", 0))
+        self._gate.reset()
+        self._last_output = None
+        self._tracker = BoxTracker(float(self.config.get("track_iou", 0.3)), int(self.config.get("track_max_age", 5)),
+                                   float(self.config.get("track_conf_decay", 0.95)))
+        self._track_key = None
+        self._track_counts = {"detect_frames": 0, "tracked_frames": 0}
+
     def _on_stop(self):
+        # 放弃未完成的热切换 (已就绪的新模型引用一并归还)
+        self._swapper.cancel()
         # 释放模型引用（便于显式 GC）
+        handle = self._model
         self._model = None
         self._model_loaded = False
-        # 等待预热线程结束
+        # 取消排队中的预热或等待运行中的预热结束
         try:
-            if self._warming and self._warmup_thread is not None:
-                import threading
-                if isinstance(self._warmup_thread, threading.Thread):
-                    self._warmup_thread.join(timeout=0.5)
+            job = self._warmup_job
+            if self._warming and job is not None:
+                # 尚未开始的预热直接出队，运行中的短暂等待
+                if get_warmup_scheduler().cancel(job):
+                    self._warming = False
+                else:
+                    job.wait(timeout=0.5)
         except Exception:
             pass
+        # 归还共享模型引用 (未被其它节点引用时按缓存预算保留/淘汰)
+        get_model_cache().release(handle)
 
     def process(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        # 周期边界: 应用已就绪的热切换模型
+        self._apply_hot_swap()
+        # 在推理线程上应用 CPU 预算 (线程数/核心绑定)
+        apply_cpu_budget(*resolve_cpu_budget(self.config, self.cpu_budget))
         ctrl = inputs.get("control")
         if ctrl is not None:
             # 宽松解析
@@ -231,9 +453,9 @@ class YoloV8DetectModule(BaseModule):
                     if txt.startswith("[") and txt.endswith("]"):
                         import json as _json
                         try:
-                            arr = _json.loads(txt)
-                            if isinstance(arr, (list, tuple)):
-                                dynamic_targets = [str(x).strip() for x in arr if str(x).strip()]
+                            parsed = _json.loads(txt)
+                            if isinstance(parsed, (list, tuple)):
+                                dynamic_targets = [str(x).strip() for x in parsed if str(x).strip()]
                         except Exception:
                             pass
                     if not dynamic_targets:
@@ -256,6 +478,19 @@ class YoloV8DetectModule(BaseModule):
                 dynamic_targets = []
         # 是否启用类别过滤: 配置启用 或 动态 targets 提供
         filter_enabled = bool(self.config.get("enable_target_filter", False)) or bool(dynamic_targets)
+        # 运动门控: 与参考帧相比无明显变化时复用上次结果 (动态 targets 变化时强制推理)
+        gated = bool(self.config.get("motion_gate", False))
+        gate_key = tuple(dynamic_targets)
+        if gated:
+            fresh = self._last_output is None or gate_key != self._gate_key
+            if not self._gate.should_infer(arr, force=fresh):
+                return self._cached_output(img)
+        # 跟踪模式: 未到检测间隔且外推置信度足够时只外推轨迹，不执行推理
+        tracking = bool(self.config.get("track", False))
+        if tracking and gate_key == self._track_key and not self._tracker.need_detection(
+                int(self.config.get("detect_interval", 3)), float(self.config.get("track_min_conf", 0.15))):
+            return self._tracked_output(img, arr)
+        infer_start = time.perf_counter()
         try:
             # ultralytics YOLO 调用
             predict_kwargs: Dict[str, Any] = dict(source=arr, conf=conf, verbose=False, max_det=max_det,
@@ -280,124 +515,127 @@ class YoloV8DetectModule(BaseModule):
                     if mapped:
                         predict_kwargs["classes"] = mapped
                 # print(mapped)
-            results = self._model.predict(**predict_kwargs)
+            if bool(self.config.get("tiled", False)):
+                results = [self._predict_tiled(arr, predict_kwargs, agnostic)]
+            else:
+                results = self._model.predict(**predict_kwargs)
         except Exception as e:
             return {"status": f"infer-error: {e}"}
         if not results:
             return {"status": "no-results"}
         r0 = results[0]
-        # 构造结果列表
-        detections: List[Dict[str, Any]] = []
+        # 结果提取: boxes.data 一次转为 NumPy 后切片 (避免逐框 item()/tolist())
         try:
-            if hasattr(r0, "boxes") and r0.boxes is not None:
-                # boxes.xyxy, boxes.cls, boxes.conf
-                xyxy = getattr(r0.boxes, "xyxy", None)
-                cls = getattr(r0.boxes, "cls", None)
-                confs = getattr(r0.boxes, "conf", None)
-                if xyxy is not None and cls is not None and confs is not None:
-                    for i in range(len(xyxy)):
-                        bb = xyxy[i].tolist()
-                        cid = int(cls[i].item()) if hasattr(cls[i], 'item') else int(cls[i])
-                        score = float(confs[i].item()) if hasattr(confs[i], 'item') else float(confs[i])
-                        detections.append({
-                            "box": [round(b,2) for b in bb],
-                            "confidence": round(score,4),
-                            "class_id": cid,
-                            "class_name": self._names.get(cid, str(cid))
-                        })
+            xyxy_np, conf_np, cls_np = extract_boxes(getattr(r0, "boxes", None))
         except Exception as e:
             return {"status": f"parse-error: {e}"}
-        # 目标过滤逻辑 (再次基于 detections 列表过滤，用于 annotate_filtered_only 及纯名称/数值混合)
+        total_count = int(len(cls_np))
+        idx_np = np.arange(total_count, dtype=np.int32)
+        # 目标过滤逻辑 (再次基于类别掩码过滤，用于 annotate_filtered_only 及纯名称/数值混合)
+        # 掩码只计算一次，结果与标注共用保留下来的原始序号 idx_np
+        all_boxes = (xyxy_np, conf_np, cls_np)
+        keep = None
         if filter_enabled:
             target_list = dynamic_targets if dynamic_targets else (self.config.get("target_classes", []) or [])
-            norm_name_set = set()
-            index_set = set()
-            for t in target_list:
-                s = str(t).strip()
-                if not s:
-                    continue
-                if s.isdigit():
-                    try:
-                        index_set.add(int(s))
-                    except ValueError:
-                        pass
-                else:
-                    norm_name_set.add(s.lower())
-            if norm_name_set or index_set:
-                filtered = []
-                for d in detections:
-                    cid = d.get("class_id")
-                    cname = d.get("class_name", "").lower()
-                    if (cid in index_set) or (cname in norm_name_set):
-                        filtered.append(d)
-                detections = filtered
-        # 可视化标注
+            keep = class_filter_mask(cls_np, self._names, target_list)
+            if keep is not None:
+                xyxy_np, conf_np, cls_np, idx_np = xyxy_np[keep], conf_np[keep], cls_np[keep], idx_np[keep]
+        det_count = int(len(cls_np))
+        track_ids = None
+        if tracking:
+            track_ids = self._tracker.update(xyxy_np, conf_np, cls_np)
+            self._track_key = gate_key
+            self._track_counts["detect_frames"] += 1
+        # 按需输出: results 无下游消费者时不构造结果对象
+        detections = None
+        if self.is_output_consumed("results"):
+            detections = format_detections(xyxy_np, conf_np, cls_np, self._names,
+                                           str(self.config.get("results_format", "dicts")), track_ids)
+        # 可视化标注 (image 端口无下游消费者时跳过，输出 None)
         annotated = arr
+        mode = str(self.config.get("annotator", "fast"))
+        if not self.is_output_consumed("image"):
+            mode = "skip"
         try:
-            if bool(self.config.get("annotate_filtered_only", False)) and filter_enabled:
-                # 构造一个仿 results 的临时对象，替换 boxes 为过滤后的集合
-                # ultralytics Results 对象不可直接简单修改, 这里采用重新绘制策略:
-                from copy import deepcopy
-                # 若 detections 空则直接返回原图
-                if detections:
-                    # 创建 mask 图层: 依据 YOLO plot 实现，需要原始 r0.boxes 张量子集
-                    try:
-                        # 获取原 box/cls/conf 张量并根据 filtered indices 重组
-                        all_indices = []
-                        id_map = []
-                        if hasattr(r0, 'boxes') and r0.boxes is not None:
-                            xyxy = getattr(r0.boxes, 'xyxy', None)
-                            cls_tensor = getattr(r0.boxes, 'cls', None)
-                            conf_tensor = getattr(r0.boxes, 'conf', None)
-                            if xyxy is not None and cls_tensor is not None and conf_tensor is not None:
-                                # 通过匹配坐标近似确定索引 (简单策略：首个匹配)
-                                for d in detections:
-                                    bb = d['box']
-                                    # 在 xyxy 中寻找完全相同四元组
-                                    match_idx = None
-                                    for i in range(len(xyxy)):
-                                        arr_bb = xyxy[i].tolist()
-                                        arr_bb_r = [round(x,2) for x in arr_bb]
-                                        if arr_bb_r == bb:
-                                            match_idx = i
-                                            break
-                                    if match_idx is not None:
-                                        all_indices.append(match_idx)
-                        if all_indices:
-                            import torch
-                            # 构造子 boxes 对象
-                            sub_boxes = deepcopy(r0.boxes)
-                            sub_boxes.xyxy = r0.boxes.xyxy[all_indices]
-                            sub_boxes.cls = r0.boxes.cls[all_indices]
-                            sub_boxes.conf = r0.boxes.conf[all_indices]
-                            # 临时替换 plot 时使用的 boxes
-                            original_boxes = r0.boxes
-                            r0.boxes = sub_boxes
-                            try:
-                                annotated = r0.plot(conf=self.config.get("show_conf", True), labels=self.config.get("show_labels", True))
-                            finally:
-                                r0.boxes = original_boxes
-                        else:
-                            annotated = arr
-                    except Exception:
-                        annotated = r0.plot(conf=self.config.get("show_conf", True), labels=self.config.get("show_labels", True))
-                else:
-                    annotated = arr
+            show_conf = bool(self.config.get("show_conf", True))
+            show_labels = bool(self.config.get("show_labels", True))
+            filtered_only = bool(self.config.get("annotate_filtered_only", False)) and keep is not None \
+                and det_count < total_count
+            if mode == "skip":
+                annotated = None
+            elif mode == "none" or (filtered_only and not det_count):
+                # 关闭标注 / 过滤结果为空: 直接输出原图
+                annotated = arr
+            elif mode == "fast":
+                # 跟踪模式只绘制参与跟踪的 (过滤后) 目标并标注 track_id
+                bx, cf, cl = (xyxy_np, conf_np, cls_np) if filtered_only or tracking else all_boxes
+                annotated = self._annotator.annotate(
+                    arr, bx, cf, cl, self._names, show_conf=show_conf, show_labels=show_labels,
+                    max_draw=int(self.config.get("max_draw", 0)),
+                    preview_max_side=int(self.config.get("preview_max_side", 0)), track_ids=track_ids)
+            elif filtered_only:
+                # 仅绘制过滤后子集: 按原始序号直接索引 Results，无需坐标匹配与深拷贝
+                annotated = subset_results(r0, idx_np).plot(conf=show_conf, labels=show_labels)
             else:
-                annotated = r0.plot(conf=self.config.get("show_conf", True), labels=self.config.get("show_labels", True))
+                annotated = r0.plot(conf=show_conf, labels=show_labels)
         except Exception:
             annotated = arr
-        try:
-            self._last_annotated_shape = tuple(annotated.shape)
-        except Exception:
-            self._last_annotated_shape = None
+        if annotated is not None:
+            try:
+                self._last_annotated_shape = tuple(annotated.shape)
+            except Exception:
+                self._last_annotated_shape = None
+        export_raw = bool(self.config.get("export_raw", True)) and self.is_output_consumed("image_raw")
+        out = {
+            "image_raw": img if export_raw else None,
+            "image": annotated,
+            "results": detections,
+            "status": f"ok:{det_count}"
+        }
+        if gated:
+            self._gate.record_inference(time.perf_counter() - infer_start)
+            self._last_output = dict(out)
+            self._gate_key = gate_key
+        return out
+
+    def _tracked_output(self, img: np.ndarray, arr: np.ndarray) -> Dict[str, Any]:
+        """跟踪外推帧: 由跟踪器给出本帧检测框 (status=tracked:N)；ultralytics 标注方式在此回退为 fast。"""
+        xyxy_np, conf_np, cls_np, track_ids = self._tracker.predict()
+        self._track_counts["tracked_frames"] += 1
+        h, w = arr.shape[:2]
+        xyxy_np[:, [0, 2]] = np.clip(xyxy_np[:, [0, 2]], 0, w)
+        xyxy_np[:, [1, 3]] = np.clip(xyxy_np[:, [1, 3]], 0, h)
+        detections = None
+        if self.is_output_consumed("results"):
+            detections = format_detections(xyxy_np, conf_np, cls_np, self._names,
+                                           str(self.config.get("results_format", "dicts")), track_ids)
+        annotated = None
+        mode = str(self.config.get("annotator", "fast"))
+        if self.is_output_consumed("image"):
+            if mode == "none":
+                annotated = arr
+            else:
+                annotated = self._annotator.annotate(
+                    arr, xyxy_np, conf_np, cls_np, self._names, show_conf=bool(self.config.get("show_conf", True)),
+                    show_labels=bool(self.config.get("show_labels", True)),
+                    max_draw=int(self.config.get("max_draw", 0)),
+                    preview_max_side=int(self.config.get("preview_max_side", 0)), track_ids=track_ids)
+        export_raw = bool(self.config.get("export_raw", True)) and self.is_output_consumed("image_raw")
         return {
-            "image_raw": img if bool(self.config.get("export_raw", True)) else None,
+            "image_raw": img if export_raw else None,
             "image": annotated,
             "results": detections,
-            "status": f"ok:{len(detections)}"
+            "status": f"tracked:{len(track_ids)}"
         }
 
+    def _cached_output(self, img: np.ndarray) -> Dict[str, Any]:
+        """门控跳过: 复用上次结果与标注图，image_raw 为当前帧，status 标记为 cached:N。"""
+        out = dict(self._last_output or {})
+        export_raw = bool(self.config.get("export_raw", True)) and self.is_output_consumed("image_raw")
+        out["image_raw"] = img if export_raw else None
+        out["status"] = "cached:" + str(out.get("status", "")).split(":", 1)[-1]
+        return out
+
     def get_status(self) -> Dict[str, Any]:
         base = super().get_status()
         base.update({
@@ -410,9 +648,41 @@ class YoloV8DetectModule(BaseModule):
             "warmup_done": self._warmup_done,
             "warmup_error": self._warmup_error,
             "warmup_iters_completed": self._warmup_iters_completed,
+            # 共享模型的引用节点数 (>1 表示与其它节点共用同一份权重)
+            "model_refs": self._model.refcount if isinstance(self._model, ModelHandle) else 0,
+            "annotator": self._annotator.stats(),
+            "tiling": dict(self._tile_stats or {}, enabled=bool(self.config.get("tiled", False))),
+            "motion_gate": dict(self._gate.stats(), enabled=bool(self.config.get("motion_gate", False))),
+            "tracking": dict(self._tracker.stats(), **self._track_counts,
+                             enabled=bool(self.config.get("track", False))),
+            "hot_swap": self._swapper.stats(),
+            "cpu_budget": dict(zip(("threads", "cores"), resolve_cpu_budget(self.config, self.cpu_budget))),
         })
         return base
 
+    def _swap_warmup_kwargs(self) -> Dict[str, Any]:
+        return {"conf": float(self.config.get("confidence", 0.25)), "max_det": int(self.config.get("max_det", 100)),
+                "agnostic_nms": bool(self.config.get("agnostic_nms", False))}
+
+    def _on_model_swapped(self):
+        # 新模型的结果与缓存/轨迹不可混用
+        self._gate.reset()
+        self._last_output = None
+        self._tracker.reset()
+        self._track_key = None
+
+    def _predict_tiled(self, arr: np.ndarray, predict_kwargs: Dict[str, Any], agnostic: bool):
+        """切片推理: 每批切片一次 predict，合并为单个 Results 兼容对象并记录分阶段耗时。"""
+        kw = {k: v for k, v in predict_kwargs.items() if k != "source"}
+        tile = int(self.config.get("tile_size", 640))
+        kw["imgsz"] = tile
+        merged, self._tile_stats = predict_tiled(
+            lambda tiles: self._model.predict(source=tiles, **kw), arr, tile_size=tile,
+            overlap=int(self.config.get("tile_overlap", 64)), batch_size=int(self.config.get("tile_batch", 8)),
+            iou_threshold=float(self.config.get("tile_merge_iou", 0.5)), agnostic=agnostic,
+            max_det=int(self.config.get("max_det", 100)), names=self._names, with_masks=False)
+        return merged
+
     def warmup_async(self):
         """对外公开的预热触发接口: 若模型未加载则先加载, 再启动后台预热线程.
         可在 GUI 启动或项目加载后统一调用, 避免首次真实调用时卡顿.
@@ -421,24 +691,25 @@ class YoloV8DetectModule(BaseModule):
             if not self._model_loaded:
                 self._on_start()
             if self._model_loaded and not self._warmup_done and not self._warming:
-                self._start_warmup_thread()
+                self._schedule_warmup()
         except Exception as e:
             self._warmup_error = f"warmup-async-error: {e}"
 
     # ---------------- 预热实现 -----------------
-    def _start_warmup_thread(self):
+    def _schedule_warmup(self):
         if self._warming or self._warmup_done or not self._model_loaded or self._model is None:
             return
-        import threading
         self._warming = True
         self._warmup_error = None
         self._warmup_iters_completed = 0
+        # 排队期间模型可能被热切换: 预热固定作用于提交时的模型
+        model = self._model
         iters = max(0, int(self.config.get("warmup_iterations", 0)))
         img_size = int(self.config.get("warmup_image_size", 640))
         device = self._select_device()
         half = bool(self.config.get("half", False)) and device.startswith("cuda")
 
-        def _run_warmup():
+        def _run_warmup(job):
             try:
                 if iters <= 0:
                     return
@@ -447,7 +718,7 @@ class YoloV8DetectModule(BaseModule):
                 dummy = (_np.random.rand(img_size, img_size, 3) * 255).astype(_np.uint8)
                 for i in range(iters):
                     try:
-                        self._model.predict(source=dummy, conf=float(self.config.get("confidence", 0.25)),
+                        model.predict(source=dummy, conf=float(self.config.get("confidence", 0.25)),
                                             verbose=False, max_det=int(self.config.get("max_det", 100)),
                                             agnostic_nms=bool(self.config.get("agnostic_nms", False)),
                                             device=device, half=half)
@@ -456,11 +727,15 @@ class YoloV8DetectModule(BaseModule):
                         self._warmup_error = f"warmup-infer-error: {_ie}"
                         break
                     self._warmup_iters_completed = i + 1
+                    job.advance()
             except Exception as e:
                 self._warmup_error = f"warmup-error: {e}"
             finally:
                 self._warming = False
                 self._warmup_done = True if self._warmup_error is None else False
-        th = threading.Thread(target=_run_warmup, name=f"yolo8-warmup-{self.name}", daemon=True)
-        self._warmup_thread = th
-        th.start()
+                if self._warmup_done and self._warmup_iters_completed > 0 and isinstance(model, ModelHandle):
+                    model.warmed = True
+            if self._warmup_error:
+                raise RuntimeError(self._warmup_error)
+        # 统一排队: 并发上限与按流程图层级的优先级见 app.models.warmup_scheduler
+        self._warmup_job = get_warmup_scheduler().submit(self.name, _run_warmup, self.warmup_priority, iters)
@@ -7,10 +7,29 @@ YOLOv8 分割模块 (yolov8分割)
 
 mask_info: {"index": i, "box": [...], "class_id": int, "class_name": str, "confidence": float, "mask_shape": [h,w]}
 （为避免数据庞大暂不直接输出整张mask矩阵，可在后续扩展增加开关）
+results_format: dicts (默认，上述格式) | structured (NumPy 结构化数组: index/box/confidence/class_id)
+  | columnar ({"index", "boxes", "confidence", "class_id", "class_names", "mask_shape"})
+annotator: fast (cv2 绘制框/标签/掩码多边形到复用缓冲区，默认) | ultralytics (Results.plot) | none
+mask_format: none (默认，仅 mask_shape) | crop (裁剪到框的 uint8 掩码) | rle (裁剪掩码游程编码) | polygon (简化多边形)
+  非 none 或 mask_stats=True 时每个实例附加 area (原图像素) 与 centroid ([x,y] 原图坐标)
+hot_swap: 运行中修改 model_path/device/half 时后台加载预热新模型，下一周期原子切换，失败回滚 (见 yolo_hot_swap)
+cpu_threads / cpu_affinity: 推理线程的 torch 线程数与绑定核心 (0 / 空使用执行器分配的预算，见 app.utils.cpu_budget)
 """
+import time
 from typing import Any, Dict, List, Optional
 import numpy as np
 from app.pipeline.base_module import BaseModule, ModuleType, ModuleCapabilities
+from app.models.model_cache import ModelHandle, get_model_cache
+from app.pipeline.model.yolo_utils import (RESULT_FORMATS, extract_boxes, class_filter_mask, format_segments,
+                                           subset_results, to_numpy)
+from app.pipeline.model.yolo_annotator import ANNOTATORS, FastAnnotator
+from app.pipeline.model.yolo_tiling import predict_tiled
+from app.pipeline.model.motion_gate import GATE_REFERENCES, MotionGate
+from app.pipeline.model.yolo_masks import MASK_FORMATS, compact_masks
+from app.pipeline.model.yolo_hot_swap import YoloHotSwapMixin
+from app.models.model_swap import ModelSwapper
+from app.models.warmup_scheduler import get_warmup_scheduler
+from app.utils.cpu_budget import apply_cpu_budget, parse_core_list, resolve_cpu_budget
 try:
     from pydantic import BaseModel, validator
 except ImportError:
@@ -19,7 +38,7 @@ except ImportError:
         def _wrap(fn): return fn
         return _wrap
 
-class YoloV8SegmentModule(BaseModule):
+class YoloV8SegmentModule(YoloHotSwapMixin, BaseModule):
     CAPABILITIES = ModuleCapabilities(
         supports_async=False,
         supports_batch=False,
@@ -44,6 +63,27 @@ class YoloV8SegmentModule(BaseModule):
         warmup_iterations: int = 1            # 预热迭代次数
         warmup_image_size: int = 640          # 预热图尺寸 (方形)
         deferred_first_infer: bool = True     # 预热未完成时 process 返回 warming 状态
+        results_format: str = "dicts"         # results 端口格式: dicts | structured | columnar
+        annotator: str = "fast"               # 标注方式: fast (cv2 复用缓冲区) | ultralytics (Results.plot) | none (不绘制)
+        max_draw: int = 0                     # 最多绘制的目标数 (按置信度取前 N，0 不限)
+        preview_max_side: int = 0             # >0 时标注图缩放到最长边不超过该值 (仅 fast)
+        tiled: bool = False                   # 切片推理: 高分辨率图拆分为重叠切片分批推理后合并
+        tile_size: int = 640                  # 切片边长 (像素，同时作为推理 imgsz)
+        tile_overlap: int = 64                # 相邻切片重叠像素 (应大于待分割目标尺寸)
+        tile_batch: int = 8                   # 每批最多送入模型的切片数
+        tile_merge_iou: float = 0.5           # 合并切片边界重复目标的 NMS IoU 阈值
+        motion_gate: bool = False             # 运动门控: 画面无变化时跳过推理并复用上次结果 (status=cached:N)
+        gate_threshold: float = 0.01          # 变化像素比例阈值 (低于则跳过)
+        gate_pixel_threshold: int = 25        # 灰度差超过该值的像素计为变化
+        gate_width: int = 160                 # 计算变化分数的缩小灰度图宽度
+        gate_reference: str = "inferred"      # 参考帧: inferred (最近推理帧) | previous (上一帧)
+        gate_max_skip: int = 0                # 连续跳过该帧数后强制推理 (0 不限)
+        mask_format: str = "none"             # 紧凑掩码输出: none | crop | rle | polygon
+        mask_stats: bool = False              # 即使 mask_format=none 也输出每个掩码的 area / centroid
+        polygon_epsilon: float = 1.0          # polygon 格式的 approxPolyDP 简化阈值 (像素，0 不简化)
+        hot_swap: bool = True                 # 运行中更换模型时后台加载预热并在周期边界切换 (不停流程)
+        cpu_threads: int = 0                  # 每次推理的 torch intra-op 线程数 (0 使用执行器分配的预算)
+        cpu_affinity: str = ""                # 推理线程绑定的核心，如 "0-3" (空则使用执行器分配)
 
         @validator("confidence")
         def _conf(cls, v):
@@ -53,6 +93,66 @@ class YoloV8SegmentModule(BaseModule):
         def _md(cls, v):
             if v <= 0: raise ValueError("max_det > 0")
             return v
+        @validator("results_format")
+        def _rf(cls, v):
+            if v not in RESULT_FORMATS: raise ValueError(f"results_format 必须为 {RESULT_FORMATS}")
+            return v
+        @validator("annotator")
+        def _ann(cls, v):
+            if v not in ANNOTATORS: raise ValueError(f"annotator 必须为 {ANNOTATORS}")
+            return v
+        @validator("max_draw", "preview_max_side", "cpu_threads")
+        def _non_neg(cls, v):
+            if v < 0: raise ValueError("不能为负数")
+            return v
+        @validator("tile_size")
+        def _tile(cls, v):
+            if v < 32: raise ValueError("tile_size 必须 >= 32")
+            return v
+        @validator("tile_overlap")
+        def _overlap(cls, v, values):
+            if v < 0 or v >= values.get("tile_size", 640): raise ValueError("tile_overlap 必须在 [0, tile_size)")
+            return v
+        @validator("tile_batch")
+        def _tile_batch(cls, v):
+            if v <= 0: raise ValueError("tile_batch > 0")
+            return v
+        @validator("tile_merge_iou")
+        def _merge_iou(cls, v):
+            if not (0 <= v <= 1): raise ValueError("tile_merge_iou 必须在 [0,1]")
+            return v
+        @validator("gate_threshold")
+        def _gate_thr(cls, v):
+            if not (0 <= v <= 1): raise ValueError("gate_threshold 必须在 [0,1]")
+            return v
+        @validator("gate_pixel_threshold")
+        def _gate_px(cls, v):
+            if not (0 <= v <= 255): raise ValueError("gate_pixel_threshold 必须在 [0,255]")
+            return v
+        @validator("gate_width")
+        def _gate_w(cls, v):
+            if v < 8: raise ValueError("gate_width 必须 >= 8")
+            return v
+        @validator("cpu_affinity")
+        def _affinity(cls, v):
+            parse_core_list(v)
+            return v
+        @validator("gate_reference")
+        def _gate_ref(cls, v):
+            if v not in GATE_REFERENCES: raise ValueError(f"gate_reference 必须为 {GATE_REFERENCES}")
+            return v
+        @validator("gate_max_skip")
+        def _gate_skip(cls, v):
+            if v < 0: raise ValueError("gate_max_skip 不能为负数")
+            return v
+        @validator("mask_format")
+        def _mf(cls, v):
+            if v not in MASK_FORMATS: raise ValueError(f"mask_format 必须为 {MASK_FORMATS}")
+            return v
+        @validator("polygon_epsilon")
+        def _eps(cls, v):
+            if v < 0: raise ValueError("polygon_epsilon 不能为负数")
+            return v
 
     def __init__(self, name: str = "yolov8分割"):
         super().__init__(name)
@@ -72,9 +172,41 @@ class YoloV8SegmentModule(BaseModule):
             "warmup_iterations": 1,
             "warmup_image_size": 640,
             "deferred_first_infer": True,
+            "results_format": "dicts",
+            "annotator": "fast",
+            "max_draw": 0,
+            "preview_max_side": 0,
+            "tiled": False,
+            "tile_size": 640,
+            "tile_overlap": 64,
+            "tile_batch": 8,
+            "tile_merge_iou": 0.5,
+            "motion_gate": False,
+            "gate_threshold": 0.01,
+            "gate_pixel_threshold": 25,
+            "gate_width": 160,
+            "gate_reference": "inferred",
+            "gate_max_skip": 0,
+            "mask_format": "none",
+            "mask_stats": False,
+            "polygon_epsilon": 1.0,
+            "hot_swap": True,
+            "cpu_threads": 0,
+            "cpu_affinity": "",
         })
+        # cv2 轻量标注器 (复用输出缓冲区)
+        self._annotator = FastAnnotator()
+        # 最近一次切片推理的统计 (切片数/批数/各阶段耗时 ms)
+        self._tile_stats: Optional[Dict[str, Any]] = None
+        # 运动门控: 变化分数判定 + 最近一次推理输出 (跳过时复用) 及其对应的动态 targets
+        self._gate = MotionGate()
+        self._last_output: Optional[Dict[str, Any]] = None
+        self._gate_key: Optional[tuple] = None
         self._model = None
         self._model_loaded = False
+        # 最近一次获取的缓存键与对应配置 (model_path, device, half)，配置变化时使旧条目失效
+        self._model_key: Optional[tuple] = None
+        self._model_source: Optional[tuple] = None
         self._names: Dict[int, str] = {}
         self._failed_reason: Optional[str] = None
         self._last_raw_shape: Optional[tuple] = None
@@ -84,7 +216,13 @@ class YoloV8SegmentModule(BaseModule):
         self._warmup_done: bool = False
         self._warmup_error: Optional[str] = None
         self._warmup_iters_completed: int = 0
-        self._warmup_thread = None
+        self._warmup_job = None
+        # 预热排队优先级: 流程图层级 (离相机最近为 0，越小越先预热)，由执行器/GUI 设置
+        self.warmup_priority: int = 0
+        # CPU 预算 {"threads", "cores"}: 执行器按并发模型节点数分配 (见 app.utils.cpu_budget)
+        self.cpu_budget: Optional[Dict[str, Any]] = None
+        # 模型热切换 (后台加载/预热新模型)
+        self._swapper = ModelSwapper(name)
 
     @property
     def module_type(self) -> ModuleType:
@@ -115,24 +253,31 @@ class YoloV8SegmentModule(BaseModule):
     def _on_start(self):
         if self._model_loaded:
             return
-        try:
-            from ultralytics import YOLO  # type: ignore
-        except Exception as e:
-            self._failed_reason = f"未安装 ultralytics: {e}"
+        # 等待后台预加载 (torch/ultralytics 导入 + weights_only 兼容补丁)，未预加载时在此触发并等待
+        from app.utils.ml_preloader import require_yolo
+        YOLO, err = require_yolo()
+        if YOLO is None:
+            self._failed_reason = f"未安装 ultralytics: {err}"
             return
-        # PyTorch 2.6 weights_only 兼容补丁
-        try:
-            from app.utils.torch_patch import ensure_torch_load_legacy
-            ensure_torch_load_legacy()
-        except Exception:
-            pass
         path = self.config.get("model_path", "yolov8n-seg.pt")
         try:
-            self._model = YOLO(path)
+            # 进程级共享缓存: 相同 (权重, 设备, 精度) 的节点复用同一模型与预热结果
+            device = self._select_device()
+            precision = "fp16" if bool(self.config.get("half", False)) and device.startswith("cuda") else "fp32"
+            self._model = get_model_cache().acquire(path, device, precision, lambda: YOLO(path))
+            self._model_key = self._model.key
+            self._model_source = self._model_source_cfg()
             self._names = getattr(self._model, "names", {}) or {}
             self._model_loaded = True
-            if bool(self.config.get("background_warmup", True)):
-                self._start_warmup_thread()
+            if self._model.warmed:
+                self._warmup_done = True
+                self._warmup_iters_completed = int(self.config.get("warmup_iterations", 0))
+            else:
+                # 新加载 (或被淘汰后重新加载) 的模型需要重新预热
+                self._warmup_done = False
+                self._warmup_iters_completed = 0
+                if bool(self.config.get("background_warmup", True)):
+                    self._schedule_warmup()
         except Exception as e:
             msg = str(e)
             if "weights_only" in msg.lower():
@@ -140,18 +285,53 @@ class YoloV8SegmentModule(BaseModule):
             else:
                 self._failed_reason = f"模型加载失败: {msg}"
 
+    def _model_source_cfg(self) -> tuple:
+        return (self.config.get("model_path"), self.config.get("device", "auto"), bool(self.config.get("half", False)))
+
+    def _on_configure(self, config: Dict[str, Any]):
+        # 模型路径/设备/精度变化: 旧缓存条目失效 (常驻模式下同样释放；仍在使用时于停止后释放)
+        if self._model_key is not None and self._model_source_cfg() != self._model_source:
+            if self._hot_swap_ready():
+                # 运行中: 旧模型继续服务，新模型后台加载预热后在周期边界切换
+                self._begin_hot_swap()
+            else:
+                get_model_cache().invalidate(self._model_key)
+                self._model_key = None
+                self._model_source = None
+        elif self._swapper.pending:
+            # 配置恢复为当前模型: 放弃进行中的切换
+            self._swapper.cancel()
+        # 配置变化后缓存结果不再可信，下一帧重新推理
+        self._gate.configure(self.config.get("gate_threshold", 0.01), self.config.get("gate_pixel_threshold", 25),
+                             self.config.get("gate_width", 160), self.config.get("gate_reference", "inferred"),
+                             self.config.get("gate_max_skip", 0))
+        self._gate.reset()
+        self._last_output = None
+
     def _on_stop(self):
+        # 放弃未完成的热切换 (已就绪的新模型引用一并归还)
+        self._swapper.cancel()
+        handle = self._model
         self._model = None
         self._model_loaded = False
         try:
-            if self._warming and self._warmup_thread is not None:
-                import threading
-                if isinstance(self._warmup_thread, threading.Thread):
-                    self._warmup_thread.join(timeout=0.5)
+            job = self._warmup_job
+            if self._warming and job is not None:
+                # 尚未开始的预热直接出队，运行中的短暂等待
+                if get_warmup_scheduler().cancel(job):
+                    self._warming = False
+                else:
+                    job.wait(timeout=0.5)
         except Exception:
             pass
+        # 归还共享模型引用 (未被其它节点引用时按缓存预算保留/淘汰)
+        get_model_cache().release(handle)
 
     def process(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        # 周期边界: 应用已就绪的热切换模型
+        self._apply_hot_swap()
+        # 在推理线程上应用 CPU 预算 (线程数/核心绑定)
+        apply_cpu_budget(*resolve_cpu_budget(self.config, self.cpu_budget))
         ctrl = inputs.get("control")
         if ctrl is not None:
             if isinstance(ctrl, (int, float)):
@@ -195,9 +375,9 @@ class YoloV8SegmentModule(BaseModule):
                     if txt.startswith("[") and txt.endswith("]"):
                         import json as _json
                         try:
-                            arr = _json.loads(txt)
-                            if isinstance(arr, (list, tuple)):
-                                dynamic_targets = [str(x).strip() for x in arr if str(x).strip()]
+                            parsed = _json.loads(txt)
+                            if isinstance(parsed, (list, tuple)):
+                                dynamic_targets = [str(x).strip() for x in parsed if str(x).strip()]
                         except Exception:
                             pass
                     if not dynamic_targets:
@@ -214,6 +394,14 @@ class YoloV8SegmentModule(BaseModule):
             except Exception:
                 dynamic_targets = []
         filter_enabled = bool(self.config.get("enable_target_filter", False)) or bool(dynamic_targets)
+        # 运动门控: 与参考帧相比无明显变化时复用上次结果 (动态 targets 变化时强制推理)
+        gated = bool(self.config.get("motion_gate", False))
+        gate_key = tuple(dynamic_targets)
+        if gated:
+            fresh = self._last_output is None or gate_key != self._gate_key
+            if not self._gate.should_infer(arr, force=fresh):
+                return self._cached_output(img)
+        infer_start = time.perf_counter()
         try:
             predict_kwargs: Dict[str, Any] = dict(source=arr, conf=conf, verbose=False, max_det=max_det,
                                                  device=device, half=half)
@@ -234,133 +422,112 @@ class YoloV8SegmentModule(BaseModule):
                             mapped.append(int(name_to_idx[key]))
                     if mapped:
                         predict_kwargs["classes"] = mapped
-            results = self._model.predict(**predict_kwargs)
+            if bool(self.config.get("tiled", False)):
+                results = [self._predict_tiled(arr, predict_kwargs)]
+            else:
+                results = self._model.predict(**predict_kwargs)
         except Exception as e:
             return {"status": f"infer-error: {e}"}
         if not results:
             return {"status": "no-results"}
         r0 = results[0]
-        segs: List[Dict[str, Any]] = []
+        # 结果提取: boxes.data 一次转为 NumPy 后切片 (避免逐框 item()/tolist())
         try:
             boxes = getattr(r0, "boxes", None)
             masks = getattr(r0, "masks", None)
+            mdata = None
             if boxes is not None and masks is not None:
-                xyxy = getattr(boxes, "xyxy", None)
-                cls = getattr(boxes, "cls", None)
-                confs = getattr(boxes, "conf", None)
+                xyxy_np, conf_np, cls_np = extract_boxes(boxes)
                 mdata = getattr(masks, "data", None)  # (n,h,w)
-                if xyxy is not None and cls is not None and confs is not None:
-                    for i in range(len(xyxy)):
-                        bb = xyxy[i].tolist()
-                        cid = int(cls[i].item()) if hasattr(cls[i], 'item') else int(cls[i])
-                        score = float(confs[i].item()) if hasattr(confs[i], 'item') else float(confs[i])
-                        mask_shape = []
-                        if mdata is not None:
-                            ms = mdata[i]
-                            mask_shape = list(ms.shape)
-                        segs.append({
-                            "index": i,
-                            "box": [round(b,2) for b in bb],
-                            "class_id": cid,
-                            "class_name": self._names.get(cid, str(cid)),
-                            "confidence": round(score,4),
-                            "mask_shape": mask_shape
-                        })
+                # 切片合并结果不含整图掩码: mask_shape 取整图尺寸 (masks.xy 多边形为整图坐标)
+                mask_shape = list(mdata.shape[1:]) if mdata is not None else list(getattr(masks, "orig_shape", []))
+            else:
+                xyxy_np, conf_np, cls_np = extract_boxes(None)
+                mask_shape = []
+            total_count = int(len(cls_np))
+            idx_np = np.arange(total_count, dtype=np.int32)
         except Exception as e:
             return {"status": f"parse-error: {e}"}
-        # 目标过滤逻辑
+        # 目标过滤逻辑 (类别掩码，保留原始序号 index 以对应 masks；结果/标注/掩码共用)
+        all_boxes = (xyxy_np, conf_np, cls_np)
+        keep = None
         if filter_enabled:
             target_list = dynamic_targets if dynamic_targets else (self.config.get("target_classes", []) or [])
-            norm_name_set = set()
-            index_set = set()
-            for t in target_list:
-                s = str(t).strip()
-                if not s:
-                    continue
-                if s.isdigit():
-                    try:
-                        index_set.add(int(s))
-                    except ValueError:
-                        pass
-                else:
-                    norm_name_set.add(s.lower())
-            if norm_name_set or index_set:
-                filtered = []
-                for d in segs:
-                    cid = d.get("class_id")
-                    cname = d.get("class_name", "").lower()
-                    if (cid in index_set) or (cname in norm_name_set):
-                        filtered.append(d)
-                segs = filtered
+            keep = class_filter_mask(cls_np, self._names, target_list)
+            if keep is not None:
+                xyxy_np, conf_np, cls_np, idx_np = xyxy_np[keep], conf_np[keep], cls_np[keep], idx_np[keep]
+        seg_count = int(len(cls_np))
+        # 按需输出: results 无下游消费者时不构造结果对象
+        segs = None
+        if self.is_output_consumed("results"):
+            geometry = None
+            mask_fmt = str(self.config.get("mask_format", "none"))
+            if masks is not None and (mask_fmt != "none" or bool(self.config.get("mask_stats", False))):
+                try:
+                    geometry = self._compact_masks(mask_fmt, masks, mdata, idx_np, xyxy_np, arr.shape[:2],
+                                                   filtered=keep is not None)
+                except Exception as e:
+                    self.logger.warning(f"紧凑掩码计算失败: {e}")
+            segs = format_segments(xyxy_np, conf_np, cls_np, idx_np, self._names, mask_shape,
+                                   str(self.config.get("results_format", "dicts")), geometry)
         # 标注图绘制（支持 annotate_filtered_only 仅绘制过滤后目标）
+        # image 端口无下游消费者时跳过标注 (含分割多边形提取)，输出 None
         annotated = arr
+        mode = str(self.config.get("annotator", "fast"))
+        if not self.is_output_consumed("image"):
+            mode = "skip"
         try:
-            if bool(self.config.get("annotate_filtered_only", False)) and filter_enabled:
-                # 当启用并存在过滤结果时裁剪 boxes + masks
-                if segs:
-                    from copy import deepcopy
-                    try:
-                        # 建立匹配索引集合：通过 box 坐标匹配 (与检测模块策略一致)
-                        match_indices = []
-                        orig_boxes = getattr(r0, 'boxes', None)
-                        boxes_xyxy = getattr(orig_boxes, 'xyxy', None)
-                        if orig_boxes is not None and boxes_xyxy is not None:
-                            for d in segs:
-                                bb = d.get('box')
-                                # 在原 boxes 中寻找坐标完全相同的四元组（四舍五入至2位与构造时一致）
-                                found = None
-                                for i in range(len(boxes_xyxy)):
-                                    arr_bb = boxes_xyxy[i].tolist()
-                                    arr_bb_r = [round(x,2) for x in arr_bb]
-                                    if arr_bb_r == bb:
-                                        found = i
-                                        break
-                                if found is not None:
-                                    match_indices.append(found)
-                        if match_indices:
-                            # 构造子集 boxes
-                            sub_boxes = deepcopy(orig_boxes)
-                            sub_boxes.xyxy = orig_boxes.xyxy[match_indices]
-                            sub_boxes.cls = orig_boxes.cls[match_indices]
-                            sub_boxes.conf = orig_boxes.conf[match_indices]
-                            # 构造子集 masks (若存在)
-                            orig_masks = getattr(r0, 'masks', None)
-                            sub_masks = None
-                            if orig_masks is not None and hasattr(orig_masks, 'data'):
-                                sub_masks = deepcopy(orig_masks)
-                                sub_masks.data = orig_masks.data[match_indices]
-                            # 临时替换 r0 的 boxes/masks 用于 plot
-                            original_boxes = r0.boxes
-                            original_masks = getattr(r0, 'masks', None)
-                            r0.boxes = sub_boxes
-                            if sub_masks is not None:
-                                r0.masks = sub_masks
-                            try:
-                                annotated = r0.plot(conf=self.config.get("show_conf", True), labels=self.config.get("show_labels", True))
-                            finally:
-                                r0.boxes = original_boxes
-                                if sub_masks is not None and original_masks is not None:
-                                    r0.masks = original_masks
-                        else:
-                            annotated = arr
-                    except Exception:
-                        annotated = r0.plot(conf=self.config.get("show_conf", True), labels=self.config.get("show_labels", True))
-                else:
-                    annotated = arr
+            show_conf = bool(self.config.get("show_conf", True))
+            show_labels = bool(self.config.get("show_labels", True))
+            filtered_only = bool(self.config.get("annotate_filtered_only", False)) and keep is not None \
+                and seg_count < total_count
+            if mode == "skip":
+                annotated = None
+            elif mode == "none" or (filtered_only and not seg_count):
+                # 关闭标注 / 过滤结果为空: 直接输出原图
+                annotated = arr
+            elif mode == "fast":
+                bx, cf, cl = (xyxy_np, conf_np, cls_np) if filtered_only else all_boxes
+                polygons = None
+                masks_xy = getattr(masks, "xy", None)  # 多边形 (原图坐标)
+                if masks_xy is not None:
+                    polygons = [masks_xy[i] for i in idx_np.tolist()] if filtered_only else list(masks_xy)
+                annotated = self._annotator.annotate(
+                    arr, bx, cf, cl, self._names, polygons=polygons, show_conf=show_conf, show_labels=show_labels,
+                    max_draw=int(self.config.get("max_draw", 0)),
+                    preview_max_side=int(self.config.get("preview_max_side", 0)))
+            elif filtered_only:
+                # 仅绘制过滤后子集: 按原始序号直接索引 Results，无需坐标匹配与深拷贝
+                annotated = subset_results(r0, idx_np).plot(conf=show_conf, labels=show_labels)
             else:
-                annotated = r0.plot(conf=self.config.get("show_conf", True), labels=self.config.get("show_labels", True))
+                annotated = r0.plot(conf=show_conf, labels=show_labels)
         except Exception:
             annotated = arr
-        try:
-            self._last_annotated_shape = tuple(annotated.shape)
-        except Exception:
-            self._last_annotated_shape = None
-        return {
-            "image_raw": img if bool(self.config.get("export_raw", True)) else None,
+        if annotated is not None:
+            try:
+                self._last_annotated_shape = tuple(annotated.shape)
+            except Exception:
+                self._last_annotated_shape = None
+        export_raw = bool(self.config.get("export_raw", True)) and self.is_output_consumed("image_raw")
+        out = {
+            "image_raw": img if export_raw else None,
             "image": annotated,
             "results": segs,
-            "status": f"ok:{len(segs)}"
+            "status": f"ok:{seg_count}"
         }
+        if gated:
+            self._gate.record_inference(time.perf_counter() - infer_start)
+            self._last_output = dict(out)
+            self._gate_key = gate_key
+        return out
+
+    def _cached_output(self, img: np.ndarray) -> Dict[str, Any]:
+        """门控跳过: 复用上次结果与标注图，image_raw 为当前帧，status 标记为 cached:N。"""
+        out = dict(self._last_output or {})
+        export_raw = bool(self.config.get("export_raw", True)) and self.is_output_consumed("image_raw")
+        out["image_raw"] = img if export_raw else None
+        out["status"] = "cached:" + str(out.get("status", "")).split(":", 1)[-1]
+        return out
 
     def get_status(self) -> Dict[str, Any]:
         base = super().get_status()
@@ -374,33 +541,74 @@ class YoloV8SegmentModule(BaseModule):
             "warmup_done": self._warmup_done,
             "warmup_error": self._warmup_error,
             "warmup_iters_completed": self._warmup_iters_completed,
+            # 共享模型的引用节点数 (>1 表示与其它节点共用同一份权重)
+            "model_refs": self._model.refcount if isinstance(self._model, ModelHandle) else 0,
+            "annotator": self._annotator.stats(),
+            "tiling": dict(self._tile_stats or {}, enabled=bool(self.config.get("tiled", False))),
+            "motion_gate": dict(self._gate.stats(), enabled=bool(self.config.get("motion_gate", False))),
+            "hot_swap": self._swapper.stats(),
+            "cpu_budget": dict(zip(("threads", "cores"), resolve_cpu_budget(self.config, self.cpu_budget))),
         })
         return base
 
+    def _swap_warmup_kwargs(self) -> Dict[str, Any]:
+        return {"conf": float(self.config.get("confidence", 0.25))}
+
+    def _on_model_swapped(self):
+        # 新模型的结果与门控缓存不可混用
+        self._gate.reset()
+        self._last_output = None
+
+    def _compact_masks(self, mask_fmt: str, masks: Any, mdata: Any, idx_np: np.ndarray, xyxy_np: np.ndarray,
+                       orig_shape: tuple, filtered: bool) -> Dict[str, Any]:
+        """由 masks.data 计算紧凑掩码与面积/质心；过滤后先在张量上按序号取子集再拷贝到主机。"""
+        data_np = None
+        if mdata is not None:
+            data_np = to_numpy(mdata[idx_np.tolist()] if filtered else mdata)
+        polygons = None
+        masks_xy = getattr(masks, "xy", None)
+        if masks_xy is not None and (mask_fmt == "polygon" or data_np is None):
+            polygons = [masks_xy[i] for i in idx_np.tolist()]
+        return compact_masks(mask_fmt, data_np, polygons, xyxy_np, orig_shape,
+                             float(self.config.get("polygon_epsilon", 1.0)))
+
+    def _predict_tiled(self, arr: np.ndarray, predict_kwargs: Dict[str, Any]):
+        """切片推理: 每批切片一次 predict，多边形平移回整图坐标后合并为单个 Results 兼容对象。"""
+        kw = {k: v for k, v in predict_kwargs.items() if k != "source"}
+        tile = int(self.config.get("tile_size", 640))
+        kw["imgsz"] = tile
+        merged, self._tile_stats = predict_tiled(
+            lambda tiles: self._model.predict(source=tiles, **kw), arr, tile_size=tile,
+            overlap=int(self.config.get("tile_overlap", 64)), batch_size=int(self.config.get("tile_batch", 8)),
+            iou_threshold=float(self.config.get("tile_merge_iou", 0.5)),
+            max_det=int(self.config.get("max_det", 100)), names=self._names, with_masks=True)
+        return merged
+
     def warmup_async(self):
         """公开预热接口: 若未加载则加载, 然后启动后台预热."""
         try:
             if not self._model_loaded:
                 self._on_start()
             if self._model_loaded and not self._warmup_done and not self._warming:
-                self._start_warmup_thread()
+                self._schedule_warmup()
         except Exception as e:
             self._warmup_error = f"warmup-async-error: {e}"
 
     # ---------------- 预热实现 -----------------
-    def _start_warmup_thread(self):
+    def _schedule_warmup(self):
         if self._warming or self._warmup_done or not self._model_loaded or self._model is None:
             return
-        import threading
         self._warming = True
         self._warmup_error = None
         self._warmup_iters_completed = 0
+        # 排队期间模型可能被热切换: 预热固定作用于提交时的模型
+        model = self._model
         iters = max(0, int(self.config.get("warmup_iterations", 0)))
         img_size = int(self.config.get("warmup_image_size", 640))
         device = self._select_device()
         half = bool(self.config.get("half", False)) and device.startswith("cuda")
 
-        def _run_warmup():
+        def _run_warmup(job):
             try:
                 if iters <= 0:
                     return
@@ -408,18 +616,22 @@ class YoloV8SegmentModule(BaseModule):
                 dummy = (_np.random.rand(img_size, img_size, 3) * 255).astype(_np.uint8)
                 for i in range(iters):
                     try:
-                        self._model.predict(source=dummy, conf=float(self.config.get("confidence", 0.25)),
+                        model.predict(source=dummy, conf=float(self.config.get("confidence", 0.25)),
                                             verbose=False, max_det=int(self.config.get("max_det", 100)),
                                             device=device, half=half)
                     except Exception as _ie:
                         self._warmup_error = f"warmup-infer-error: {_ie}"
                         break
                     self._warmup_iters_completed = i + 1
+                    job.advance()
             except Exception as e:
                 self._warmup_error = f"warmup-error: {e}"
             finally:
                 self._warming = False
                 self._warmup_done = True if self._warmup_error is None else False
-        th = threading.Thread(target=_run_warmup, name=f"yolo8-seg-warmup-{self.name}", daemon=True)
-        self._warmup_thread = th
-        th.start()
+                if self._warmup_done and self._warmup_iters_completed > 0 and isinstance(model, ModelHandle):
+                    model.warmed = True
+            if self._warmup_error:
+                raise RuntimeError(self._warmup_error)
+        # 统一排队: 并发上限与按流程图层级的优先级见 app.models.warmup_scheduler
+        self._warmup_job = get_warmup_scheduler().submit(self.name, _run_warmup, self.warmup_priority, iters)
@@ -3,19 +3,92 @@
 """
 模块注册表
 提供模块类的集中注册与查找，支持GUI动态端口反射。
+
+延迟加载:
+- 内置模块与 entry point 插件只登记 "显示名 -> 导入路径"，首次 get_module_class 时才导入
+  (cv2 / ultralytics / pymodbus 等重依赖不再在导入注册表时加载)。
+- 模块元数据 (端口/能力/分类/ModuleType/是否可用) 缓存在清单文件中，GUI 工具箱分组、端口预览
+  通过 get_module_metadata 读取，无需导入模块。清单以 app/pipeline 源码指纹 (路径/mtime/大小)
+  和插件发行版本校验，源码变化后对应条目自动重建。
+- 环境变量:
+    FAHAI_EAGER_REGISTRY=1     导入注册表时立即导入全部内置模块 (旧行为，用于对比/排错)
+    FAHAI_MODULE_MANIFEST=路径  清单文件位置 (默认 <cwd>/user_data/cache/module_manifest.json)；
+                               设为空字符串则只在内存中缓存
 """
-from typing import Dict, Type, Optional, List
+from typing import Dict, Type, Optional, List, Any, Tuple
 from app.utils.i18n import translate, bilingual, get_language_mode
-from .base_module import BaseModule
+from app.utils.startup_profiler import startup_phase
+from .base_module import BaseModule, ModuleType
+import importlib
+import importlib.util
+import hashlib
+import json
 import logging
+import os
+import threading
 try:
     from importlib.metadata import entry_points
 except ImportError:  # Python <3.8 回退（此环境为3.10通常不会触发）
     entry_points = None  # type: ignore
 
-# 内部注册映射: display_name -> class
+# 内部注册映射: display_name -> class (已导入)
 _module_registry: Dict[str, Type[BaseModule]] = {}
+# 延迟注册映射: display_name -> "package.module:ClassName"
+_lazy_registry: Dict[str, str] = {}
+# 延迟条目的清单指纹来源: display_name -> 指纹 (内置模块为源码指纹，插件为发行版本)
+_lazy_fingerprints: Dict[str, str] = {}
+# 注册顺序 (工具箱展示顺序)
+_order: List[str] = []
+# 本进程内导入失败记录: display_name -> 错误信息
+_import_errors: Dict[str, str] = {}
 _logger = logging.getLogger("module_registry")
+_lock = threading.RLock()
+
+MANIFEST_VERSION = 1
+_manifest: Optional[Dict[str, Dict[str, Any]]] = None
+_manifest_dirty = False
+_source_fp: Optional[str] = None
+
+# 内置模块: (显示名, 导入路径)
+_BUILTIN_MODULES: List[Tuple[str, str]] = [
+    ("相机", "app.pipeline.camera.camera_module:CameraModule"),
+    ("图片导入", "app.pipeline.camera.image_import_module:ImageImportModule"),
+    ("模型", "app.pipeline.model.model_module:ModelModule"),
+    ("触发", "app.pipeline.trigger.trigger_module:TriggerModule"),
+    ("后处理", "app.pipeline.postprocess.postprocess_module:PostprocessModule"),
+    ("检测结果布尔判断", "app.pipeline.postprocess.yolo_result_bool_module:YoloResultBoolModule"),
+    ############################################################
+    # 新的分类结构: input / display / storage / script / utility
+    # 旧 custom 模块仍保留以兼容外部直接导入路径；这里统一从新路径注册。
+    ############################################################
+    ("文本输入", "app.pipeline.utility.text_input_module:TextInputModule"),
+    ("打印", "app.pipeline.utility.print_module:PrintModule"),
+    ("延时", "app.pipeline.utility.delay_module:DelayModule"),
+    ("逻辑", "app.pipeline.utility.logic_module:LogicModule"),
+    ("布尔闸门", "app.pipeline.utility.bool_gate_module:BoolGateModule"),
+    ("运动门控", "app.pipeline.utility.motion_gate_module:MotionGateModule"),
+    ("路径选择器", "app.pipeline.utility.path_selector_module:PathSelectorModule"),
+    ("示例模块", "app.pipeline.utility.sample_dev_module:SampleDevModule"),
+    ("图片展示", "app.pipeline.display.image_display_module:ImageDisplayModule"),
+    ("视频播放", "app.pipeline.custom.video_play_module:VideoPlayModule"),
+    ("打印显示", "app.pipeline.display.print_display_module:PrintDisplayModule"),
+    ("文本展示", "app.pipeline.display.text_display_module:TextDisplayModule"),
+    ("OK/NOK展示", "app.pipeline.display.ok_nok_display_module:OkNokDisplayModule"),
+    ("保存图片", "app.pipeline.storage.save_image_module:SaveImageModule"),
+    ("保存文本", "app.pipeline.storage.save_text_module:SaveTextModule"),
+    ("脚本模块", "app.pipeline.script.script_module:ScriptModule"),
+    # YOLOv8 模型系列模块 (检测/分类/分割/级联分类)
+    ("yolov8检测", "app.pipeline.model.yolov8_detect_module:YoloV8DetectModule"),
+    ("yolov8分类", "app.pipeline.model.yolov8_classify_module:YoloV8ClassifyModule"),
+    ("yolov8级联分类", "app.pipeline.model.yolov8_cascade_module:YoloV8CascadeClassifyModule"),
+    ("yolov8分割", "app.pipeline.model.yolov8_segment_module:YoloV8SegmentModule"),
+    # Modbus 系列模块
+    ("modbus连接", "app.pipeline.modbus.modbus_connect_module:ModbusConnectModule"),
+    ("modbus模拟服务器", "app.pipeline.modbus.modbus_server_module:ModbusServerModule"),
+    ("modbus监听", "app.pipeline.modbus.modbus_listener_module:ModbusListenerModule"),
+    ("modbus输出", "app.pipeline.modbus.modbus_write_module:ModbusWriteModule"),
+]
+
 
 def register_module(display_name: str, cls: Type[BaseModule]):
     """注册模块类
@@ -25,13 +98,71 @@ def register_module(display_name: str, cls: Type[BaseModule]):
     """
     if not issubclass(cls, BaseModule):
         raise TypeError("模块类必须继承 BaseModule")
-    _module_registry[display_name] = cls
+    with _lock:
+        _module_registry[display_name] = cls
+        _import_errors.pop(display_name, None)
+        if display_name not in _order:
+            _order.append(display_name)
+
+
+def register_lazy_module(display_name: str, target: str, fingerprint: Optional[str] = None):
+    """延迟注册: 仅记录导入路径 "package.module:ClassName"，首次 get_module_class 时导入。
+    fingerprint 用于校验清单缓存 (默认使用 app/pipeline 源码指纹)。
+    """
+    if ':' not in target:
+        raise ValueError(f"导入路径需为 'module:Class' 形式: {target}")
+    with _lock:
+        if display_name in _module_registry:
+            return
+        _lazy_registry[display_name] = target
+        if fingerprint is not None:
+            _lazy_fingerprints[display_name] = fingerprint
+        if display_name not in _order:
+            _order.append(display_name)
+
+
+def _import_target(target: str) -> Type[BaseModule]:
+    mod_name, _, attr = target.partition(':')
+    obj: Any = importlib.import_module(mod_name)
+    for part in attr.split('.'):
+        obj = getattr(obj, part)
+    if not (isinstance(obj, type) and issubclass(obj, BaseModule)):
+        raise TypeError(f"{target} 不是有效的 BaseModule 子类")
+    return obj
+
 
 def get_module_class(display_name: str) -> Optional[Type[BaseModule]]:
-    return _module_registry.get(display_name)
+    cls = _module_registry.get(display_name)
+    if cls is not None:
+        return cls
+    target = _lazy_registry.get(display_name)
+    if target is None or display_name in _import_errors:
+        return None
+    # 导入在锁外进行: 被导入模块可能在导入时自行调用 register_module
+    try:
+        cls = _import_target(target)
+    except Exception as e:
+        with _lock:
+            _import_errors[display_name] = f"{type(e).__name__}: {e}"
+            _remember_unavailable(display_name, e)
+        _logger.error(f"导入模块失败 {display_name} ({target}): {e}")
+        return None
+    with _lock:
+        _module_registry[display_name] = cls
+    return cls
+
+
+def _is_available(display_name: str) -> bool:
+    if display_name in _module_registry:
+        return True
+    if display_name in _import_errors:
+        return False
+    entry = _manifest_entry(display_name)
+    return entry is None or entry.get('available', True)
+
 
 def list_registered_modules() -> List[str]:
-    return list(_module_registry.keys())
+    return [n for n in list(_order) if _is_available(n)]
 
 def list_registered_modules_display() -> List[str]:
     """Return module names adapted to current language mode (for non-GUI consumers).
@@ -39,7 +170,7 @@ def list_registered_modules_display() -> List[str]:
     """
     mode = get_language_mode()
     names = []
-    for raw in _module_registry.keys():
+    for raw in list_registered_modules():
         if mode == 'zh':
             names.append(raw)
         elif mode == 'en':
@@ -48,199 +179,208 @@ def list_registered_modules_display() -> List[str]:
             names.append(bilingual(raw))
     return names
 
+def is_module_loaded(display_name: str) -> bool:
+    """模块类是否已导入 (延迟条目首次实例化前为 False)。"""
+    return display_name in _module_registry
+
+
+# ---------- 元数据清单 ----------
+def manifest_path() -> Optional[str]:
+    env = os.environ.get('FAHAI_MODULE_MANIFEST')
+    if env is not None:
+        return env or None
+    return os.path.join(os.getcwd(), 'user_data', 'cache', 'module_manifest.json')
+
+
+def _source_fingerprint() -> str:
+    """app/pipeline 下全部 .py 的 (相对路径, mtime, 大小) 摘要；只做 stat，不导入。"""
+    global _source_fp
+    if _source_fp is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha1()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+            for fn in sorted(filenames):
+                if fn.endswith('.py'):
+                    st = os.stat(os.path.join(dirpath, fn))
+                    h.update(f"{os.path.relpath(os.path.join(dirpath, fn), root)}:{st.st_mtime_ns}:{st.st_size};".encode())
+        _source_fp = h.hexdigest()
+    return _source_fp
+
+
+def _fingerprint(display_name: str) -> str:
+    return _lazy_fingerprints.get(display_name) or _source_fingerprint()
+
+
+def _load_manifest() -> Dict[str, Dict[str, Any]]:
+    global _manifest
+    if _manifest is None:
+        data: Dict[str, Dict[str, Any]] = {}
+        path = manifest_path()
+        if path and os.path.isfile(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    raw = json.load(f)
+                if isinstance(raw, dict) and raw.get('version') == MANIFEST_VERSION:
+                    data = raw.get('modules', {}) or {}
+            except Exception as e:
+                _logger.warning(f"读取模块清单失败，将重建: {e}")
+        _manifest = data
+    return _manifest
+
+
+def _manifest_entry(display_name: str) -> Optional[Dict[str, Any]]:
+    """返回与当前源码/插件版本一致的清单条目；不一致或不存在返回 None。"""
+    target = _lazy_registry.get(display_name)
+    entry = _load_manifest().get(display_name)
+    if not entry or target is None:
+        return None
+    if entry.get('target') != target or entry.get('fingerprint') != _fingerprint(display_name):
+        return None
+    if not entry.get('available', True):
+        # 缺失依赖若已安装则重新尝试 (find_spec 只查找不导入)
+        missing = entry.get('missing_module')
+        if missing:
+            try:
+                if importlib.util.find_spec(missing) is not None:
+                    return None
+            except Exception:
+                pass
+    return entry
+
+
+def _remember_unavailable(display_name: str, err: Exception):
+    global _manifest_dirty
+    target = _lazy_registry.get(display_name)
+    if target is None:
+        return
+    _load_manifest()[display_name] = {
+        'target': target,
+        'fingerprint': _fingerprint(display_name),
+        'available': False,
+        'error': f"{type(err).__name__}: {err}",
+        'missing_module': getattr(err, 'name', None) if isinstance(err, ImportError) else None,
+    }
+    _manifest_dirty = True
+
+
+def _describe_class(display_name: str, cls: Type[BaseModule]) -> Dict[str, Any]:
+    from .utility.category_utils import classify_module
+    inst = cls(name=display_name)
+    mtype = inst.module_type
+    return {
+        'available': True,
+        'class_name': cls.__name__,
+        'module_type': mtype.value if isinstance(mtype, ModuleType) else str(mtype),
+        'category': classify_module(display_name, mtype if isinstance(mtype, ModuleType) else None),
+        'inputs': list(inst.input_ports.keys()),
+        'outputs': list(inst.output_ports.keys()),
+        'capabilities': inst.capabilities.to_dict(),
+    }
+
+
+def get_module_metadata(display_name: str) -> Optional[Dict[str, Any]]:
+    """返回模块元数据: module_type / category / inputs / outputs / capabilities / available。
+    延迟条目优先读清单缓存，缓存缺失或失效时导入并实例化一次后写回清单。
+    """
+    global _manifest_dirty
+    if display_name in _lazy_registry:
+        with _lock:
+            entry = _manifest_entry(display_name)
+        if entry is not None:
+            return dict(entry)
+    cls = get_module_class(display_name)
+    if cls is None:
+        with _lock:
+            entry = _load_manifest().get(display_name)
+        return dict(entry) if entry else None
+    try:
+        meta = _describe_class(display_name, cls)
+    except Exception as e:
+        _logger.error(f"生成模块元数据失败 {display_name}: {e}")
+        return None
+    with _lock:
+        if display_name in _lazy_registry:
+            meta['target'] = _lazy_registry[display_name]
+            meta['fingerprint'] = _fingerprint(display_name)
+            _load_manifest()[display_name] = meta
+            _manifest_dirty = True
+        return dict(meta)
+
+
+def save_manifest() -> Optional[str]:
+    """将清单写回文件 (原子替换)；无变化或未配置路径时返回 None。"""
+    global _manifest_dirty
+    path = manifest_path()
+    with _lock:
+        if not _manifest_dirty or not path or _manifest is None:
+            return None
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'modules': _manifest}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, path)
+        except Exception as e:
+            _logger.warning(f"保存模块清单失败: {e}")
+            return None
+        _manifest_dirty = False
+        return path
+
+
+def build_manifest(save: bool = True) -> Dict[str, Dict[str, Any]]:
+    """为全部已登记模块生成/刷新元数据 (会导入所有模块)。"""
+    out = {}
+    for name in list(_order):
+        meta = get_module_metadata(name)
+        if meta is not None:
+            out[name] = meta
+    if save:
+        save_manifest()
+    return out
+
+
 def load_plugin_modules(group: str = "fahai.modules") -> List[str]:
-    """通过 entry points 加载外部插件模块。
+    """通过 entry points 登记外部插件模块 (延迟导入)。
     约定：每个 entry point 的对象是一个 BaseModule 子类；名称使用 entry point 的 name。
-    Returns: 成功注册的显示名列表。
+    类型校验在首次 get_module_class 时进行，失败的插件不会出现在模块列表中。
+    Returns: 成功登记的显示名列表。
     """
     loaded: List[str] = []
     if not entry_points:
         return loaded
     try:
-        eps = entry_points()
-        # 兼容不同 Python 版本: 3.10 返回 dict-like, 新版本返回 Selection
-        candidates = []
-        if isinstance(eps, dict):  # old style
-            candidates = eps.get(group, [])
-        else:
-            for ep in eps:
-                if ep.group == group:
-                    candidates.append(ep)
+        try:
+            candidates = list(entry_points(group=group))
+        except TypeError:  # 旧版本 entry_points() 返回 dict
+            eps = entry_points()
+            candidates = list(eps.get(group, [])) if isinstance(eps, dict) else [ep for ep in eps if ep.group == group]
         for ep in candidates:
             try:
-                obj = ep.load()
-                if isinstance(obj, type) and issubclass(obj, BaseModule):
-                    display_name = ep.name
-                    if display_name in _module_registry:
-                        _logger.warning(f"插件名称已存在，跳过: {display_name}")
-                        continue
-                    register_module(display_name, obj)
-                    loaded.append(display_name)
-                else:
-                    _logger.error(f"Entry point {ep.name} 不是有效的 BaseModule 子类")
+                display_name = ep.name
+                if display_name in _module_registry or display_name in _lazy_registry:
+                    _logger.warning(f"插件名称已存在，跳过: {display_name}")
+                    continue
+                dist = getattr(ep, 'dist', None)
+                fp = f"{dist.metadata['Name']}=={dist.version}" if dist is not None else None
+                register_lazy_module(display_name, ep.value, fingerprint=fp)
+                loaded.append(display_name)
             except Exception as e:
-                _logger.error(f"加载插件 {ep.name} 失败: {e}")
+                _logger.error(f"登记插件 {ep.name} 失败: {e}")
     except Exception as e:
         _logger.error(f"枚举插件失败: {e}")
     return loaded
 
-# 可选：预先导入常用模块进行注册（也可以在各模块文件中自注册）
-try:
-    from .camera.camera_module import CameraModule
-    register_module("相机", CameraModule)
-except Exception as e:
-    pass
-
-try:
-    from .camera.image_import_module import ImageImportModule
-    register_module("图片导入", ImageImportModule)
-except Exception as e:
-    pass
-
-try:
-    from .model.model_module import ModelModule
-    register_module("模型", ModelModule)
-except Exception as e:
-    pass
-
-try:
-    from .trigger.trigger_module import TriggerModule
-    register_module("触发", TriggerModule)
-except Exception as e:
-    pass
-
-try:
-    from .postprocess.postprocess_module import PostprocessModule
-    register_module("后处理", PostprocessModule)
-except Exception as e:
-    pass
-try:
-    from .postprocess.yolo_result_bool_module import YoloResultBoolModule
-    register_module("检测结果布尔判断", YoloResultBoolModule)
-except Exception:
-    pass
-
-# 新增: 文本输入与打印模块
-############################################################
-# 新的分类结构: input / display / storage / script / utility
-# 旧 custom 模块仍保留以兼容外部直接导入路径；这里统一从新路径注册。
-############################################################
-try:
-    from .utility.text_input_module import TextInputModule
-    register_module("文本输入", TextInputModule)
-except Exception:
-    pass
-try:
-    from .utility.print_module import PrintModule
-    register_module("打印", PrintModule)
-except Exception:
-    pass
-try:
-    from .utility.delay_module import DelayModule
-    register_module("延时", DelayModule)
-except Exception:
-    pass
-try:
-    from .utility.logic_module import LogicModule
-    register_module("逻辑", LogicModule)
-except Exception:
-    pass
-try:
-    from .utility.bool_gate_module import BoolGateModule
-    register_module("布尔闸门", BoolGateModule)
-except Exception:
-    pass
-try:
-    from .utility.path_selector_module import PathSelectorModule
-    register_module("路径选择器", PathSelectorModule)
-except Exception:
-    pass
-try:
-    from .utility.sample_dev_module import SampleDevModule
-    register_module("示例模块", SampleDevModule)
-except Exception:
-    pass
-try:
-    from .display.image_display_module import ImageDisplayModule
-    register_module("图片展示", ImageDisplayModule)
-except Exception:
-    pass
-try:
-    from .custom.video_play_module import VideoPlayModule
-    register_module("视频播放", VideoPlayModule)
-except Exception:
-    pass
-try:
-    from .display.print_display_module import PrintDisplayModule
-    register_module("打印显示", PrintDisplayModule)
-except Exception:
-    pass
-try:
-    from .display.text_display_module import TextDisplayModule
-    register_module("文本展示", TextDisplayModule)
-except Exception:
-    pass
-try:
-    from .display.ok_nok_display_module import OkNokDisplayModule
-    register_module("OK/NOK展示", OkNokDisplayModule)
-except Exception:
-    pass
-try:
-    from .storage.save_image_module import SaveImageModule
-    register_module("保存图片", SaveImageModule)
-except Exception:
-    pass
-try:
-    from .storage.save_text_module import SaveTextModule
-    register_module("保存文本", SaveTextModule)
-except Exception:
-    pass
-try:
-    from .script.script_module import ScriptModule
-    register_module("脚本模块", ScriptModule)
-except Exception:
-    pass
 
-# YOLOv8 模型系列模块 (检测/分类/分割)
-try:
-    from .model.yolov8_detect_module import YoloV8DetectModule
-    register_module("yolov8检测", YoloV8DetectModule)
-except Exception as e:
-    pass
-try:
-    from .model.yolov8_classify_module import YoloV8ClassifyModule
-    register_module("yolov8分类", YoloV8ClassifyModule)
-except Exception as e:
-    pass
-try:
-    from .model.yolov8_segment_module import YoloV8SegmentModule
-    register_module("yolov8分割", YoloV8SegmentModule)
-except Exception as e:
-    pass
+for _name, _target in _BUILTIN_MODULES:
+    register_lazy_module(_name, _target)
 
-# Modbus 系列模块
-try:
-    from .modbus.modbus_connect_module import ModbusConnectModule
-    register_module("modbus连接", ModbusConnectModule)
-except Exception:
-    pass
-try:
-    from .modbus.modbus_server_module import ModbusServerModule
-    register_module("modbus模拟服务器", ModbusServerModule)
-except Exception:
-    pass
-try:
-    from .modbus.modbus_listener_module import ModbusListenerModule
-    register_module("modbus监听", ModbusListenerModule)
-except Exception:
-    pass
-try:
-    from .modbus.modbus_write_module import ModbusWriteModule
-    register_module("modbus输出", ModbusWriteModule)
-except Exception:
-    pass
+if os.environ.get('FAHAI_EAGER_REGISTRY', '').strip() in ('1', 'true', 'yes'):
+    for _name, _target in _BUILTIN_MODULES:
+        get_module_class(_name)
 
-# 自动加载外部插件
-_loaded_plugins = load_plugin_modules()
+# 自动登记外部插件
+with startup_phase('plugin_loading'):
+    _loaded_plugins = load_plugin_modules()
 if _loaded_plugins:
-    _logger.info(f"已加载插件模块: {_loaded_plugins}")
+    _logger.info(f"已登记插件模块: {_loaded_plugins}")
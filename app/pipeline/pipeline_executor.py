@@ -5,9 +5,12 @@
 负责管理和执行整个处理流程，支持顺序和并行执行
 """
 
+import os
 import threading
 import time
 import queue
+from collections import deque
+from contextlib import contextmanager
 from typing import Any, Dict, List, Optional, Callable
 from enum import Enum
 from concurrent.futures import ThreadPoolExecutor, Future
@@ -15,6 +18,14 @@ import logging
 
 from .base_module import BaseModule, ModuleStatus
 from .interfaces import Connection
+from .profiling import NodeProfiler, SamplingProfiler
+from .memory_accounting import (PayloadTracker, estimate_size, take_tracemalloc_snapshot,
+                                diff_tracemalloc_snapshots)
+from .metrics_exporter import MetricsExporter
+from .metrics_history import MetricsHistory
+from .graph_optimizer import find_dead_nodes, find_fusible_chains, contract_levels
+from app.models.warmup_scheduler import get_warmup_scheduler
+from app.utils.cpu_budget import BUDGET_MODES, plan_cpu_budgets, release_affinity, set_opencv_threads
 
 
 class ExecutionMode(Enum):
@@ -67,6 +78,8 @@ class PipelineExecutor:
     流程执行器，管理整个处理流程的执行
     支持多种执行模式和复杂的数据流控制
     """
+    # 会话统计保留的最近逐次延迟个数 (用于 p50/p95)
+    SESSION_LATENCY_WINDOW = 1000
     
     def __init__(self, name: str = "流程执行器"):
         """
@@ -114,6 +127,28 @@ class PipelineExecutor:
         self._metrics_interval_s = 1.0
         self._metrics_timer_thread = None
         self._metrics_stop = threading.Event()
+        # 图优化结果 (config.optimize_graph 开启时在 start/run_once 规划阶段生成)
+        self._fused_chains: Dict[str, List[str]] = {}   # 链首 node_id -> 链成员 (含链首)
+        self._fused_members: set = set()                # 非链首的链成员，由链首统一执行
+        self._fused_levels: Optional[List[List[str]]] = None
+        self._optimization_report: Dict[str, Any] = {}
+        # 多分辨率指标历史 (1s x 10min / 1min x 24h 环形缓冲)
+        self._metrics_history = MetricsHistory()
+        # 运行期剖析：{node_id: NodeProfiler}，未开启时 _invoke_module 直接调用 run_cycle
+        self._node_profilers: Dict[str, NodeProfiler] = {}
+        self._finished_profiles: Dict[str, NodeProfiler] = {}
+        self._sampling_profiler: Optional[SamplingProfiler] = None
+        # 负载/内存统计 (config.enable_payload_accounting 开启时在路由阶段记录)
+        self._payload_tracker = PayloadTracker()
+        self._memory_snapshots: Dict[str, Any] = {}
+        # Prometheus 指标端点 (start_metrics_server 按需启动)
+        self._metrics_exporter: Optional[MetricsExporter] = None
+        # 拓扑版本: 增删节点/连接时递增 (单次运行会话据此重新规划)
+        self._graph_version = 0
+        # 单次运行会话 (open_session/close_session)，None 表示未打开
+        self._session: Optional[Dict[str, Any]] = None
+        # 并行模式下按预算设置 OpenCV 线程数前的原值 (停止时恢复)
+        self._cv2_threads_restore: Optional[int] = None
         
         # 配置
         self.config = {
@@ -125,7 +160,16 @@ class PipelineExecutor:
             "enable_monitoring": True,   # 启用监控
             "log_level": "INFO",
             "allow_idle_tick": True,     # 无输入时是否仍然空转执行一次周期 (用于轮询型源模块)
-            "idle_tick_interval": 0.1    # 空转轮询间隔秒
+            "idle_tick_interval": 0.1,   # 空转轮询间隔秒
+            "profile_output_dir": None,  # 剖析输出目录 (None=user_data/profiles)
+            "enable_payload_accounting": False,  # 统计每个输出端口/连接的负载字节数
+            "enable_metrics_history": True,      # 记录周期/节点耗时历史 (get_metrics_history)
+            "optimize_graph": False,             # 规划阶段消除死节点并融合轻量线性链
+            "demand_driven_outputs": True,       # 告知模块哪些输出端口有下游连接，跳过无人使用的端口计算
+            "await_warmup": False,               # 启动时等待模型预热完成后再开始执行周期
+            "warmup_timeout": 120.0,             # 等待预热的最长秒数 (超时仍继续启动)
+            "cpu_budget": "auto",                # 模型节点 CPU 预算: off | auto (线程数) | pin (线程数 + 核心绑定)
+            "cpu_reserve": 0                     # 预留给采集/界面等线程、不分配给模型节点的核心数
         }
         
         # 设置日志
@@ -149,6 +193,8 @@ class PipelineExecutor:
             
         node = PipelineNode(module, node_id)
         self.nodes[node_id] = node
+        self._graph_version += 1
+        self._publish_output_demand(node)
         
         self.logger.info(f"添加模块到流程: {module.name} ({node_id})")
         return node_id
@@ -165,6 +211,7 @@ class PipelineExecutor:
             for outputs in pred.outputs.values():
                 outputs[:] = [(target, input_name) for target, input_name in outputs 
                              if target.node_id != node_id]
+            pred.successors[:] = [succ for succ in pred.successors if succ.node_id != node_id]
                              
         for succ in node.successors:
             succ.predecessors[:] = [pred for pred in succ.predecessors 
@@ -175,6 +222,20 @@ class PipelineExecutor:
                     del succ.inputs[input_name]
                     
         del self.nodes[node_id]
+        self.connections = [c for c in self.connections
+                            if c.source_module != node_id and c.target_module != node_id]
+        self._clear_fusion()
+        self._graph_version += 1
+        for pred in node.predecessors:
+            self._publish_output_demand(pred)
+        # 移出执行器后恢复为独立模块 (全部端口产出)
+        node.module.set_consumed_outputs(None)
+        if self._session is not None:
+            # 会话中移除的模块不再由 close_session 停止，此处立即停止
+            try:
+                node.module.stop()
+            except Exception:
+                pass
         self.logger.info(f"从流程中移除模块: {node_id}")
         
     def connect_modules(self, source_id: str, output_name: str, 
@@ -198,6 +259,9 @@ class PipelineExecutor:
         
         source_node.add_output(output_name, target_node, input_name)
         target_node.add_input(input_name, source_node, output_name)
+        self._clear_fusion()
+        self._graph_version += 1
+        self._publish_output_demand(source_node)
         
         self.logger.info(f"连接模块: {source_id}.{output_name} -> {target_id}.{input_name}")
         self.connections.append(Connection(source_module=source_id,
@@ -226,6 +290,9 @@ class PipelineExecutor:
             if source.node_id == source_id and output == output_name:
                 del target_node.inputs[input_name]
                 
+        self._clear_fusion()
+        self._graph_version += 1
+        self._publish_output_demand(source_node)
         self.logger.info(f"断开连接: {source_id}.{output_name} -> {target_id}.{input_name}")
         self.connections = [c for c in self.connections if not (
             c.source_module == source_id and c.source_port == output_name and
@@ -251,24 +318,36 @@ class PipelineExecutor:
         if self.status != PipelineStatus.IDLE:
             self.logger.warning("流程已在运行中")
             return False
+        if self._session is not None:
+            self.logger.info("持续运行前关闭单次运行会话")
+            self.close_session()
             
         try:
             # 验证流程
             if not self._validate_pipeline():
                 return False
                 
+            if self.config.get("optimize_graph", False):
+                self.optimize_graph()
+            self._publish_output_demand()
             # 计算执行顺序
             self.execution_order = self._calculate_execution_order()
             if not self.execution_order:
                 self.logger.error("无法计算执行顺序，可能存在循环依赖")
                 return False
                 
-            # 初始化所有模块
-            for node_id in self.nodes:
-                node = self.nodes[node_id]
-                if not node.module.start():
-                    self.logger.error(f"模块启动失败: {node_id}")
-                    return False
+            # 初始化所有模块: 预热任务按流程图层级排队 (离相机最近的模型先预热)
+            self.assign_warmup_priorities()
+            self.assign_cpu_budgets()
+            with get_warmup_scheduler().batch():
+                for node_id in self.nodes:
+                    node = self.nodes[node_id]
+                    if not node.module.start():
+                        self.logger.error(f"模块启动失败: {node_id}")
+                        self._restore_opencv_threads()
+                        return False
+            if self.config.get("await_warmup", False):
+                self.wait_for_warmup(self.config.get("warmup_timeout", 120.0))
                     
             # 设置初始输入数据
             if input_data:
@@ -298,6 +377,7 @@ class PipelineExecutor:
             
         except Exception as e:
             self.status = PipelineStatus.ERROR
+            self._restore_opencv_threads()
             self.logger.error(f"启动流程失败: {e}")
             return False
             
@@ -323,6 +403,7 @@ class PipelineExecutor:
             # 停止所有模块
             for node in self.nodes.values():
                 node.module.stop()
+            self._restore_opencv_threads()
                 
             self.status = PipelineStatus.STOPPED
             self.logger.info("流程执行已停止")
@@ -374,6 +455,25 @@ class PipelineExecutor:
                 
         return True
         
+    def _publish_output_demand(self, node: Optional[PipelineNode] = None):
+        """将每个节点有下游连接的输出端口告知模块 (规划时全部刷新，连接变化时刷新源节点)。
+        关闭 demand_driven_outputs 时设置为 None，模块产出全部端口。
+        """
+        nodes = [node] if node is not None else list(self.nodes.values())
+        enabled = bool(self.config.get("demand_driven_outputs", True))
+        for n in nodes:
+            try:
+                if not enabled:
+                    n.module.set_consumed_outputs(None)
+                else:
+                    n.module.set_consumed_outputs([port for port, conns in n.outputs.items() if conns])
+            except Exception as e:
+                self.logger.debug(f"设置输出需求失败 {n.node_id}: {e}")
+
+    def get_output_demand(self) -> Dict[str, List[str]]:
+        """各节点有消费者的输出端口 (node_id -> 端口列表)。"""
+        return {nid: sorted(port for port, conns in n.outputs.items() if conns) for nid, n in self.nodes.items()}
+
     def _has_cycle(self) -> bool:
         """检查是否存在循环依赖"""
         visited = set()
@@ -409,6 +509,7 @@ class PipelineExecutor:
         行为:
         1. 仅在 IDLE 状态可执行，避免与持续运行冲突。
         2. 验证拓扑与模块状态；初始化(start)→执行→停止(stop)。
+           已通过 open_session() 打开会话时跳过 start/stop，模块在多次调用间保持启动。
         3. 使用顺序模式拓扑排序，忽略设置的 parallel/pipeline 模式（保持确定性）。
         4. 触发模块步骤回调 (start/end) 与结果/进度回调。
         5. 结束后状态回到 IDLE。
@@ -417,65 +518,16 @@ class PipelineExecutor:
         if self.status != PipelineStatus.IDLE:
             self.logger.warning("run_once: 当前执行器非 IDLE 状态，拒绝执行")
             return None
+        if self._session is not None:
+            return self._run_session_cycle(input_data)
         try:
-            if not self._validate_pipeline():
-                return None
-            order = self._calculate_execution_order()
+            order = self._plan_run_once()
             if not order:
-                self.logger.error("run_once: 拓扑排序失败")
                 return None
             # 初始化模块
-            for node in self.nodes.values():
-                if not node.module.start():
-                    self.logger.error(f"run_once: 模块启动失败 {node.node_id}")
-                    # 尝试停止已启动模块
-                    for n2 in self.nodes.values():
-                        try: n2.module.stop()
-                        except Exception: pass
-                    return None
-            self.status = PipelineStatus.RUNNING
-            data_context: Dict[str, Any] = input_data.copy() if input_data else {}
-            start_t = time.time()
-            # 单次顺序执行 + 闸门阻断逻辑与持续运行保持一致
-            gate_skip_cache: set[str] = set()
-            for node_id in order:
-                if node_id in gate_skip_cache:
-                    continue  # 被闸门标记需要跳过
-                node = self.nodes[node_id]
-                node_inputs = self._prepare_node_inputs(node, data_context)
-                node.module.receive_inputs(node_inputs)
-                self._notify_module_step(node_id, 'start')
-                mod_t0 = time.time()
-                result = node.module.run_cycle()
-                node.execution_time = time.time() - mod_t0
-                node.last_result = result
-                self._route_outputs(node, result, data_context)
-                self._notify_module_step(node_id, 'end')
-                # 中断检测
-                if getattr(node.module, 'request_abort', False) or (isinstance(result, dict) and result.get('abort') is True):
-                    self.logger.info(f"run_once: 中断于节点 {node_id}")
-                    break
-                # 闸门阻断: 收集后继
-                if getattr(node.module, 'request_gate_block', False):
-                    to_skip = set()
-                    stack = [s.node_id for s in node.successors]
-                    while stack:
-                        sid = stack.pop()
-                        if sid in to_skip:
-                            continue
-                        to_skip.add(sid)
-                        for nxt in self.nodes[sid].successors:
-                            stack.append(nxt.node_id)
-                    gate_skip_cache.update(to_skip)
-                    # 清理全局 data_context 中可能被后继消费的共享键（简单策略：不删除，或实现白名单；此处仅添加标记）
-                    data_context[f"gate_block_from_{node_id}"] = True
-            exec_time = time.time() - start_t
-            self.execution_count += 1
-            self.total_execution_time += exec_time
-            # 回调通知
-            if data_context:
-                self._notify_result(data_context)
-            self._notify_progress(self.execution_count, exec_time)
+            if not self._start_all_modules("run_once"):
+                return None
+            data_context, exec_time = self._run_once_cycle(order, input_data)
             # 停止模块
             for node in self.nodes.values():
                 try:
@@ -490,7 +542,283 @@ class PipelineExecutor:
             self.logger.error(f"run_once: 执行异常 {e}")
             self._notify_error(e)
             return None
-        
+
+    def _plan_run_once(self) -> List[str]:
+        """run_once / 会话规划: 验证、可选图优化、拓扑排序；失败返回空列表。"""
+        if not self._validate_pipeline():
+            return []
+        if self.config.get("optimize_graph", False):
+            self.optimize_graph()
+        self._publish_output_demand()
+        order = self._calculate_execution_order()
+        if not order:
+            self.logger.error("run_once: 拓扑排序失败")
+        return order
+
+    def _start_all_modules(self, tag: str, skip_running: bool = False) -> bool:
+        """启动全部模块；任一失败则停止全部并返回 False。skip_running=True 时跳过已在运行的模块 (会话)。"""
+        self.assign_warmup_priorities()
+        self.assign_cpu_budgets(parallel=False)   # 单次运行/会话始终按顺序执行
+        with get_warmup_scheduler().batch():
+            for node in self.nodes.values():
+                if skip_running and node.module.status in (ModuleStatus.RUNNING, ModuleStatus.PAUSED):
+                    continue
+                if not node.module.start():
+                    self.logger.error(f"{tag}: 模块启动失败 {node.node_id}")
+                    # 尝试停止已启动模块
+                    for n2 in self.nodes.values():
+                        try: n2.module.stop()
+                        except Exception: pass
+                    return False
+        if self.config.get("await_warmup", False):
+            self.wait_for_warmup(self.config.get("warmup_timeout", 120.0))
+        return True
+
+    def assign_warmup_priorities(self) -> Dict[str, int]:
+        """按执行层级设置模型模块的 warmup_priority (层级 0 为无前驱的源节点)；返回 {node_id: 层级}。"""
+        priorities: Dict[str, int] = {}
+        for depth, level in enumerate(self._calculate_execution_levels()):
+            for node_id in level:
+                module = self.nodes[node_id].module
+                if hasattr(module, "warmup_priority"):
+                    module.warmup_priority = depth
+                    priorities[node_id] = depth
+        return priorities
+
+    def assign_cpu_budgets(self, parallel: Optional[bool] = None) -> Dict[str, Dict[str, Any]]:
+        """为模型模块 (带 cpu_budget 属性) 分配 CPU 预算；返回 {node_id: 预算}。
+        并发数 = 并行模式下同一层级的模型节点数最大值 (顺序执行为 1)，可用核心按并发数均分，
+        同层节点使用不同的核心区段；不同层级不会同时运行，可复用同一区段。
+        并发数为 1 且未预留核心时预算不设置线程数与绑定 (threads=0)。
+        """
+        mode = str(self.config.get("cpu_budget", "auto"))
+        if mode not in BUDGET_MODES:
+            self.logger.warning(f"未知的 cpu_budget 模式: {mode}，按 off 处理")
+            mode = "off"
+        if parallel is None:
+            parallel = self.execution_mode == ExecutionMode.PARALLEL
+        levels = self._calculate_execution_levels() if parallel else [list(self.nodes)]
+        model_levels = [[nid for nid in level if hasattr(self.nodes[nid].module, "cpu_budget")] for level in levels]
+        slots = max([len(level) for level in model_levels] + [1]) if parallel else 1
+        reserve = int(self.config.get("cpu_reserve", 0) or 0)
+        budgets = plan_cpu_budgets(slots, reserve=reserve)
+        if slots == 1 and reserve <= 0:
+            # 同一时刻只有一个模型推理: 不设置线程数 (保持 torch 默认的物理核心数)，也无需绑定
+            budgets = [{"threads": 0, "cores": []}]
+        assigned: Dict[str, Dict[str, Any]] = {}
+        for level in model_levels:
+            for i, node_id in enumerate(level):
+                budget, slot = None, (i if parallel else 0)
+                if mode != "off":
+                    budget = {"threads": budgets[slot]["threads"],
+                              "cores": list(budgets[slot]["cores"]) if mode == "pin" else [],
+                              "slot": slot, "slots": slots}
+                    assigned[node_id] = budget
+                self.nodes[node_id].module.cpu_budget = budget
+        # OpenCV 线程池为进程级: 多个模型并发时按单个预算的线程数设置 (停止时恢复)
+        if mode != "off" and slots > 1 and assigned:
+            previous = set_opencv_threads(budgets[0]["threads"])
+            if self._cv2_threads_restore is None:
+                self._cv2_threads_restore = previous
+        if assigned:
+            self.logger.info(f"CPU 预算: {slots} 个并发模型槽位，每槽 {budgets[0]['threads']} 线程 ({mode})")
+        return assigned
+
+    def _restore_opencv_threads(self):
+        if self._cv2_threads_restore is not None:
+            set_opencv_threads(self._cv2_threads_restore)
+            self._cv2_threads_restore = None
+
+    def wait_for_warmup(self, timeout: Optional[float] = None) -> bool:
+        """等待已排队/运行中的模型预热全部结束；超时返回 False (执行器启动前可调用)。"""
+        t0 = time.time()
+        ok = get_warmup_scheduler().wait(timeout=timeout)
+        if ok:
+            self.logger.info(f"模型预热就绪，等待 {time.time() - t0:.2f}s")
+        else:
+            self.logger.warning(f"等待模型预热超时 ({timeout}s)，继续执行")
+        return ok
+
+    def _run_once_cycle(self, order: List[str], input_data: Dict[str, Any] | None):
+        """按给定顺序执行一轮 (模块已启动)；返回 (data_context, 耗时秒)。结束时状态为 RUNNING。"""
+        self.status = PipelineStatus.RUNNING
+        data_context: Dict[str, Any] = input_data.copy() if input_data else {}
+        start_t = time.time()
+        # 单次顺序执行 + 闸门阻断逻辑与持续运行保持一致
+        gate_skip_cache: set[str] = set()
+        for node_id in order:
+            if node_id in gate_skip_cache or node_id in self._fused_members:
+                continue  # 被闸门标记需要跳过 / 已随融合链首执行
+            if node_id in self._fused_chains:
+                if self._execute_chain(self._fused_chains[node_id], data_context, gate_skip_cache):
+                    self.logger.info(f"run_once: 中断于融合链 {node_id}")
+                    break
+                continue
+            node = self.nodes[node_id]
+            node_inputs = self._prepare_node_inputs(node, data_context)
+            node.module.receive_inputs(node_inputs)
+            self._notify_module_step(node_id, 'start')
+            mod_t0 = time.time()
+            result = self._invoke_module(node)
+            node.execution_time = time.time() - mod_t0
+            node.last_result = result
+            self._record_perf(node.node_id, node.execution_time)
+            self._route_outputs(node, result, data_context)
+            self._notify_module_step(node_id, 'end')
+            # 中断检测
+            if getattr(node.module, 'request_abort', False) or (isinstance(result, dict) and result.get('abort') is True):
+                self.logger.info(f"run_once: 中断于节点 {node_id}")
+                break
+            # 闸门阻断: 收集后继
+            if getattr(node.module, 'request_gate_block', False):
+                to_skip = set()
+                stack = [s.node_id for s in node.successors]
+                while stack:
+                    sid = stack.pop()
+                    if sid in to_skip:
+                        continue
+                    to_skip.add(sid)
+                    for nxt in self.nodes[sid].successors:
+                        stack.append(nxt.node_id)
+                gate_skip_cache.update(to_skip)
+                # 清理全局 data_context 中可能被后继消费的共享键（简单策略：不删除，或实现白名单；此处仅添加标记）
+                data_context[f"gate_block_from_{node_id}"] = True
+        exec_time = time.time() - start_t
+        self.execution_count += 1
+        self.total_execution_time += exec_time
+        if self.config.get("enable_metrics_history", True):
+            self._metrics_history.record_cycle(exec_time)
+        # 回调通知
+        if data_context:
+            self._notify_result(data_context)
+        self._notify_progress(self.execution_count, exec_time)
+        return data_context, exec_time
+
+    # ---------- 单次运行会话 ----------
+    def open_session(self) -> bool:
+        """打开单次运行会话: 规划并启动全部模块，之后的 run_once 不再逐次 start/stop。
+        适用于人工触发大量单次运行的场景 (相机/模型保持打开)。需在 IDLE 状态调用。
+        """
+        if self._session is not None:
+            return True
+        if self.status != PipelineStatus.IDLE:
+            self.logger.warning("open_session: 当前执行器非 IDLE 状态")
+            return False
+        try:
+            t0 = time.perf_counter()
+            order = self._plan_run_once()
+            if not order or not self._start_all_modules("open_session"):
+                return False
+            self._session = {
+                'order': order,
+                'graph_version': self._graph_version,
+                'opened_at': time.time(),
+                'open_seconds': time.perf_counter() - t0,
+                'runs': 0,
+                'failures': 0,
+                'total_latency': 0.0,
+                'last_latency': 0.0,
+                'min_latency': None,
+                'max_latency': 0.0,
+                'latencies': deque(maxlen=self.SESSION_LATENCY_WINDOW),
+            }
+            self.logger.info(f"open_session: 会话已打开 ({len(order)} 个节点)")
+            return True
+        except Exception as e:
+            self.logger.error(f"open_session: 打开会话失败 {e}")
+            self._notify_error(e)
+            return False
+
+    def close_session(self) -> Dict[str, Any]:
+        """关闭会话并停止全部模块；返回会话统计 (未打开会话时返回空字典)。"""
+        if self._session is None:
+            return {}
+        stats = self.get_session_stats()
+        self._session = None
+        for node in self.nodes.values():
+            try:
+                node.module.stop()
+            except Exception:
+                pass
+        if self.status == PipelineStatus.RUNNING:
+            self.status = PipelineStatus.IDLE
+        self.logger.info(f"close_session: 会话已关闭 共 {stats.get('runs', 0)} 次运行")
+        return stats
+
+    @contextmanager
+    def session(self):
+        """with executor.session(): executor.run_once(...) —— 退出时自动关闭会话。"""
+        if not self.open_session():
+            raise RuntimeError("无法打开单次运行会话")
+        try:
+            yield self
+        finally:
+            self.close_session()
+
+    def is_session_open(self) -> bool:
+        return self._session is not None
+
+    def _run_session_cycle(self, input_data: Dict[str, Any] | None) -> Dict[str, Any] | None:
+        sess = self._session
+        t0 = time.perf_counter()
+        try:
+            # 会话期间拓扑变化 (增删节点/连接) 时重新规划；新增模块按需启动
+            if sess['graph_version'] != self._graph_version:
+                order = self._plan_run_once()
+                if not order:
+                    sess['failures'] += 1
+                    return None
+                sess['order'] = order
+                sess['graph_version'] = self._graph_version
+            if not self._start_all_modules("run_once(session)", skip_running=True):
+                self._session = None
+                sess['failures'] += 1
+                return None
+            data_context, _ = self._run_once_cycle(sess['order'], input_data)
+            self.status = PipelineStatus.IDLE
+        except Exception as e:
+            self.status = PipelineStatus.IDLE
+            sess['failures'] += 1
+            self.logger.error(f"run_once(session): 执行异常 {e}")
+            self._notify_error(e)
+            return None
+        latency = time.perf_counter() - t0
+        sess['runs'] += 1
+        sess['total_latency'] += latency
+        sess['last_latency'] = latency
+        sess['max_latency'] = max(sess['max_latency'], latency)
+        sess['min_latency'] = latency if sess['min_latency'] is None else min(sess['min_latency'], latency)
+        sess['latencies'].append(latency)
+        return data_context
+
+    def get_session_stats(self) -> Dict[str, Any]:
+        """会话统计: 运行次数、失败次数、逐次延迟 (last/avg/min/max 与最近窗口的 p50/p95)。单位秒。"""
+        sess = self._session
+        if sess is None:
+            return {'open': False}
+        window = sorted(sess['latencies'])
+
+        def _pct(q: float) -> float:
+            if not window:
+                return 0.0
+            return window[min(len(window) - 1, int(round(q * (len(window) - 1))))]
+
+        runs = sess['runs']
+        return {
+            'open': True,
+            'opened_at': sess['opened_at'],
+            'open_seconds': sess['open_seconds'],
+            'runs': runs,
+            'failures': sess['failures'],
+            'last_latency': sess['last_latency'],
+            'avg_latency': sess['total_latency'] / runs if runs else 0.0,
+            'min_latency': sess['min_latency'] or 0.0,
+            'max_latency': sess['max_latency'],
+            'p50_latency': _pct(0.5),
+            'p95_latency': _pct(0.95),
+            'recent_latencies': list(sess['latencies']),
+        }
+
     def _calculate_execution_order(self) -> List[str]:
         """计算执行顺序（拓扑排序）"""
         in_degree = {node_id: 0 for node_id in self.nodes}
@@ -552,6 +880,8 @@ class PipelineExecutor:
                 # 更新统计信息
                 self.execution_count += 1
                 self.total_execution_time += execution_time
+                if self.config.get("enable_metrics_history", True):
+                    self._metrics_history.record_cycle(execution_time)
                 
                 # 输出结果
                 if result:
@@ -584,15 +914,22 @@ class PipelineExecutor:
         if not adaptive:
             # 原始逻辑
             for node_id in self.execution_order:
+                if node_id in self._fused_members:
+                    continue
                 node = self.nodes[node_id]
                 # 闸门跳过逻辑：若之前某个闸门阻断标记了该节点，则直接 continue
                 if hasattr(self, '_gate_skip_cache') and node_id in self._gate_skip_cache:
                     continue
+                if node_id in self._fused_chains:
+                    if self._execute_chain(self._fused_chains[node_id], current_data, self._ensure_gate_skip_cache()):
+                        self.logger.info(f"顺序执行中断于融合链 {node_id}")
+                        break
+                    continue
                 node_inputs = self._prepare_node_inputs(node, current_data)
                 node.module.receive_inputs(node_inputs)
                 self._notify_module_step(node_id, 'start')
                 start_time = time.time()
-                result = node.module.run_cycle()
+                result = self._invoke_module(node)
                 node.execution_time = time.time() - start_time
                 self._record_perf(node.node_id, node.execution_time)
                 node.last_result = result
@@ -617,7 +954,7 @@ class PipelineExecutor:
                     self._gate_skip_cache.update(to_skip)
             return current_data
         # 自适应层级并发
-        levels = self._calculate_execution_levels()
+        levels = self._scheduled_levels()
         for level in levels:
             # 拆分 may_block 与普通
             block_nodes = [nid for nid in level if getattr(self.nodes[nid].module.capabilities, 'may_block', False)]
@@ -645,7 +982,7 @@ class PipelineExecutor:
                     node.module.receive_inputs(node_inputs)
                     self._notify_module_step(nid, 'start')
                     t0 = time.time()
-                    result = node.module.run_cycle()
+                    result = self._invoke_module(node)
                     node.execution_time = time.time() - t0
                     self._record_perf(node.node_id, node.execution_time)
                     node.last_result = result
@@ -658,12 +995,17 @@ class PipelineExecutor:
             for nid in normal_nodes:
                 if hasattr(self, '_gate_skip_cache') and nid in self._gate_skip_cache:
                     continue
+                if nid in self._fused_chains:
+                    if self._execute_chain(self._fused_chains[nid], current_data, self._ensure_gate_skip_cache()):
+                        self.logger.info(f"自适应并发中断于融合链 {nid}")
+                        return current_data
+                    continue
                 node = self.nodes[nid]
                 node_inputs = self._prepare_node_inputs(node, current_data)
                 node.module.receive_inputs(node_inputs)
                 self._notify_module_step(nid, 'start')
                 t0 = time.time()
-                result = node.module.run_cycle()
+                result = self._invoke_module(node)
                 node.execution_time = time.time() - t0
                 self._record_perf(node.node_id, node.execution_time)
                 node.last_result = result
@@ -691,17 +1033,62 @@ class PipelineExecutor:
         """辅助：在线程中执行节点并路由结果 (用于 adaptive 并发)。"""
         self._notify_module_step(node.node_id, 'start')
         t0 = time.time()
-        result = node.module.run_cycle()
+        result = self._invoke_module(node)
         node.execution_time = time.time() - t0
         self._record_perf(node.node_id, node.execution_time)
         node.last_result = result
         self._route_outputs(node, result, current_data)
         self._notify_module_step(node.node_id, 'end')
         
+    def _ensure_gate_skip_cache(self) -> set:
+        if not hasattr(self, '_gate_skip_cache'):
+            self._gate_skip_cache = set()
+        return self._gate_skip_cache
+
+    def _execute_chain(self, chain: List[str], data_context: Dict[str, Any], skip_cache: set) -> bool:
+        """作为单个调度单元顺序执行融合链。返回 True 表示有节点请求中断整轮执行。
+        步骤事件与节点耗时仍按成员逐个发出/记录 (界面只高亮正在执行的成员)。
+        """
+        for nid in chain:
+            if nid in skip_cache:
+                return False
+            node = self.nodes[nid]
+            node.module.receive_inputs(self._prepare_node_inputs(node, data_context))
+            self._notify_module_step(nid, 'start')
+            try:
+                t0 = time.time()
+                result = self._invoke_module(node)
+                node.execution_time = time.time() - t0
+                self._record_perf(nid, node.execution_time)
+                node.last_result = result
+                self._route_outputs(node, result, data_context)
+            finally:
+                self._notify_module_step(nid, 'end')
+            if getattr(node.module, 'request_abort', False) or (isinstance(result, dict) and result.get('abort') is True):
+                return True
+            if getattr(node.module, 'request_gate_block', False):
+                to_skip = set()
+                stack = [s.node_id for s in node.successors]
+                while stack:
+                    sid = stack.pop()
+                    if sid in to_skip:
+                        continue
+                    to_skip.add(sid)
+                    for nxt in self.nodes[sid].successors:
+                        stack.append(nxt.node_id)
+                skip_cache.update(to_skip)
+        return False
+
+    def _scheduled_levels(self) -> List[List[str]]:
+        """层级调度使用的层级: 有融合链时使用规划阶段折叠后的层级。"""
+        if self._fused_levels is not None:
+            return self._fused_levels
+        return self._calculate_execution_levels()
+
     def _execute_parallel(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """并行执行（端口驱动路由版本）"""
-        # 按层级并行执行
-        levels = self._calculate_execution_levels()
+        # 按层级并行执行 (融合链折叠为链首单元)
+        levels = self._scheduled_levels()
         current_data = input_data.copy()
         
         for level_nodes in levels:
@@ -710,11 +1097,16 @@ class PipelineExecutor:
                 node = self.nodes[level_nodes[0]]
                 if hasattr(self, '_gate_skip_cache') and node.node_id in self._gate_skip_cache:
                     continue
+                if node.node_id in self._fused_chains:
+                    if self._execute_chain(self._fused_chains[node.node_id], current_data, self._ensure_gate_skip_cache()):
+                        self.logger.info(f"并行执行中断于融合链 {node.node_id}")
+                        break
+                    continue
                 node_inputs = self._prepare_node_inputs(node, current_data)
                 node.module.receive_inputs(node_inputs)
                 self._notify_module_step(node.node_id, 'start')
                 start_time = time.time()
-                result = node.module.run_cycle()
+                result = self._invoke_module(node)
                 node.execution_time = time.time() - start_time
                 self._record_perf(node.node_id, node.execution_time)
                 node.last_result = result
@@ -736,10 +1128,17 @@ class PipelineExecutor:
             else:
                 # 多个节点并行执行
                 futures = []
+                chain_futures = []
                 for node_id in level_nodes:
                     if hasattr(self, '_gate_skip_cache') and node_id in self._gate_skip_cache:
                         continue
                     node = self.nodes[node_id]
+                    if node_id in self._fused_chains:
+                        # 融合链整体作为一个任务提交，链内路由在任务线程完成
+                        chain_futures.append((node_id, self.thread_pool.submit(
+                            self._execute_chain, self._fused_chains[node_id], current_data,
+                            self._ensure_gate_skip_cache())))
+                        continue
                     node_inputs = self._prepare_node_inputs(node, current_data)
                     future = self.thread_pool.submit(self._execute_node, node, node_inputs)
                     futures.append((node, future))
@@ -765,6 +1164,16 @@ class PipelineExecutor:
                             self._gate_skip_cache.update(to_skip)
                     except Exception as e:
                         self.logger.error(f"节点执行失败: {node.node_id}, {e}")
+                aborted = False
+                for head_id, future in chain_futures:
+                    try:
+                        if future.result(timeout=self.config.get("timeout", 30)):
+                            aborted = True
+                    except Exception as e:
+                        self.logger.error(f"融合链执行失败: {head_id}, {e}")
+                if aborted:
+                    self.logger.info("并行执行中断于融合链")
+                    break
                         
         return current_data
         
@@ -779,12 +1188,34 @@ class PipelineExecutor:
         node.module.receive_inputs(inputs)
         self._notify_module_step(node.node_id, 'start')
         start_time = time.time()
-        result = node.module.run_cycle()
+        result = self._invoke_module(node)
         node.execution_time = time.time() - start_time
         self._record_perf(node.node_id, node.execution_time)
         self._notify_module_step(node.node_id, 'end')
         return result
         
+    def _invoke_module(self, node: PipelineNode) -> Dict[str, Any]:
+        """调用节点 run_cycle；模型节点 (带 cpu_budget) 执行后解除其在当前线程上的核心绑定，
+        避免线程池线程之后执行的相机/显示等节点仍被限制在该模型的核心区段。"""
+        if not hasattr(node.module, "cpu_budget"):
+            return self._run_module_cycle(node)
+        try:
+            return self._run_module_cycle(node)
+        finally:
+            release_affinity()
+
+    def _run_module_cycle(self, node: PipelineNode) -> Dict[str, Any]:
+        """执行 run_cycle；若该节点开启了 cProfile 剖析则在剖析器下执行。"""
+        profiler = self._node_profilers.get(node.node_id)
+        if profiler is None:
+            return node.module.run_cycle()
+        result = profiler.runcall(node.module.run_cycle)
+        if profiler.done:
+            self._node_profilers.pop(node.node_id, None)
+            self._finished_profiles[node.node_id] = profiler
+            self.logger.info(f"节点剖析完成: {node.node_id} -> {profiler.output_path}")
+        return result
+
     def _calculate_execution_levels(self) -> List[List[str]]:
         """计算执行层级"""
         levels = []
@@ -829,6 +1260,8 @@ class PipelineExecutor:
         # 更新全局数据上下文（共享输出）
         for k, v in outputs.items():
             data_context[k] = v
+        if self.config.get("enable_payload_accounting", False):
+            self._record_payload(node, outputs)
         # 按显式连接分发
         for output_name, connections in node.outputs.items():
             if output_name in outputs:
@@ -836,6 +1269,16 @@ class PipelineExecutor:
                 for target_node, target_input_name in connections:
                     target_node.module.receive_inputs({target_input_name: value})
         
+    def _record_payload(self, node: PipelineNode, outputs: Dict[str, Any]):
+        for port, value in outputs.items():
+            if value is None:
+                continue
+            edges = [(t.node_id, inp) for t, inp in node.outputs.get(port, [])]
+            try:
+                self._payload_tracker.record(node.node_id, port, estimate_size(value), edges)
+            except Exception as e:
+                self.logger.debug(f"负载统计失败 {node.node_id}.{port}: {e}")
+
     def add_progress_callback(self, callback: Callable):
         """添加进度回调"""
         self.progress_callbacks.append(callback)
@@ -918,6 +1361,8 @@ class PipelineExecutor:
             if duration > stat['max_time']:
                 stat['max_time'] = duration
             stat['avg_time'] = stat['total_time'] / stat['exec_count']
+        if self.config.get("enable_metrics_history", True):
+            self._metrics_history.record_node(node_id, duration)
 
     def get_metrics(self) -> Dict[str, Any]:
         with self._perf_lock:
@@ -932,6 +1377,18 @@ class PipelineExecutor:
     def reset_metrics(self):
         with self._perf_lock:
             self._perf_stats.clear()
+        self._metrics_history.clear()
+
+    def get_metrics_history(self, node_id: Optional[str] = None, resolution_s: float = 1.0,
+                            window_s: Optional[float] = None) -> Dict[str, Any]:
+        """查询耗时/吞吐趋势 (node_id=None 为整体周期)。
+        返回等长 numpy 数组: ts(桶起始时间) / count / rate(次/秒) / mean / max(秒)，空桶 count=0。
+        """
+        return self._metrics_history.query(node_id, resolution_s=resolution_s, window_s=window_s)
+
+    def list_history_series(self) -> List[str]:
+        """有历史记录的节点 ID 列表。"""
+        return self._metrics_history.series()
 
     def add_metrics_callback(self, callback: Callable):
         """注册性能指标回调: callback(stats_dict, aggregate_dict)"""
@@ -962,6 +1419,144 @@ class PipelineExecutor:
             self._metrics_timer_thread.join(timeout=1.5)
         self._metrics_timer_thread = None
         
+    def start_metrics_server(self, host: str = '127.0.0.1', port: int = 9464) -> Optional[MetricsExporter]:
+        """启动 Prometheus 文本格式指标端点 (GET /metrics)，返回导出器；端口占用等失败返回 None。"""
+        if self._metrics_exporter and self._metrics_exporter.is_running:
+            return self._metrics_exporter
+        exporter = MetricsExporter(self, host=host, port=port)
+        try:
+            exporter.start()
+        except OSError as e:
+            self.logger.error(f"指标端点启动失败 {host}:{port}: {e}")
+            return None
+        self._metrics_exporter = exporter
+        self.logger.info(f"指标端点已启动: http://{host}:{exporter.address[1]}/metrics")
+        return exporter
+
+    def stop_metrics_server(self):
+        if self._metrics_exporter:
+            self._metrics_exporter.stop()
+            self._metrics_exporter = None
+
+    # ---------- 负载与内存统计 ----------
+    def get_memory_report(self) -> Dict[str, Any]:
+        """返回端口/连接负载统计与各模块驻留缓存字节数。
+        retained: {node_id: {buffer_name: bytes}}，来自模块 get_retained_buffers()。
+        """
+        report = self._payload_tracker.snapshot()
+        retained: Dict[str, Dict[str, int]] = {}
+        for node_id, node in list(self.nodes.items()):
+            try:
+                buffers = node.module.get_retained_buffers()
+            except Exception:
+                continue
+            if buffers:
+                retained[node_id] = {name: estimate_size(buf) for name, buf in buffers.items()}
+        report['retained'] = retained
+        report['retained_total'] = sum(sum(v.values()) for v in retained.values())
+        report['accounting_enabled'] = bool(self.config.get("enable_payload_accounting", False))
+        return report
+
+    def reset_payload_stats(self):
+        self._payload_tracker.reset()
+
+    def take_memory_snapshot(self, label: str) -> None:
+        """记录一次 tracemalloc 快照 (首次调用会启动 tracemalloc)。"""
+        self._memory_snapshots[label] = take_tracemalloc_snapshot()
+
+    def diff_memory_snapshots(self, old_label: str, new_label: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """对比两个已记录快照，返回内存增长最多的代码位置。"""
+        if old_label not in self._memory_snapshots or new_label not in self._memory_snapshots:
+            raise ValueError(f"快照不存在: {old_label} / {new_label}")
+        return diff_tracemalloc_snapshots(self._memory_snapshots[old_label],
+                                          self._memory_snapshots[new_label], limit=limit)
+
+    # ---------- 运行期剖析 ----------
+    def enable_node_profiling(self, node_id: str, cycles: int = 50, output_dir: Optional[str] = None) -> bool:
+        """对指定节点的 run_cycle 开启 cProfile 剖析，累计 cycles 个周期后自动写出 pstats。
+        可在运行中调用；返回 False 表示节点不存在。
+        """
+        if node_id not in self.nodes:
+            self.logger.warning(f"剖析目标节点不存在: {node_id}")
+            return False
+        out_dir = output_dir or self.config.get("profile_output_dir")
+        self._node_profilers[node_id] = NodeProfiler(node_id, cycles=cycles, output_dir=out_dir)
+        self._finished_profiles.pop(node_id, None)
+        self.logger.info(f"开启节点剖析: {node_id} ({cycles} 周期)")
+        return True
+
+    def disable_node_profiling(self, node_id: str) -> bool:
+        """取消尚未完成的节点剖析 (不写出文件)。"""
+        return self._node_profilers.pop(node_id, None) is not None
+
+    def start_sampling_profiler(self, interval_ms: float = 5.0) -> bool:
+        """启动整进程采样剖析线程。"""
+        if self._sampling_profiler and self._sampling_profiler.is_running:
+            return False
+        self._sampling_profiler = SamplingProfiler(interval_s=interval_ms / 1000.0)
+        return self._sampling_profiler.start()
+
+    def stop_sampling_profiler(self, path: Optional[str] = None) -> Optional[str]:
+        """停止采样剖析并写出折叠栈文件，返回文件路径。"""
+        sp = self._sampling_profiler
+        if not sp:
+            return None
+        sp.stop()
+        if path is None and self.config.get("profile_output_dir"):
+            path = os.path.join(self.config["profile_output_dir"],
+                                f"sampling_{time.strftime('%Y%m%d_%H%M%S')}.collapsed")
+        return sp.dump_collapsed(path)
+
+    def get_profiling_status(self) -> Dict[str, Any]:
+        """返回节点剖析 (进行中/已完成) 与采样剖析状态。"""
+        return {
+            'active': {nid: p.status() for nid, p in list(self._node_profilers.items())},
+            'finished': {nid: p.status() for nid, p in list(self._finished_profiles.items())},
+            'sampling': self._sampling_profiler.status() if self._sampling_profiler else None,
+        }
+
+    # ---------- 图优化 ----------
+    def _clear_fusion(self):
+        self._fused_chains = {}
+        self._fused_members = set()
+        self._fused_levels = None
+
+    def optimize_graph(self, eliminate_dead: bool = True, fuse_chains: bool = True) -> Dict[str, Any]:
+        """规划阶段图优化: 移除无法到达汇点的节点，并把轻量线性链融合为单个调度单元。
+        连接/节点变更会使融合结果失效，需要重新调用。返回优化报告。
+        """
+        nodes_before = len(self.nodes)
+        eliminated = find_dead_nodes(self.nodes) if eliminate_dead else []
+        for nid in eliminated:
+            self.remove_module(nid)
+        self._clear_fusion()
+        chains: List[List[str]] = []
+        if fuse_chains:
+            with self._perf_lock:
+                perf = {nid: st.copy() for nid, st in self._perf_stats.items()}
+            chains = find_fusible_chains(self.nodes, perf)
+            for chain in chains:
+                self._fused_chains[chain[0]] = chain
+                self._fused_members.update(chain[1:])
+            if chains:
+                self._fused_levels = contract_levels(self._calculate_execution_levels(), chains)
+        levels = self._scheduled_levels()
+        self._optimization_report = {
+            'eliminated': eliminated,
+            'fused': chains,
+            'nodes_before': nodes_before,
+            'nodes_after': len(self.nodes),
+            'scheduled_units': len(self.nodes) - len(self._fused_members),
+            'levels': len(levels),
+        }
+        if eliminated or chains:
+            self.logger.info(f"图优化: 消除 {len(eliminated)} 个死节点 {eliminated}，融合 {len(chains)} 条链 {chains}")
+        return dict(self._optimization_report)
+
+    def get_optimization_report(self) -> Dict[str, Any]:
+        """最近一次 optimize_graph 的报告 (未执行时为空字典)。"""
+        return dict(self._optimization_report)
+
     def get_pipeline_graph(self) -> Dict[str, Any]:
         """获取流程图信息"""
         nodes = {}
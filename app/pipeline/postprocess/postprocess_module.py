@@ -112,6 +112,9 @@ class PostprocessModule(BaseModule):
         if len(self.results_cache) > limit:
             self.results_cache = self.results_cache[-limit:]
 
+    def get_retained_buffers(self) -> Dict[str, Any]:
+        return {"results_cache": self.results_cache}
+
     def _stats(self) -> Dict[str, Any]:
         avg = self.total_process_time / self.process_count if self.process_count else 0
         return {
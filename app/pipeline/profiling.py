@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行期性能剖析工具
+提供两类可在运行中开关的剖析钩子：
+1. NodeProfiler: 针对单个节点的 run_cycle 使用 cProfile 剖析 N 个周期后输出 pstats 文件。
+2. SamplingProfiler: 基于 sys._current_frames 的低开销采样线程，输出折叠栈 (collapsed stack)
+   文本，可直接用于 flamegraph.pl / speedscope 生成火焰图。
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+
+def default_profile_dir() -> str:
+    """默认剖析输出目录: <cwd>/user_data/profiles"""
+    return os.path.join(os.getcwd(), 'user_data', 'profiles')
+
+
+class NodeProfiler:
+    """单节点 cProfile 剖析器。
+
+    每次 runcall 剖析一次 run_cycle，累计到同一个 Profile 对象；
+    达到 cycles 次数后自动写出 .pstats 文件并标记完成。
+    """
+
+    def __init__(self, node_id: str, cycles: int = 50, output_dir: Optional[str] = None,
+                 sort_by: str = 'cumulative'):
+        self.node_id = node_id
+        self.cycles = max(1, int(cycles))
+        self.output_dir = output_dir or default_profile_dir()
+        self.sort_by = sort_by
+        self.completed_cycles = 0
+        self.skipped_cycles = 0  # 其它剖析器占用 (Python 3.12+ 同一时刻仅允许一个) 时跳过
+        self.done = False
+        self.output_path: Optional[str] = None
+        self.summary: str = ''
+        self._profile = cProfile.Profile()
+        self._lock = threading.Lock()
+
+    def runcall(self, fn: Callable, *args, **kwargs) -> Any:
+        """在剖析下执行 fn；已完成或剖析器被占用时直接执行。"""
+        if self.done:
+            return fn(*args, **kwargs)
+        with self._lock:
+            # 只在启用剖析时判断占用，fn 自身抛出的异常 (含 ValueError) 原样传播且只执行一次
+            try:
+                self._profile.enable()
+            except ValueError:
+                # "Another profiling tool is already active"
+                self.skipped_cycles += 1
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._profile.disable()
+                self.completed_cycles += 1
+                if self.completed_cycles >= self.cycles:
+                    self._finish()
+
+    def _finish(self):
+        self.done = True
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            safe_id = ''.join(ch if ch.isalnum() or ch in '-_.' else '_' for ch in self.node_id)
+            ts = time.strftime('%Y%m%d_%H%M%S')
+            self.output_path = os.path.join(self.output_dir, f'node_{safe_id}_{ts}.pstats')
+            self._profile.dump_stats(self.output_path)
+        except Exception as e:
+            self.output_path = None
+            self.summary = f'dump-error: {e}'
+            return
+        self.summary = self.format_top(20)
+
+    def format_top(self, limit: int = 20) -> str:
+        """返回按 sort_by 排序的前 limit 条文本统计。"""
+        buf = io.StringIO()
+        try:
+            st = pstats.Stats(self._profile, stream=buf)
+            st.sort_stats(self.sort_by).print_stats(limit)
+        except Exception as e:  # 尚无数据时 pstats 会抛 TypeError
+            return f'no-data: {e}'
+        return buf.getvalue()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'node_id': self.node_id,
+            'cycles': self.cycles,
+            'completed_cycles': self.completed_cycles,
+            'skipped_cycles': self.skipped_cycles,
+            'done': self.done,
+            'output_path': self.output_path,
+        }
+
+
+class SamplingProfiler:
+    """整进程采样剖析器。
+
+    后台线程按 interval 周期读取 sys._current_frames()，把每个线程的调用栈折叠为
+    "thread;module:func;module:func" 形式计数。采样线程本身不计入。
+    """
+
+    def __init__(self, interval_s: float = 0.005, max_depth: int = 64,
+                 include_thread_name: bool = True):
+        self.interval_s = max(0.0005, float(interval_s))
+        self.max_depth = max(1, int(max_depth))
+        self.include_thread_name = include_thread_name
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._started_at = 0.0
+        self._stopped_at = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        if self.is_running:
+            return False
+        with self._lock:
+            self._stacks.clear()
+            self._samples = 0
+        self._stop.clear()
+        self._started_at = time.time()
+        self._stopped_at = 0.0
+        self._thread = threading.Thread(target=self._loop, daemon=True, name='sampling-profiler')
+        self._thread.start()
+        return True
+
+    def stop(self) -> bool:
+        if not self.is_running:
+            return False
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        self._stopped_at = time.time()
+        return True
+
+    def _loop(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()} if self.include_thread_name else {}
+            frames = sys._current_frames()
+            batch: List[str] = []
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+                parts: List[str] = []
+                depth = 0
+                f = frame
+                while f is not None and depth < self.max_depth:
+                    code = f.f_code
+                    mod = os.path.splitext(os.path.basename(code.co_filename))[0]
+                    parts.append(f"{mod}:{code.co_name}")
+                    f = f.f_back
+                    depth += 1
+                parts.reverse()
+                if self.include_thread_name:
+                    parts.insert(0, names.get(ident, str(ident)).replace(';', '_').replace(' ', '_'))
+                batch.append(';'.join(parts))
+            del frames
+            with self._lock:
+                self._stacks.update(batch)
+                self._samples += 1
+
+    def collapsed(self) -> str:
+        """返回折叠栈文本，每行 "stack count"。"""
+        with self._lock:
+            items = sorted(self._stacks.items(), key=lambda kv: kv[1], reverse=True)
+        return '\n'.join(f"{stack} {count}" for stack, count in items)
+
+    def dump_collapsed(self, path: Optional[str] = None) -> Optional[str]:
+        """写出折叠栈文件，返回路径；失败返回 None。"""
+        if path is None:
+            out_dir = default_profile_dir()
+            path = os.path.join(out_dir, f"sampling_{time.strftime('%Y%m%d_%H%M%S')}.collapsed")
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.collapsed())
+                f.write('\n')
+            return path
+        except Exception:
+            return None
+
+    def status(self) -> Dict[str, Any]:
+        end = self._stopped_at or time.time()
+        with self._lock:
+            samples = self._samples
+            unique = len(self._stacks)
+        return {
+            'running': self.is_running,
+            'interval_s': self.interval_s,
+            'samples': samples,
+            'unique_stacks': unique,
+            'duration_s': (end - self._started_at) if self._started_at else 0.0,
+        }
@@ -9,7 +9,6 @@
 from __future__ import annotations
 from typing import Tuple, Optional
 from app.pipeline.base_module import ModuleType
-from PyQt6.QtGui import QColor
 
 CATEGORY_NAMES = ['输入', '模型', '显示', '存储', '协议', '脚本', '逻辑', '其它']
 
@@ -37,16 +36,17 @@ def classify_module(display_name: str, module_type: Optional[ModuleType]) -> str
             return '协议'
         if ('脚本' in name) or ('script' in low):
             return '脚本'
-        if ('逻辑' in name) or ('延时' in name) or ('示例' in name) or ('文本输入' in name) or (name == '打印') or ('print' in low) or ('布尔' in name):
+        if ('逻辑' in name) or ('延时' in name) or ('示例' in name) or ('文本输入' in name) or (name == '打印') or ('print' in low) or ('布尔' in name) or ('门控' in name):
             return '逻辑'
     except Exception:
         return '其它'
     return '其它'
 
-def category_color_pair(category: str, dark: bool = False) -> Tuple[QColor, QColor]:
+def category_color_pair(category: str, dark: bool = False) -> Tuple['QColor', 'QColor']:
     """返回分类对应的 (c1,c2) 渐变颜色。dark 为暗色主题调整。
     未知分类回退到 '其它'。
     """
+    from PyQt6.QtGui import QColor  # 延迟导入: classify_module 也被无界面的模块注册表使用
     mapping = {
         '输入': (QColor(76,175,80), QColor(102,187,106)),
         '模型': (QColor(142,36,170), QColor(171,71,188)),
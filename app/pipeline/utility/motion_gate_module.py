@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""运动门控模块 MotionGateModule
+
+独立的变化门控节点: 对输入图像计算缩小灰度图上的变化分数 (见 app.pipeline.model.motion_gate)。
+ - changed 输出可连接任意模型模块的 control 端口 (False 时跳过推理)
+ - block_downstream=True 时画面无变化即阻断全部后继节点 (与布尔闸门相同机制)，下游展示保持上一帧结果
+YOLO 检测/分割模块也内置同样的门控 (配置 motion_gate)，跳过时直接复用上次结果。
+"""
+from typing import Any, Dict
+
+import numpy as np
+
+from app.pipeline.base_module import BaseModule, ModuleType, ModuleCapabilities
+from app.pipeline.model.motion_gate import GATE_REFERENCES, MotionGate
+
+try:
+    from pydantic import BaseModel, validator
+except ImportError:
+    BaseModel = object  # type: ignore
+
+
+class MotionGateModule(BaseModule):
+    CAPABILITIES = ModuleCapabilities(
+        supports_async=False,
+        supports_batch=False,
+        may_block=False,
+        resource_tags=["gate", "motion"],
+        throughput_hint=500.0,
+    )
+
+    class ConfigModel(BaseModel):  # type: ignore
+        threshold: float = 0.01          # 变化像素比例阈值
+        pixel_threshold: int = 25        # 灰度差超过该值的像素计为变化
+        width: int = 160                 # 缩小灰度图宽度
+        reference: str = "inferred"      # inferred (最近一次判定为变化的帧) | previous (上一帧)
+        max_skip: int = 0                # 连续无变化该帧数后强制输出 changed=True (0 不限)
+        block_downstream: bool = False   # 无变化时阻断后继节点
+
+        @validator("threshold")
+        def _thr(cls, v):
+            if not (0 <= v <= 1):
+                raise ValueError("threshold 必须在 [0,1]")
+            return v
+
+        @validator("pixel_threshold")
+        def _px(cls, v):
+            if not (0 <= v <= 255):
+                raise ValueError("pixel_threshold 必须在 [0,255]")
+            return v
+
+        @validator("width")
+        def _w(cls, v):
+            if v < 8:
+                raise ValueError("width 必须 >= 8")
+            return v
+
+        @validator("reference")
+        def _ref(cls, v):
+            if v not in GATE_REFERENCES:
+                raise ValueError(f"reference 必须为 {GATE_REFERENCES}")
+            return v
+
+        @validator("max_skip")
+        def _skip(cls, v):
+            if v < 0:
+                raise ValueError("max_skip 不能为负数")
+            return v
+
+    def __init__(self, name: str = "运动门控"):
+        super().__init__(name)
+        self.config.update({
+            "threshold": 0.01,
+            "pixel_threshold": 25,
+            "width": 160,
+            "reference": "inferred",
+            "max_skip": 0,
+            "block_downstream": False,
+        })
+        self._gate = MotionGate()
+
+    @property
+    def module_type(self) -> ModuleType:
+        return ModuleType.CUSTOM
+
+    def _define_ports(self):
+        if not self.input_ports:
+            self.register_input_port("image", port_type="frame", desc="输入图像", required=True)
+            self.register_input_port("reset", port_type="bool", desc="True 时丢弃参考帧", required=False)
+        if not self.output_ports:
+            self.register_output_port("image", port_type="frame", desc="输入图像直通")
+            self.register_output_port("changed", port_type="bool", desc="画面是否变化")
+            self.register_output_port("score", port_type="meta", desc="变化像素比例 (首帧为 None)")
+
+    def _on_configure(self, config: Dict[str, Any]):
+        self._gate.configure(self.config.get("threshold", 0.01), self.config.get("pixel_threshold", 25),
+                             self.config.get("width", 160), self.config.get("reference", "inferred"),
+                             self.config.get("max_skip", 0))
+        self._gate.reset()
+
+    def process(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        # 清除上一轮阻断标记
+        self.request_gate_block = False
+        img = inputs.get("image")
+        if img is None or not isinstance(img, np.ndarray):
+            return {"image": None, "changed": False, "score": None}
+        if inputs.get("reset"):
+            self._gate.reset()
+        changed = self._gate.should_infer(img)
+        if not changed and bool(self.config.get("block_downstream", False)):
+            self.request_gate_block = True
+        return {"image": img, "changed": changed, "score": self._gate.last_score}
+
+    def get_status(self) -> Dict[str, Any]:
+        base = super().get_status()
+        base.update({"motion_gate": self._gate.stats()})
+        return base
+
+
+__all__ = ["MotionGateModule"]
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""CPU 线程预算与核心绑定 (仅 CPU 工控机上的多模型并行)
+
+torch / OpenCV 默认每次推理都使用全部核心；并行模式下两个模型节点同时推理会超额订阅，
+线程争抢与缓存抖动使两者都变慢。执行器按 "可同时运行的模型节点数" (并行模式下同一层级的
+模型节点数，顺序模式为 1) 均分可用的物理核心，为每个模型节点分配一个预算:
+  {"threads": 每次推理的 intra-op 线程数 (= 物理核心数), "cores": 绑定的逻辑 CPU 列表 (可选)}
+
+- 划分单位为物理核心: 按 sysfs topology/thread_siblings_list 将 SMT 兄弟线程归为一组
+  (Linux x86 上兄弟线程编号通常为 i 与 i+N/2，连续编号并不对应同一物理核心)，
+  同一物理核心的兄弟线程总是分给同一个槽位；无法读取拓扑时每个逻辑 CPU 视为一个核心
+
+- 模块配置 cpu_threads / cpu_affinity 覆盖执行器分配的预算 (0 / 空为使用分配值)
+- apply_cpu_budget() 在推理调用线程上生效: torch.set_num_threads (torch 已导入时)，
+  os.sched_setaffinity(0, ...) 绑定当前线程 (Linux；其它平台忽略)
+- 核心绑定只在模型节点执行期间有效: 执行器在节点结束后调用 release_affinity() 恢复该线程，
+  线程池线程之后执行的其它节点不受影响
+- OpenCV 线程数为进程级设置，由执行器通过 set_opencv_threads() 统一设置 (停止时恢复)
+
+只处理线程: 执行器在同一进程的线程池中运行模块，不涉及子进程。
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+BUDGET_MODES = ("off", "auto", "pin")   # off: 不限制；auto: 仅线程数；pin: 线程数 + 核心绑定
+
+_local = threading.local()
+
+
+def usable_cpus() -> List[int]:
+    """当前进程可用的核心编号 (受 taskset/cgroup 限制时少于 os.cpu_count())。"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return list(range(os.cpu_count() or 1))
+
+
+# 导入时的进程可用核心 (线程被绑定后 sched_getaffinity(0) 只返回该线程的绑定集合)
+_PROCESS_CPUS = tuple(usable_cpus())
+
+_SYSFS_CPU = "/sys/devices/system/cpu"
+
+
+def parse_core_list(spec: Union[str, Iterable[int], None]) -> List[int]:
+    """解析核心列表: "0-3,6" / [0, 1] / None -> 升序去重列表；格式错误抛 ValueError。"""
+    if spec is None:
+        return []
+    if not isinstance(spec, str):
+        return sorted({int(c) for c in spec})
+    cores = set()
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            lo, hi = int(lo), int(hi)
+            if lo > hi or lo < 0:
+                raise ValueError(f"无效的核心范围: {part}")
+            cores.update(range(lo, hi + 1))
+        else:
+            if int(part) < 0:
+                raise ValueError(f"无效的核心编号: {part}")
+            cores.add(int(part))
+    return sorted(cores)
+
+
+def core_groups(cpus: Iterable[int]) -> List[List[int]]:
+    """按物理核心将逻辑 CPU 分组 (SMT 兄弟线程同组)，组按最小编号排序；无法读取拓扑的 CPU 单独成组。"""
+    groups: Dict[Tuple[int, ...], List[int]] = {}
+    for cpu in sorted(set(cpus)):
+        try:
+            with open(f"{_SYSFS_CPU}/cpu{cpu}/topology/thread_siblings_list") as f:
+                key = tuple(parse_core_list(f.read().strip())) or (cpu,)
+        except (OSError, ValueError):
+            key = (cpu,)
+        groups.setdefault(key, []).append(cpu)
+    return sorted(groups.values(), key=lambda g: g[0])
+
+
+def plan_cpu_budgets(slots: int, cpus: Optional[List[int]] = None, reserve: int = 0) -> List[Dict[str, Any]]:
+    """将可用物理核心均分给 slots 个并发模型节点 (预留 reserve 个物理核心给采集/界面等线程)。
+    每个槽位的线程数为其物理核心数，绑定集合包含这些核心的全部 SMT 兄弟线程；
+    物理核心数少于 slots 时各节点共用全部核心、每个 1 线程。
+    """
+    cpus = list(cpus if cpus is not None else _PROCESS_CPUS)
+    slots = max(1, int(slots))
+    groups = core_groups(cpus)
+    if reserve > 0 and len(groups) - reserve >= 1:
+        groups = groups[reserve:]
+    if len(groups) < slots:
+        shared = sorted(c for g in groups for c in g)
+        return [{"threads": 1, "cores": shared} for _ in range(slots)]
+    per, extra = divmod(len(groups), slots)
+    budgets, start = [], 0
+    for i in range(slots):
+        n = per + (1 if i < extra else 0)
+        budgets.append({"threads": n, "cores": sorted(c for g in groups[start:start + n] for c in g)})
+        start += n
+    return budgets
+
+
+def resolve_cpu_budget(config: Dict[str, Any], assigned: Optional[Dict[str, Any]]) -> Tuple[int, List[int]]:
+    """合并模块配置与执行器分配的预算 -> (线程数, 绑定核心)；0 / [] 表示不设置。"""
+    assigned = assigned or {}
+    threads = int(config.get("cpu_threads", 0) or 0) or int(assigned.get("threads", 0) or 0)
+    cores = parse_core_list(config.get("cpu_affinity") or None) or list(assigned.get("cores") or [])
+    return threads, cores
+
+
+def apply_cpu_budget(threads: int = 0, cores: Optional[List[int]] = None) -> Dict[str, Any]:
+    """在调用线程上应用预算 (重复调用相同值几乎无开销)；返回实际生效的设置。"""
+    applied: Dict[str, Any] = {}
+    if threads > 0:
+        torch = sys.modules.get("torch")   # 不主动导入 torch
+        if torch is not None:
+            try:
+                if torch.get_num_threads() != threads:
+                    torch.set_num_threads(threads)
+                applied["torch_threads"] = threads
+            except Exception:
+                pass
+    if cores:
+        key = tuple(cores)
+        if getattr(_local, "cores", None) != key and hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, key)
+                _local.cores = key
+            except OSError:
+                pass   # 核心不存在/无权限: 保持原绑定
+        if getattr(_local, "cores", None) == key:
+            applied["cores"] = list(key)
+    return applied
+
+
+def release_affinity():
+    """解除当前线程的核心绑定 (恢复为进程可用的全部核心)。"""
+    if getattr(_local, "cores", None) is None or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        os.sched_setaffinity(0, _PROCESS_CPUS)
+    except OSError:
+        pass
+    _local.cores = None
+
+
+def set_opencv_threads(threads: int) -> Optional[int]:
+    """设置 OpenCV 线程数 (进程级)；返回原值，失败返回 None。"""
+    try:
+        import cv2
+        previous = cv2.getNumThreads()
+        cv2.setNumThreads(int(threads))
+        return previous
+    except Exception:
+        return None
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""重型 ML 依赖后台预加载 (torch / ultralytics)
+
+首次 `from ultralytics import YOLO` 连带导入 torch 往往需要数秒；若发生在模块 _on_start 中会阻塞
+调用线程 (通常是执行器启动路径)。本模块在后台线程中完成导入并应用 ensure_torch_load_legacy，
+主窗口显示后即可启动；模型模块通过 require_yolo() 等待结果而不是各自同步导入。
+
+状态: idle -> loading -> ready | failed
+- 并发调用 require_yolo() 只会触发一次导入，其余调用方等待同一结果。
+- 未调用 start() 时 require_yolo() 会自行启动预加载并等待 (行为等同原先的同步导入)。
+- 预加载失败 (例如未安装 ultralytics) 会记录原因；依赖安装后可调用 reset() 重新尝试。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.utils.startup_profiler import begin_phase, end_phase
+
+IDLE = 'idle'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class MLPreloader:
+    # (步骤名, 进度权重) —— torch 导入占绝大部分耗时
+    STEPS = (('torch', 0.6), ('torch_patch', 0.05), ('ultralytics', 0.35))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._state = IDLE
+        self._step: Optional[str] = None
+        self._progress = 0.0
+        self._error: Optional[str] = None
+        self._yolo_cls: Any = None
+        self._torch_version: Optional[str] = None
+        self._cuda_available: Optional[bool] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    # ---------- 控制 ----------
+    def start(self) -> bool:
+        """启动后台预加载线程；已在进行或已完成时返回 False。"""
+        with self._lock:
+            if self._state != IDLE:
+                return False
+            self._state = LOADING
+            self._started_at = time.time()
+            self._event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='ml-preload-thread')
+            self._thread.start()
+        return True
+
+    def reset(self):
+        """失败后重置为 idle 以便重新尝试 (加载进行中调用无效)。"""
+        with self._lock:
+            if self._state == LOADING:
+                return
+            self._state = IDLE
+            self._step = None
+            self._progress = 0.0
+            self._error = None
+            self._event.clear()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待预加载结束；返回是否就绪 (ready)。"""
+        self._event.wait(timeout)
+        return self._state == READY
+
+    def _run(self):
+        begin_phase('ml_preload')
+        done = 0.0
+        try:
+            for step, weight in self.STEPS:
+                self._step = step
+                if step == 'torch':
+                    try:
+                        import torch  # type: ignore
+                        self._torch_version = str(getattr(torch, '__version__', ''))
+                        try:
+                            self._cuda_available = bool(torch.cuda.is_available())
+                        except Exception:
+                            self._cuda_available = False
+                    except Exception as e:
+                        # torch 缺失时 ultralytics 导入同样会失败，此处先记录原因
+                        self._error = f"torch: {e}"
+                elif step == 'torch_patch':
+                    try:
+                        from app.utils.torch_patch import ensure_torch_load_legacy
+                        ensure_torch_load_legacy()
+                    except Exception:
+                        pass
+                elif step == 'ultralytics':
+                    from ultralytics import YOLO  # type: ignore
+                    self._yolo_cls = YOLO
+                done += weight
+                self._progress = min(1.0, done)
+            with self._lock:
+                self._state = READY
+                self._error = None
+        except Exception as e:
+            with self._lock:
+                self._state = FAILED
+                self._error = f"{self._step}: {e}"
+        finally:
+            self._step = None
+            self._finished_at = time.time()
+            self._event.set()
+            end_phase('ml_preload')
+
+    # ---------- 查询 ----------
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def is_ready(self) -> bool:
+        return self._state == READY
+
+    def is_loading(self) -> bool:
+        return self._state == LOADING
+
+    def status(self) -> Dict[str, Any]:
+        end = self._finished_at or time.time()
+        return {
+            'state': self._state,
+            'step': self._step,
+            'progress': round(self._progress, 3),
+            'error': self._error,
+            'elapsed_s': round(end - self._started_at, 3) if self._started_at else None,
+            'torch_version': self._torch_version,
+            'cuda_available': self._cuda_available,
+        }
+
+    def get_yolo(self, timeout: Optional[float] = None) -> Tuple[Any, Optional[str]]:
+        """返回 (YOLO 类, 错误信息)。未启动时自动启动并等待。"""
+        if self._state == IDLE:
+            self.start()
+        if not self.wait(timeout):
+            if self._state == LOADING:
+                return None, '依赖预加载超时'
+            return None, self._error or '依赖预加载失败'
+        return self._yolo_cls, None
+
+
+_preloader: Optional[MLPreloader] = None
+_preloader_lock = threading.Lock()
+
+
+def get_preloader() -> MLPreloader:
+    global _preloader
+    if _preloader is None:
+        with _preloader_lock:
+            if _preloader is None:
+                _preloader = MLPreloader()
+    return _preloader
+
+
+def peek_preloader() -> Optional[MLPreloader]:
+    """仅返回已创建的预加载器 (GUI 轮询用，不创建实例)。"""
+    return _preloader
+
+
+def start_preload() -> MLPreloader:
+    p = get_preloader()
+    p.start()
+    return p
+
+
+def require_yolo(timeout: Optional[float] = None) -> Tuple[Any, Optional[str]]:
+    """模型模块获取 ultralytics.YOLO 的统一入口 (已应用 torch.load 兼容补丁)。"""
+    return get_preloader().get_yolo(timeout)
+
+
+__all__ = ['MLPreloader', 'get_preloader', 'peek_preloader', 'start_preload', 'require_yolo',
+           'IDLE', 'LOADING', 'READY', 'FAILED']
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""启动耗时记录 (startup instrumentation)
+
+开启方式: 环境变量 FAHAI_STARTUP_PROFILE=1 或 main.py 命令行参数 --profile-startup。
+未开启时 startup_phase() 返回共享的空上下文，begin/end/finish 均为空操作，不安装导入钩子。
+
+开启后记录:
+- 阶段耗时: 以进程内 enable() 时刻为零点的开始偏移与持续时间 (Qt 创建、注册表导入、插件登记、
+  主窗口构造、上次项目热加载、模型预热等)。异步阶段使用 begin()/end()。
+- 模块导入耗时: 通过 sys.meta_path 查找器包装 loader.exec_module，得到每个模块的累计/自身耗时
+  (与 python -X importtime 口径一致，按线程区分嵌套)。
+报告写到 user_data/startup/startup_<时间>.txt 与同名 .json；finish() 之后结束的异步阶段会重写报告。
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+ENV_VAR = 'FAHAI_STARTUP_PROFILE'
+CLI_FLAG = '--profile-startup'
+
+_NULL_CONTEXT = contextlib.nullcontext()
+_profiler: Optional['StartupProfiler'] = None
+
+
+class _TimedLoader:
+    """包装原始 loader，仅计时 exec_module；其余属性透传。导入完成后恢复原 loader。"""
+
+    def __init__(self, loader, recorder: '_ImportRecorder'):
+        self._loader = loader
+        self._recorder = recorder
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        name = module.__name__
+        try:
+            with self._recorder.timing(name):
+                self._loader.exec_module(module)
+        finally:
+            try:
+                module.__loader__ = self._loader
+                if module.__spec__ is not None:
+                    module.__spec__.loader = self._loader
+            except Exception:
+                pass
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+
+class _ImportRecorder:
+    """sys.meta_path 首位查找器: 委托其余查找器解析 spec，再替换为计时 loader。"""
+
+    def __init__(self):
+        self.records: Dict[str, Dict[str, float]] = {}
+        self._tls = threading.local()
+        self._lock = threading.Lock()
+
+    # MetaPathFinder 协议
+    def find_spec(self, fullname, path=None, target=None):
+        if getattr(self._tls, 'resolving', False):
+            return None
+        self._tls.resolving = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._tls.resolving = False
+
+    def invalidate_caches(self):
+        pass
+
+    @contextlib.contextmanager
+    def timing(self, name: str):
+        stack = getattr(self._tls, 'stack', None)
+        if stack is None:
+            stack = self._tls.stack = []
+        frame = [0.0]  # 子模块累计耗时
+        stack.append(frame)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            cumulative = time.perf_counter() - t0
+            stack.pop()
+            if stack:
+                stack[-1][0] += cumulative
+            with self._lock:
+                self.records[name] = {
+                    'cumulative_s': cumulative,
+                    'self_s': max(0.0, cumulative - frame[0]),
+                    'depth': len(stack),
+                    'thread': threading.current_thread().name,
+                }
+
+
+class StartupProfiler:
+    def __init__(self, output_dir: Optional[str] = None):
+        self.t0 = time.perf_counter()
+        self.started_at = time.time()
+        self.output_dir = output_dir or os.path.join(os.getcwd(), 'user_data', 'startup')
+        self.phases: List[Dict[str, Any]] = []
+        self._open: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._imports = _ImportRecorder()
+        self._finished = False
+        self.report_path: Optional[str] = None
+        sys.meta_path.insert(0, self._imports)
+
+    def _now(self) -> float:
+        return time.perf_counter() - self.t0
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = self._now()
+        try:
+            yield
+        finally:
+            self._add(name, start, self._now())
+
+    def begin(self, name: str):
+        with self._lock:
+            self._open.setdefault(name, self._now())
+
+    def end(self, name: str):
+        with self._lock:
+            start = self._open.pop(name, None)
+        if start is not None:
+            self._add(name, start, self._now())
+
+    def _add(self, name: str, start: float, end: float):
+        with self._lock:
+            self.phases.append({'name': name, 'start_s': start, 'duration_s': end - start,
+                                'thread': threading.current_thread().name})
+            rewrite = self._finished
+        if rewrite:
+            self.write_report()
+
+    def finish(self) -> Optional[str]:
+        """标记启动完成 (首个窗口已显示) 并写出报告；之后结束的异步阶段会追加并重写。"""
+        with self._lock:
+            self._finished = True
+            self.phases.append({'name': 'startup_complete', 'start_s': self._now(), 'duration_s': 0.0,
+                                'thread': threading.current_thread().name})
+        return self.write_report()
+
+    def stop(self):
+        """移除导入钩子 (报告数据保留)。"""
+        try:
+            sys.meta_path.remove(self._imports)
+        except ValueError:
+            pass
+
+    def to_dict(self, top: int = 40) -> Dict[str, Any]:
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p['start_s'])
+            pending = {k: self._now() - v for k, v in self._open.items()}
+        with self._imports._lock:
+            imports = dict(self._imports.records)
+        by_cum = sorted(imports.items(), key=lambda kv: kv[1]['cumulative_s'], reverse=True)
+        by_self = sorted(imports.items(), key=lambda kv: kv[1]['self_s'], reverse=True)
+        top_level_total = sum(r['cumulative_s'] for r in imports.values() if r['depth'] == 0)
+        return {
+            'started_at': self.started_at,
+            'python': sys.version.split()[0],
+            'argv': list(sys.argv),
+            'phases': phases,
+            'pending_phases': pending,
+            'imports': {
+                'count': len(imports),
+                'total_top_level_s': top_level_total,
+                'top_cumulative': [{'module': k, **v} for k, v in by_cum[:top]],
+                'top_self': [{'module': k, **v} for k, v in by_self[:top]],
+            },
+        }
+
+    def format_text(self, data: Optional[Dict[str, Any]] = None) -> str:
+        data = data or self.to_dict()
+        lines = [f"FAHAI startup report  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(data['started_at']))}",
+                 f"python {data['python']}  argv {' '.join(data['argv'])}", '', 'Phases (ms):',
+                 f"  {'start':>9} {'duration':>9}  name"]
+        for p in data['phases']:
+            lines.append(f"  {p['start_s'] * 1000:>9.1f} {p['duration_s'] * 1000:>9.1f}  {p['name']}"
+                         + (f"  [{p['thread']}]" if p['thread'] != 'MainThread' else ''))
+        for name, elapsed in data['pending_phases'].items():
+            lines.append(f"  {'':>9} {'(running)':>9}  {name} {elapsed * 1000:.0f}ms so far")
+        imp = data['imports']
+        lines += ['', f"Imports: {imp['count']} modules, top-level total {imp['total_top_level_s'] * 1000:.1f} ms",
+                  '', 'Top by cumulative (ms):']
+        lines += [f"  {r['cumulative_s'] * 1000:>9.1f}  {'  ' * r['depth']}{r['module']}" for r in imp['top_cumulative']]
+        lines += ['', 'Top by self (ms):']
+        lines += [f"  {r['self_s'] * 1000:>9.1f}  {r['module']}" for r in imp['top_self']]
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self) -> Optional[str]:
+        data = self.to_dict()
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            if self.report_path is None:
+                stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(self.started_at))
+                self.report_path = os.path.join(self.output_dir, f'startup_{stamp}.txt')
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                f.write(self.format_text(data))
+            with open(os.path.splitext(self.report_path)[0] + '.json', 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+        except Exception as e:
+            print(f"写出启动报告失败: {e}")
+            return None
+        return self.report_path
+
+
+# ---------- 模块级接口 (未开启时为空操作) ----------
+def enable(output_dir: Optional[str] = None) -> StartupProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler(output_dir)
+    return _profiler
+
+
+def enable_from_env(argv: Optional[List[str]] = None) -> Optional[StartupProfiler]:
+    """根据环境变量/命令行参数开启；会从 argv 中移除 --profile-startup。"""
+    argv = sys.argv if argv is None else argv
+    flag = CLI_FLAG in argv
+    if flag:
+        argv[:] = [a for a in argv if a != CLI_FLAG]
+    if flag or os.environ.get(ENV_VAR, '').strip().lower() in ('1', 'true', 'yes', 'on'):
+        return enable()
+    return None
+
+
+def get_profiler() -> Optional[StartupProfiler]:
+    return _profiler
+
+
+def startup_phase(name: str):
+    """with startup_phase('xxx'): ...  未开启时返回共享空上下文。"""
+    p = _profiler
+    return p.phase(name) if p is not None else _NULL_CONTEXT
+
+
+def begin_phase(name: str):
+    if _profiler is not None:
+        _profiler.begin(name)
+
+
+def end_phase(name: str):
+    if _profiler is not None:
+        _profiler.end(name)
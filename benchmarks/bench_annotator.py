@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""标注耗时基准: FastAnnotator (cv2 复用缓冲区) vs ultralytics Results.plot
+
+场景: 1920x1080 BGR 帧，随机 100 个检测框 (可选 --masks 为每个目标附加多边形掩码)
+  results.plot      ultralytics Results.plot (每帧新分配图像；未安装 ultralytics/torch 时跳过)
+  fast              FastAnnotator 全分辨率
+  fast-aa           FastAnnotator 全分辨率 + 抗锯齿 (与 Results.plot 画质一致)
+  fast-max20        FastAnnotator max_draw=20
+  fast-preview960   FastAnnotator 缩放到最长边 960 后绘制
+
+用法:
+  python benchmarks/bench_annotator.py [--frames 200] [--dets 100] [--masks]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from app.pipeline.model.yolo_annotator import FastAnnotator  # noqa: E402
+
+NAMES = {i: f"class_{i}" for i in range(80)}
+
+
+def make_scene(n: int, w: int = 1920, h: int = 1080, seed: int = 0, masks: bool = False):
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+    x1 = rng.uniform(0, w - 200, n)
+    y1 = rng.uniform(0, h - 200, n)
+    bw = rng.uniform(20, 200, n)
+    bh = rng.uniform(20, 200, n)
+    xyxy = np.stack([x1, y1, x1 + bw, y1 + bh], axis=1).astype(np.float32)
+    conf = rng.uniform(0.25, 1.0, n).astype(np.float32)
+    cls = rng.integers(0, 80, n).astype(np.int32)
+    polygons = None
+    if masks:
+        # 每个框内一个 24 边形近似椭圆
+        t = np.linspace(0, 2 * np.pi, 24, endpoint=False)
+        polygons = [np.stack([(b[0] + b[2]) / 2 + (b[2] - b[0]) / 2 * np.cos(t),
+                              (b[1] + b[3]) / 2 + (b[3] - b[1]) / 2 * np.sin(t)], axis=1).astype(np.float32)
+                    for b in xyxy]
+    return frame, xyxy, conf, cls, polygons
+
+
+def _time(fn, frames: int, warmup: int = 5):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples
+
+
+def _ultralytics_plot(frame, xyxy, conf, cls, polygons):
+    try:
+        import torch
+        from ultralytics.engine.results import Results
+    except Exception as e:
+        return None, f"ultralytics 不可用: {e}"
+    data = torch.from_numpy(np.concatenate([xyxy, conf[:, None], cls[:, None].astype(np.float32)], axis=1))
+    kw = {}
+    if polygons is not None:
+        import cv2
+        h, w = frame.shape[:2]
+        m = np.zeros((len(polygons), h, w), dtype=np.uint8)
+        for i, p in enumerate(polygons):
+            cv2.fillPoly(m[i], [np.round(p).astype(np.int32)], 1)
+        kw["masks"] = torch.from_numpy(m)
+    r = Results(orig_img=frame, path="bench.jpg", names=NAMES, boxes=data, **kw)
+    return (lambda: r.plot(conf=True, labels=True)), None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--frames", type=int, default=200)
+    ap.add_argument("--dets", type=int, default=100)
+    ap.add_argument("--masks", action="store_true", help="附加分割多边形")
+    args = ap.parse_args()
+    frame, xyxy, conf, cls, polygons = make_scene(args.dets, masks=args.masks)
+    print(f"frame {frame.shape[1]}x{frame.shape[0]}, detections={args.dets}, masks={args.masks}, "
+          f"frames={args.frames}")
+
+    cases = []
+    plot_fn, err = _ultralytics_plot(frame, xyxy, conf, cls, polygons)
+    if plot_fn is not None:
+        cases.append(("results.plot", plot_fn))
+    else:
+        print(f"(跳过 results.plot: {err})")
+    for name, aa, kw in (("fast", False, {}), ("fast-aa", True, {}), ("fast-max20", False, {"max_draw": 20}),
+                         ("fast-preview960", False, {"preview_max_side": 960})):
+        ann = FastAnnotator(antialias=aa)
+        cases.append((name, (lambda a=ann, k=kw: a.annotate(frame, xyxy, conf, cls, NAMES, polygons=polygons, **k))))
+
+    print(f"{'case':<16} {'median ms':>10} {'p95 ms':>8} {'fps':>8}")
+    base = None
+    for name, fn in cases:
+        samples = sorted(_time(fn, args.frames))
+        med = statistics.median(samples)
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        base = base or med
+        print(f"{name:<16} {med:>10.2f} {p95:>8.2f} {1000.0 / med:>8.1f}  ({base / med:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""CPU 线程预算基准: 多个模型节点并行推理时，默认线程数 vs 按并发数均分核心
+
+模拟并行执行模式下同一层级的 N 个模型节点: N 个工作线程同时循环推理 --seconds 秒。
+  default   不设置预算 (torch / OpenCV 每次推理使用全部核心)
+  budget    plan_cpu_budgets(N) 均分线程数 (执行器 cpu_budget=auto)
+  pin       均分线程数 + 每个工作线程绑定到各自的核心区段 (cpu_budget=pin，仅 Linux)
+
+负载 (--workload):
+  torch     3 层卷积网络，输入 1x3xSxS (需安装 torch；auto 时优先使用)
+  opencv    GaussianBlur + resize + Sobel (cv2 并行算子；OpenCV 线程数为进程级，预算时按每槽线程数设置)
+
+用法:
+  python benchmarks/bench_cpu_budget.py [--models 2] [--seconds 5] [--workload auto|torch|opencv] [--size 320]
+单核机器上三种场景结果相同 (无可分配的核心)。
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from app.utils.cpu_budget import apply_cpu_budget, plan_cpu_budgets, set_opencv_threads, usable_cpus  # noqa: E402
+
+
+def _torch_workload(size: int):
+    try:
+        import torch
+    except Exception as e:
+        return None, f"torch 不可用: {e}"
+    torch.manual_seed(0)
+    net = torch.nn.Sequential(
+        torch.nn.Conv2d(3, 32, 3, stride=2, padding=1), torch.nn.ReLU(),
+        torch.nn.Conv2d(32, 64, 3, stride=2, padding=1), torch.nn.ReLU(),
+        torch.nn.Conv2d(64, 128, 3, stride=2, padding=1), torch.nn.ReLU(),
+    ).eval()
+    x = torch.rand(1, 3, size, size)
+
+    def _run():
+        with torch.inference_mode():
+            net(x)
+    return _run, None
+
+
+def _opencv_workload(size: int):
+    import cv2
+    side = max(size, 64) * 3
+    img = np.random.default_rng(0).integers(0, 255, (side, side, 3), dtype=np.uint8)
+
+    def _run():
+        blur = cv2.GaussianBlur(img, (9, 9), 0)
+        small = cv2.resize(blur, (side // 2, side // 2), interpolation=cv2.INTER_AREA)
+        cv2.Sobel(small, cv2.CV_16S, 1, 0)
+    return _run, None
+
+
+def run_scenario(fn, models: int, seconds: float, budgets):
+    """N 个工作线程并行循环执行 fn；返回 (总吞吐 it/s, 单次耗时中位数 ms, p95 ms)。"""
+    stop = threading.Event()
+    samples = [[] for _ in range(models)]
+
+    def _worker(i):
+        if budgets is not None:
+            apply_cpu_budget(budgets[i]["threads"], budgets[i]["cores"])
+        for _ in range(2):   # 预热
+            fn()
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            fn()
+            samples[i].append((time.perf_counter() - t0) * 1000.0)
+
+    threads = [threading.Thread(target=_worker, args=(i,), daemon=True) for i in range(models)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    flat = sorted(s for per in samples for s in per)
+    if not flat:
+        return 0.0, 0.0, 0.0
+    return len(flat) / seconds, statistics.median(flat), flat[max(0, int(len(flat) * 0.95) - 1)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--models", type=int, default=2, help="并行推理的模型节点数")
+    ap.add_argument("--seconds", type=float, default=5.0, help="每个场景的运行时长")
+    ap.add_argument("--workload", choices=("auto", "torch", "opencv"), default="auto")
+    ap.add_argument("--size", type=int, default=320, help="输入边长")
+    args = ap.parse_args()
+
+    fn, err = (None, None)
+    if args.workload in ("auto", "torch"):
+        fn, err = _torch_workload(args.size)
+        workload = "torch"
+        if fn is None and args.workload == "torch":
+            print(err)
+            return
+    if fn is None:
+        if err:
+            print(f"(torch 负载跳过: {err})")
+        fn, _ = _opencv_workload(args.size)
+        workload = "opencv"
+
+    cpus = usable_cpus()
+    budgets = plan_cpu_budgets(args.models, cpus)
+    torch = sys.modules.get("torch")
+    torch_default = torch.get_num_threads() if torch is not None else None
+    import cv2
+    cv2_default = cv2.getNumThreads()
+    print(f"workload={workload}, models={args.models}, cpus={len(cpus)}, seconds={args.seconds}, "
+          f"budget={[b['threads'] for b in budgets]} 线程/槽")
+
+    scenarios = [("default", None), ("budget", [dict(b, cores=[]) for b in budgets])]
+    if hasattr(os, "sched_setaffinity"):
+        scenarios.append(("pin", budgets))
+    print(f"{'case':<10} {'it/s':>8} {'median ms':>10} {'p95 ms':>8}")
+    base = None
+    for name, plan in scenarios:
+        # 每个场景从默认设置开始 (工作线程为新线程，继承主线程未绑定的核心集合)
+        if torch is not None:
+            torch.set_num_threads(torch_default)
+        set_opencv_threads(cv2_default if plan is None else plan[0]["threads"])
+        tput, med, p95 = run_scenario(fn, args.models, args.seconds, plan)
+        base = base or tput
+        print(f"{name:<10} {tput:>8.1f} {med:>10.2f} {p95:>8.2f}  ({tput / base if base else 0:.2f}x)")
+    set_opencv_threads(cv2_default)
+
+
+if __name__ == "__main__":
+    main()
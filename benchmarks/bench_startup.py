@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""启动耗时基准: 模块注册表导入 / 首个窗口显示
+
+每个场景在独立子进程中运行 (避免模块缓存影响)，工作目录为临时目录 (独立 user_data 与清单缓存):
+  eager       FAHAI_EAGER_REGISTRY=1，导入注册表时导入全部内置模块 (旧行为)
+  lazy-cold   延迟注册，清单缓存不存在 (首次启动，需要导入模块生成元数据)
+  lazy-warm   延迟注册，清单缓存已存在 (常规启动)
+
+用法:
+  python benchmarks/bench_startup.py [--repeat 5] [--no-window]
+GUI 场景需要 PyQt6；无显示环境自动使用 QT_QPA_PLATFORM=offscreen。
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_REGISTRY_SNIPPET = r"""
+import sys, time, json
+t0 = time.perf_counter()
+sys.path.insert(0, {repo!r})
+from app.pipeline import module_registry as r
+names = r.list_registered_modules()
+for n in names:
+    r.get_module_metadata(n)
+r.save_manifest()
+print(json.dumps({{'seconds': time.perf_counter() - t0, 'modules': len(names),
+                  'imported': sum(1 for n in names if r.is_module_loaded(n))}}))
+"""
+
+_WINDOW_SNIPPET = r"""
+import sys, time, json
+t0 = time.perf_counter()
+sys.path.insert(0, {repo!r})
+from PyQt6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+from app.gui.main_window import MainWindow
+w = MainWindow()
+w.show()
+app.processEvents()
+elapsed = time.perf_counter() - t0
+from app.pipeline import module_registry as r
+names = r.list_registered_modules()
+print(json.dumps({{'seconds': elapsed, 'modules': len(names),
+                  'imported': sum(1 for n in names if r.is_module_loaded(n))}}))
+"""
+
+
+def _run(snippet: str, cwd: str, eager: bool) -> dict:
+    env = dict(os.environ)
+    env.pop('FAHAI_MODULE_MANIFEST', None)
+    env['FAHAI_EAGER_REGISTRY'] = '1' if eager else '0'
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    out = subprocess.run([sys.executable, '-c', snippet.format(repo=REPO)], cwd=cwd, env=env,
+                         capture_output=True, text=True, timeout=300)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip()[-2000:])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench(snippet: str, repeat: int):
+    results = {}
+    # eager
+    with tempfile.TemporaryDirectory() as d:
+        runs = [_run(snippet, d, eager=True) for _ in range(repeat)]
+        results['eager'] = runs
+    # lazy-cold: 每次使用全新目录
+    cold = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as d:
+            cold.append(_run(snippet, d, eager=False))
+    results['lazy-cold'] = cold
+    # lazy-warm: 先生成清单再计时
+    with tempfile.TemporaryDirectory() as d:
+        _run(snippet, d, eager=False)
+        results['lazy-warm'] = [_run(snippet, d, eager=False) for _ in range(repeat)]
+    return results
+
+
+def _report(title: str, results: dict):
+    print(f"\n== {title} ==")
+    print(f"{'scenario':<12} {'median ms':>10} {'min ms':>8} {'imported':>9}")
+    base = None
+    for name, runs in results.items():
+        secs = [r['seconds'] for r in runs]
+        med = statistics.median(secs) * 1000
+        base = base or med
+        print(f"{name:<12} {med:>10.1f} {min(secs) * 1000:>8.1f} "
+              f"{runs[-1]['imported']:>4}/{runs[-1]['modules']:<4} ({med / base:.2f}x)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument('--no-window', action='store_true', help='只测注册表，不启动 GUI')
+    args = ap.parse_args()
+    _report('registry import + metadata', bench(_REGISTRY_SNIPPET, args.repeat))
+    if not args.no_window:
+        if shutil.which(sys.executable) and _has_qt():
+            _report('time to first window', bench(_WINDOW_SNIPPET, args.repeat))
+        else:
+            print('\n(PyQt6 不可用，跳过窗口场景)')
+
+
+def _has_qt() -> bool:
+    try:
+        import PyQt6  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+if __name__ == '__main__':
+    main()
@@ -7,19 +7,30 @@ FAHAI - 图形化流程设计器
 
 import sys
 import os
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app.gui.main_window import MainWindow
+# 启动耗时记录需在其它导入之前开启 (FAHAI_STARTUP_PROFILE=1 或 --profile-startup)
+from app.utils.startup_profiler import enable_from_env, startup_phase
+_startup_profiler = enable_from_env(sys.argv)
+
+with startup_phase('import_qt'):
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import Qt, QTimer
+
+with startup_phase('registry_import'):
+    import app.pipeline.module_registry  # noqa: F401
+
+with startup_phase('main_window_import'):
+    from app.gui.main_window import MainWindow
 
 
 def main():
     """主函数，启动应用程序"""
     # 创建 QApplication 实例
-    app = QApplication(sys.argv)
+    with startup_phase('qt_application'):
+        app = QApplication(sys.argv)
     
     # 设置应用程序属性
     app.setApplicationName("FAHAI")
@@ -38,8 +49,16 @@ def main():
         pass
     
     # 创建主窗口
-    main_window = MainWindow()
-    main_window.show()
+    with startup_phase('main_window_construct'):
+        main_window = MainWindow()
+    with startup_phase('main_window_show'):
+        main_window.show()
+    
+    if _startup_profiler is not None:
+        # 事件循环首次空闲时视为启动完成；退出时补写异步阶段 (热加载/模型预热)
+        import atexit
+        QTimer.singleShot(0, _startup_profiler.finish)
+        atexit.register(_startup_profiler.write_report)
     
     # 运行应用程序
     sys.exit(app.exec())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试共用的替身模块与模型 (各测试文件从此处导入，不互相导入测试模块)"""
+import numpy as np
+
+from app.pipeline.base_module import BaseModule, ModuleCapabilities, ModuleType
+
+
+class CustomModule(BaseModule):
+    """替身模块基类: 类型为 CUSTOM，端口由子类注册。"""
+
+    @property
+    def module_type(self):
+        return ModuleType.CUSTOM
+
+
+class Source(CustomModule):
+    """无输入，out 端口输出 1 (轻量，可参与链融合)。"""
+    CAPABILITIES = ModuleCapabilities(throughput_hint=1000.0)
+
+    def _define_ports(self):
+        self.register_output_port('out', 'int', 'value')
+
+    def process(self, inputs):
+        return {'out': 1}
+
+
+class AddOne(CustomModule):
+    """out = in + 1 (轻量，可参与链融合)。"""
+    CAPABILITIES = ModuleCapabilities(throughput_hint=1000.0)
+
+    def _define_ports(self):
+        self.register_input_port('in', 'int', 'value')
+        self.register_output_port('out', 'int', 'value')
+
+    def process(self, inputs):
+        return {'out': (inputs.get('in') or 0) + 1}
+
+
+class ValueModule(CustomModule):
+    """单输出端口 val，输出 1。"""
+
+    def _define_ports(self):
+        self.register_output_port('val', 'int', 'value')
+
+    def process(self, inputs):
+        return {'val': 1}
+
+
+class FakeBackend:
+    """ModelModule 推理后端替身: 记录输入 blob，返回固定输出。"""
+
+    def __init__(self, output):
+        self.output = output
+        self.seen = None
+
+    def inference(self, blob):
+        self.seen = blob
+        return [self.output]
+
+    def get_model_info(self):
+        return {'backend': 'fake'}
+
+
+def v8_output(rows):
+    """rows: (cx, cy, w, h, s0, s1) -> v8 布局 (1, 4+nc, N)"""
+    return np.asarray(rows, dtype=np.float32).T[None]
+
+
+def identity_onnx(path, dims):
+    """手工编码仅含 Identity 节点的 ONNX (无需 onnx 包)"""
+    def varint(n):
+        out = b''
+        while True:
+            b, n = n & 0x7f, n >> 7
+            if n:
+                out += bytes([b | 0x80])
+            else:
+                return out + bytes([b])
+
+    def ld(f, b):
+        return varint((f << 3) | 2) + varint(len(b)) + b
+
+    def vi(f, n):
+        return varint(f << 3) + varint(n)
+
+    def s(f, t):
+        return ld(f, t.encode())
+
+    def valinfo(name):
+        shape = b''.join(ld(1, vi(1, d)) for d in dims)
+        return s(1, name) + ld(2, ld(1, vi(1, 1) + ld(2, shape)))
+
+    graph = ld(1, s(1, 'x') + s(2, 'y') + s(4, 'Identity')) + s(2, 'g') + ld(11, valinfo('x')) + ld(12, valinfo('y'))
+    path.write_bytes(vi(1, 7) + ld(8, s(1, '') + vi(2, 13)) + ld(7, graph))
+    return str(path)
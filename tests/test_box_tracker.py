@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""跟踪器与检测模块跟踪模式测试: 稳定 track_id、中间帧外推、按间隔/置信度调度检测"""
+import numpy as np
+
+from app.pipeline.model.box_tracker import BoxTracker, greedy_match, iou_matrix
+from app.pipeline.model.yolov8_detect_module import YoloV8DetectModule
+
+
+def _box(x, y=50, w=40, h=30):
+    return [x, y, x + w, y + h]
+
+
+def test_iou_and_greedy_match():
+    a = np.array([_box(0), _box(100)], np.float32)
+    b = np.array([_box(105), _box(2), _box(300)], np.float32)
+    iou = iou_matrix(a, b)
+    assert iou.shape == (2, 3) and np.isclose(iou[0, 1], 38 * 30 / (2 * 1200 - 38 * 30))
+    rows, cols = greedy_match(iou, 0.3)
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 1), (1, 0)]
+
+
+def test_tracker_keeps_ids_and_extrapolates():
+    tr = BoxTracker(match_iou=0.2, max_age=1, decay=0.9)
+    conf, cls = np.array([0.8], np.float32), np.array([0], np.int32)
+    ids = [tr.update(np.array([_box(10 * k)], np.float32), conf, cls)[0] for k in range(4)]
+    assert ids == [1, 1, 1, 1]
+    boxes, c, _, tids = tr.predict()
+    assert tids.tolist() == [1] and 30 < boxes[0, 0] < 42 and np.isclose(c[0], 0.72)  # 沿运动方向外推
+    # 新目标 (不同类别) 获得新 id；原轨迹连续未命中超过 max_age 后删除
+    other = tr.update(np.array([_box(200)], np.float32), conf, np.array([1], np.int32))
+    assert other.tolist() == [2] and len(tr) == 2
+    tr.update(np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int32))
+    assert tr.stats()['tracks'] == 1 and tr.ids.tolist() == [2]
+
+
+def test_need_detection_interval_and_confidence():
+    tr = BoxTracker(decay=0.5)
+    assert tr.need_detection(5, 0.1)
+    tr.update(np.array([_box(0)], np.float32), np.array([0.9], np.float32), np.array([0], np.int32))
+    assert not tr.need_detection(5, 0.1)
+    tr.predict()
+    tr.predict()
+    assert tr.need_detection(5, 0.2)  # 0.9 * 0.5^3 < 0.2
+    assert not tr.need_detection(5, 0.1)
+    tr.predict()
+    assert tr.need_detection(4, 0.0)
+
+
+class _Boxes:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Result:
+    def __init__(self, data):
+        self.boxes = _Boxes(data)
+
+
+class _MovingModel:
+    """每次 predict 返回按调用帧号平移的框"""
+    names = {0: 'part'}
+
+    def __init__(self):
+        self.frame = 0
+        self.calls = 0
+
+    def predict(self, **kw):
+        self.calls += 1
+        return [_Result(np.array([_box(4 * self.frame) + [0.9, 0]], np.float32))]
+
+
+def test_detect_module_track_mode():
+    m = YoloV8DetectModule()
+    assert m.configure({'track': True, 'detect_interval': 3, 'deferred_first_infer': False})
+    assert not m.configure({'track': True, 'detect_interval': 0})
+    model = _MovingModel()
+    m._model, m._names, m._model_loaded = model, dict(model.names), True
+    img = np.zeros((200, 320, 3), np.uint8)
+    statuses, ids = [], set()
+    for k in range(9):
+        model.frame = k
+        out = m.process({'image': img})
+        statuses.append(out['status'].split(':')[0])
+        ids.update(r['track_id'] for r in out['results'])
+    assert statuses == ['ok', 'tracked', 'tracked'] * 3 and model.calls == 3 and ids == {1}
+    assert out['image'].any()
+    st = m.get_status()['tracking']
+    assert st['enabled'] and st['detect_frames'] == 3 and st['tracked_frames'] == 6
+    # 动态 targets 变化时立即重新检测
+    out = m.process({'image': img, 'targets': 'part'})
+    assert out['status'] == 'ok:1' and model.calls == 4
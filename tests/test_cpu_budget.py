@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""CPU 预算测试: 核心划分、模块覆盖、调用线程生效、执行器按并发模型节点数分配"""
+import sys
+import threading
+
+import cv2
+import pytest
+
+from app.pipeline.pipeline_executor import ExecutionMode, PipelineExecutor
+from app.pipeline.model.yolov8_detect_module import YoloV8DetectModule
+from app.utils import cpu_budget
+from app.utils.cpu_budget import apply_cpu_budget, parse_core_list, plan_cpu_budgets, resolve_cpu_budget
+from helpers import AddOne, Source
+
+
+def _fake_topology(root, siblings):
+    """在 root 下构造 sysfs topology: siblings 为 {cpu: "兄弟线程列表"}。"""
+    for cpu, spec in siblings.items():
+        d = root / f"cpu{cpu}" / "topology"
+        d.mkdir(parents=True)
+        (d / "thread_siblings_list").write_text(spec + "\n")
+
+
+def test_parse_and_plan(monkeypatch, tmp_path):
+    monkeypatch.setattr(cpu_budget, "_SYSFS_CPU", str(tmp_path))   # 无拓扑信息: 每个 CPU 视为一个核心
+    assert parse_core_list("0-2, 5,2") == [0, 1, 2, 5] and parse_core_list(None) == []
+    with pytest.raises(ValueError):
+        parse_core_list("3-1")
+    plan = plan_cpu_budgets(3, list(range(8)))
+    assert [b["threads"] for b in plan] == [3, 3, 2]
+    assert [b["cores"] for b in plan] == [[0, 1, 2], [3, 4, 5], [6, 7]]
+    assert plan_cpu_budgets(2, list(range(8)), reserve=2)[0]["cores"] == [2, 3, 4]
+    assert plan_cpu_budgets(3, [0, 1]) == [{"threads": 1, "cores": [0, 1]}] * 3
+
+
+def test_plan_keeps_smt_siblings_together(monkeypatch, tmp_path):
+    # 4 个物理核心 x 2 线程，兄弟线程编号为 i 与 i+4
+    _fake_topology(tmp_path, {c: f"{c % 4},{c % 4 + 4}" for c in range(8)})
+    monkeypatch.setattr(cpu_budget, "_SYSFS_CPU", str(tmp_path))
+    assert cpu_budget.core_groups(range(8)) == [[0, 4], [1, 5], [2, 6], [3, 7]]
+    plan = plan_cpu_budgets(2, list(range(8)))
+    assert plan == [{"threads": 2, "cores": [0, 1, 4, 5]}, {"threads": 2, "cores": [2, 3, 6, 7]}]
+    assert plan_cpu_budgets(2, list(range(8)), reserve=1)[0] == {"threads": 2, "cores": [1, 2, 5, 6]}
+    assert plan_cpu_budgets(1, list(range(8)))[0]["threads"] == 4   # 物理核心数，而非逻辑 CPU 数
+
+
+def test_resolve_overrides_and_apply(monkeypatch):
+    assigned = {"threads": 4, "cores": [0, 1, 2, 3]}
+    assert resolve_cpu_budget({}, assigned) == (4, [0, 1, 2, 3])
+    assert resolve_cpu_budget({"cpu_threads": 2, "cpu_affinity": "1"}, assigned) == (2, [1])
+    assert resolve_cpu_budget({}, None) == (0, [])
+
+    class _Torch:
+        threads = 8
+        calls = 0
+
+        def get_num_threads(self):
+            return self.threads
+
+        def set_num_threads(self, n):
+            self.threads, self.calls = n, self.calls + 1
+
+    fake = _Torch()
+    monkeypatch.setitem(sys.modules, "torch", fake)
+    core = cpu_budget.usable_cpus()[0]
+    seen = []
+
+    def _worker():
+        seen.append(apply_cpu_budget(2, [core]))
+        seen.append(apply_cpu_budget(2, [core]))   # 相同预算不重复设置
+        cpu_budget.release_affinity()
+    th = threading.Thread(target=_worker)
+    th.start()
+    th.join()
+    assert fake.threads == 2 and fake.calls == 1
+    assert seen[0]["torch_threads"] == 2
+    if hasattr(cpu_budget.os, "sched_setaffinity"):
+        assert seen[0]["cores"] == [core] and seen[1] == seen[0]
+
+
+class _Model(AddOne):
+    """带 cpu_budget 属性的替身模型节点 (与真实模型模块一样在 process 中应用预算)。"""
+
+    def __init__(self, name, fail_start=False):
+        super().__init__(name)
+        self.cpu_budget = None
+        self.fail_start = fail_start
+        self.pinned = None
+
+    def _on_start(self):
+        if self.fail_start:
+            raise RuntimeError("load failed")
+
+    def process(self, inputs):
+        apply_cpu_budget(*resolve_cpu_budget(self.config, self.cpu_budget))
+        self.pinned = getattr(cpu_budget._local, "cores", None)
+        return super().process(inputs)
+
+
+def test_executor_splits_cores_between_concurrent_models(monkeypatch, tmp_path):
+    monkeypatch.setattr(cpu_budget, "_PROCESS_CPUS", tuple(range(8)))
+    monkeypatch.setattr(cpu_budget, "_SYSFS_CPU", str(tmp_path))
+    ex = PipelineExecutor()
+    models = {nid: _Model(nid) for nid in ("det_a", "det_b", "cls")}
+    ex.add_module(Source("src"), "src")
+    for nid, mod in models.items():
+        ex.add_module(mod, nid)
+    ex.connect_modules("src", "out", "det_a", "in")
+    ex.connect_modules("src", "out", "det_b", "in")
+    ex.connect_modules("det_a", "out", "cls", "in")
+    # 顺序执行: 一次只运行一个模型，不改变默认线程数也不绑定
+    assert {(b["threads"], tuple(b["cores"])) for b in ex.assign_cpu_budgets().values()} == {(0, ())}
+    ex.config["cpu_reserve"] = 2
+    assert {b["threads"] for b in ex.assign_cpu_budgets().values()} == {6}
+    ex.config["cpu_reserve"] = 0
+    ex.set_execution_mode(ExecutionMode.PARALLEL)
+    ex.config["cpu_budget"] = "pin"
+    budgets = ex.assign_cpu_budgets()
+    assert budgets["det_a"]["cores"] == [0, 1, 2, 3] and budgets["det_b"]["cores"] == [4, 5, 6, 7]
+    assert budgets["cls"]["slot"] == 0 and budgets["cls"]["threads"] == 4 and budgets["cls"]["slots"] == 2
+    assert models["det_b"].cpu_budget == budgets["det_b"]
+    ex._restore_opencv_threads()
+    ex.config["cpu_budget"] = "off"
+    assert ex.assign_cpu_budgets() == {} and models["det_a"].cpu_budget is None
+
+
+def test_executor_releases_pin_after_model_node():
+    core = cpu_budget.usable_cpus()[0]
+    ex = PipelineExecutor()
+    model = _Model("det")
+    model.config["cpu_affinity"] = str(core)
+    ex.add_module(Source("src"), "src")
+    ex.add_module(model, "det")
+    ex.connect_modules("src", "out", "det", "in")
+    assert ex.run_once({}) is not None
+    # 模型节点执行期间绑定，结束后当前线程 (之后可能执行其它节点) 恢复为全部核心
+    if hasattr(cpu_budget.os, "sched_setaffinity"):
+        assert model.pinned == (core,)
+    assert getattr(cpu_budget._local, "cores", None) is None
+
+
+def test_start_failure_restores_opencv_threads(monkeypatch, tmp_path):
+    monkeypatch.setattr(cpu_budget, "_PROCESS_CPUS", tuple(range(8)))
+    monkeypatch.setattr(cpu_budget, "_SYSFS_CPU", str(tmp_path))
+    original = cv2.getNumThreads()
+    ex = PipelineExecutor()
+    ex.set_execution_mode(ExecutionMode.PARALLEL)
+    ex.add_module(Source("src"), "src")
+    ex.add_module(_Model("a"), "a")
+    ex.add_module(_Model("b", fail_start=True), "b")
+    ex.connect_modules("src", "out", "a", "in")
+    ex.connect_modules("src", "out", "b", "in")
+    assert not ex.start()
+    assert cv2.getNumThreads() == original and ex._cv2_threads_restore is None
+
+
+def test_detect_module_budget_config():
+    m = YoloV8DetectModule()
+    assert not m.configure({"cpu_affinity": "3-1"}) and not m.configure({"cpu_threads": -1})
+    m.cpu_budget = {"threads": 4, "cores": [0, 1, 2, 3]}
+    assert m.get_status()["cpu_budget"] == {"threads": 4, "cores": [0, 1, 2, 3]}
+    assert m.configure({"cpu_threads": 2})
+    assert m.get_status()["cpu_budget"]["threads"] == 2
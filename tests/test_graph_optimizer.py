@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""图优化测试: 死节点消除与轻量链融合"""
+from app.pipeline.base_module import ModuleCapabilities
+from app.pipeline.pipeline_executor import PipelineExecutor, ExecutionMode
+from helpers import AddOne, CustomModule, Source
+
+
+class Slow(AddOne):
+    CAPABILITIES = ModuleCapabilities(may_block=True)
+
+
+class Sink(CustomModule):
+    CAPABILITIES = ModuleCapabilities(resource_tags=['viewer'])
+
+    def _define_ports(self):
+        self.register_input_port('in', 'int', 'value')
+
+    def process(self, inputs):
+        self.seen = inputs.get('in')
+        return {}
+
+
+def _build():
+    ex = PipelineExecutor()
+    sink = Sink('sink')
+    ex.add_module(Source('src'), 'src')
+    ex.add_module(AddOne('a'), 'a')
+    ex.add_module(AddOne('b'), 'b')
+    ex.add_module(sink, 'sink')
+    ex.add_module(AddOne('dead'), 'dead')
+    ex.add_module(AddOne('dead2'), 'dead2')
+    ex.connect_modules('src', 'out', 'a', 'in')
+    ex.connect_modules('a', 'out', 'b', 'in')
+    ex.connect_modules('b', 'out', 'sink', 'in')
+    ex.connect_modules('src', 'out', 'dead', 'in')
+    ex.connect_modules('dead', 'out', 'dead2', 'in')
+    return ex, sink
+
+
+def test_eliminate_and_fuse_report():
+    ex, sink = _build()
+    rep = ex.optimize_graph()
+    assert sorted(rep['eliminated']) == ['dead', 'dead2']
+    assert rep['fused'] == [['src', 'a', 'b']]   # 有副作用的 sink 不参与融合
+    assert rep['nodes_after'] == 4 and rep['scheduled_units'] == 2 and rep['levels'] == 2
+    assert all(c.target_module not in ('dead', 'dead2') for c in ex.connections)
+    # 连接变更使融合失效
+    ex.add_module(Slow('slow'), 'slow')
+    ex.connect_modules('a', 'out', 'slow', 'in')
+    assert ex._fused_chains == {}
+
+
+def test_fused_execution_matches_unfused():
+    for mode in (ExecutionMode.SEQUENTIAL, ExecutionMode.PARALLEL):
+        ex, sink = _build()
+        ex.config['optimize_graph'] = True
+        ex.set_execution_mode(mode)
+        assert ex.run_once({}) is not None
+        assert sink.seen == 3
+        assert ex.get_optimization_report()['fused'] == [['src', 'a', 'b']]
+        assert ex.get_metrics()['nodes']['b']['exec_count'] == 1
+
+
+def test_blocking_node_breaks_chain():
+    ex = PipelineExecutor()
+    sink = Sink('sink')
+    for nid, mod in (('src', Source('src')), ('a', AddOne('a')), ('slow', Slow('slow')),
+                     ('b', AddOne('b')), ('sink', sink)):
+        ex.add_module(mod, nid)
+    ex.connect_modules('src', 'out', 'a', 'in')
+    ex.connect_modules('a', 'out', 'slow', 'in')
+    ex.connect_modules('slow', 'out', 'b', 'in')
+    ex.connect_modules('b', 'out', 'sink', 'in')
+    rep = ex.optimize_graph()
+    assert rep['eliminated'] == []
+    assert rep['fused'] == [['src', 'a']]
+    ex.run_once({})
+    assert sink.seen == 4
+
+
+class Plain(AddOne):
+    CAPABILITIES = ModuleCapabilities()
+
+
+class Abort(AddOne):
+    def process(self, inputs):
+        return {'out': 0, 'abort': True}
+
+
+def test_cheap_requires_declared_hint_and_no_side_effects():
+    from app.pipeline.custom.script_module import ScriptModule
+    from app.pipeline.graph_optimizer import is_cheap
+    assert is_cheap(AddOne('a')) and not is_cheap(Plain('p'))
+    assert not is_cheap(ScriptModule('s')) and not is_cheap(Sink('sink'))
+    assert not is_cheap(AddOne('a'), avg_time=0.01)
+
+
+def test_chain_step_events_and_abort():
+    ex, sink = _build()
+    events = []
+    ex.add_module_step_callback(lambda nid, phase: events.append((nid, phase)))
+    ex.optimize_graph()
+    ex.run_once({})
+    # 融合链成员逐个发出 start/end，而非整条链同时处于运行状态
+    assert events[:6] == [('src', 'start'), ('src', 'end'), ('a', 'start'), ('a', 'end'),
+                          ('b', 'start'), ('b', 'end')]
+    # 融合链请求中断时本轮后续层级不再执行 (顺序与并行模式一致)
+    for execute in ('_execute_sequential', '_execute_parallel'):
+        ex = PipelineExecutor()
+        sink = Sink('sink')
+        for nid, mod in (('src', Source('src')), ('stop', Abort('stop')), ('sink', sink)):
+            ex.add_module(mod, nid)
+        ex.connect_modules('src', 'out', 'stop', 'in')
+        ex.connect_modules('stop', 'out', 'sink', 'in')
+        assert ex.optimize_graph()['fused'] == [['src', 'stop']]
+        getattr(ex, execute)({})
+        assert not hasattr(sink, 'seen')
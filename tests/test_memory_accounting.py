@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""负载大小估算与执行器内存统计测试"""
+import numpy as np
+from app.pipeline.pipeline_executor import PipelineExecutor
+from app.pipeline.memory_accounting import estimate_size
+from app.pipeline.postprocess.postprocess_module import PostprocessModule
+from helpers import CustomModule
+
+
+class FrameSource(CustomModule):
+    def _define_ports(self):
+        self.register_output_port('image', 'frame', '图像')
+        self.register_output_port('results', 'meta', '结果')
+
+    def process(self, inputs):
+        dets = [{'box': [1.0, 2.0, 3.0, 4.0], 'confidence': 0.9, 'class_id': 0, 'class_name': 'a'}] * 100
+        return {'image': np.zeros((100, 200, 3), dtype=np.uint8), 'results': {'dets': dets}}
+
+
+def test_estimate_size_ndarray_and_lists():
+    arr = np.zeros((10, 10), dtype=np.float32)
+    assert estimate_size(arr) == 400
+    small = [{'v': 1}] * 10
+    big = [{'v': 1}] * 1000
+    # 抽样外推后应近似线性
+    ratio = estimate_size(big) / estimate_size(small)
+    assert 50 < ratio < 150
+    assert estimate_size(None) == 0
+
+
+def test_executor_payload_and_retained():
+    ex = PipelineExecutor()
+    ex.config['enable_payload_accounting'] = True
+    post = PostprocessModule()
+    ex.add_module(FrameSource('src'), 's')
+    ex.add_module(post, 'p')
+    ex.connect_modules('s', 'results', 'p', 'results')
+    for _ in range(3):
+        ex.run_once({})
+    rep = ex.get_memory_report()
+    assert rep['ports']['s.image']['last_bytes'] == 100 * 200 * 3
+    assert rep['ports']['s.image']['count'] == 3
+    assert 's.results->p.results' in rep['edges']
+    assert rep['retained']['p']['results_cache'] > 0
+    assert rep['retained_total'] >= rep['retained']['p']['results_cache']
+
+
+def test_tracemalloc_diff():
+    ex = PipelineExecutor()
+    ex.take_memory_snapshot('a')
+    hold = [bytearray(1024) for _ in range(200)]
+    ex.take_memory_snapshot('b')
+    diff = ex.diff_memory_snapshots('a', 'b', limit=5)
+    assert diff and diff[0]['size_diff'] > 0
+    del hold
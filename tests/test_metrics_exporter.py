@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Prometheus 指标端点测试"""
+import urllib.request
+from app.pipeline.pipeline_executor import PipelineExecutor
+from app.pipeline.metrics_exporter import format_prometheus, collect_snapshot
+from helpers import ValueModule
+
+
+class QueueModule(ValueModule):
+    def get_status(self):
+        base = super().get_status()
+        base.update({'queue_size': 3, 'dropped_frames': 7, 'warming': False})
+        return base
+
+
+def test_format_contains_node_and_module_metrics():
+    ex = PipelineExecutor(name='站点"A"')
+    ex.add_module(QueueModule('q'), 'n1')
+    ex.run_once({})
+    text = format_prometheus(collect_snapshot(ex))
+    assert '# TYPE fahai_node_executions_total counter' in text
+    assert 'fahai_node_executions_total{pipeline="站点\\"A\\"",node="n1",module="q"} 1' in text
+    assert 'fahai_module_queue_depth{' in text and text.count('fahai_module_dropped_frames_total{') == 1
+    assert 'stat="avg"' in text
+    assert 'fahai_model_warming{pipeline="站点\\"A\\"",node="n1",module="q"} 0' in text
+
+
+def test_http_endpoint_serves_metrics():
+    ex = PipelineExecutor()
+    ex.add_module(QueueModule('q'), 'n1')
+    ex.run_once({})
+    exporter = ex.start_metrics_server(port=0)
+    try:
+        assert exporter is not None
+        port = exporter.address[1]
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5) as resp:
+            assert resp.status == 200
+            assert resp.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            body = resp.read().decode('utf-8')
+        assert 'fahai_pipeline_cycles_total' in body
+        assert 'fahai_module_dropped_frames_total' in body
+        assert exporter.scrape_count == 1
+    finally:
+        ex.stop_metrics_server()
+    assert not exporter.is_running
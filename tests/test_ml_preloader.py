@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""torch/ultralytics 后台预加载测试 (使用替身模块，不依赖真实安装)"""
+import sys
+import threading
+import types
+
+from app.utils import ml_preloader, torch_patch
+
+
+def _fake_deps(monkeypatch):
+    torch = types.ModuleType('torch')
+    torch.__version__ = '0.fake'
+    torch.cuda = types.SimpleNamespace(is_available=lambda: False)
+    torch.load = lambda *a, **k: k
+    ultra = types.ModuleType('ultralytics')
+    ultra.YOLO = type('YOLO', (), {})
+    monkeypatch.setitem(sys.modules, 'torch', torch)
+    monkeypatch.setitem(sys.modules, 'ultralytics', ultra)
+    monkeypatch.setattr(torch_patch, '_PATCHED', False)
+    return torch, ultra
+
+
+def test_preload_ready_shared_by_waiters(monkeypatch):
+    torch, ultra = _fake_deps(monkeypatch)
+    pre = ml_preloader.MLPreloader()
+    assert pre.start() and not pre.start()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pre.get_yolo(5))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [(ultra.YOLO, None)] * 4
+    st = pre.status()
+    assert st['state'] == 'ready' and st['progress'] == 1.0 and st['torch_version'] == '0.fake'
+    # weights_only 兼容补丁已应用
+    assert torch.load('x') == {'weights_only': False}
+
+
+def test_preload_failure_and_reset(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'ultralytics', None)
+    pre = ml_preloader.MLPreloader()
+    yolo, err = pre.get_yolo(5)
+    assert yolo is None and err.startswith('ultralytics')
+    assert pre.state == 'failed'
+    pre.reset()
+    assert pre.state == 'idle' and pre.status()['error'] is None
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""进程级模型缓存测试 (替身模型，不依赖 ultralytics)"""
+import threading
+import time
+
+from app.models import model_cache
+from app.models.model_cache import ModelCache
+from app.utils import ml_preloader
+
+
+class _Param:
+    def __init__(self, n):
+        self.n = n
+
+    def numel(self):
+        return self.n
+
+    def element_size(self):
+        return 4
+
+
+class FakeModel:
+    loads = 0
+
+    def __init__(self, path='m.pt', params=250):
+        FakeModel.loads += 1
+        self.path = path
+        self.names = {0: 'person'}
+        self._params = [_Param(params)]
+        self.active = 0
+        self.max_active = 0
+
+    def parameters(self):
+        return iter(self._params)
+
+    def predict(self, **kw):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        time.sleep(0.005)
+        self.active -= 1
+        return []
+
+
+def test_refcount_lru_and_stats():
+    cache = ModelCache(memory_budget_bytes=2500)
+    a = cache.acquire('a.pt', 'cpu', 'fp32', lambda: FakeModel('a.pt'))
+    a2 = cache.acquire('a.pt', 'cpu', 'fp32', lambda: FakeModel('a.pt'))
+    assert a is a2 and a.refcount == 2 and a.nbytes == 1000 and a.names == {0: 'person'}
+    fp16 = cache.acquire('a.pt', 'cuda', 'fp16', lambda: FakeModel('a.pt'))
+    assert fp16 is not a
+    cache.release(a)
+    cache.release(a2)
+    # a 未被引用但在预算内保留；再加载 b 超出预算时淘汰最久未用的 a
+    b = cache.acquire('b.pt', 'cpu', 'fp32', lambda: FakeModel('b.pt'))
+    st = cache.stats()
+    assert st['hits'] == 1 and st['misses'] == 3 and st['evictions'] == 1
+    assert sorted(m['path'] for m in st['models']) == ['a.pt', 'b.pt'] and st['bytes'] == 2000
+    # 被引用条目不会被淘汰
+    cache.set_budget(0)
+    assert cache.stats()['entries'] == 2
+    cache.release(b)
+    cache.release(fp16)
+    assert cache.stats()['entries'] == 0
+
+
+def test_concurrent_acquire_loads_once_and_predict_serialized():
+    cache = ModelCache()
+    FakeModel.loads = 0
+
+    def slow_loader():
+        time.sleep(0.05)
+        return FakeModel()
+
+    handles = []
+    threads = [threading.Thread(target=lambda: handles.append(cache.acquire('m.pt', 'cpu', 'fp32', slow_loader)))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert FakeModel.loads == 1 and len({id(h) for h in handles}) == 1 and handles[0].refcount == 4
+    threads = [threading.Thread(target=lambda: handles[0].predict(source=None)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert handles[0].model.max_active == 1 and handles[0].predict_count == 4
+
+
+def test_detect_modules_share_model(monkeypatch):
+    from app.pipeline.model.yolov8_detect_module import YoloV8DetectModule
+    monkeypatch.setattr(model_cache, '_cache', ModelCache())
+    monkeypatch.setattr(ml_preloader, 'require_yolo', lambda timeout=None: (FakeModel, None))
+    mods = [YoloV8DetectModule(f'd{i}') for i in range(2)]
+    for m in mods:
+        m.config.update({'device': 'cpu', 'background_warmup': False})
+        m._on_start()
+    assert mods[0]._model is mods[1]._model and mods[1].get_status()['model_refs'] == 2
+    st = model_cache.get_model_cache().stats()
+    assert st['misses'] == 1 and st['hits'] == 1
+    for m in mods:
+        m._on_stop()
+    assert model_cache.get_model_cache().stats()['referenced'] == 0
+
+
+def test_keep_warm_restart_and_invalidation(monkeypatch):
+    from app.pipeline.model.yolov8_detect_module import YoloV8DetectModule
+    cache = ModelCache(memory_budget_bytes=0, keep_warm=True)
+    monkeypatch.setattr(model_cache, '_cache', cache)
+    monkeypatch.setattr(ml_preloader, 'require_yolo', lambda timeout=None: (FakeModel, None))
+    FakeModel.loads = 0
+    m = YoloV8DetectModule('d')
+    m.config.update({'device': 'cpu', 'warmup_iterations': 1})
+    m._on_start()
+    m._warmup_job.wait(2)
+    assert m._model.warmed
+    m._on_stop()
+    # 常驻: 预算为 0 也保留，重启直接复用已预热模型
+    assert cache.stats()['entries'] == 1
+    m._on_start()
+    assert FakeModel.loads == 1 and m._warmup_done and not m._warming
+    # 运行中修改模型路径 (关闭热切换): 停止后旧条目释放
+    assert m.configure(dict(m.config, model_path='other.pt', hot_swap=False))
+    assert cache.stats()['entries'] == 1
+    m._on_stop()
+    assert cache.stats()['entries'] == 0
+    m._on_start()
+    assert cache.stats()['models'][0]['path'] == 'other.pt' and FakeModel.loads == 2
+    m._warmup_job.wait(2)
+    m._on_stop()
+    assert cache.unload_all() == 1 and cache.stats()['entries'] == 0
+
+
+class MergingModel(FakeModel):
+    """模拟 ultralytics: 每次 predict 的参数合并进持久的 predictor.args。"""
+
+    def __init__(self, path='m.pt', params=250):
+        super().__init__(path, params)
+        self.names = {0: 'person', 1: 'car'}
+        self.overrides = {'imgsz': 512}
+        self.args = {'classes': None, 'imgsz': 640}
+        self.calls = []
+
+    def predict(self, source=None, **kw):
+        self.args.update(kw)
+        self.calls.append(dict(self.args))
+        return []
+
+
+def test_shared_model_does_not_leak_predict_args(monkeypatch):
+    import numpy as np
+    from app.pipeline.model.yolov8_detect_module import YoloV8DetectModule
+    monkeypatch.setattr(model_cache, '_cache', ModelCache())
+    monkeypatch.setattr(ml_preloader, 'require_yolo', lambda timeout=None: (MergingModel, None))
+    filtered, plain = YoloV8DetectModule('f'), YoloV8DetectModule('p')
+    filtered.config.update({'enable_target_filter': True, 'target_classes': ['car'], 'confidence': 0.6})
+    for m in (filtered, plain):
+        m.config.update({'device': 'cpu', 'background_warmup': False})
+        m._on_start()
+    model = filtered._model.model
+    assert plain._model.model is model
+    img = np.zeros((64, 64, 3), np.uint8)
+    filtered.process({'image': img})
+    plain.process({'image': img})
+    assert model.calls[0]['classes'] == [1] and model.calls[0]['conf'] == 0.6
+    # 未过滤的节点不继承另一节点的类别过滤/置信度，imgsz 回到权重默认值
+    assert model.calls[1]['classes'] is None and model.calls[1]['conf'] == 0.25
+    assert model.calls[1]['imgsz'] == 512
+    for m in (filtered, plain):
+        m._on_stop()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""模型热切换测试: 后台加载预热期间旧模型继续服务、周期边界切换、失败回滚"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from app.models.model_cache import get_model_cache
+from app.models.model_swap import ModelSwapper
+from app.pipeline.model.model_module import ModelModule
+from app.pipeline.model.yolov8_detect_module import YoloV8DetectModule
+from helpers import identity_onnx
+
+
+def test_swapper_supersede_and_rollback():
+    sw, dropped = ModelSwapper('t'), []
+    release = threading.Event()
+    sw.begin('a', lambda: release.wait(2) and 'model-a', lambda m: None, dropped.append)
+    sw.begin('b', lambda: 'model-b', lambda m: None, dropped.append)  # 取代进行中的任务
+    assert sw.wait(2) and sw.take() == ('swap', 'b', 'model-b')
+    release.set()
+    for _ in range(200):  # 作废任务在自己的线程结束后释放模型
+        if dropped:
+            break
+        time.sleep(0.01)
+    assert dropped == ['model-a'] and sw.take() is None
+
+    def bad_warmup(m):
+        raise RuntimeError('broken')
+    sw.begin('c', lambda: 'model-c', bad_warmup, dropped.append)
+    assert sw.wait(2) and sw.take() == ('rollback', 'c', 'broken')
+    assert dropped == ['model-a', 'model-c'] and sw.stats()['rollbacks'] == 1 and sw.stats()['swaps'] == 1
+
+
+class _Boxes:
+    data = np.array([[1, 2, 30, 40, 0.9, 0]], dtype=np.float32)
+
+
+class _Result:
+    boxes = _Boxes()
+
+
+class _TagModel:
+    def __init__(self, tag, gate=None):
+        self.names = {0: tag}
+        self.gate = gate
+
+    def predict(self, **kw):
+        if self.gate is not None:
+            self.gate.wait(2)
+        return [_Result()]
+
+
+def test_detect_module_hot_swap():
+    cache = get_model_cache()
+    warm = threading.Event()
+    models = {'hs-b.pt': _TagModel('b', warm)}
+    loads = []
+
+    def loader(path, device, precision):
+        loads.append(path)
+        if path not in models:
+            raise FileNotFoundError(path)
+        return cache.acquire(path, device, precision, lambda: models[path])
+
+    cfg = {'model_path': 'hs-a.pt', 'device': 'cpu', 'deferred_first_infer': False, 'annotator': 'none'}
+    m = YoloV8DetectModule()
+    assert m.configure(cfg)
+    m._swap_loader = loader
+    old = cache.acquire('hs-a.pt', 'cpu', 'fp32', lambda: _TagModel('a'))
+    m._model, m._model_key, m._model_source = old, old.key, m._model_source_cfg()
+    m._names, m._model_loaded = dict(old.names), True
+    img = np.zeros((64, 64, 3), np.uint8)
+
+    assert m.configure(dict(cfg, model_path='hs-b.pt'))
+    assert m.get_status()['hot_swap']['state'] in ('loading', 'warming')
+    assert m.process({'image': img})['results'][0]['class_name'] == 'a'  # 预热期间旧模型继续推理
+    assert m.configure(dict(cfg, model_path='hs-b.pt', confidence=0.3))  # 无关配置变更不重启切换
+    warm.set()
+    assert m._swapper.wait(2) and m._swapper.state == 'ready'
+    assert m.configure(dict(cfg, model_path='hs-b.pt', confidence=0.4))
+    assert m._swapper.state == 'ready' and loads == ['hs-b.pt']
+    assert m.process({'image': img})['results'][0]['class_name'] == 'b'  # 下一周期即切换
+    assert old.refcount == 0 and cache.stats()['models'] and all(e['path'] != 'hs-a.pt'
+                                                                 for e in cache.stats()['models'])
+
+    assert m.configure(dict(cfg, model_path='hs-missing.pt'))
+    assert m._swapper.wait(2)
+    out = m.process({'image': img})
+    st = m.get_status()['hot_swap']
+    assert out['results'][0]['class_name'] == 'b' and m.config['model_path'] == 'hs-b.pt'
+    assert m._config_model.model_path == 'hs-b.pt' and not m._swapper.pending  # 经 configure() 回滚
+    assert st['swaps'] == 1 and st['rollbacks'] == 1 and 'hs-missing.pt' in st['error']
+    m._on_stop()
+
+
+def test_model_module_hot_swap(tmp_path):
+    a = identity_onnx(tmp_path / 'a.onnx', [1, 3, 32, 32])
+    b = identity_onnx(tmp_path / 'b.onnx', [1, 3, 32, 32])
+    bad = tmp_path / 'bad.onnx'
+    bad.write_bytes(b'not a model')
+    m = ModelModule()
+    assert m.configure({'model_path': a, 'input_size': [32, 32]}) and m._load_model()
+    first = m.model
+    threads = cv2.getNumThreads()
+    assert m.configure({'model_path': b, 'input_size': [32, 32], 'num_threads': threads + 1})
+    assert m.model is first and m._swapper.wait(2)
+    assert cv2.getNumThreads() == threads   # 后台加载不修改进程级线程数
+    m._apply_hot_swap()
+    assert m.model is not first and m.model.model_path == b and m._loaded_source[0] == b
+    assert cv2.getNumThreads() == threads + 1   # 在周期边界随新模型生效
+    cv2.setNumThreads(threads)
+    assert m.configure({'model_path': str(bad), 'input_size': [32, 32]}) and m._swapper.wait(2)
+    m._apply_hot_swap()
+    assert m.model.model_path == b and m.config['model_path'] == b and m._config_model.model_path == b
+    assert m.config['num_threads'] == threads + 1 and not m._swapper.pending
+    assert m.get_status()['hot_swap']['rollbacks'] == 1
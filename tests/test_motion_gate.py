@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""运动门控测试: 变化分数判定、YOLO 模块缓存复用与独立门控模块"""
+import numpy as np
+
+from app.pipeline.model.motion_gate import MotionGate
+from app.pipeline.model.yolov8_detect_module import YoloV8DetectModule
+from app.pipeline.utility.motion_gate_module import MotionGateModule
+
+
+def _frame(part=None, noise=0, seed=0):
+    img = np.full((480, 640, 3), 90, np.uint8)
+    if noise:
+        img = np.clip(img.astype(np.int16) + np.random.default_rng(seed).integers(-noise, noise + 1, img.shape),
+                      0, 255).astype(np.uint8)
+    if part is not None:
+        x, y = part
+        img[y:y + 120, x:x + 160] = 230
+    return img
+
+
+def test_gate_skips_static_frames():
+    gate = MotionGate(threshold=0.01)
+    assert gate.should_infer(_frame())  # 首帧无参考
+    assert not gate.should_infer(_frame(noise=6, seed=1))  # 传感器噪声
+    assert gate.should_infer(_frame(part=(100, 100)))  # 工件进入
+    assert not gate.should_infer(_frame(part=(100, 100)))
+    assert gate.should_infer(_frame(part=(100, 100))[:240])  # 尺寸变化强制推理
+    gate.record_inference(0.02)
+    st = gate.stats()
+    assert st['frames'] == 5 and st['skipped'] == 2 and st['skip_ratio'] == 0.4
+    assert st['saved_ms'] == 40.0 and 0 < st['saved_ratio'] < 1
+    limited = MotionGate(max_skip=1)
+    assert [limited.should_infer(_frame()) for _ in range(4)] == [True, False, True, False]
+
+
+def test_gate_reference_modes():
+    # 缓慢漂移: inferred 参考累积后触发，previous 参考不触发
+    frames = [np.full((120, 160), v, np.uint8) for v in (100, 110, 120, 130)]
+    inferred, previous = MotionGate(pixel_threshold=25), MotionGate(pixel_threshold=25, reference='previous')
+    assert [inferred.should_infer(f) for f in frames] == [True, False, False, True]
+    assert [previous.should_infer(f) for f in frames] == [True, False, False, False]
+
+
+class _Boxes:
+    data = np.array([[1, 2, 30, 40, 0.9, 0]], dtype=np.float32)
+
+
+class _Result:
+    boxes = _Boxes()
+
+
+class _Model:
+    names = {0: 'part'}
+    calls = 0
+
+    def predict(self, **kw):
+        _Model.calls += 1
+        return [_Result()]
+
+
+def test_detect_module_reuses_cached_results():
+    m = YoloV8DetectModule()
+    assert m.configure({'motion_gate': True, 'deferred_first_infer': False, 'annotator': 'none'})
+    assert not m.configure({'motion_gate': True, 'gate_reference': 'average'})
+    m._model, m._names, m._model_loaded = _Model(), dict(_Model.names), True
+    before = _Model.calls
+    first = m.process({'image': _frame(part=(50, 50))})
+    cached = m.process({'image': _frame(part=(50, 50))})
+    assert first['status'] == 'ok:1' and cached['status'] == 'cached:1' and _Model.calls == before + 1
+    assert cached['results'] == first['results']
+    m.process({'image': _frame(part=(50, 50)), 'targets': 'part'})  # 动态 targets 变化强制推理
+    m.process({'image': _frame(part=(400, 300))})
+    assert _Model.calls == before + 3
+    st = m.get_status()['motion_gate']
+    assert st['enabled'] and st['frames'] == 4 and st['skipped'] == 1
+
+
+def test_motion_gate_module_blocks_downstream():
+    gate = MotionGateModule()
+    assert gate.configure({'block_downstream': True})
+    out = gate.process({'image': _frame()})
+    assert out['changed'] and out['score'] is None and not gate.request_gate_block
+    out = gate.process({'image': _frame()})
+    assert not out['changed'] and out['score'] == 0.0 and gate.request_gate_block
+    assert gate.get_status()['motion_gate']['skipped'] == 1
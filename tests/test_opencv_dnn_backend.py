@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""OpenCV DNN 后端测试: YOLO 解码 / NMS / 坐标映射，cv2.dnn 加载 ONNX，ModelModule 后处理"""
+import numpy as np
+
+from app.models.opencv_dnn_model import OpenCVDNNModel
+from app.models.yolo_postprocess import batched_nms, decode_yolo, nms, scale_boxes
+from app.pipeline.model.model_module import ModelModule
+from helpers import FakeBackend, identity_onnx, v8_output
+
+
+def test_decode_v8_and_v5_layouts():
+    out = v8_output([[50, 50, 20, 10, 0.9, 0.1], [10, 10, 4, 4, 0.1, 0.2], [80, 80, 10, 10, 0.2, 0.7]])
+    xyxy, scores, cls = decode_yolo(out, 0.5, num_classes=2)
+    assert xyxy.tolist() == [[40, 45, 60, 55], [75, 75, 85, 85]]
+    assert np.allclose(scores, [0.9, 0.7]) and cls.tolist() == [0, 1]
+    v5 = np.array([[[50, 50, 20, 10, 0.5, 0.9, 0.1]]], dtype=np.float32)  # objectness * cls
+    xyxy, scores, cls = decode_yolo(v5, 0.3, num_classes=2)
+    assert np.allclose(scores, [0.45]) and cls.tolist() == [0]
+
+
+def test_nms_and_batched_nms():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60], [0, 0, 10, 10]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7, 0.6], dtype=np.float32)
+    assert nms(boxes, scores, 0.5).tolist() == [0, 2]
+    assert nms(boxes, scores, 0.5, max_det=1).tolist() == [0]
+    keep = batched_nms(boxes, scores, np.array([0, 0, 0, 1]), 0.5)
+    assert sorted(keep.tolist()) == [0, 2, 3]
+
+
+def test_scale_boxes_letterbox():
+    # 200x100 原图 letterbox 到 100x100: scale 0.5, pad_y 25
+    boxes = np.array([[10, 30, 60, 70]], dtype=np.float32)
+    out = scale_boxes(boxes, 0.5, 0.5, 0, 25, (100, 200))
+    assert out.tolist() == [[20, 10, 120, 90]]
+
+
+def test_opencv_dnn_model_load_and_infer(tmp_path):
+    path = identity_onnx(tmp_path / 'id.onnx', [1, 6, 5])
+    model = OpenCVDNNModel(path, {'num_threads': 0})
+    assert not model.load(str(tmp_path / 'missing.onnx'))
+    assert model.load(path) and model.is_loaded
+    x = np.arange(30, dtype=np.float32).reshape(1, 6, 5)
+    outs = model.inference(x)
+    assert len(outs) == 1 and np.array_equal(outs[0].reshape(x.shape), x)
+    assert model.inference_count == 1 and model.get_model_info()['backend'] == 'opencv_dnn'
+
+
+def test_model_module_postprocess_maps_boxes_to_original():
+    m = ModelModule()
+    assert m.configure({'input_size': [100, 100], 'class_names': ['a', 'b'], 'confidence_threshold': 0.5,
+                        'preprocessing': {'normalize': True, 'mean': [0, 0, 0], 'std': [1, 1, 1],
+                                          'letterbox': True, 'bgr2rgb': True},
+                        'postprocessing': {'filter_classes': [], 'min_area': 0, 'max_area': -1,
+                                           'aspect_ratio_range': [0.1, 10.0]}})
+    assert not m.configure({'backend': 'tensorrt'})
+    # 网络坐标: 两个重叠的 a 框 + 一个 b 框
+    out = v8_output([[35, 50, 50, 40, 0.9, 0.0], [36, 50, 50, 40, 0.8, 0.0], [80, 50, 10, 10, 0.1, 0.6]])
+    m.model, m.model_loaded = FakeBackend(out), True
+    img = np.zeros((100, 200, 3), np.uint8)
+    res = m.process({'image': img, 'roi': None})
+    assert m.model.seen.shape == (1, 3, 100, 100) and np.isclose(m.model.seen.max(), 114 / 255.0)
+    assert res['count'] == 2 and [d['class_name'] for d in res['detections']] == ['a', 'b']
+    assert np.allclose(res['detections'][0]['box'], [20, 10, 120, 90])
+    # ROI 偏移与类别过滤
+    m.config['postprocessing'] = dict(m.config['postprocessing'], filter_classes=['b'])
+    res = m.process({'image': np.zeros((200, 300, 3), np.uint8), 'roi': {'x': 50, 'y': 50, 'width': 200, 'height': 100}})
+    assert res['count'] == 1 and np.allclose(res['detections'][0]['box'], [200, 90, 220, 110])
+    assert m.get_status()['model_info'] == {'backend': 'fake'}
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""按需输出测试: 执行器告知模块有消费者的输出端口，内置模块跳过无人使用端口的计算"""
+import numpy as np
+
+from app.pipeline.pipeline_executor import PipelineExecutor
+from app.pipeline.custom.image_display_module import ImageDisplayModule
+from app.pipeline.camera.camera_module import CameraModule
+from app.pipeline.model.yolov8_detect_module import YoloV8DetectModule
+from helpers import CustomModule
+
+
+class Source(CustomModule):
+    def _define_ports(self):
+        self.register_output_port('image', 'frame', 'image')
+        self.register_output_port('meta', 'meta', 'meta')
+
+    def process(self, inputs):
+        return {'image': np.zeros((4, 4, 3), np.uint8), 'meta': {}}
+
+
+def test_executor_publishes_consumed_outputs():
+    src, disp = Source('src'), ImageDisplayModule()
+    assert src.is_output_consumed('meta')  # 独立模块: 全部端口
+    ex = PipelineExecutor()
+    ex.add_module(src, 'src')
+    ex.add_module(disp, 'disp')
+    assert not src.is_output_consumed('image')
+    ex.connect_modules('src', 'image', 'disp', 'image')
+    assert src.is_output_consumed('image') and not src.is_output_consumed('meta')
+    assert ex.get_output_demand() == {'src': ['image'], 'disp': []}
+    out = ex.run_once({})
+    assert out is not None and disp.outputs['meta'] is None and disp.outputs['image'] is not None
+    ex.disconnect_modules('src', 'image', 'disp', 'image')
+    assert not src.is_output_consumed('image')
+    ex.config['demand_driven_outputs'] = False
+    ex.run_once({})
+    assert disp.is_output_consumed('meta')
+    ex.remove_module('src')
+    assert src.is_output_consumed('image')
+
+
+class _Boxes:
+    data = np.array([[1, 2, 30, 40, 0.9, 0]], dtype=np.float32)
+
+
+class _Result:
+    boxes = _Boxes()
+    plots = 0
+
+    def plot(self, **kw):
+        _Result.plots += 1
+        return np.zeros((64, 64, 3), np.uint8)
+
+
+class _Model:
+    names = {0: 'person'}
+
+    def predict(self, **kw):
+        return [_Result()]
+
+
+def test_yolo_skips_unconsumed_image_and_raw():
+    m = YoloV8DetectModule()
+    m.configure({'annotator': 'ultralytics'})
+    m._model, m._names, m._model_loaded = _Model(), dict(_Model.names), True
+    img = np.zeros((64, 64, 3), np.uint8)
+    m.set_consumed_outputs(['results'])
+    out = m.process({'image': img})
+    assert out['status'] == 'ok:1' and out['image'] is None and out['image_raw'] is None
+    assert out['results'][0]['class_name'] == 'person' and _Result.plots == 0
+    m.set_consumed_outputs(['image'])
+    out = m.process({'image': img})
+    assert out['image'] is not None and out['results'] is None and _Result.plots == 1
+
+
+def test_camera_converts_only_consumed_frames():
+    cam = CameraModule()
+    cam.config['format'] = 'GRAY'
+    frame = np.zeros((8, 8, 3), np.uint8)
+    assert cam._output_frame(frame).shape == (8, 8)
+    assert cam._output_frame(frame) is cam._output_frame(frame)  # 同一帧只转换一次
+    cam.set_consumed_outputs(['meta'])
+    assert cam._output_frame(frame) is None
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""预处理引擎测试: 与逐步实现结果一致、缓冲区复用、灰度/ROI、ModelModule 批量推理与阶段耗时"""
+import cv2
+import numpy as np
+
+from app.models.preprocess import PreprocessEngine
+from app.pipeline.model.model_module import ModelModule
+from helpers import FakeBackend, v8_output
+
+PREP = {'normalize': True, 'mean': [0.485, 0.456, 0.406], 'std': [0.229, 0.224, 0.225],
+        'letterbox': True, 'bgr2rgb': True}
+
+
+def _reference(image, size, prep):
+    """逐步实现: 通道交换 -> letterbox/缩放 -> 归一化 -> HWC->CHW。"""
+    if image.ndim == 2:
+        image = np.repeat(image[:, :, None], 3, axis=2)
+    if prep['bgr2rgb']:
+        image = image[:, :, ::-1]
+    tw, th = size
+    h, w = image.shape[:2]
+    if prep['letterbox']:
+        s = min(tw / w, th / h)
+        nw, nh = int(w * s), int(h * s)
+        canvas = np.full((th, tw, 3), 114, np.uint8)
+        top, left = (th - nh) // 2, (tw - nw) // 2
+        canvas[top:top + nh, left:left + nw] = cv2.resize(np.ascontiguousarray(image), (nw, nh))
+        image = canvas
+    else:
+        image = cv2.resize(np.ascontiguousarray(image), (tw, th))
+    image = image.astype(np.float64)
+    if prep['normalize']:
+        image = (image / 255.0 - np.array(prep['mean'])) / np.array(prep['std'])
+    return image.transpose(2, 0, 1)
+
+
+def test_matches_reference_and_reuses_buffers():
+    rng = np.random.default_rng(0)
+    eng = PreprocessEngine()
+    for shape in ((120, 200, 3), (90, 60), (64, 64, 3)):
+        for letterbox in (True, False):
+            for bgr2rgb in (True, False):
+                prep = dict(PREP, letterbox=letterbox, bgr2rgb=bgr2rgb)
+                img = rng.integers(0, 255, shape, dtype=np.uint8)
+                eng.configure([96, 64], prep)
+                blob, transforms, timings = eng.run([img])
+                assert blob.dtype == np.float32 and blob.shape == (1, 3, 64, 96)
+                assert np.allclose(blob[0], _reference(img, (96, 64), prep), atol=1e-4)
+    assert set(timings) == {'resize_ms', 'normalize_ms', 'preprocess_ms'}
+    # 同尺寸输入复用同一 blob 与 resize 缓冲区，不再分配
+    eng.configure([96, 64], PREP)
+    img = rng.integers(0, 255, (120, 200, 3), dtype=np.uint8)
+    first, _, _ = eng.run([img])
+    allocations = eng.allocations
+    again, transforms, _ = eng.run([img[::-1].copy()])
+    assert again is first and eng.allocations == allocations
+    assert transforms[0]['pad_y'] == (64 - 57) // 2 and np.isclose(transforms[0]['scale_x'], 96 / 200)
+
+
+def test_batch_roi_and_pad_refresh():
+    eng = PreprocessEngine()
+    eng.configure([32, 32], dict(PREP, normalize=False))
+    wide, tall = np.full((16, 32, 3), 7, np.uint8), np.full((32, 16, 3), 9, np.uint8)
+    blob, transforms, _ = eng.run([wide, tall])
+    assert blob.shape == (2, 3, 32, 32)
+    assert blob[0, :, 0, 0].tolist() == [114] * 3 and blob[0, :, 16, 16].tolist() == [7] * 3
+    assert blob[1, :, 0, 0].tolist() == [114] * 3 and blob[1, :, 16, 16].tolist() == [9] * 3
+    # 几何变化 (两张图对调) 时边框重新填充
+    blob, _, _ = eng.run([tall, wide])
+    assert blob[0, 0, 16, 0] == 114 and blob[1, 0, 0, 16] == 114
+    big = np.zeros((100, 100, 3), np.uint8)
+    big[10:42, 20:52] = 200
+    blob, transforms, _ = eng.run([big], [{'x': 20, 'y': 10, 'width': 32, 'height': 32}])
+    assert np.all(blob == 200) and transforms[0]['roi_x'] == 20 and transforms[0]['roi_y'] == 10
+
+
+class _BatchBackend(FakeBackend):
+    def inference(self, blob):
+        self.seen = blob.copy()
+        return [np.repeat(self.output, len(blob), axis=0)]
+
+
+def test_model_module_batch_and_stage_timing():
+    m = ModelModule()
+    assert m.configure({'input_size': [100, 100], 'class_names': ['a', 'b'], 'batch_size': 2,
+                        'preprocessing': dict(PREP, mean=[0, 0, 0], std=[1, 1, 1]),
+                        'postprocessing': {'filter_classes': [], 'min_area': 0, 'max_area': -1,
+                                           'aspect_ratio_range': [0.1, 10.0]}})
+    m.model, m.model_loaded = _BatchBackend(v8_output([[35, 50, 50, 40, 0.9, 0.0]])), True
+    imgs = [np.zeros((100, 200, 3), np.uint8), np.zeros((200, 100, 3), np.uint8), np.zeros((100, 100, 3), np.uint8)]
+    res = m.process({'image': imgs})
+    assert res['count'] == [1, 1, 1] and len(res['detections']) == 3
+    assert np.allclose(res['detections'][0][0]['box'], [20, 10, 120, 90])   # letterbox pad_y=25
+    assert np.allclose(res['detections'][1][0]['box'], [0, 60, 70, 140])    # pad_x=25，裁剪到图像内
+    assert m.model.seen.shape == (1, 3, 100, 100)   # 3 张图按 batch_size=2 分为 2 + 1
+    info = res['inference_info']
+    assert info['batch'] == 3 and set(info['stages']) == {'resize_ms', 'normalize_ms', 'preprocess_ms',
+                                                          'inference_ms', 'postprocess_ms'}
+    assert all(v >= 0 for v in info['stages'].values())
+    single = m.process({'image': imgs[0]})
+    assert single['count'] == 1 and single['inference_info']['batch'] == 1
+    assert set(m.get_inference_statistics()['stage_average_ms']) == set(info['stages'])
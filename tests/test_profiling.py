@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""运行期剖析钩子测试: 单节点 cProfile 与采样剖析器"""
+import os
+import time
+import pstats
+import pytest
+
+from app.pipeline.pipeline_executor import PipelineExecutor
+from app.pipeline.profiling import NodeProfiler, SamplingProfiler
+from helpers import ValueModule
+
+
+class BusyModule(ValueModule):
+    def process(self, inputs):
+        return {'val': sum(i * i for i in range(2000))}
+
+
+def test_node_profiling_dumps_pstats(tmp_path):
+    ex = PipelineExecutor()
+    ex.add_module(BusyModule('busy'), 'b1')
+    assert ex.enable_node_profiling('b1', cycles=3, output_dir=str(tmp_path))
+    assert not ex.enable_node_profiling('missing')
+    for _ in range(4):
+        assert ex.run_once({}) is not None
+    st = ex.get_profiling_status()
+    assert 'b1' not in st['active']
+    done = st['finished']['b1']
+    assert done['done'] and done['completed_cycles'] == 3
+    assert os.path.isfile(done['output_path'])
+    stats = pstats.Stats(done['output_path'])
+    assert any(fn[2] == 'process' for fn in stats.stats)
+
+
+def test_node_profiler_module_error_runs_once(tmp_path):
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ValueError('bad input')
+
+    prof = NodeProfiler('n', cycles=5, output_dir=str(tmp_path))
+    with pytest.raises(ValueError, match='bad input'):
+        prof.runcall(failing)
+    assert calls == [1] and prof.skipped_cycles == 0 and prof.completed_cycles == 1
+    assert prof.runcall(lambda: 7) == 7
+
+
+def test_sampling_profiler_collapsed(tmp_path):
+    sp = SamplingProfiler(interval_s=0.002)
+    assert sp.start()
+    t_end = time.time() + 0.2
+    while time.time() < t_end:
+        sum(i for i in range(1000))
+    assert sp.stop()
+    text = sp.collapsed()
+    assert sp.status()['samples'] > 0
+    line = text.splitlines()[0]
+    stack, count = line.rsplit(' ', 1)
+    assert int(count) > 0 and ';' in stack
+    path = sp.dump_collapsed(str(tmp_path / 'out.collapsed'))
+    assert path and os.path.getsize(path) > 0
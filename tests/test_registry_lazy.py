@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""延迟模块注册表与元数据清单测试"""
+import json
+import os
+import subprocess
+import sys
+
+from app.pipeline import module_registry as reg
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_broken_lazy_entry_hidden():
+    reg.register_lazy_module("测试坏模块", "app.pipeline.no_such_module:Missing")
+    assert "测试坏模块" in reg.list_registered_modules()
+    assert reg.get_module_class("测试坏模块") is None
+    assert "测试坏模块" not in reg.list_registered_modules()
+
+
+def test_metadata_matches_class():
+    meta = reg.get_module_metadata("逻辑")
+    cls = reg.get_module_class("逻辑")
+    inst = cls()
+    assert meta['available'] and meta['category'] == '逻辑'
+    assert meta['outputs'] == list(inst.output_ports.keys())
+    assert meta['capabilities']['throughput_hint'] == inst.capabilities.throughput_hint
+
+
+def test_warm_manifest_avoids_imports(tmp_path):
+    manifest = tmp_path / 'manifest.json'
+    env = dict(os.environ, FAHAI_MODULE_MANIFEST=str(manifest), FAHAI_EAGER_REGISTRY='0')
+    build = ("import sys; sys.path.insert(0, %r)\n"
+             "from app.pipeline import module_registry as r\n"
+             "r.build_manifest()\n") % REPO
+    subprocess.run([sys.executable, '-c', build], env=env, check=True, cwd=str(tmp_path))
+    assert json.loads(manifest.read_text(encoding='utf-8'))['modules']['相机']['category'] == '输入'
+    probe = ("import sys, json; sys.path.insert(0, %r)\n"
+             "from app.pipeline import module_registry as r\n"
+             "metas = {n: r.get_module_metadata(n) for n in r.list_registered_modules()}\n"
+             "print(json.dumps({'cv2': 'cv2' in sys.modules, 'loaded': [n for n in metas if r.is_module_loaded(n)],"
+             " 'cam_outputs': metas['相机']['outputs']}))\n") % REPO
+    out = subprocess.run([sys.executable, '-c', probe], env=env, check=True, cwd=str(tmp_path),
+                         capture_output=True, text=True)
+    res = json.loads(out.stdout.strip().splitlines()[-1])
+    assert res['cv2'] is False and res['loaded'] == []
+    assert res['cam_outputs'] == ['image', 'meta']
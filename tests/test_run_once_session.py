@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""单次运行会话测试: 会话内 run_once 不逐次启动/停止模块"""
+from app.pipeline.pipeline_executor import PipelineExecutor, PipelineStatus
+from helpers import CustomModule
+
+
+class Counted(CustomModule):
+    def _define_ports(self):
+        self.register_input_port('in', 'int', 'value', required=False)
+        self.register_output_port('out', 'int', 'value')
+
+    def _on_start(self):
+        self.starts = getattr(self, 'starts', 0) + 1
+
+    def _on_stop(self):
+        self.stops = getattr(self, 'stops', 0) + 1
+
+    def process(self, inputs):
+        return {'out': (inputs.get('in') or 0) + 1}
+
+
+def _build():
+    ex = PipelineExecutor()
+    a, b = Counted('a'), Counted('b')
+    ex.add_module(a, 'a')
+    ex.add_module(b, 'b')
+    ex.connect_modules('a', 'out', 'b', 'in')
+    return ex, a, b
+
+
+def test_session_keeps_modules_started():
+    ex, a, b = _build()
+    with ex.session():
+        for _ in range(5):
+            assert ex.run_once({}) is not None
+            assert ex.status == PipelineStatus.IDLE
+        st = ex.get_session_stats()
+        assert a.starts == 1 and getattr(a, 'stops', 0) == 0
+        assert st['runs'] == 5 and st['failures'] == 0
+        assert 0 < st['min_latency'] <= st['p50_latency'] <= st['max_latency']
+        assert len(st['recent_latencies']) == 5
+    assert a.stops == 1 and b.stops == 1 and not ex.is_session_open()
+    # 无会话时保持逐次启动/停止
+    ex.run_once({})
+    assert a.starts == 2 and a.stops == 2
+
+
+def test_session_replans_after_graph_change():
+    ex, a, b = _build()
+    assert ex.open_session()
+    ex.run_once({})
+    c = Counted('c')
+    ex.add_module(c, 'c')
+    ex.connect_modules('b', 'out', 'c', 'in')
+    ex.run_once({})
+    assert c.starts == 1 and a.starts == 1
+    ex.remove_module('c')
+    assert c.stops == 1
+    stats = ex.close_session()
+    assert stats['runs'] == 2 and a.stops == 1
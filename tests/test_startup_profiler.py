@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""启动耗时记录测试"""
+import json
+import sys
+
+from app.utils import startup_profiler as sp
+
+
+def test_disabled_is_noop(monkeypatch):
+    monkeypatch.delenv(sp.ENV_VAR, raising=False)
+    argv = ['main.py']
+    assert sp.get_profiler() is None and sp.enable_from_env(argv) is None
+    assert sp.startup_phase('x') is sp.startup_phase('y')
+    assert not any(isinstance(f, sp._ImportRecorder) for f in sys.meta_path)
+
+
+def test_phases_and_imports_report(tmp_path, monkeypatch):
+    pkg = tmp_path / 'sp_probe_pkg'
+    pkg.mkdir()
+    (pkg / '__init__.py').write_text('from . import child\n', encoding='utf-8')
+    (pkg / 'child.py').write_text('import time\ntime.sleep(0.02)\n', encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    prof = sp.StartupProfiler(str(tmp_path / 'out'))
+    try:
+        with prof.phase('import_probe'):
+            import sp_probe_pkg  # noqa: F401
+        prof.begin('async_phase')
+        path = prof.finish()
+        prof.end('async_phase')
+    finally:
+        prof.stop()
+    assert sp_probe_pkg.__spec__.loader.__class__.__name__ != '_TimedLoader'
+    with open(path[:-4] + '.json', encoding='utf-8') as f:
+        data = json.load(f)
+    names = [p['name'] for p in data['phases']]
+    assert names[0] == 'import_probe' and 'startup_complete' in names and 'async_phase' in names
+    mods = {r['module']: r for r in data['imports']['top_cumulative']}
+    assert mods['sp_probe_pkg']['cumulative_s'] >= mods['sp_probe_pkg.child']['cumulative_s'] >= 0.02
+    assert mods['sp_probe_pkg']['self_s'] < 0.02 and mods['sp_probe_pkg.child']['depth'] == 1
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""预热调度器测试: 并发上限、按优先级派发、进度/取消、流程图层级优先级"""
+import threading
+import time
+
+from app.models import warmup_scheduler
+from app.models.warmup_scheduler import WarmupScheduler, get_warmup_scheduler, graph_depths
+from app.pipeline.pipeline_executor import PipelineExecutor
+from helpers import AddOne, Source
+
+
+def test_concurrency_limit_and_priority_order():
+    sched = WarmupScheduler(max_concurrent=1)
+    order, active, peak = [], [0], [0]
+    lock = threading.Lock()
+
+    def make(tag):
+        def _fn(job):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                order.append(tag)
+            for _ in range(job.total):
+                time.sleep(0.005)
+                job.advance()
+            with lock:
+                active[0] -= 1
+        return _fn
+
+    with sched.batch():
+        jobs = [sched.submit(tag, make(tag), prio, 2) for tag, prio in (('c', 2), ('a', 0), ('b', 1), ('a2', 0))]
+        assert all(j.state == 'queued' for j in jobs)
+    assert sched.wait(timeout=2) and sched.idle()
+    assert order == ['a', 'a2', 'b', 'c'] and peak[0] == 1
+    prog = sched.progress()
+    assert prog['done'] == 4 and prog['fraction'] == 1.0 and prog['total'] == 4
+
+
+def test_progress_cancel_and_failure():
+    sched = WarmupScheduler(max_concurrent=1)
+    gate = threading.Event()
+
+    def blocked(job):
+        job.advance()
+        gate.wait(2)
+        job.advance()
+
+    first = sched.submit('first', blocked, 0, 2)
+    queued = sched.submit('queued', lambda job: None, 1, 2)
+    bad = sched.submit('bad', lambda job: (_ for _ in ()).throw(RuntimeError('boom')), 2, 1)
+    for _ in range(200):
+        if first.completed:
+            break
+        time.sleep(0.01)
+    prog = sched.progress()
+    assert prog['running'] == 1 and prog['queued'] == 2 and prog['fraction'] == 0.2
+    assert sched.cancel(queued) and queued.state == 'cancelled' and not sched.cancel(queued)
+    assert not sched.wait([first], timeout=0.05)
+    gate.set()
+    assert sched.wait(timeout=2)
+    assert first.state == 'done' and bad.state == 'failed' and bad.error == 'boom'
+
+
+def test_graph_depths():
+    edges = [('cam', 'det'), ('det', 'cls'), ('cam', 'cls'), ('cls', 'save'), ('save', 'cls')]
+    depths = graph_depths(['cam', 'det', 'cls', 'save', 'other'], edges)
+    assert depths['cam'] == 0 and depths['other'] == 0 and depths['det'] == 1
+    assert depths['cls'] == 2 and depths['save'] == 3
+
+
+class Warm(AddOne):
+    """启动时提交预热任务的替身模型模块。"""
+
+    def __init__(self, name, log):
+        super().__init__(name)
+        self.warmup_priority = 0
+        self.log = log
+
+    def _on_start(self):
+        get_warmup_scheduler().submit(self.name, lambda job: self.log.append(self.name), self.warmup_priority)
+        return True
+
+
+def test_executor_warms_in_graph_order(monkeypatch):
+    monkeypatch.setattr(warmup_scheduler, '_scheduler', WarmupScheduler(max_concurrent=1))
+    log = []
+    ex = PipelineExecutor()
+    ex.config['await_warmup'] = True
+    # 添加顺序与流程顺序相反: 仍按层级预热
+    ex.add_module(Warm('late', log), 'late')
+    ex.add_module(Warm('mid', log), 'mid')
+    ex.add_module(Source('src'), 'src')
+    ex.add_module(Warm('early', log), 'early')
+    ex.connect_modules('src', 'out', 'early', 'in')
+    ex.connect_modules('early', 'out', 'mid', 'in')
+    ex.connect_modules('mid', 'out', 'late', 'in')
+    assert ex.assign_warmup_priorities() == {'early': 1, 'mid': 2, 'late': 3}
+    assert ex._start_all_modules('test')
+    assert log == ['early', 'mid', 'late'] and get_warmup_scheduler().idle()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""cv2 轻量标注器测试"""
+import numpy as np
+
+from app.pipeline.model.yolo_annotator import FastAnnotator, class_color
+from app.pipeline.model.yolov8_detect_module import YoloV8DetectModule
+
+NAMES = {0: 'person', 1: 'car'}
+XYXY = np.array([[10, 40, 60, 90], [100, 100, 150, 180], [20, 120, 70, 170]], dtype=np.float32)
+CONF = np.array([0.9, 0.3, 0.6], dtype=np.float32)
+CLS = np.array([0, 1, 1], dtype=np.int32)
+
+
+def test_annotate_reuses_buffers_and_keeps_input():
+    img = np.zeros((200, 320, 3), dtype=np.uint8)
+    ann = FastAnnotator(buffers=2)
+    outs = [ann.annotate(img, XYXY, CONF, CLS, NAMES) for _ in range(4)]
+    assert not img.any()
+    assert outs[0] is not outs[1] and outs[0] is outs[2] and outs[1] is outs[3]
+    assert tuple(int(c) for c in outs[0][40, 30]) == class_color(0)  # 上边框
+    assert ann.stats()["frames"] == 4 and ann.stats()["buffers"] == 2
+
+
+def test_max_draw_preview_and_masks():
+    img = np.zeros((200, 320, 3), dtype=np.uint8)
+    ann = FastAnnotator()
+    out = ann.annotate(img, XYXY, CONF, CLS, NAMES, show_labels=False, show_conf=False, max_draw=2)
+    assert ann.last_drawn == 2
+    assert not out[140, 100:150].any()  # 置信度最低的框 (0.3) 未绘制
+    out = ann.annotate(img, XYXY, CONF, CLS, NAMES, preview_max_side=160)
+    assert out.shape == (100, 160, 3)
+    poly = [np.array([[20, 50], [50, 50], [50, 80], [20, 80]], dtype=np.float32), None, None]
+    out = ann.annotate(img, XYXY, CONF, CLS, NAMES, polygons=poly, show_labels=False, show_conf=False)
+    assert out[65, 35].any() and not out[65, 90].any()
+
+
+class _Boxes:
+    def __init__(self):
+        self.data = np.concatenate([XYXY, CONF[:, None], CLS[:, None].astype(np.float32)], axis=1)
+
+
+class _Result:
+    boxes = _Boxes()
+    plot_calls = 0
+
+    def plot(self, **kw):
+        _Result.plot_calls += 1
+        return np.zeros((200, 320, 3), dtype=np.uint8)
+
+
+class _Model:
+    names = NAMES
+
+    def predict(self, **kw):
+        return [_Result()]
+
+
+def test_detect_module_annotator_modes():
+    img = np.zeros((200, 320, 3), dtype=np.uint8)
+    for mode in ("fast", "ultralytics", "none"):
+        m = YoloV8DetectModule()
+        m.configure({"annotator": mode, "deferred_first_infer": False})
+        m._model, m._names, m._model_loaded = _Model(), dict(NAMES), True
+        before = _Result.plot_calls
+        out = m.process({"image": img})
+        assert out["status"] == "ok:3"
+        if mode == "none":
+            assert out["image"] is img
+        elif mode == "fast":
+            assert out["image"] is not img and out["image"].any() and _Result.plot_calls == before
+        else:
+            assert _Result.plot_calls == before + 1
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""级联分类测试: 向量化裁剪、按批分类与结果格式保持"""
+import cv2
+import numpy as np
+
+from app.pipeline.model.yolo_crops import attach_classification, crop_batch, crop_regions, detection_boxes
+from app.pipeline.model.yolo_utils import format_detections
+from app.pipeline.model.yolov8_cascade_module import YoloV8CascadeClassifyModule
+
+
+def test_crop_batch_matches_resize():
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    regions = np.array([[10, 20, 74, 84], [0, 0, 160, 120]], np.float32)
+    crops = crop_batch(img, regions, 32)
+    assert crops.shape == (2, 32, 32, 3) and crops.dtype == np.uint8
+    ref = cv2.resize(img[20:84, 10:74], (32, 32), interpolation=cv2.INTER_LINEAR)
+    assert np.abs(crops[0].astype(int) - ref).max() <= 1
+    same = crop_batch(img, np.array([[40, 30, 72, 62]], np.float32), 32)
+    assert np.array_equal(same[0], img[30:62, 40:72])
+    assert crop_batch(img[:, :, 0], regions, 16).shape == (2, 16, 16)
+    sq = crop_regions(np.array([[0, 0, 40, 20]], np.float32), pad=0.25, mode="square")
+    assert np.allclose(sq, [[-10, -20, 50, 40]])
+
+
+def test_attach_keeps_format():
+    xyxy = np.array([[0, 0, 10, 10], [5, 5, 30, 30]], np.float32)
+    conf, cls = np.array([0.9, 0.8], np.float32), np.array([0, 0], np.int32)
+    names = {0: "ok", 1: "scratch"}
+    for fmt in ("dicts", "structured", "columnar"):
+        det = format_detections(xyxy, conf, cls, {0: "part"}, fmt)
+        assert np.allclose(detection_boxes(det), xyxy)
+        out = attach_classification(det, np.array([1]), np.array([1], np.int32), np.array([0.7], np.float32), names)
+        if fmt == "dicts":
+            assert out[0]["cls_id"] is None and out[1]["cls_name"] == "scratch" and out[1]["class_name"] == "part"
+            assert "cls_id" not in det[1]
+        elif fmt == "structured":
+            assert out["cls_id"].tolist() == [-1, 1] and np.allclose(out["box"], xyxy)
+        else:
+            assert out["cls_names"] == [None, "scratch"] and np.isclose(out["cls_confidence"][1], 0.7)
+
+
+class _Probs:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Result:
+    def __init__(self, data):
+        self.probs = _Probs(data)
+
+
+class _BrightnessModel:
+    """亮裁剪判为类别 1，暗裁剪判为类别 0；记录每次调用的批大小"""
+    names = {0: "dark", 1: "bright"}
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, source=None, **kw):
+        crops = list(source)
+        self.batches.append(len(crops))
+        out = []
+        for c in crops:
+            p = float(np.asarray(c).mean()) / 255.0
+            out.append(_Result(np.array([1 - p, p], np.float32)))
+        return out
+
+
+def test_cascade_module_batches_crops():
+    m = YoloV8CascadeClassifyModule()
+    assert m.configure({"batch_size": 2, "crop_size": 64, "deferred_first_infer": False})
+    assert not m.configure({"crop_size": 100})
+    model = _BrightnessModel()
+    m._model, m._names, m._model_loaded = model, dict(model.names), True
+    img = np.zeros((200, 300, 3), np.uint8)
+    img[20:80, 20:80] = 250
+    img[120:180, 200:260] = 250
+    xyxy = np.array([[20, 20, 80, 80], [100, 100, 160, 160], [200, 120, 260, 180], [5, 5, 7, 7]], np.float32)
+    det = format_detections(xyxy, np.full(4, 0.9, np.float32), np.zeros(4, np.int32), {0: "part"})
+    out = m.process({"image": img, "detections": det})
+    assert out["status"] == "ok:3" and model.batches == [2, 1]
+    assert [r["cls_name"] for r in out["results"]] == ["bright", "dark", "bright", None]
+    st = m.get_status()["cascade"]
+    assert st["detections"] == 4 and st["crops"] == 3 and st["batches"] == 2
+    empty = m.process({"image": img, "detections": []})
+    assert empty["status"] == "ok:0" and empty["results"] == []
+    assert m.process({"image": img, "detections": det, "control": "stop"})["status"] == "skipped"
+
+
+def test_classify_on_shared_weights_keeps_own_imgsz():
+    from app.models.model_cache import ModelHandle
+    from app.pipeline.model.yolov8_classify_module import YoloV8ClassifyModule
+
+    class _Recording(_BrightnessModel):
+        overrides = {"imgsz": 96}
+
+        def __init__(self):
+            super().__init__()
+            self.imgsz = []
+
+        def predict(self, source=None, **kw):
+            self.imgsz.append(kw.get("imgsz"))
+            return super().predict(source if isinstance(source, list) else [source], **kw)
+
+    model = _Recording()
+    handle = ModelHandle(("m-cls.pt", "cpu", "fp32"), model)
+    cascade, plain = YoloV8CascadeClassifyModule(), YoloV8ClassifyModule()
+    assert cascade.configure({"crop_size": 64, "deferred_first_infer": False})
+    for m in (cascade, plain):
+        m._model, m._names, m._model_loaded = handle, dict(model.names), True
+    img = np.full((100, 100, 3), 200, np.uint8)
+    det = format_detections(np.array([[10, 10, 60, 60]], np.float32), np.array([0.9], np.float32),
+                            np.zeros(1, np.int32), {0: "part"})
+    assert cascade.process({"image": img, "detections": det})["status"] == "ok:1"
+    plain.process({"image": img})
+    # 级联以 crop_size 推理后，普通分类节点仍使用权重默认尺寸
+    assert model.imgsz == [64, 96]
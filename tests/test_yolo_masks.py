@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""分割紧凑掩码测试: 面积/质心、裁剪、RLE、多边形以及分割模块输出"""
+import numpy as np
+
+from app.pipeline.model.yolo_masks import (compact_masks, crop_masks, mask_geometry, polygon_geometry, rle_decode,
+                                           rle_encode)
+from app.pipeline.model.yolov8_segment_module import YoloV8SegmentModule
+
+ORIG = (200, 400)  # 原图 (h,w)；推理掩码 160x320 (gain 0.8, 无填充) 或带上下填充的 192x320
+
+
+def _masks(shape, rects):
+    m = np.zeros((len(rects),) + shape, np.float32)
+    for i, (x1, y1, x2, y2) in enumerate(rects):
+        m[i, y1:y2, x1:x2] = 1
+    return m
+
+
+def test_mask_geometry_maps_to_original():
+    m = _masks((160, 320), [(8, 16, 40, 48), (0, 0, 0, 0)])
+    area, cen = mask_geometry(m, ORIG)
+    assert np.isclose(area[0], 32 * 32 / 0.64) and area[1] == 0
+    assert np.allclose(cen[0], [30, 40]) and np.isnan(cen[1]).all()
+    # letterbox 上下各 16 像素填充
+    padded = _masks((192, 320), [(8, 32, 40, 64)])
+    assert np.allclose(mask_geometry(padded, ORIG)[1][0], [30, 40])
+    pa, pc = polygon_geometry([np.array([[10, 20], [50, 20], [50, 60], [10, 60]], np.float32)])
+    assert np.isclose(pa[0], 1600) and np.allclose(pc[0], [30, 40])
+
+
+def test_crop_and_rle_roundtrip():
+    m = _masks((160, 320), [(8, 16, 40, 48)])
+    boxes, crops = crop_masks(m, np.array([[10, 20, 50, 60]], np.float32), ORIG)
+    assert boxes.tolist() == [[10, 20, 50, 60]] and crops[0].shape == (40, 40) and crops[0].all()
+    mask = np.zeros((5, 4), np.uint8)
+    mask[1:3, 1:3] = 1
+    rle = rle_encode(mask)
+    assert rle['size'] == [5, 4] and rle['counts'][0] == 6 and sum(rle['counts']) == 20
+    assert np.array_equal(rle_decode(rle), mask)
+    assert rle_encode(np.ones((2, 2), np.uint8))['counts'] == [0, 4]
+    poly = [np.array([[10, 20], [50, 20], [50, 60], [10, 60]], np.float32)]
+    _, from_poly = crop_masks(None, np.array([[10, 20, 50, 60]], np.float32), ORIG, poly)
+    assert from_poly[0].shape == (40, 40) and from_poly[0][20, 20] == 1
+    geo = compact_masks('polygon', None, poly, np.array([[10, 20, 50, 60]], np.float32), ORIG)
+    assert len(geo['masks'][0]) == 4 and np.isclose(geo['area'][0], 1600)
+
+
+class _Boxes:
+    data = np.array([[10, 20, 50, 60, 0.9, 0], [200, 100, 260, 180, 0.8, 1]], np.float32)
+
+
+class _Masks:
+    data = _masks((160, 320), [(8, 16, 40, 48), (160, 80, 208, 144)])
+    xy = [np.array([[10, 20], [50, 20], [50, 60], [10, 60]], np.float32),
+          np.array([[200, 100], [260, 100], [260, 180], [200, 180]], np.float32)]
+
+
+class _Result:
+    boxes = _Boxes()
+    masks = _Masks()
+
+
+class _Model:
+    names = {0: 'hole', 1: 'crack'}
+
+    def predict(self, **kw):
+        return [_Result()]
+
+
+def test_segment_module_mask_formats():
+    img = np.zeros(ORIG + (3,), np.uint8)
+    for fmt in ('none', 'crop', 'rle', 'polygon'):
+        m = YoloV8SegmentModule()
+        assert m.configure({'mask_format': fmt, 'mask_stats': True, 'deferred_first_infer': False,
+                            'enable_target_filter': True, 'target_classes': ['crack']})
+        m._model, m._names, m._model_loaded = _Model(), dict(_Model.names), True
+        res = m.process({'image': img})['results']
+        assert len(res) == 1 and res[0]['index'] == 1
+        assert np.isclose(res[0]['area'], 60 * 80) and res[0]['centroid'] == [230.0, 140.0]
+        if fmt == 'none':
+            assert 'mask' not in res[0]
+        elif fmt == 'crop':
+            assert res[0]['mask']['box'] == [200, 100, 260, 180] and res[0]['mask']['mask'].all()
+        elif fmt == 'rle':
+            assert rle_decode(res[0]['mask']).shape == (80, 60)
+        else:
+            assert res[0]['mask'][0] == [200.0, 100.0]
+    m = YoloV8SegmentModule()
+    assert not m.configure({'mask_format': 'png'})
+    assert m.configure({'mask_format': 'rle', 'results_format': 'structured', 'deferred_first_infer': False})
+    m._model, m._names, m._model_loaded = _Model(), dict(_Model.names), True
+    res = m.process({'image': img})['results']
+    assert np.isclose(res['area'][0], 1600) and np.allclose(res['centroid'][1], [230, 140])
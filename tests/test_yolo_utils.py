@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""YOLO 结果提取工具测试 (替身 Boxes，不依赖 torch/ultralytics)"""
+import numpy as np
+
+from app.pipeline.model.yolo_utils import (
+    extract_boxes, class_filter_mask, format_detections, format_segments, subset_results, top_k,
+    format_classification,
+)
+
+NAMES = {0: 'person', 1: 'car', 2: 'dog'}
+
+
+class FakeBoxes:
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32)
+
+
+class AttrBoxes:
+    """无 data 属性时回退到 xyxy / conf / cls"""
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy, self.conf, self.cls = np.asarray(xyxy), np.asarray(conf), np.asarray(cls)
+
+
+def _data(track=False):
+    rows = [[10, 20, 30, 40, 0.9, 0], [1.234, 2.345, 3.456, 4.567, 0.51234, 1], [5, 5, 9, 9, 0.3, 2]]
+    if track:
+        rows = [r[:4] + [7 + i] + r[4:] for i, r in enumerate(rows)]
+    return rows
+
+
+def test_extract_boxes_six_and_seven_columns():
+    for track in (False, True):
+        xyxy, conf, cls = extract_boxes(FakeBoxes(_data(track)))
+        assert xyxy.shape == (3, 4) and xyxy.dtype == np.float32
+        assert cls.tolist() == [0, 1, 2]
+        assert np.allclose(conf, [0.9, 0.51234, 0.3])
+    xyxy, conf, cls = extract_boxes(AttrBoxes([[0, 0, 1, 1]], [0.5], [1.0]))
+    assert xyxy.shape == (1, 4) and cls.tolist() == [1]
+    xyxy, conf, cls = extract_boxes(None)
+    assert len(xyxy) == len(conf) == len(cls) == 0
+
+
+def test_class_filter_mask_names_and_indices():
+    cls = np.array([0, 1, 2, 1], dtype=np.int32)
+    assert class_filter_mask(cls, NAMES, []) is None
+    assert class_filter_mask(cls, NAMES, ['Car']).tolist() == [False, True, False, True]
+    assert class_filter_mask(cls, NAMES, ['person', '2']).tolist() == [True, False, True, False]
+    assert not class_filter_mask(cls, NAMES, ['cat']).any()
+
+
+def test_format_detections_variants():
+    xyxy, conf, cls = extract_boxes(FakeBoxes(_data()))
+    dicts = format_detections(xyxy, conf, cls, NAMES)
+    assert dicts[1] == {"box": [1.23, 2.35, 3.46, 4.57], "confidence": 0.5123, "class_id": 1, "class_name": "car"}
+    structured = format_detections(xyxy, conf, cls, NAMES, "structured")
+    assert structured.shape == (3,) and structured["class_id"].tolist() == [0, 1, 2]
+    assert np.allclose(structured["box"][0], [10, 20, 30, 40])
+    columnar = format_detections(xyxy, conf, cls, NAMES, "columnar")
+    assert columnar["boxes"].shape == (3, 4) and columnar["class_names"] == ['person', 'car', 'dog']
+
+
+def test_format_segments_keeps_original_index():
+    xyxy, conf, cls = extract_boxes(FakeBoxes(_data()))
+    keep = class_filter_mask(cls, NAMES, ['dog'])
+    idx = np.arange(3, dtype=np.int32)[keep]
+    segs = format_segments(xyxy[keep], conf[keep], cls[keep], idx, NAMES, [160, 160])
+    assert segs == [{"index": 2, "box": [5.0, 5.0, 9.0, 9.0], "class_id": 2, "class_name": "dog",
+                     "confidence": 0.3, "mask_shape": [160, 160]}]
+    assert format_segments(xyxy, conf, cls, np.arange(3), NAMES, [], "structured")["index"].tolist() == [0, 1, 2]
+
+
+def test_top_k_and_classification():
+    probs = np.array([0.1, 0.5, 0.05, 0.3, 0.05], dtype=np.float32)
+    idx = top_k(probs, 3)
+    assert idx.tolist() == [1, 3, 0]
+    assert top_k(probs, 10).tolist()[:2] == [1, 3]
+    assert len(top_k(probs, 0)) == 0
+    res = format_classification(probs, idx, NAMES)
+    assert res[0] == {"class_id": 1, "class_name": "car", "confidence": 0.5}
+    assert res[2]["class_name"] == "person"
+    assert format_classification(probs, idx, NAMES, "columnar")["class_id"].tolist() == [1, 3, 0]
+
+
+class FakeResults:
+    """支持 __getitem__ 的 Results 替身: 记录索引，boxes/masks 同步取子集"""
+    def __init__(self, n=4):
+        self.boxes = np.arange(n * 6, dtype=np.float32).reshape(n, 6)
+        self.masks = np.zeros((n, 8, 8), dtype=np.uint8)
+        self.masks[:, 0, 0] = np.arange(n)
+
+    def __getitem__(self, idx):
+        sub = FakeResults.__new__(FakeResults)
+        sub.boxes, sub.masks = self.boxes[idx], self.masks[idx]
+        return sub
+
+
+class LegacyResults:
+    def __init__(self):
+        self.boxes = np.arange(4)
+        self.masks = None
+
+
+def test_subset_results_indexes_boxes_and_masks():
+    r = FakeResults()
+    sub = subset_results(r, np.array([1, 3], dtype=np.int32))
+    assert sub.boxes[:, 0].tolist() == [6.0, 18.0]
+    assert sub.masks[:, 0, 0].tolist() == [1, 3]
+    assert len(r.boxes) == 4  # 原对象不被修改
+    legacy = LegacyResults()
+    sub = subset_results(legacy, np.array([0, 2]))
+    assert sub is not legacy and sub.boxes.tolist() == [0, 2] and sub.masks is None
+    assert legacy.boxes.tolist() == [0, 1, 2, 3]